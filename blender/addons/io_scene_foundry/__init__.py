@@ -24,12 +24,14 @@ def register():
     bpy.app.handlers.load_post.append(startup.load_handler)
     bpy.app.handlers.load_post.append(startup.load_set_output_state)
     bpy.app.handlers.save_post.append(startup.save_object_positions_to_tags)
+    bpy.app.handlers.depsgraph_update_post.append(startup.track_save_sync_changes)
     bpy.app.handlers.blend_import_post.append(startup.import_handler)
     for module in modules:
         module.register()
 
 def unregister():
     bpy.app.handlers.blend_import_post.remove(startup.import_handler)
+    bpy.app.handlers.depsgraph_update_post.remove(startup.track_save_sync_changes)
     bpy.app.handlers.save_post.remove(startup.save_object_positions_to_tags)
     bpy.app.handlers.load_post.remove(startup.load_set_output_state)
     bpy.app.handlers.load_post.remove(startup.load_handler)
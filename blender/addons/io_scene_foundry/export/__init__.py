@@ -479,6 +479,7 @@ class NWO_ExportScene(Operator, ExportHelper):
         col.prop(scene_nwo_export, "show_output", text="Toggle Output")
         if scene_nwo.asset_type in {'cinematic', 'model', 'animation', 'single_animation'}:
             col.prop(scene_nwo_export, "faster_animation_export")
+        col.prop(scene_nwo_export, "granny_parallel_write")
         col.separator()
         col.use_property_split = False
         # if not scene_nwo.is_child_asset:
@@ -0,0 +1,122 @@
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+
+from .. import utils
+
+MANIFEST_VERSION = 1
+
+def _update(digest, value):
+    '''Feeds a value into the digest. Arrays and ctypes buffers are hashed by their raw bytes, everything else by repr'''
+    if value is None:
+        digest.update(b"\x00")
+    elif isinstance(value, np.ndarray):
+        digest.update(str(value.dtype).encode())
+        digest.update(str(value.shape).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        digest.update(value)
+    else:
+        digest.update(repr(value).encode())
+
+def _props_key(props: dict) -> tuple:
+    if not props:
+        return ()
+    return tuple(sorted(props.items(), key=lambda item: item[0]))
+
+def _matrix_key(matrix) -> tuple:
+    return tuple(tuple(row) for row in matrix)
+
+def _mesh_digest(digest, mesh):
+    _update(digest, mesh.name)
+    _update(digest, tuple(mesh.siblings))
+    _update(digest, tuple(mesh.bone_bindings))
+    vertex_array = getattr(mesh, "vertex_array", None)
+    if vertex_array is not None:
+        _update(digest, memoryview(vertex_array).cast("B"))
+    _update(digest, mesh.indices)
+    _update(digest, mesh.pca_indices)
+    _update(digest, tuple((material.name, material.shader_path, material.shader_type, index, tuple(tris)) for material, index, tris in mesh.groups))
+    for name, face_set in mesh.face_properties.items():
+        _update(digest, (name, face_set.annotation_type))
+        _update(digest, face_set.array)
+
+def _node_digest(digest, node):
+    _update(digest, (node.name, node.region, node.permutation, node.negative_scaling))
+    _update(digest, _props_key(node.props))
+    _update(digest, _matrix_key(node.matrix_world))
+    _update(digest, tuple(node.bone_bindings))
+    if node.mesh is not None:
+        _mesh_digest(digest, node.mesh)
+
+def granny_file_digest(scene, nodes: dict, animation=None, settings: tuple = ()) -> str:
+    '''Returns a content hash of everything that would be written to a gr2 file built from the given virtual nodes & animation.
+    Walks the tree the same way Granny.from_tree does so that only data which ends up in the file contributes'''
+    digest = hashlib.blake2b(digest_size=16)
+    _update(digest, (MANIFEST_VERSION, utils.get_version(), settings))
+
+    for model in scene.models.values():
+        node = nodes.get(model.ob)
+        if node is None:
+            continue
+
+        _update(digest, model.name)
+        _node_digest(digest, node)
+        for bone in model.skeleton.bones:
+            _update(digest, (bone.name, bone.parent_index, bone.is_proxy, _matrix_key(bone.matrix_local), _matrix_key(bone.matrix_world)))
+            _update(digest, _props_key(bone.props))
+            if bone.node and (nodes.get(bone.bone) or bone.is_proxy) and bone.node.mesh:
+                _node_digest(digest, bone.node)
+
+    if animation is not None:
+        _update(digest, animation.name)
+        _update(digest, tuple((item.name, item.node_type) for item in animation.animation_nodes))
+        _update(digest, animation.sample_digest)
+
+    return digest.hexdigest()
+
+class ExportCache:
+    '''Manifest of content hashes for the gr2 files written by the last export of an asset. Files whose hash is unchanged
+    and which still exist on disk do not need to be rebuilt'''
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = manifest_path
+        self.files = {}
+        self.dirty = False
+        if manifest_path.exists():
+            try:
+                with open(manifest_path, "r") as file:
+                    data = json.load(file)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.files = data.get("files", {})
+            except (OSError, ValueError):
+                self.files = {}
+
+    def _key(self, filepath: Path) -> str:
+        return str(Path(filepath).resolve()).lower()
+
+    def is_current(self, filepath: Path, digest: str) -> bool:
+        return self.files.get(self._key(filepath)) == digest and Path(filepath).exists()
+
+    def update(self, filepath: Path, digest: str):
+        self.files[self._key(filepath)] = digest
+        self.dirty = True
+
+    def discard(self, filepath: Path):
+        '''Forgets the hash of a file that is about to be rewritten. The manifest on disk is removed so that an export which
+        fails before save() is called can't leave a stale hash pointing at a partially written file'''
+        if self.files.pop(self._key(filepath), None) is not None:
+            self.dirty = True
+            self.manifest_path.unlink(missing_ok=True)
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        try:
+            with open(self.manifest_path, "w") as file:
+                json.dump({"version": MANIFEST_VERSION, "files": self.files}, file, indent=4)
+            self.dirty = False
+        except OSError as e:
+            utils.print_warning(f"Failed to write export manifest {self.manifest_path}: {e}")
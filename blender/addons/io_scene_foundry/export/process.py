@@ -1,4 +1,5 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from functools import lru_cache
 from math import degrees
@@ -48,6 +49,7 @@ from ..managed_blam.animation import AnimationTag
 from ..managed_blam.model import ModelTag
 from .import_sidecar import SidecarImport
 from .build_sidecar import Sidecar, get_cinematic_scenes
+from .export_cache import ExportCache, granny_file_digest
 from .export_info import AdditionalCompression, BoundarySurfaceType, ExportInfo, FaceDrawDistance, FaceMode, FaceSides, FaceType, LightmapType, MeshObbVolumeType, PoopCollisionType, PoopInstanceImposterPolicy, PoopLighting, PoopInstancePathfindingPolicy, MeshTessellationDensity, MeshType, ObjectType
 from ..props.mesh import NWO_MeshPropertiesGroup
 from ..props.object import NWO_ObjectPropertiesGroup
@@ -133,6 +135,14 @@ class ExportScene:
         self.granny_textures = gr2_debug and export_settings.granny_textures
         self.granny_open = gr2_debug and export_settings.granny_open
         self.granny_animations_mesh = gr2_debug and export_settings.granny_animations_mesh
+        self.granny_parallel_write = export_settings.granny_parallel_write and not self.granny_open
+        self.granny_write_pool = None
+        self.granny_writes = []
+        
+        self.export_cache = None
+        self.unchanged_granny_files = 0
+        if not (export_settings.import_force or self.granny_open or self.granny_textures):
+            self.export_cache = ExportCache(Path(asset_path, f"{asset_name}.export_manifest.json"))
         
         self.node_usage_set = False
         
@@ -2366,6 +2376,26 @@ class ExportScene:
                 self._export_shots()
             else:
                 self._export_animations()
+                
+        self._finish_granny_writes()
+        
+        if self.export_cache is not None:
+            self.export_cache.save()
+            if self.unchanged_granny_files:
+                print(f'\n--- Skipped writing {self.unchanged_granny_files} unchanged GR2 file{"s" if self.unchanged_granny_files != 1 else ""}')
+        
+    def _finish_granny_writes(self):
+        '''Waits for any GR2 files still queued on the background writer'''
+        if self.granny_write_pool is None:
+            return
+        
+        try:
+            for future in self.granny_writes:
+                future.result()
+        finally:
+            self.granny_write_pool.shutdown()
+            self.granny_write_pool = None
+            self.granny_writes = []
             
     def _export_shots(self):
         
@@ -2513,7 +2543,28 @@ class ExportScene:
         if not exported_something:
             print("--- No geometry to export")
         
+    def _granny_file_settings(self) -> tuple:
+        '''Export settings which affect gr2 contents but not the virtual tree. Excludes the user/machine/time stamps in the export info'''
+        stamps = {"bungie_export_user", "bungie_export_machine", "bungie_export_date", "bungie_export_time"}
+        export_info = tuple(sorted((key, value) for key, value in self.export_info.items() if key not in stamps))
+        return self.forward, self.from_halo_scale, self.mirror, self.corinth, self.granny_animations_mesh, export_info
+        
     def _export_granny_file(self, filepath: Path, virtual_objects: dict[str: VirtualNode], animation: VirtualAnimation = None):
+        digest = None
+        # Cinematic shot animations aren't sampled through VirtualAnimation so have no sample digest to compare
+        if self.export_cache is not None and (animation is None or getattr(animation, "sample_digest", None) is not None):
+            digest = granny_file_digest(self.virtual_scene, virtual_objects, animation, self._granny_file_settings())
+            if self.export_cache.is_current(filepath, digest):
+                self.unchanged_granny_files += 1
+                return
+            self.export_cache.discard(filepath)
+            
+        self._write_granny_file(filepath, virtual_objects, animation)
+        
+        if digest is not None:
+            self.export_cache.update(filepath, digest)
+        
+    def _write_granny_file(self, filepath: Path, virtual_objects: dict[str: VirtualNode], animation: VirtualAnimation = None):
         self.granny.new(filepath, self.forward, self.from_halo_scale, self.mirror)
         self.granny.from_tree(self.virtual_scene, virtual_objects, animation)
         
@@ -2539,6 +2590,14 @@ class ExportScene:
             self.granny.write_skeletons(export_info=self.export_info)
         
         self.granny.write_models()
+        
+        if self.granny_parallel_write:
+            if self.granny_write_pool is None:
+                # One writer. Every call into the granny dll takes the same lock, so more threads would only queue on it
+                self.granny_write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="granny_write")
+            self.granny_writes.append(self.granny_write_pool.submit(self.granny.detach().write))
+            return
+        
         self.granny.transform()
         self.granny.save()
         
@@ -2,6 +2,7 @@
 
 from collections import defaultdict
 import csv
+import hashlib
 from ctypes import Array, Structure, c_char_p, c_float, c_int, POINTER, c_ubyte, c_void_p, cast, create_string_buffer, memmove, pointer, sizeof
 import logging
 from math import asin, atan2, degrees, inf, nextafter, pi, radians
@@ -286,10 +287,6 @@ class VirtualShotActor:
             skeleton = model.skeleton
             if skeleton is not None:
                 self.bones = skeleton.animated_bones
-                
-        self.positions = defaultdict(list)
-        self.orientations = defaultdict(list)
-        self.scales = defaultdict(list)
 
 class VirtualShot:
     def __init__(self,  frame_start: int, frame_end: int, actors: list[Actor], camera: bpy.types.Object, index, scene: 'VirtualScene', shape_key_objects=[], in_scope=True):
@@ -308,6 +305,7 @@ class VirtualShot:
         self.in_scope = in_scope
     
     def perform(self, scene: 'VirtualScene', film_aperture: float):
+        samplers = {shot_actor: BoneSampler(shot_actor.bones, self.frame_count, scene.rotation_matrix) for shot_actor in self.shot_actors if shot_actor.in_scope}
         if scene.cinematic_scope != 'OBJECT' and self.in_scope:
             fps = utils.real_frame_rate()
             start, end = self.frame_start, self.frame_end
@@ -316,70 +314,63 @@ class VirtualShot:
             end_time = end / fps
             duration = end_time - start_time
 
-            for i in range(self.frame_count):
-                t = i / (self.frame_count - 1) if self.frame_count > 1 else 0.0
-                time = start_time + t * duration
-
-                frame_float = time * fps
-                frame = int(frame_float)
-                subframe = frame_float - frame
-
-                if frame > end:
-                    frame = end
-                    subframe = 0.0
-
-                scene.context.scene.frame_set(frame, subframe=subframe)
-                self.frames.append(Frame(self.camera, scene.corinth, film_aperture, scene.halo_transform_scale, scene.halo_rotation))
-                for shot_actor in self.shot_actors:
-                    if not shot_actor.in_scope:
-                        continue
-
-                    bone_inverse_matrices = {}
-
-                    for bone in shot_actor.bones:
-                        if bone.parent:
-                            matrix_world = scene.rotation_matrix @ bone.ob.matrix_world @ bone.pbone.matrix
-                            bone_inverse_matrices[bone.pbone] = matrix_world.inverted_safe()
-                            matrix = bone_inverse_matrices[bone.parent] @ matrix_world
-                        else:
-                            matrix = scene.rotation_matrix @ bone.ob.matrix_world @ bone.pbone.matrix
-                            bone_inverse_matrices[bone.pbone] = matrix.inverted_safe()
-
-                        loc, rot, sca = matrix.decompose()
-
-                        position = (c_float * 3)(loc.x, loc.y, loc.z)
-                        orientation = (c_float * 4)(rot.x, rot.y, rot.z, rot.w)
-                        scale_shear = (c_float * 9)(sca.x, 0.0, 0.0, 0.0, sca.y, 0.0, 0.0, 0.0, sca.z)
-
-                        shot_actor.positions[bone].extend(position)
-                        shot_actor.orientations[bone].extend(orientation)
-                        shot_actor.scales[bone].extend(scale_shear)
+            # Only the camera and the in scope actors are sampled, so disable everything else in the viewport for the
+            # duration of the shot. The depsgraph then evaluates just their dependency closure on each frame_set
+            closure = dependency_closure([self.camera] + [shot_actor.ob for shot_actor in samplers])
+            disabled = [ob for ob in scene.context.view_layer.objects if ob not in closure and not ob.hide_viewport]
+            cache = FrameMatrixCache()
+            try:
+                for ob in disabled:
+                    ob.hide_viewport = True
+                    
+                for i in range(self.frame_count):
+                    t = i / (self.frame_count - 1) if self.frame_count > 1 else 0.0
+                    time = start_time + t * duration
+
+                    frame_float = time * fps
+                    frame = int(frame_float)
+                    subframe = frame_float - frame
+
+                    if frame > end:
+                        frame = end
+                        subframe = 0.0
+
+                    scene.context.scene.frame_set(frame, subframe=subframe)
+                    cache.clear()
+                    self.frames.append(Frame(self.camera, scene.corinth, film_aperture, scene.halo_transform_scale, scene.halo_rotation))
+                    for sampler in samplers.values():
+                        sampler.sample(i, cache)
+            finally:
+                for ob in disabled:
+                    ob.hide_viewport = False
+
+            for sampler in samplers.values():
+                sampler.finalize()
+        else:
+            for sampler in samplers.values():
+                sampler.samples.fill(0.0)
 
         frame_total = self.frame_count - 1
                 
         for shot_actor in self.shot_actors:
             if shot_actor.in_scope:
-                tracks = []
-                for bone in shot_actor.bones:
-                    tracks.append((c_float * (self.frame_count * 3))(*shot_actor.positions[bone]))
-                    tracks.append((c_float * (self.frame_count * 4))(*shot_actor.orientations[bone]))
-                    tracks.append((c_float * (self.frame_count * 9))(*shot_actor.scales[bone]))
-                    
+                sampler = samplers[shot_actor]
                 granny_tracks = []
-                for bone_idx, i in enumerate(range(0, len(tracks), 3)):
+                for bone_idx, bone in enumerate(shot_actor.bones):
                     granny_track = GrannyTransformTrack()
-                    granny_track.name = shot_actor.bones[bone_idx].pbone.name.encode()
+                    granny_track.name = bone.pbone.name.encode()
+                    (positions, positions_ptr), (orientations, orientations_ptr), (scales, scales_ptr) = sampler.control_arrays(bone_idx)
                     
                     builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 3, self.frame_count)
-                    scene.granny.push_control_array(builder, tracks[i])
+                    scene.granny.push_control_array(builder, positions_ptr)
                     position_curve = scene.granny.end_curve(builder)
                     
                     builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 4, self.frame_count)
-                    scene.granny.push_control_array(builder, tracks[i + 1])
+                    scene.granny.push_control_array(builder, orientations_ptr)
                     orientation_curve = scene.granny.end_curve(builder)
                     
                     builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 9, self.frame_count)
-                    scene.granny.push_control_array(builder, tracks[i + 2])
+                    scene.granny.push_control_array(builder, scales_ptr)
                     scale_curve = scene.granny.end_curve(builder)
                     
                     granny_track.position_curve = position_curve.contents
@@ -394,33 +385,18 @@ class VirtualShot:
                     
                 granny_track = GrannyTransformTrack()
                 granny_track.name = b"world"
-                arm_tracks = []
-                loc, rot, sca = IDENTITY_MATRIX.decompose()
-                positions = []
-                orientations = []
-                scales = []
-                for frame in range(self.frame_count):
-                    position = (c_float * 3)(0, 0, 0)
-                    orientation = (c_float * 4)(0, 0, 0, 1)
-                    scale_shear = (c_float * 9)(1, 0.0, 0.0, 0.0, 1, 0.0, 0.0, 0.0, 1)
-                    positions.extend(position)
-                    orientations.extend(orientation)
-                    scales.extend(scale_shear)
-
-                arm_tracks.append((c_float * (self.frame_count * 3))(*positions))
-                arm_tracks.append((c_float * (self.frame_count * 4))(*orientations))
-                arm_tracks.append((c_float * (self.frame_count * 9))(*scales))
+                (positions, positions_ptr), (orientations, orientations_ptr), (scales, scales_ptr) = identity_control_arrays(self.frame_count)
 
                 builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 3, self.frame_count)
-                scene.granny.push_control_array(builder, arm_tracks[0])
+                scene.granny.push_control_array(builder, positions_ptr)
                 position_curve = scene.granny.end_curve(builder)
                 
                 builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 4, self.frame_count)
-                scene.granny.push_control_array(builder, arm_tracks[1])
+                scene.granny.push_control_array(builder, orientations_ptr)
                 orientation_curve = scene.granny.end_curve(builder)
                 
                 builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 9, self.frame_count)
-                scene.granny.push_control_array(builder, arm_tracks[2])
+                scene.granny.push_control_array(builder, scales_ptr)
                 scale_curve = scene.granny.end_curve(builder)
 
                 granny_track.position_curve = position_curve.contents
@@ -545,6 +521,7 @@ class VirtualAnimation:
         
         self.vector_tracks = []
         self.composite_blend_axis_values = {}
+        self.sample_digest = None
             
         self.granny_animation = None
         self.granny_track_group = None
@@ -614,16 +591,12 @@ class VirtualAnimation:
             self.vector_tracks.append(VectorTrack(granny_vector_track, event.name.encode(), granny_track_group))
         
     def create_track_group(self, bones: list['AnimatedBone'], scene: 'VirtualScene', shape_key_objects, vector_events: list[VectorEvent]):
-        positions = defaultdict(list)
-        orientations = defaultdict(list)
-        scales = defaultdict(list)
-        tracks = []
+        sampler = BoneSampler(bones, self.frame_count, scene.rotation_matrix)
+        sampled_frames = []
         pose_overlay_frame_data = defaultdict(list)
         morph_target_datas = defaultdict(list)
         shape_key_data = {}
         root_track_bone = self._composite_root_bone(bones, scene)
-        root_translations = []
-        root_rotations = []
 
         for ob in shape_key_objects:
             node = scene.nodes.get(ob)
@@ -694,38 +667,8 @@ class VirtualAnimation:
                         self.suspension_destroyed_extension_depth = (suspension_reference_height - suspension_destroyed_extension_height) * scene.unit_factor * WU_SCALAR
                         self.suspension_destroyed_compression_depth = (suspension_reference_height - suspension_destroyed_compression_height) * scene.unit_factor * WU_SCALAR
 
-            bone_inverse_matrices = {}
-            for bone in bones:
-                if bone.is_object:
-                    matrix_world = scene.rotation_matrix @ bone.pbone.matrix_world
-                    matrix = matrix_world
-                elif bone.parent:
-                    matrix_world = scene.rotation_matrix @ bone.ob.matrix_world @ bone.pbone.matrix
-                    bone_inverse_matrices[bone.pbone] = matrix_world.inverted_safe()
-                    matrix = bone_inverse_matrices[bone.parent] @ matrix_world
-                else:
-                    matrix = scene.rotation_matrix @ bone.ob.matrix_world @ bone.pbone.matrix
-                    matrix_world = matrix
-                    bone_inverse_matrices[bone.pbone] = matrix.inverted_safe()
-                    
-                loc, rot, sca = matrix.decompose()
-
-                if bone is root_track_bone:
-                    root_translations.append(loc.copy())
-                    root_rotations.append(rot.copy())
-
-                if self.overlay and bone.is_aim_bone and not first_frame:
-                    frame_data = tuple((rot.x, rot.y, rot.z, wrap_events.get(frame)))
-                    pose_overlay_frame_data[bone.name].append(frame_data)
-
-                position = (c_float * 3)(loc.x, loc.y, loc.z)
-                orientation = (c_float * 4)(rot.x, rot.y, rot.z, rot.w)
-                scale_shear = (c_float * 9)(sca.x, 0.0, 0.0, 0.0, sca.y, 0.0, 0.0, 0.0, sca.z)
-
-                positions[bone].extend(position)
-                orientations[bone].extend(orientation)
-                scales[bone].extend(scale_shear)
-                
+            sampler.sample(i)
+            sampled_frames.append(frame)
             first_frame = False
 
             for event in vector_events:
@@ -735,6 +678,22 @@ class VirtualAnimation:
                 for ob, node in shape_key_data.items():
                     morph_target_datas[node].append(VirtualMorphTargetData(ob, scene, node))
 
+        samples = sampler.finalize()
+        self.sample_digest = self._sample_digest(samples, vector_events, morph_target_datas)
+
+        root_translations = []
+        root_rotations = []
+        if root_track_bone is not None:
+            root_samples = samples[:, bones.index(root_track_bone)]
+            root_translations = [Vector(loc) for loc in root_samples[:, 0:3].tolist()]
+            root_rotations = [Quaternion((w, x, y, z)) for x, y, z, w in root_samples[:, 3:7].tolist()]
+
+        if self.overlay:
+            for bone_idx, bone in enumerate(bones):
+                if bone.is_aim_bone:
+                    rotations = samples[1:, bone_idx, 3:6].tolist()
+                    pose_overlay_frame_data[bone.name] = [(x, y, z, wrap_events.get(frame)) for (x, y, z), frame in zip(rotations, sampled_frames[1:])]
+
         self.composite_blend_axis_values = self.calculate_composite_blend_axis_values(root_translations, root_rotations, scene)
         if self.composite_blend_axis_values:
             scene.add_composite_blend_axis_values(self.name, self.composite_blend_axis_values)
@@ -760,26 +719,22 @@ class VirtualAnimation:
                         rotation_with_names = {tuple(pose_overlay_frame_data)[idx]: tuple(degrees(r) for r in rot[:3]) for (idx, rot) in enumerate(rotation)}
                         scene.warnings.append(f"--- XYZ rotation {rotation_with_names} occurs at frames {frames}")
 
-        for bone in bones:
-            tracks.append((c_float * (self.frame_count * 3))(*positions[bone]))
-            tracks.append((c_float * (self.frame_count * 4))(*orientations[bone]))
-            tracks.append((c_float * (self.frame_count * 9))(*scales[bone]))
-            
         granny_tracks = []
-        for bone_idx, i in enumerate(range(0, len(tracks), 3)):
+        for bone_idx, bone in enumerate(bones):
             granny_track = GrannyTransformTrack()
-            granny_track.name = bones[bone_idx].pbone.name.encode()
+            granny_track.name = bone.pbone.name.encode()
+            (positions, positions_ptr), (orientations, orientations_ptr), (scales, scales_ptr) = sampler.control_arrays(bone_idx)
             
             builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 3, self.frame_count)
-            scene.granny.push_control_array(builder, tracks[i])
+            scene.granny.push_control_array(builder, positions_ptr)
             position_curve = scene.granny.end_curve(builder)
             
             builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 4, self.frame_count)
-            scene.granny.push_control_array(builder, tracks[i + 1])
+            scene.granny.push_control_array(builder, orientations_ptr)
             orientation_curve = scene.granny.end_curve(builder)
             
             builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 9, self.frame_count)
-            scene.granny.push_control_array(builder, tracks[i + 2])
+            scene.granny.push_control_array(builder, scales_ptr)
             scale_curve = scene.granny.end_curve(builder)
             
             granny_track.position_curve = position_curve.contents
@@ -794,33 +749,20 @@ class VirtualAnimation:
 
         granny_track = GrannyTransformTrack()
         granny_track.name = b"world"
-        arm_tracks = []
-        loc, rot, sca = IDENTITY_MATRIX.decompose()
-        positions = []
-        orientations = []
-        scales = []
-        for frame in range(self.frame_count):
-            position = (c_float * 3)(0, 0, 0)
-            orientation = (c_float * 4)(0, 0, 0, 1)
-            scale_shear = (c_float * 9)(1, 0.0, 0.0, 0.0, 1, 0.0, 0.0, 0.0, 1)
-            positions.extend(position)
-            orientations.extend(orientation)
-            scales.extend(scale_shear)
-
-        arm_tracks.append((c_float * (self.frame_count * 3))(*positions))
-        arm_tracks.append((c_float * (self.frame_count * 4))(*orientations))
-        arm_tracks.append((c_float * (self.frame_count * 9))(*scales))
+        positions, positions_ptr = granny_control_array(np.zeros((self.frame_count, 3)))
+        orientations, orientations_ptr = granny_control_array(np.tile((0.0, 0.0, 0.0, 1.0), (self.frame_count, 1)))
+        scales, scales_ptr = granny_control_array(np.tile((1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0), (self.frame_count, 1)))
 
         builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 3, self.frame_count)
-        scene.granny.push_control_array(builder, arm_tracks[0])
+        scene.granny.push_control_array(builder, positions_ptr)
         position_curve = scene.granny.end_curve(builder)
         
         builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 4, self.frame_count)
-        scene.granny.push_control_array(builder, arm_tracks[1])
+        scene.granny.push_control_array(builder, orientations_ptr)
         orientation_curve = scene.granny.end_curve(builder)
         
         builder = scene.granny.begin_curve(scene.granny.keyframe_type, 0, 9, self.frame_count)
-        scene.granny.push_control_array(builder, arm_tracks[2])
+        scene.granny.push_control_array(builder, scales_ptr)
         scale_curve = scene.granny.end_curve(builder)
 
         granny_track.position_curve = position_curve.contents
@@ -897,6 +839,20 @@ class VirtualAnimation:
             "negative_translation_offset_z": self._zero_small(-translation.z * WU_SCALAR),
         }
 
+    @staticmethod
+    def _sample_digest(samples: np.ndarray, vector_events: list[VectorEvent], morph_target_datas: dict) -> str:
+        '''Content hash of the sampled tracks, used to skip rewriting unchanged animation gr2 files'''
+        digest = hashlib.blake2b(samples.astype(np.float32).tobytes(), digest_size=16)
+        for event in vector_events:
+            digest.update(repr((event.name, event.effect_name, event.effect_data)).encode())
+        for node, datas in morph_target_datas.items():
+            digest.update(node.name.encode())
+            for data in datas:
+                for array in (data.positions, data.normals, data.tension):
+                    if array is not None:
+                        digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
     @staticmethod
     def _composite_root_bone(bones: list['AnimatedBone'], scene: 'VirtualScene'):
         if scene.root_bone is not None:
@@ -1194,10 +1150,8 @@ class VirtualMorphTargetData:
         for array, data_type in zip(data, dtypes):
             vertex_array[data_type[0]] = array
 
-        vertex_byte_array = vertex_array.tobytes()
-
-        self.len_vertex_array = len(vertex_byte_array)
-        self.vertex_array = (c_ubyte * self.len_vertex_array).from_buffer_copy(vertex_byte_array)
+        self.len_vertex_array = vertex_array.nbytes
+        self.vertex_array = (c_ubyte * self.len_vertex_array).from_buffer(vertex_array)
     
     
 class VirtualMesh:
@@ -1258,7 +1212,8 @@ class VirtualMesh:
         
     def _granny_tri_topology(self, indices_override: np.ndarray | None = None):
         source_indices = self.indices if indices_override is None else indices_override
-        indices = (c_int * len(source_indices)).from_buffer_copy(source_indices.astype(np.int32).tobytes())
+        # Always a copy, granny inverts the winding of negatively scaled meshes in place
+        indices = (c_int * len(source_indices)).from_buffer(np.array(source_indices, dtype=np.int32))
 
         granny_tri_topology = GrannyTriTopology()
 
@@ -1289,8 +1244,8 @@ class VirtualMesh:
                 granny_tri_annotation_set.tri_annotation_type = face_set.annotation_type
                 
                 num_tri_annotations = len(face_set.array)
-                annotation_byte_array = face_set.array.tobytes()
-                annotation_array = (c_ubyte * len(annotation_byte_array)).from_buffer_copy(annotation_byte_array)
+                annotation_buffer = np.array(face_set.array, order="C")
+                annotation_array = (c_ubyte * annotation_buffer.nbytes).from_buffer(annotation_buffer)
                 
                 granny_tri_annotation_set.tri_annotation_count = num_tri_annotations
                 granny_tri_annotation_set.tri_annotations = cast(annotation_array, POINTER(c_ubyte))
@@ -1385,8 +1340,8 @@ class VirtualMesh:
         for array, data_type in zip(data, dtypes):
             vertex_array[data_type[0]] = array
 
-        vertex_byte_array = vertex_array.tobytes()
-        return names_array, type_info_array, (c_ubyte * len(vertex_byte_array)).from_buffer_copy(vertex_byte_array), len(vertex_byte_array), num_types
+        # The ctypes array shares the numpy buffer and keeps it alive, so the vertex data is never copied
+        return names_array, type_info_array, (c_ubyte * vertex_array.nbytes).from_buffer(vertex_array), vertex_array.nbytes, num_types
 
     def _granny_vertex_data(self, scene: 'VirtualScene'):
         names_array, type_info_array, vertex_array, len_vertex_array, num_types = self._make_vertex_array(scene)
@@ -1503,9 +1458,6 @@ class VirtualMesh:
         
         self.positions = vertex_positions[loop_vertex_indices]
         
-        def remap(i):
-            return vgroup_remap.get(i, 0)
-
         is_collision = props.get("bungie_mesh_type") == MeshType.collision.value
         is_physics = props.get("bungie_mesh_type") == MeshType.physics.value
 
@@ -1514,98 +1466,17 @@ class VirtualMesh:
             if ob.parent_type == 'BONE' and ob.parent_bone in bones:
                 default_bone_index = bones.index(ob.parent_bone)
 
-            vgroup_bone_names = {vg.name: idx for idx, vg in enumerate(ob.vertex_groups)}
-
-            bone_weights = np.zeros((num_vertices, 4), dtype=np.uint8)
-            bone_indices = np.zeros((num_vertices, 4), dtype=np.int32)
-            vgroup_remap = {}
-            unique_bone_indices = set()
-            bone_use_counter = {}
-
-            for idx, bone in enumerate(bones):
-                vg_bone_index = vgroup_bone_names.get(bone)
-                if vg_bone_index is not None:
-                    vgroup_remap[vg_bone_index] = idx
-
-            def remap(vg_idx):
-                return vgroup_remap.get(int(vg_idx), -1)
-
-            def quantize_weights(weights: np.ndarray) -> np.ndarray:
-                scaled = weights * 255.0
-                quantized = np.floor(scaled).astype(np.int32)
-                remainder = 255 - int(quantized.sum())
-                if remainder > 0:
-                    fractions = scaled - quantized
-                    for idx in np.argsort(-fractions)[:remainder]:
-                        quantized[idx] += 1
-                elif remainder < 0:
-                    for idx in np.argsort(weights):
-                        if remainder == 0:
-                            break
-                        amount = min(int(quantized[idx]), -remainder)
-                        quantized[idx] -= amount
-                        remainder += amount
-                return np.clip(quantized, 0, 255).astype(np.uint8)
-
-            for v_idx, vertex in enumerate(mesh.vertices):
-                groups = vertex.groups
-                if not groups:
-                    bone_ids = np.array([default_bone_index], dtype=np.int32)
-                    weights = np.array([1.0], dtype=np.single)
-                else:
-                    weights = np.zeros(len(groups), dtype=np.single)
-                    indices = np.zeros(len(groups), dtype=np.int32)
-
-                    groups.foreach_get("weight", weights)
-                    groups.foreach_get("group", indices)
-
-                    bone_ids = np.array([remap(g) for g in indices], dtype=np.int32)
+            bone_indices, bone_weights, normalized_weights = skin_weights(mesh, ob.vertex_groups, bones, default_bone_index, 1 if is_collision else 4)
 
-                    valid_mask = bone_ids >= 0
-                    bone_ids = bone_ids[valid_mask]
-                    weights = weights[valid_mask]
-
-                    if len(weights) == 0:
-                        bone_ids = np.array([default_bone_index], dtype=np.int32)
-                        weights = np.array([1.0], dtype=np.single)
-                    else:
-                        order = np.argsort(-weights)
-                        bone_ids = bone_ids[order]
-                        weights = weights[order]
-
-                        if is_collision:
-                            bone_ids = bone_ids[:1]
-                            weights = weights[:1]
-                        else:
-                            bone_ids = bone_ids[:4]
-                            weights = weights[:4]
-
-                        total = weights.sum()
-                        if total > 0:
-                            weights = weights / total
-                        else:
-                            bone_ids = np.array([default_bone_index], dtype=np.int32)
-                            weights = np.array([1.0], dtype=np.single)
-
-                # pad to 4
-                pad = 4 - len(weights)
-                if pad > 0:
-                    bone_ids = np.pad(bone_ids, (0, pad), constant_values=default_bone_index)
-                    weights = np.pad(weights, (0, pad), constant_values=0.0)
-
-                bone_weights[v_idx] = quantize_weights(weights)
-                bone_indices[v_idx] = bone_ids
-
-                # track used bones
-                positive_mask = weights > 0.0
-                if positive_mask.any():
-                    unique_bone_indices.update(bone_ids[positive_mask])
-                    for b in bone_ids[positive_mask]:
-                        bone_use_counter[b] = bone_use_counter.get(b, 0) + 1
+            # track used bones, most used is the first to reach the highest count in vertex order
+            used_bone_ids = bone_indices[normalized_weights > 0.0]
+            unique_bone_indices = set(np.unique(used_bone_ids).tolist())
 
             if is_physics:
-                if bone_use_counter:
-                    most_used_bone = max(bone_use_counter, key=bone_use_counter.get)
+                if used_bone_ids.size:
+                    candidates, first_use, use_counts = np.unique(used_bone_ids, return_index=True, return_counts=True)
+                    most_used = use_counts == use_counts.max()
+                    most_used_bone = int(candidates[most_used][np.argmin(first_use[most_used])])
                 else:
                     most_used_bone = default_bone_index
 
@@ -1629,9 +1500,10 @@ class VirtualMesh:
 
             bone_index_remap = {orig_idx: new_idx for new_idx, orig_idx in enumerate(used_bones)}
 
-            remapped_indices = np.zeros_like(bone_indices, dtype=np.int32)
+            bone_lookup = np.zeros(max(int(bone_indices.max()), max(used_bones)) + 1, dtype=np.int32)
             for orig_idx, new_idx in bone_index_remap.items():
-                remapped_indices[bone_indices == orig_idx] = new_idx
+                bone_lookup[orig_idx] = new_idx
+            remapped_indices = bone_lookup[bone_indices]
 
             self.bone_bindings = [bones[i] for i in used_bones]
             self.bone_weights = bone_weights[loop_vertex_indices]
@@ -1889,6 +1761,7 @@ class VirtualNode:
         self.granny_vertex_data_copy_buffers = {}
         self.negative_scaling = False
         self.mod_stack = None
+        self.mesh_key = None
         
         self.for_pca = isinstance(id, utils.ExportObject) and id.for_pca
         
@@ -1928,10 +1801,11 @@ class VirtualNode:
                 if id.parent_type == 'BONE' and id.parent_bone:
                     bone_parent = id.parent_bone
                 
-                existing_mesh = scene.meshes.get((id.data, self.negative_scaling, materials))
+                self.mesh_key = mesh_pool_key(id, self.negative_scaling, materials, self.props)
+                existing_mesh = None if self.mesh_key is None else scene.meshes.get(self.mesh_key)
                 existing_linked_mesh = scene.meshes_linked.get(id.data)
 
-                can_reuse_existing_mesh = existing_mesh and not id.modifiers and not bone_parent
+                can_reuse_existing_mesh = existing_mesh and not bone_parent
                 if can_reuse_existing_mesh and (not self.for_pca or existing_mesh.pca_indices is not None):
                     self.mesh = existing_mesh
                     self.mesh.siblings.append(self.name)
@@ -2196,6 +2070,286 @@ class AnimatedBone:
             else:
                 self.parent = parent_override
 
+def _quantize_weights(weights: np.ndarray) -> np.ndarray:
+    '''Quantizes rows of normalized weights to uint8 rows that sum to 255, giving the rounding remainder to the largest fractions'''
+    scaled = weights * 255.0
+    quantized = np.floor(scaled).astype(np.int32)
+    remainder = 255 - quantized.sum(axis=1)
+
+    under = remainder > 0
+    if under.any():
+        ranks = np.argsort(np.argsort(-(scaled[under] - quantized[under]), axis=1, kind="stable"), axis=1, kind="stable")
+        quantized[under] += ranks < remainder[under, None]
+
+    for row in np.flatnonzero(remainder < 0):
+        row_remainder = int(remainder[row])
+        for idx in np.argsort(weights[row], kind="stable"):
+            if row_remainder == 0:
+                break
+            amount = min(int(quantized[row, idx]), -row_remainder)
+            quantized[row, idx] -= amount
+            row_remainder += amount
+
+    return np.clip(quantized, 0, 255).astype(np.uint8)
+
+def skin_weights(mesh: bpy.types.Mesh, vertex_groups, bones: list[str], default_bone_index: int, max_influences: int = 4) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''Gathers the vertex group weights of every vertex into flat arrays and keeps the highest max_influences weights that
+    belong to bones. Returns (vertices, 4) bone indices, quantized uint8 weights, and the normalized float weights.
+    Vertices without any bone weight are bound fully to default_bone_index'''
+    num_vertices = len(mesh.vertices)
+    # One pass over the vertex groups, each entry is (vertex index, group index, weight)
+    entries = np.fromiter(
+        (value for vert_idx, v in enumerate(mesh.vertices) for g in v.groups for value in (vert_idx, g.group, g.weight)),
+        dtype=np.float64,
+    ).reshape(-1, 3)
+    total = len(entries)
+    rows = entries[:, 0].astype(np.int64)
+    group_ids = entries[:, 1].astype(np.int64)
+    weights = entries[:, 2].astype(np.single)
+    counts = np.bincount(rows, minlength=num_vertices)
+
+    bone_lookup = {bone: idx for idx, bone in enumerate(bones)}
+    group_lookup = np.full(max(len(vertex_groups), int(group_ids.max(initial=-1)) + 1), -1, dtype=np.int32)
+    for vg_idx, vg in enumerate(vertex_groups):
+        group_lookup[vg_idx] = bone_lookup.get(vg.name, -1)
+
+    # Scatter into a (vertices, max groups) table, entries that do not belong to a bone sort last
+    width = max(int(counts.max(initial=0)), max_influences)
+    columns = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    table_ids = np.full((num_vertices, width), -1, dtype=np.int32)
+    table_weights = np.full((num_vertices, width), -np.inf, dtype=np.single)
+    bone_ids = group_lookup[group_ids]
+    table_ids[rows, columns] = bone_ids
+    table_weights[rows, columns] = np.where(bone_ids >= 0, weights, -np.inf)
+
+    order = np.argsort(-table_weights, axis=1, kind="stable")[:, :max_influences]
+    top_ids = np.take_along_axis(table_ids, order, axis=1)
+    top_weights = np.take_along_axis(table_weights, order, axis=1)
+    valid = top_ids >= 0
+    top_weights[~valid] = 0.0
+    top_ids[~valid] = default_bone_index
+
+    totals = top_weights.sum(axis=1)
+    unweighted = totals <= 0
+    top_weights[~unweighted] /= totals[~unweighted, None]
+    top_ids[unweighted] = default_bone_index
+    top_weights[unweighted] = 0.0
+    top_weights[unweighted, 0] = 1.0
+
+    bone_indices = np.full((num_vertices, 4), default_bone_index, dtype=np.int32)
+    normalized_weights = np.zeros((num_vertices, 4), dtype=np.single)
+    bone_indices[:, :max_influences] = top_ids
+    normalized_weights[:, :max_influences] = top_weights
+
+    return bone_indices, _quantize_weights(normalized_weights), normalized_weights
+
+def inverted_safe_matrices(matrices: np.ndarray) -> np.ndarray:
+    '''Batched equivalent of Matrix.inverted_safe for an (..., 4, 4) array'''
+    flat = matrices.reshape(-1, 4, 4)
+    inverted = np.empty_like(flat)
+    singular = np.abs(np.linalg.det(flat)) < 1e-12
+    if not singular.all():
+        inverted[~singular] = np.linalg.inv(flat[~singular])
+    if singular.any():
+        inverted[singular] = np.linalg.pinv(flat[singular])
+    return inverted.reshape(matrices.shape)
+
+def decompose_matrices(matrices: np.ndarray, out: np.ndarray):
+    '''Batched equivalent of Matrix.decompose for an (..., 4, 4) array. Writes loc (3), quaternion xyzw (4) and scale (3) into the last axis of out'''
+    basis = matrices[..., :3, :3]
+    scale = np.linalg.norm(basis, axis=-2)
+    scale[scale == 0.0] = 1.0
+    rot = basis / scale[..., None, :]
+    negative = np.linalg.det(rot) < 0.0
+    rot[negative] *= -1.0
+    scale[negative] *= -1.0
+
+    m00, m01, m02 = rot[..., 0, 0], rot[..., 0, 1], rot[..., 0, 2]
+    m10, m11, m12 = rot[..., 1, 0], rot[..., 1, 1], rot[..., 1, 2]
+    m20, m21, m22 = rot[..., 2, 0], rot[..., 2, 1], rot[..., 2, 2]
+    trace = m00 + m11 + m22
+
+    quat = np.empty(trace.shape + (4,), dtype=np.float64) # xyzw
+
+    # Same branching as Blender's mat3_normalized_to_quat_fast so the quaternion hemisphere matches mathutils
+    use_w = trace > 0.0
+    use_x = ~use_w & (m00 > m11) & (m00 > m22)
+    use_y = ~use_w & ~use_x & (m11 > m22)
+    use_z = ~use_w & ~use_x & ~use_y
+
+    s = 2.0 * np.sqrt(np.maximum(1.0 + trace[use_w], 0.0))
+    quat[use_w] = np.stack(((m21 - m12)[use_w] / s, (m02 - m20)[use_w] / s, (m10 - m01)[use_w] / s, 0.25 * s), axis=-1)
+    s = 2.0 * np.sqrt(np.maximum(1.0 + m00[use_x] - m11[use_x] - m22[use_x], 0.0))
+    quat[use_x] = np.stack((0.25 * s, (m01 + m10)[use_x] / s, (m02 + m20)[use_x] / s, (m21 - m12)[use_x] / s), axis=-1)
+    s = 2.0 * np.sqrt(np.maximum(1.0 + m11[use_y] - m00[use_y] - m22[use_y], 0.0))
+    quat[use_y] = np.stack(((m01 + m10)[use_y] / s, 0.25 * s, (m12 + m21)[use_y] / s, (m02 - m20)[use_y] / s), axis=-1)
+    s = 2.0 * np.sqrt(np.maximum(1.0 + m22[use_z] - m00[use_z] - m11[use_z], 0.0))
+    quat[use_z] = np.stack(((m02 + m20)[use_z] / s, (m12 + m21)[use_z] / s, 0.25 * s, (m10 - m01)[use_z] / s), axis=-1)
+
+    quat[quat[..., 3] < 0.0] *= -1.0
+    quat /= np.linalg.norm(quat, axis=-1, keepdims=True)
+
+    out[..., 0:3] = matrices[..., :3, 3]
+    out[..., 3:7] = quat
+    out[..., 7:10] = scale
+
+def granny_control_array(array: np.ndarray):
+    '''Returns a float32 contiguous copy of the given array and a ctypes float pointer to it. The array must be kept alive for as long as the pointer is used'''
+    buffer = np.ascontiguousarray(array, dtype=np.float32)
+    return buffer, buffer.ctypes.data_as(POINTER(c_float))
+
+def identity_control_arrays(frame_count: int):
+    '''Returns position (3), orientation (4) and scale shear (9) control arrays holding an identity transform for every frame'''
+    identity = np.zeros((frame_count, 16), dtype=np.float32)
+    identity[:, 6] = 1.0
+    identity[:, (7, 11, 15)] = 1.0
+    return granny_control_array(identity[:, 0:3]), granny_control_array(identity[:, 3:7]), granny_control_array(identity[:, 7:16])
+
+def dependency_closure(obs: list[bpy.types.Object]) -> set[bpy.types.Object]:
+    '''Returns the given objects and every object their evaluation depends on: parents, constraint targets (including
+    pose bone constraints), modifier objects and driver variable targets'''
+    closure = set()
+    pending = [ob for ob in obs if ob is not None]
+    while pending:
+        ob = pending.pop()
+        if ob in closure:
+            continue
+        closure.add(ob)
+        
+        if ob.parent is not None:
+            pending.append(ob.parent)
+        
+        constraints = list(ob.constraints)
+        if ob.pose is not None:
+            for pbone in ob.pose.bones:
+                constraints.extend(pbone.constraints)
+                
+        for con in constraints:
+            for attr in "target", "pole_target":
+                target = getattr(con, attr, None)
+                if target is not None:
+                    pending.append(target)
+            # Armature constraints hold a collection of targets
+            for con_target in getattr(con, "targets", ()):
+                if con_target.target is not None:
+                    pending.append(con_target.target)
+                    
+        for mod in ob.modifiers:
+            target = getattr(mod, "object", None)
+            if isinstance(target, bpy.types.Object):
+                pending.append(target)
+                
+        ids = [ob, ob.data]
+        shape_keys = getattr(ob.data, "shape_keys", None)
+        if shape_keys is not None:
+            ids.append(shape_keys)
+            
+        for data_block in ids:
+            animation_data = getattr(data_block, "animation_data", None)
+            if animation_data is None:
+                continue
+            for fcurve in animation_data.drivers:
+                for var in fcurve.driver.variables:
+                    for var_target in var.targets:
+                        if isinstance(var_target.id, bpy.types.Object):
+                            pending.append(var_target.id)
+                            
+    return closure
+
+class FrameMatrixCache:
+    '''Matrices read from Blender for the current scene frame. Samplers that share an armature or object read it once per
+    frame rather than once each. Call clear() after every frame change'''
+    def __init__(self):
+        self.poses: dict[bpy.types.Object, np.ndarray] = {}
+        self.worlds: dict[bpy.types.Object, np.ndarray] = {}
+        
+    def clear(self):
+        self.poses.clear()
+        self.worlds.clear()
+        
+    def pose_matrices(self, arm: bpy.types.Object, buffer: np.ndarray) -> np.ndarray:
+        '''Returns the (bones, 4, 4) armature space matrices of all pose bones, reading them into buffer if not cached'''
+        matrices = self.poses.get(arm)
+        if matrices is None:
+            arm.pose.bones.foreach_get("matrix", buffer)
+            matrices = self.poses[arm] = buffer.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+        return matrices
+    
+    def world_matrix(self, ob: bpy.types.Object) -> np.ndarray:
+        matrix = self.worlds.get(ob)
+        if matrix is None:
+            matrix = self.worlds[ob] = np.array(ob.matrix_world, dtype=np.float64)
+        return matrix
+
+class BoneSampler:
+    '''Samples AnimatedBone transforms for every frame of an animation into a single preallocated (frames, bones, 10) array
+    of loc (3), quaternion xyzw (4), and scale (3). World matrices are gathered in bulk per armature each frame, and parent
+    inverse composition and decomposition are done for all frames at once'''
+    def __init__(self, bones: list[AnimatedBone], frame_count: int, rotation_matrix: Matrix):
+        self.bones = bones
+        self.frame_count = frame_count
+        self.rotation_matrix = np.array(rotation_matrix, dtype=np.float64)
+        self.world_matrices = np.empty((frame_count, len(bones), 4, 4), dtype=np.float64)
+        self.samples = np.empty((frame_count, len(bones), 10), dtype=np.float64)
+        self.parent_indices = np.full(len(bones), -1, dtype=np.int64)
+
+        self.object_bones: list[tuple[int, bpy.types.Object]] = []
+        self.armatures: dict[bpy.types.Object, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+        armature_bones = defaultdict(list)
+        owners = defaultdict(list)
+        pbone_indices = {}
+        for idx, bone in enumerate(bones):
+            if bone.is_object:
+                self.object_bones.append((idx, bone.pbone))
+                continue
+
+            pbone_indices[bone.pbone] = idx
+            if bone.parent is not None:
+                self.parent_indices[idx] = pbone_indices[bone.parent]
+
+            armature_bones[bone.pbone.id_data].append((idx, bone.pbone.id_data.pose.bones.find(bone.pbone.name)))
+            owners[bone.ob].append(idx)
+
+        for arm, indices in armature_bones.items():
+            bone_indices, pose_indices = (np.array(i, dtype=np.int64) for i in zip(*indices))
+            self.armatures[arm] = bone_indices, pose_indices, np.empty(len(arm.pose.bones) * 16, dtype=np.float32)
+
+        self.owners = {ob: np.array(indices, dtype=np.int64) for ob, indices in owners.items()}
+
+    def sample(self, frame_index: int, cache: FrameMatrixCache | None = None):
+        '''Gathers the world matrices of all bones for the current scene frame. Pass a cache shared with the other samplers
+        of the frame to avoid reading the same armature or object more than once'''
+        if cache is None:
+            cache = FrameMatrixCache()
+        world = self.world_matrices[frame_index]
+        for arm, (bone_indices, pose_indices, buffer) in self.armatures.items():
+            world[bone_indices] = cache.pose_matrices(arm, buffer)[pose_indices]
+
+        for ob, bone_indices in self.owners.items():
+            world[bone_indices] = self.rotation_matrix @ cache.world_matrix(ob) @ world[bone_indices]
+
+        for idx, ob in self.object_bones:
+            world[idx] = self.rotation_matrix @ cache.world_matrix(ob)
+
+    def finalize(self) -> np.ndarray:
+        '''Composes parent relative matrices and decomposes them. Returns the samples array'''
+        local = self.world_matrices.copy()
+        child_indices = np.flatnonzero(self.parent_indices >= 0)
+        if child_indices.size:
+            parent_inverses = inverted_safe_matrices(self.world_matrices[:, self.parent_indices[child_indices]])
+            local[:, child_indices] = parent_inverses @ self.world_matrices[:, child_indices]
+
+        decompose_matrices(local, self.samples)
+        return self.samples
+
+    def control_arrays(self, bone_index: int):
+        '''Returns contiguous position (3), orientation (4) and scale shear (9) control arrays for the given bone'''
+        bone_samples = self.samples[:, bone_index]
+        scale_shear = np.zeros((self.frame_count, 9), dtype=np.float32)
+        scale_shear[:, (0, 4, 8)] = bone_samples[:, 7:10]
+        return granny_control_array(bone_samples[:, 0:3]), granny_control_array(bone_samples[:, 3:7]), granny_control_array(scale_shear)
+
 class FakeBone:
     __slots__ = ("name", "ob", "parent", "direct_parent", "_pending_parent", "bone", "export", "matrix")
 
@@ -2680,11 +2834,8 @@ class VirtualScene:
         if not node.invalid:
             self.nodes[node.ob] = node
             if node.new_mesh:
-                # This is a tuple containing whether the object has a negative scale. This because we need to create separate mesh data for negatively scaled objects
-                negative_scaling = id.matrix_world.is_negative
-                if id.invert_topology:
-                    negative_scaling = not negative_scaling
-                self.meshes[(node.mesh.mesh, negative_scaling, node.mesh.bpy_materials)] = node.mesh
+                if node.mesh_key is not None:
+                    self.meshes[node.mesh_key] = node.mesh
                 self.meshes_linked[node.mesh.mesh] = node.mesh
             
         return node
@@ -3732,6 +3883,73 @@ def is_rendered(props: dict) -> bool:
     
     return mesh_type in {MeshType.default.value, MeshType.poop.value, MeshType.object_instance.value, MeshType.water_surface.value, MeshType.decorator.value}
 
+# Object level props read while building mesh data. Objects sharing mesh data must agree on these to share a VirtualMesh
+MESH_POOL_PROPS = (
+    "bungie_mesh_type",
+    "foundry_simplify",
+    "material_override",
+    "bungie_mesh_poop_collision_type",
+    "bungie_face_mode",
+    "bungie_face_sides",
+    "bungie_face_region",
+)
+
+def _pool_value(value):
+    if isinstance(value, bpy.types.ID):
+        raise TypeError
+    if isinstance(value, (Vector, Color, Quaternion, Euler)):
+        return tuple(value)
+    if isinstance(value, Matrix):
+        return tuple(tuple(row) for row in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_pool_value(v) for v in value))
+    if isinstance(value, (list, tuple)) or type(value).__name__ in {"bpy_prop_array", "IDPropertyArray"}:
+        return tuple(_pool_value(v) for v in value)
+    if isinstance(value, bpy.types.bpy_struct):
+        raise TypeError
+    hash(value)
+    return value
+
+def modifier_stack_signature(ob) -> tuple | None:
+    '''Returns a hashable signature of the settings of every modifier on the given object. Returns None if any modifier
+    references another ID, as the evaluated mesh may then depend on more than the object's own data. Read only properties
+    are runtime state (persistent_uid, execution_time) and are left out, otherwise no two stacks would ever match'''
+    signature = []
+    for mod in ob.modifiers:
+        settings = []
+        for prop in mod.bl_rna.properties:
+            identifier = prop.identifier
+            if prop.is_readonly or identifier in {"name", "show_expanded", "is_active"}:
+                continue
+            try:
+                settings.append((identifier, _pool_value(getattr(mod, identifier))))
+            except AttributeError:
+                continue
+            except TypeError:
+                return None
+
+        signature.append((mod.type, tuple(settings)))
+
+    return tuple(signature)
+
+def mesh_pool_key(ob, negative_scaling: bool, materials: tuple, props: dict) -> tuple | None:
+    '''Returns the key VirtualScene.meshes stores the VirtualMesh built for this object under, or None if the mesh
+    cannot be shared with other objects'''
+    modifiers = modifier_stack_signature(ob)
+    if modifiers is None:
+        return None
+    try:
+        mesh_props = tuple(_pool_value(props.get(key)) for key in MESH_POOL_PROPS)
+        transform = None if ob.transform is None else _pool_value(ob.transform)
+    except TypeError:
+        return None
+
+    # Deform weights and modifier vertex group settings are resolved to groups through the object's own vertex groups,
+    # so objects only share a mesh when their groups have the same names in the same order
+    vertex_groups = tuple(vg.name for vg in ob.vertex_groups or ())
+
+    return ob.data, negative_scaling, materials, transform, modifiers, mesh_props, vertex_groups
+
 def deep_copy_granny_tri_topology(original):
     copy = GrannyTriTopology()
     copy.group_count = original.contents.group_count
@@ -1,7 +1,8 @@
 from collections import defaultdict
-from ctypes import CDLL, Array, byref, c_uint32, c_void_p, cast, cdll, create_string_buffer, pointer, sizeof, string_at, windll
+from ctypes import CDLL, Array, addressof, byref, c_uint32, c_void_p, cast, cdll, create_string_buffer, memmove, pointer, sizeof, string_at, windll
 from pathlib import Path
 import struct
+import threading
 import time
 
 import bpy
@@ -21,6 +22,39 @@ GrannyCallbackType = CFUNCTYPE(
 
 encountered_datas = []
 
+class _SerializedLibrary:
+    '''Wraps the granny dll so that only one thread is ever inside it. The dll is not documented as thread safe'''
+    def __init__(self, dll: CDLL, lock: threading.RLock):
+        self._dll = dll
+        self._lock = lock
+        
+    def __getattr__(self, name):
+        function = getattr(self._dll, name)
+        lock = self._lock
+        def call(*args):
+            with lock:
+                return function(*args)
+        
+        setattr(self, name, call)
+        return call
+
+class GrannyFile:
+    '''A fully built gr2 data tree detached from the Granny instance that built it. The tree owns copies of the vertex and
+    topology buffers that transforming rewrites in place, so it can be written on a worker thread while the next file is
+    being built. Calls into the dll still take the Granny lock'''
+    def __init__(self, granny: 'Granny', filename: str, file_info: GrannyFileInfo, variant_references: list, buffers: list):
+        self.granny = granny
+        self.filename = filename
+        self.file_info = file_info
+        self._variant_references = variant_references
+        self._buffers = buffers
+        
+    def write(self):
+        with self.granny.lock:
+            self.granny.transform(self.file_info)
+            self.granny.save(self.file_info, self.filename)
+        return self.filename
+
 class Granny:
     def __init__(self, granny_dll_path: str | Path, corinth: bool):
         self.dll = cdll.LoadLibrary(str(granny_dll_path))
@@ -32,6 +66,8 @@ class Granny:
         self.keyframe_type = POINTER(GrannyDataTypeDefinition).in_dll(self.dll, "GrannyCurveDataDaKeyframes32fType")
         self.curve_type = POINTER(GrannyDataTypeDefinition).in_dll(self.dll, "GrannyCurveDataDaK32fC32fType")
         self.variant_type = POINTER(GrannyDataTypeDefinition).in_dll(self.dll, "GrannyVariantType")
+        self.lock = threading.RLock()
+        self.dll = _SerializedLibrary(self.dll, self.lock)
         self.string_table = self.new_string_table()
         self._create_callback()
         self.filename = ""
@@ -265,15 +301,92 @@ class Granny:
         morph_vert_data = scene.morph_vertex_data.get(animation)
         if morph_vert_data is not None:
             self.export_vertex_datas.extend(morph_vert_data)
+            
+    def detach(self) -> GrannyFile:
+        '''Hands the current file tree over to a GrannyFile so that it can be written independently. The next call to new() starts a fresh tree'''
+        granny_file = GrannyFile(self, self.filename, self.file_info, self._variant_references, self._copy_file_buffers(self.file_info))
+        self.file_info = None
+        self.granny_export_info = None
+        self._variant_references = []
+        return granny_file
+        
+    def _copy_file_buffers(self, file_info: GrannyFileInfo) -> list:
+        '''Points the file at its own copies of every vertex data and tri topology it uses. These are otherwise shared with
+        other files through pooled mesh data, and transforming the file rewrites them in place. Returns the copied buffers,
+        which must be kept alive until the file is written'''
+        buffers = []
+        vertex_datas = {}
+        tri_topologies = {}
+        
+        def copy_array(array, count, ctype):
+            if not array or count <= 0:
+                return array
+            copy = (ctype * count)()
+            memmove(copy, array, sizeof(ctype) * count)
+            buffers.append(copy)
+            return cast(copy, POINTER(ctype))
+        
+        def copy_vertex_data(vertex_data):
+            if not vertex_data:
+                return vertex_data
+            address = addressof(vertex_data.contents)
+            if address not in vertex_datas:
+                source = vertex_data.contents
+                copy = GrannyVertexData.from_buffer_copy(source)
+                copy.vertices = copy_array(source.vertices, source.vertex_count * self.get_total_object_size(source.vertex_type), c_ubyte)
+                buffers.append(copy)
+                vertex_datas[address] = pointer(copy)
+            return vertex_datas[address]
+        
+        def copy_tri_topology(tri_topology):
+            if not tri_topology:
+                return tri_topology
+            address = addressof(tri_topology.contents)
+            if address not in tri_topologies:
+                source = tri_topology.contents
+                copy = GrannyTriTopology.from_buffer_copy(source)
+                copy.groups = copy_array(source.groups, source.group_count, GrannyTriMaterialGroup)
+                copy.indices = copy_array(source.indices, source.index_count, c_int)
+                copy.indices16 = copy_array(source.indices16, source.index16_count, c_ushort)
+                copy.vertex_to_vertex_map = copy_array(source.vertex_to_vertex_map, source.vertex_to_vertex_count, c_int)
+                copy.vertex_to_triangle_map = copy_array(source.vertex_to_triangle_map, source.vertex_to_triangle_count, c_int)
+                copy.side_to_neighbor_map = copy_array(source.side_to_neighbor_map, source.side_to_neighbor_count, c_uint)
+                copy.bones_for_triangle = copy_array(source.bones_for_triangle, source.bones_for_triangle_count, c_int)
+                copy.triangle_to_bone_indices = copy_array(source.triangle_to_bone_indices, source.triangle_to_bone_count, c_int)
+                copy.tri_annotation_sets = copy_array(source.tri_annotation_sets, source.tri_annotation_set_count, GrannyTriAnnotationSet)
+                for i in range(copy.tri_annotation_set_count):
+                    annotation_set = copy.tri_annotation_sets[i]
+                    annotation_size = self.get_total_object_size(annotation_set.tri_annotation_type)
+                    annotation_set.tri_annotations = copy_array(annotation_set.tri_annotations, annotation_set.tri_annotation_count * annotation_size, c_ubyte)
+                    annotation_set.tri_annotation_indices = copy_array(annotation_set.tri_annotation_indices, annotation_set.tri_annotation_index_count, c_int)
+                buffers.append(copy)
+                tri_topologies[address] = pointer(copy)
+            return tri_topologies[address]
+        
+        for i in range(file_info.vertex_data_count):
+            file_info.vertex_datas[i] = copy_vertex_data(file_info.vertex_datas[i])
+        for i in range(file_info.tri_topology_count):
+            file_info.tri_topologies[i] = copy_tri_topology(file_info.tri_topologies[i])
+        for i in range(file_info.mesh_count):
+            mesh = file_info.meshes[i].contents
+            mesh.primary_vertex_data = copy_vertex_data(mesh.primary_vertex_data)
+            mesh.primary_topology = copy_tri_topology(mesh.primary_topology)
+            mesh.morph_targets = copy_array(mesh.morph_targets, mesh.morph_target_count, GrannyMorphTarget)
+            for j in range(mesh.morph_target_count):
+                mesh.morph_targets[j].vertex_data = copy_vertex_data(mesh.morph_targets[j].vertex_data)
+                
+        return buffers
         
-    def save(self):
-        data_tree_writer = self.begin_file_data_tree_writing()
+    def save(self, file_info: GrannyFileInfo = None, filename: str = None):
+        data_tree_writer = self.begin_file_data_tree_writing(file_info)
         if data_tree_writer:
-            if self.write_data_tree_to_file(data_tree_writer):
+            if self.write_data_tree_to_file(data_tree_writer, filename):
                 self.end_file_data_tree_writing(data_tree_writer)
                 
-    def transform(self):
+    def transform(self, file_info: GrannyFileInfo = None):
         '''Transforms the granny file to Halo (Big scale + X forward)'''
+        if file_info is None:
+            file_info = self.file_info
         halo_origin = (c_float * 3)(0, 0, 0)
         if self.corinth: # basically transform it to maya
             halo_units_per_meter = 1 / 0.3048
@@ -290,7 +403,7 @@ class Granny:
         linear3x3 = (c_float * 9)(0, 0, 0, 0, 0, 0, 0, 0, 0)
         inverse_linear3x3 = (c_float * 9)(0, 0, 0, 0, 0, 0, 0, 0, 0)
         
-        self.compute_basis_conversion(self.file_info, 
+        self.compute_basis_conversion(file_info, 
                                       halo_units_per_meter,
                                       halo_origin,
                                       halo_right_vector,
@@ -306,7 +419,7 @@ class Granny:
         # print("inverse_linear3x3 ", [i for i in inverse_linear3x3])
         
         self.transform_file(
-            self.file_info,
+            file_info,
             affine3,
             linear3x3,
             inverse_linear3x3,
@@ -315,10 +428,10 @@ class Granny:
             3, # 3 represents the flags GrannyRenormalizeNormals & GrannyReorderTriangleIndices
         )
         
-        self.file_info.art_tool_info.contents.right_vector = halo_right_vector
-        self.file_info.art_tool_info.contents.up_vector = halo_up_vector
-        self.file_info.art_tool_info.contents.back_vector = halo_back_vector
-        self.file_info.art_tool_info.contents.units_per_meter = halo_units_per_meter
+        file_info.art_tool_info.contents.right_vector = halo_right_vector
+        file_info.art_tool_info.contents.up_vector = halo_up_vector
+        file_info.art_tool_info.contents.back_vector = halo_back_vector
+        file_info.art_tool_info.contents.units_per_meter = halo_units_per_meter
         
         # self.file_info.art_tool_info.contents.right_vector = (c_float * 3)(1, 0, 0)
         # self.file_info.art_tool_info.contents.up_vector = (c_float * 3)(0, 1, 0)
@@ -592,13 +705,13 @@ class Granny:
         """Returns the granny dll version as a string"""
         return self.dll.GrannyGetVersionString().decode()
     
-    def begin_file_data_tree_writing(self):
+    def begin_file_data_tree_writing(self, file_info: GrannyFileInfo = None):
         "Starts writing the gr2 data"
-        return self.dll.GrannyBeginFileDataTreeWriting(self.file_info_type, pointer(self.file_info), 0, 0)
+        return self.dll.GrannyBeginFileDataTreeWriting(self.file_info_type, pointer(self.file_info if file_info is None else file_info), 0, 0)
     
-    def write_data_tree_to_file(self, writer):
+    def write_data_tree_to_file(self, writer, filename: str = None):
         "Write the gr2 to a system file"
-        return self.dll.GrannyWriteDataTreeToFile(writer, 0x80000037, self.magic_value, self.filename.encode(), 1)
+        return self.dll.GrannyWriteDataTreeToFile(writer, 0x80000037, self.magic_value, (self.filename if filename is None else filename).encode(), 1)
     
     def end_file_data_tree_writing(self, writer):
         "Ends gr2 data writing"
@@ -763,6 +876,9 @@ class Granny:
         
     def find_bone_by_name(self, skeleton: POINTER(GrannySkeleton), bone_name: c_char_p, bone_index: POINTER(c_int32)) -> c_bool:
         return self.dll.GrannyFindBoneByName(skeleton, bone_name, bone_index)
+    
+    def get_total_object_size(self, type_definition: POINTER(GrannyDataTypeDefinition)) -> c_int32:
+        return self.dll.GrannyGetTotalObjectSize(type_definition)
 
     def _define_granny_functions(self):
         # Get version
@@ -894,4 +1010,7 @@ class Granny:
         # find bone by name
         self.dll.GrannyFindBoneByName.argtypes=[POINTER(GrannySkeleton), c_char_p, POINTER(c_int32)]
         self.dll.GrannyFindBoneByName.restype=c_bool
+        # size of one object of a type
+        self.dll.GrannyGetTotalObjectSize.argtypes=[POINTER(GrannyDataTypeDefinition)]
+        self.dll.GrannyGetTotalObjectSize.restype=c_int32
         
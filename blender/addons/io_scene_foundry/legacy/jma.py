@@ -1,20 +1,27 @@
+from itertools import islice
 import math
 from pathlib import Path
-from typing import cast
-from mathutils import Euler, Matrix, Quaternion, Vector
+from mathutils import Euler
 import bpy
+import numpy as np
 
 from . import gen_lines, sint
 from .. import utils
+from ..export.virtual_geometry import decompose_matrices, inverted_safe_matrices
 
 e90 = Euler((0, 0, math.radians(-90)))
 
+# Same tolerance keyframe_points.insert uses to decide a NEEDED key matches the curve
+KEY_EPSILON = np.finfo(np.float32).eps
+KEY_RELATIVE_EPSILON = 32 * KEY_EPSILON
+
 class Node:
     def __init__(self, name: str, parent_index=-1, child_index=-1, sibling_index=-1):
         self.name = name
         self.parent_index = parent_index
         self.child_index = child_index
         self.sibling_index = sibling_index
+        self.index = -1
         self.parent: Node = None
         self.fc_loc_x: bpy.types.FCurve
         self.fc_loc_y: bpy.types.FCurve
@@ -47,6 +54,39 @@ def assign_parents_from_child_sibling(nodes: list[Node], index=0, parent_index=-
     # Then next sibling
     assign_parents_from_child_sibling(nodes, node.sibling_index, parent_index)
 
+def loc_rot_scale_matrices(frames: np.ndarray) -> np.ndarray:
+    '''Returns the (..., 4, 4) matrices of a (..., 8) array of loc (3), quaternion xyzw (4) and uniform scale. Equivalent to
+    Matrix.LocRotScale'''
+    x, y, z, w = np.moveaxis(frames[..., 3:7], -1, 0)
+    matrices = np.zeros(frames.shape[:-1] + (4, 4))
+    matrices[..., 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    matrices[..., 0, 1] = 2.0 * (x * y - w * z)
+    matrices[..., 0, 2] = 2.0 * (x * z + w * y)
+    matrices[..., 1, 0] = 2.0 * (x * y + w * z)
+    matrices[..., 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    matrices[..., 1, 2] = 2.0 * (y * z - w * x)
+    matrices[..., 2, 0] = 2.0 * (x * z - w * y)
+    matrices[..., 2, 1] = 2.0 * (y * z + w * x)
+    matrices[..., 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    matrices[..., :3, :3] *= frames[..., 7, np.newaxis, np.newaxis]
+    matrices[..., :3, 3] = frames[..., 0:3]
+    matrices[..., 3, 3] = 1.0
+    return matrices
+
+def needed_keys(values: np.ndarray) -> np.ndarray:
+    '''Returns a mask of the keys to keep from one value per frame. Keys in the middle of a run of equal values add nothing
+    to the curve and are dropped, and a curve that never changes keeps only its first key'''
+    needed = np.ones(len(values), dtype=bool)
+    if len(values) < 3:
+        needed[1:] = ~np.isclose(values[1:], values[:-1], rtol=KEY_RELATIVE_EPSILON, atol=KEY_EPSILON)
+        return needed
+    same_as_previous = np.isclose(values[1:], values[:-1], rtol=KEY_RELATIVE_EPSILON, atol=KEY_EPSILON)
+    if same_as_previous.all():
+        needed[1:] = False
+        return needed
+    needed[1:-1] = ~(same_as_previous[:-1] & same_as_previous[1:])
+    return needed
+
 class JMA:
     def __init__(self):
         self.name = ""
@@ -58,7 +98,10 @@ class JMA:
         self.actor_names = ["unnamedActor"]
         self.node_count = 0
         self.nodes: list[Node] = []
-        self.transforms: list[dict[Node: Matrix]] = []
+        # (frames, nodes, 8) of loc (3), quaternion xyzw (4) and scale as read from the file, in file node order
+        self.frames = np.zeros((0, 0, 8))
+        # (frames, nodes, 4, 4) parent relative matrices, in file node order
+        self.transforms = np.zeros((0, 0, 4, 4))
         self.overlay = False
         
     def from_file(self, filepath: Path | str):
@@ -94,38 +137,32 @@ class JMA:
             for _ in range(self.node_count):
                 self.nodes.append(Node(get(), parent_index=sint(get())))
             
-        for node in self.nodes:
+        for index, node in enumerate(self.nodes):
+            node.index = index
             if node.parent_index > -1:
                 node.parent = self.nodes[node.parent_index]
-            
-        for _ in range(self.frame_count):
-            frame_data = {}
-            for node in self.nodes:
-                loc = Vector(tuple(map(float, get().split())))
-                rot = tuple(map(float, get().split()))
-                quat = Quaternion((rot[3], rot[0], rot[1], rot[2]))
-                if h1:
-                    quat.invert()
-                scale = float(get())
-                frame_data[node] = Matrix.LocRotScale(loc, quat, Vector.Fill(3, scale))
-                
-            self.transforms.append(frame_data)
-            
+
+        frame_values = np.array(" ".join(islice(lines, self.frame_count * self.node_count * 3)).split(), dtype=np.float64)
+        self.frames = frame_values.reshape(self.frame_count, self.node_count, 8)
+        if h1:
+            self.frames[..., 3:6] *= -1.0
+
+        self.transforms = loc_rot_scale_matrices(self.frames)
+
+        # Make all matrices parent relative
+        if not h1:
+            child_indices = np.array([node.index for node in self.nodes if node.parent is not None], dtype=np.int64)
+            parent_indices = np.array([node.parent_index for node in self.nodes if node.parent is not None], dtype=np.int64)
+            if len(child_indices):
+                world = self.transforms.copy()
+                self.transforms[:, child_indices] = inverted_safe_matrices(world[:, parent_indices]) @ world[:, child_indices]
+
         node_dict = {}
         for node in self.nodes:
             node_dict[node] = node.parent_index + 1
-                
+
         self.nodes.sort(key=lambda x: node_dict[x])
-        
-        # Make all matrices parent relative
-        if not h1:
-            for frame_data in self.transforms:
-                for node in reversed(self.nodes):
-                    if node.parent is None:
-                        continue
-                    frame_data[node] = frame_data[node.parent].inverted_safe() @ frame_data[node]
-                
-            
+
     def to_armature_action(self, armature: bpy.types.Object, action: bpy.types.Action=None):
         if action is None:
             action = bpy.data.actions.new(name=self.name)
@@ -160,51 +197,42 @@ class JMA:
             node.fc_sca_z = fcurves.new(data_path=f'pose.bones["{node.pose_bone.name}"].scale', index=2)
             valid_nodes.append(node)
             
-        bone_dict = {}
-        bones_ordered = [node.pose_bone for node in valid_nodes]
-        for bone in bones_ordered:
-            if bone.parent and bone.parent in valid_nodes:
-                bone_dict[bone] = bone_dict[bone.parent] + 1
-            else:
-                bone_dict[bone] = 0
-                
-        bones_ordered.sort(key=lambda x: bone_dict[x])
-        
-        bone_base_matrices = {}
-        for bone in bones_ordered:
+        if not valid_nodes or self.frame_count == 0:
+            return action
+
+        bone_base_matrices = np.empty((len(valid_nodes), 4, 4))
+        for idx, node in enumerate(valid_nodes):
+            bone = node.pose_bone
             if bone.parent:
-                bone_base_matrices[bone] = bone.parent.matrix.inverted_safe() @ bone.matrix
+                bone_base_matrices[idx] = bone.parent.matrix.inverted_safe() @ bone.matrix
             else:
-                bone_base_matrices[bone] = bone.matrix
-        
-        for idx, nodes_transforms in enumerate(self.transforms):
-            frame_idx = idx + 1
-            for node in valid_nodes:
-                node: Node
-                matrix = nodes_transforms[node]
-                # get diff between base and jma transform
-                transform_matrix = bone_base_matrices[node.pose_bone].inverted_safe() @ matrix
-                loc, rot, sca = transform_matrix.decompose()
-                
-                node.fc_loc_x.keyframe_points.insert(frame_idx, loc.x, options={'FAST', 'NEEDED'})
-                node.fc_loc_y.keyframe_points.insert(frame_idx, loc.y, options={'FAST', 'NEEDED'})
-                node.fc_loc_z.keyframe_points.insert(frame_idx, loc.z, options={'FAST', 'NEEDED'})
-                
-                if self.overlay and node.aim_bone:
-                    # Always include exact keyframes for aim bones on overlays
-                    node.fc_rot_w.keyframe_points.insert(frame_idx, rot.w, options={'FAST'})
-                    node.fc_rot_x.keyframe_points.insert(frame_idx, rot.x, options={'FAST'})
-                    node.fc_rot_y.keyframe_points.insert(frame_idx, rot.y, options={'FAST'})
-                    node.fc_rot_z.keyframe_points.insert(frame_idx, rot.z, options={'FAST'})
+                bone_base_matrices[idx] = bone.matrix
+
+        # get diff between base and jma transform
+        node_indices = np.array([node.index for node in valid_nodes], dtype=np.int64)
+        transform_matrices = inverted_safe_matrices(bone_base_matrices) @ self.transforms[:, node_indices]
+        channels = np.empty((self.frame_count, len(valid_nodes), 10))
+        decompose_matrices(transform_matrices, channels)
+        # xyzw to blender's wxyz
+        channels[..., 3:7] = np.roll(channels[..., 3:7], 1, axis=-1)
+
+        frames = np.arange(1, self.frame_count + 1, dtype=np.float32)
+        for idx, node in enumerate(valid_nodes):
+            node_fcurves = (
+                node.fc_loc_x, node.fc_loc_y, node.fc_loc_z,
+                node.fc_rot_w, node.fc_rot_x, node.fc_rot_y, node.fc_rot_z,
+                node.fc_sca_x, node.fc_sca_y, node.fc_sca_z,
+            )
+            for channel, fcurve in enumerate(node_fcurves):
+                values = channels[:, idx, channel]
+                # Always include exact keyframes for aim bones on overlays
+                if self.overlay and node.aim_bone and 3 <= channel < 7:
+                    needed = slice(None)
                 else:
-                    node.fc_rot_w.keyframe_points.insert(frame_idx, rot.w, options={'FAST', 'NEEDED'})
-                    node.fc_rot_x.keyframe_points.insert(frame_idx, rot.x, options={'FAST', 'NEEDED'})
-                    node.fc_rot_y.keyframe_points.insert(frame_idx, rot.y, options={'FAST', 'NEEDED'})
-                    node.fc_rot_z.keyframe_points.insert(frame_idx, rot.z, options={'FAST', 'NEEDED'})
-                
-                node.fc_sca_x.keyframe_points.insert(frame_idx, sca.x, options={'FAST', 'NEEDED'})
-                node.fc_sca_y.keyframe_points.insert(frame_idx, sca.y, options={'FAST', 'NEEDED'})
-                node.fc_sca_z.keyframe_points.insert(frame_idx, sca.z, options={'FAST', 'NEEDED'})
-                
+                    needed = needed_keys(values)
+                keyframe_co = np.column_stack((frames[needed], values[needed])).astype(np.float32)
+                fcurve.keyframe_points.add(len(keyframe_co))
+                fcurve.keyframe_points.foreach_set("co", keyframe_co.ravel())
+                fcurve.update()
+
         return action
-                
\ No newline at end of file
@@ -1,10 +1,23 @@
 from pathlib import Path
+import re
+import warnings
 
 from mathutils import Quaternion, Vector
 import bpy
-from . import gen_lines, sint, to_quaternion, to_vector
+import numpy as np
+from . import sint, to_quaternion, to_vector
 from .. import utils
 
+# Sections are found by the headers every JMS exporter writes, so sections a version lacks are simply empty
+SECTION_PATTERN = re.compile(r";###[ \t]*([^\n]+?)[ \t]*###[^\n]*")
+COMMENT_PATTERN = re.compile(r";[^\n]*")
+MIN_VERSION = 8205
+# position (3), normal (3), node influence count, texture coordinate count
+VERTEX_FIXED_VALUES = 8
+VERTEX_COLOR_VALUES = 3
+# Sections this reader parses. Anything else, such as collision primitives and constraints, is listed in unread_sections
+READ_SECTIONS = {"VERSION", "NODE LIST CHECKSUM", "NODES", "MATERIALS", "MARKERS", "INSTANCE XREF PATHS", "INSTANCE MARKERS", "VERTICES", "TRIANGLES"}
+
 
 class Node:
     def __init__(self, name: str, parent_node_index: int, default_rotation: Quaternion, default_translation: Vector):
@@ -12,132 +25,308 @@ class Node:
         self.parent_node_index = parent_node_index
         self.default_rotation = default_rotation
         self.default_translation = default_translation
-        
+
 class Material:
     def __init__(self, name: str, material_name: str):
         self.name = name
         self.material_name = material_name
         parts = self.material_name.split()
-        self.value = parts[0].strip("()")
-        self.permutation = parts[1]
-        self.region = parts[2]
-        
+        self.value = parts[0].strip("()") if parts else ""
+        self.permutation = parts[1] if len(parts) > 1 else "default"
+        self.region = parts[2] if len(parts) > 2 else "default"
+
         self.clean_name = utils.get_valid_shader_name(name)
-        
-        self.blender_material = bpy.data.materials.get(self.clean_name)
-        
+        self.blender_material: bpy.types.Material = None
+
+    def ensure_blender_material(self) -> bpy.types.Material:
+        '''Gets or creates the material named as in the JMS. The name keeps its legacy symbols, which the importer reads
+        material properties from'''
         if self.blender_material is None:
-            self.blender_material = bpy.data.materials.new(self.clean_name)
-        
+            self.blender_material = bpy.data.materials.get(self.name)
+            if self.blender_material is None:
+                self.blender_material = bpy.data.materials.new(self.name)
+        return self.blender_material
+
 class Marker:
-    def __init__(self):
-        self.name = "default"
-        self.node_index = 0
-        self.rotation: Quaternion = None
-        self.translation: Vector = None
-        self.radius = 1
-        
+    def __init__(self, name="default", node_index=0, rotation: Quaternion = None, translation: Vector = None, radius=1):
+        self.name = name
+        self.node_index = node_index
+        self.rotation = rotation
+        self.translation = translation
+        self.radius = radius
+
 class Xref:
-    def __init__(self):
-        self.path = "default"
-        self.name = "default"
+    def __init__(self, path="default", name="default"):
+        self.path = path
+        self.name = name
 
 class InstanceMarker:
-    def __init__(self):
-        self.name = "default"
-        self.unique_identifier = 0
-        self.path_index = -1
-        self.rotation: Quaternion = None
-        self.translation: Vector = None
-        
-class NodeInfluence:
-    def __init__(self):
-        self.index = -1
-        self.weight = 0
-        
-class TextureCoordinate:
-    def __init__(self):
-        self.u = 0.0
-        self.v = 0.0
+    def __init__(self, name="default", unique_identifier=0, path_index=-1, rotation: Quaternion = None, translation: Vector = None):
+        self.name = name
+        self.unique_identifier = unique_identifier
+        self.path_index = path_index
+        self.rotation = rotation
+        self.translation = translation
 
-class VertexColor:
-    def __init__(self):
-        self.r = 0
-        self.g = 0
-        self.b = 0
-        
-class VertexIndices:
-    def __init__(self):
-        self.v1 = 0
-        self.v2 = 1
-        self.v3 = 2
+def section_lines(text: str):
+    for line in text.splitlines():
+        line = line.partition(";")[0].strip()
+        if line:
+            yield line
+
+def section_values(text: str, dtype=np.float64) -> np.ndarray:
+    '''Parses every number in a section into a flat array without building a python object per value'''
+    with warnings.catch_warnings():
+        # fromstring warns when it stops early, which is caught by the callers' size checks instead
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return np.fromstring(COMMENT_PATTERN.sub(" ", text), dtype=dtype, sep=" ")
+
+def section_count(text: str) -> int:
+    '''Returns the element count a section starts with, or 1 if it does not start with a count'''
+    first = next(section_lines(text), "0").split()[0]
+    try:
+        return sint(first)
+    except ValueError:
+        return 1
+
+def vertex_offsets(values: np.ndarray, vertex_count: int, color_values: int) -> np.ndarray | None:
+    '''Returns the offset of each vertex into the flat vertex values, or None if they do not describe vertex_count
+    vertices'''
+    size = len(values)
+    # Exporters usually write the same number of influences and texture coordinates for every vertex, which lets the
+    # whole section be read at a fixed stride
+    if size > 6:
+        influence_count = int(values[6])
+        if 7 + influence_count * 2 < size:
+            texture_coordinate_count = int(values[7 + influence_count * 2])
+            stride = VERTEX_FIXED_VALUES + influence_count * 2 + texture_coordinate_count * 2 + color_values
+            if stride * vertex_count == size:
+                offsets = np.arange(vertex_count, dtype=np.int64) * stride
+                if np.all(values[offsets + 6] == influence_count) and np.all(values[offsets + 7 + influence_count * 2] == texture_coordinate_count):
+                    return offsets
+
+    offsets = np.empty(vertex_count, dtype=np.int64)
+    offset = 0
+    for vertex_index in range(vertex_count):
+        if offset + 7 >= size:
+            return None
+        offsets[vertex_index] = offset
+        offset += 7 + int(values[offset + 6]) * 2
+        if offset >= size:
+            return None
+        offset += 1 + int(values[offset]) * 2 + color_values
+
+    return offsets if offset == size else None
 
-class Triangle:
-    def __init__(self):
-        self.material_index = 0
-        self.vertex_indices: VertexIndices = None
-        
-class Vertex:
-    def __init__(self):
-        self.positon: Vector = None
-        self.normal: Vector = None
-        self.node_influences_count = 0
-        self.node_influences: list[NodeInfluence]  = []
-        self.texture_coordinate_count: list[NodeInfluence]  = []
-        
-class Sphere:
-    def __init__(self):
-        self.name = "default"
-        self.parent = None
-        self.material = 0
-        
 class JMS:
     def __init__(self):
         self.name = ""
         self.version = 8213
-        
+
         self.node_count = 0
         self.nodes: list[Node] = []
-        
+
         self.material_count = 0
         self.materials: list[Material] = []
-        
+
         self.marker_count = 0
         self.markers: list[Marker] = []
-        
+
+        self.xrefs: list[Xref] = []
+        self.instance_markers: list[InstanceMarker] = []
+
+        self.vertex_count = 0
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.normals = np.zeros((0, 3), dtype=np.float32)
+        # -1 where a vertex has fewer influences than the most influenced vertex
+        self.influence_indices = np.zeros((0, 0), dtype=np.int32)
+        self.influence_weights = np.zeros((0, 0), dtype=np.float32)
+        # (vertices, texture coordinate sets, 2)
+        self.texture_coordinates = np.zeros((0, 0, 2), dtype=np.float32)
+        self.colors: np.ndarray | None = None
+
+        self.triangle_count = 0
+        self.triangles = np.zeros((0, 3), dtype=np.int32)
+        self.triangle_materials = np.zeros(0, dtype=np.int32)
+
+        self.unread_sections: list[str] = []
+
     def from_file(self, filepath):
         self.name = Path(filepath).with_suffix("").name
-        lines = gen_lines(filepath)
+        with open(filepath, "r") as file:
+            text = file.read()
+
+        headers = list(SECTION_PATTERN.finditer(text))
+        if not headers:
+            raise ValueError(f"{filepath} has no JMS section headers")
+
+        sections = {}
+        for header, next_header in zip(headers, headers[1:] + [None]):
+            sections[header.group(1).upper()] = text[header.end():next_header.start() if next_header else len(text)]
+        del text
+        self.unread_sections = [name for name, section in sections.items() if name not in READ_SECTIONS and section_count(section)]
+
+        self.version = sint(next(section_lines(sections.get("VERSION", "")), 0))
+        if self.version < MIN_VERSION:
+            raise ValueError(f"JMS version {self.version} is not supported, re-export {filepath} at version {MIN_VERSION} or later")
+
+        lines = section_lines(sections.get("NODES", ""))
         get = lambda: next(lines)
         geti = lambda: sint(next(lines))
-        getf = lambda: float(next(lines))
         getv = lambda: to_vector(next(lines))
         getq = lambda: to_quaternion(next(lines))
-        self.version = sint(get())
-        
-        # NODES
-        self.node_count = geti()
+        self.node_count = geti() if "NODES" in sections else 0
         for _ in range(self.node_count):
             self.nodes.append(Node(get(), geti(), getq(), getv()))
-            
-        # MATERIALS
-        self.material_count = geti()
+
+        lines = section_lines(sections.get("MATERIALS", ""))
+        self.material_count = geti() if "MATERIALS" in sections else 0
         for _ in range(self.material_count):
             self.materials.append(Material(get(), get()))
-            
-        # MARKERS
-        self.marker_count = geti()
+
+        lines = section_lines(sections.get("MARKERS", ""))
+        self.marker_count = geti() if "MARKERS" in sections else 0
         for _ in range(self.marker_count):
-            self.markers.append(Marker(get(), geti(), getq(), getv(), getf()))
-            
-        # XREF Paths
-        
-        # INSTANCE MARKERS
-        
-        # VERTICES
-        self.vertex_count = geti()
-        for _ in range(self.vertex_count):
-            self.vertices.append(Vertex(getv(), getv(), [NodeInfluence(geti(), getf()) for _ in range(geti())], [TextureCoordinate(getv(), getv()) for _ in range(geti())], VertexColor(getv())))
-    
-    def to_mesh(self):
-        pass
\ No newline at end of file
+            self.markers.append(Marker(get(), geti(), getq(), getv(), float(get())))
+
+        lines = section_lines(sections.get("INSTANCE XREF PATHS", ""))
+        for _ in range(geti() if "INSTANCE XREF PATHS" in sections else 0):
+            self.xrefs.append(Xref(get(), get()))
+
+        lines = section_lines(sections.get("INSTANCE MARKERS", ""))
+        for _ in range(geti() if "INSTANCE MARKERS" in sections else 0):
+            self.instance_markers.append(InstanceMarker(get(), geti(), geti(), getq(), getv()))
+
+        self._read_vertices(sections.pop("VERTICES", ""))
+        self._read_triangles(sections.pop("TRIANGLES", ""))
+
+    def _read_vertices(self, text: str):
+        values = section_values(text)
+        if not len(values):
+            return
+
+        self.vertex_count = int(values[0])
+        values = values[1:]
+        for color_values in (VERTEX_COLOR_VALUES, 0):
+            offsets = vertex_offsets(values, self.vertex_count, color_values)
+            if offsets is not None:
+                break
+        else:
+            raise ValueError(f"Failed to read {self.vertex_count} vertices from {self.name}")
+
+        self.positions = values[offsets[:, None] + np.arange(3)].astype(np.float32)
+        self.normals = values[offsets[:, None] + np.arange(3, 6)].astype(np.float32)
+
+        influence_counts = values[offsets + 6].astype(np.int64)
+        max_influences = int(influence_counts.max()) if self.vertex_count else 0
+        slots = np.arange(max_influences)
+        has_influence = slots < influence_counts[:, None]
+        influence_offsets = offsets[:, None] + 7 + slots * 2
+        self.influence_indices = np.where(has_influence, values[np.where(has_influence, influence_offsets, 0)], -1).astype(np.int32)
+        self.influence_weights = np.where(has_influence, values[np.where(has_influence, influence_offsets + 1, 0)], 0).astype(np.float32)
+
+        texture_offsets = offsets + 7 + influence_counts * 2
+        texture_counts = values[texture_offsets].astype(np.int64)
+        max_texture_coordinates = int(texture_counts.max()) if self.vertex_count else 0
+        slots = np.arange(max_texture_coordinates)
+        has_texture_coordinate = slots < texture_counts[:, None]
+        uv_offsets = np.where(has_texture_coordinate, texture_offsets[:, None] + 1 + slots * 2, 0)[..., None] + np.arange(2)
+        self.texture_coordinates = np.where(has_texture_coordinate[..., None], values[uv_offsets], 0).astype(np.float32)
+
+        if color_values:
+            color_offsets = texture_offsets + 1 + texture_counts * 2
+            self.colors = values[color_offsets[:, None] + np.arange(3)].astype(np.float32)
+
+    def _read_triangles(self, text: str):
+        values = section_values(text, np.int64)
+        if not len(values):
+            return
+
+        self.triangle_count = int(values[0])
+        if len(values) - 1 != self.triangle_count * 4:
+            raise ValueError(f"Failed to read {self.triangle_count} triangles from {self.name}")
+
+        triangles = values[1:].reshape(self.triangle_count, 4)
+        self.triangle_materials = triangles[:, 0].astype(np.int32)
+        self.triangles = triangles[:, 1:].astype(np.int32)
+
+    def region_permutation_triangles(self) -> dict[tuple[str, str], np.ndarray]:
+        '''Returns the indices of the triangles of each (permutation, region) their materials place them in'''
+        if not self.materials:
+            return {("default", "default"): np.arange(self.triangle_count)}
+
+        keys = [(material.permutation, material.region) for material in self.materials]
+        unique_keys = list(dict.fromkeys(keys))
+        material_groups = np.array([unique_keys.index(key) for key in keys], dtype=np.int64)
+        groups = material_groups[np.clip(self.triangle_materials, 0, len(keys) - 1)]
+        order = np.argsort(groups, kind="stable")
+        split = np.split(order, np.cumsum(np.bincount(groups, minlength=len(unique_keys)))[:-1])
+        return {key: triangle_indices for key, triangle_indices in zip(unique_keys, split) if len(triangle_indices)}
+
+    def to_mesh(self, name="", triangle_indices: np.ndarray | None = None) -> tuple[bpy.types.Mesh, np.ndarray]:
+        '''Builds a mesh from the given triangles, or from every triangle. Returns the mesh and the index of the JMS vertex
+        behind each of its vertices'''
+        from ..managed_blam.connected_geometry import new_triangle_mesh
+        triangles = self.triangles if triangle_indices is None else self.triangles[triangle_indices]
+        triangle_materials = self.triangle_materials if triangle_indices is None else self.triangle_materials[triangle_indices]
+        vertex_indices, mesh_triangles = np.unique(triangles, return_inverse=True)
+        mesh_triangles = mesh_triangles.reshape(-1, 3)
+        mesh = new_triangle_mesh(name or self.name, self.positions[vertex_indices], mesh_triangles)
+
+        loop_vertex_indices = vertex_indices[mesh_triangles.ravel()]
+        for uv_index in range(self.texture_coordinates.shape[1]):
+            uv_layer = mesh.uv_layers.new(name=f"UVMap{uv_index}", do_init=False)
+            uv_layer.data.foreach_set("uv", self.texture_coordinates[loop_vertex_indices, uv_index].ravel())
+
+        mesh.normals_split_custom_set_from_vertices(self.normals[vertex_indices])
+
+        colors = None if self.colors is None else self.colors[vertex_indices]
+        if colors is not None and np.any(colors):
+            vcolor_attribute = mesh.color_attributes.new("Color", 'FLOAT_COLOR', 'POINT')
+            rgba = np.c_[colors, np.ones(len(vertex_indices), dtype=np.float32)]
+            vcolor_attribute.data.foreach_set("color", rgba.ravel())
+
+        if self.materials:
+            used_materials, material_indices = np.unique(np.clip(triangle_materials, 0, len(self.materials) - 1), return_inverse=True)
+            for material_index in used_materials.tolist():
+                mesh.materials.append(self.materials[material_index].ensure_blender_material())
+            mesh.polygons.foreach_set("material_index", material_indices.ravel().astype(np.int32))
+
+        mesh.update()
+        return mesh, vertex_indices
+
+    def set_vertex_weights(self, ob: bpy.types.Object, vertex_indices: np.ndarray | None = None):
+        '''Adds the vertices of the object's mesh to the vertex groups of the nodes that influence them. vertex_indices gives
+        the JMS vertex behind each mesh vertex, as returned by to_mesh. Weights are written as read, with one group.add
+        call per run of vertices sharing a node and weight'''
+        if vertex_indices is None:
+            vertex_indices = np.arange(self.vertex_count)
+        influence_indices = self.influence_indices[vertex_indices]
+        mesh_vertices = np.repeat(np.arange(len(vertex_indices), dtype=np.int64), influence_indices.shape[1])
+        node_indices = influence_indices.ravel().astype(np.int64)
+        weights = self.influence_weights[vertex_indices].ravel().astype(np.float64)
+        valid = (node_indices >= 0) & (node_indices < self.node_count)
+
+        # A vertex can list the same node more than once, those influences add up to a single weight
+        pairs, inverse = np.unique(mesh_vertices[valid] * self.node_count + node_indices[valid], return_inverse=True)
+        weights = np.bincount(inverse.ravel(), weights=weights[valid], minlength=len(pairs))
+        mesh_vertices, node_indices = np.divmod(pairs, self.node_count)
+
+        order = np.lexsort((mesh_vertices, weights, node_indices))
+        mesh_vertices = mesh_vertices[order]
+        node_indices = node_indices[order]
+        weights = weights[order]
+        if len(order):
+            starts = np.flatnonzero(np.r_[True, (node_indices[1:] != node_indices[:-1]) | (weights[1:] != weights[:-1])])
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        ends = np.r_[starts[1:], len(order)]
+
+        groups = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            node_index = int(node_indices[start])
+            group = groups.get(node_index)
+            if group is None:
+                group_name = self.nodes[node_index].name
+                group = groups[node_index] = ob.vertex_groups.get(group_name) or ob.vertex_groups.new(name=group_name)
+            group.add(mesh_vertices[start:end].tolist(), float(weights[start]), 'REPLACE')
@@ -3,13 +3,13 @@
 from collections import defaultdict
 from contextlib import nullcontext
 from enum import Enum, IntEnum
-from math import degrees
 from pathlib import Path
 import math
 import struct
 from typing import cast
 import bpy
 from mathutils import Euler, Matrix, Quaternion, Vector
+import numpy as np
 
 from .frame_event_list import AnimationEvent, DialogueEvent, EffectEvent, FrameEventListTag, Reference, SoundEvent
 
@@ -39,6 +39,7 @@ from .render_model import RenderModelTag
 from . import Tag
 from . import import_transform
 from ..legacy.jma import Node
+from ..export.virtual_geometry import decompose_matrices, inverted_safe_matrices
 from .. import utils
 from ..constants import IK_INFLUENCE_ROUNDING_TOLERANCE
 
@@ -177,6 +178,27 @@ damage_states = "h_ping", "s_ping", "h_kill", "s_kill"
 directions = "front", "left", "right", "back"
 regions = "gut", "chest", "head", "l_arm", "l_hand", "l_leg", "l_foot", "r_arm", "r_hand", "r_leg", "r_foot"
 
+
+def _euler_xyz_z(matrices: np.ndarray) -> np.ndarray:
+    '''Batched equivalent of Matrix.to_euler('XYZ').z for an (..., 4, 4) array. Of the two euler solutions, picks the one
+    with the smaller total angle as Blender does'''
+    basis = matrices[..., :3, :3]
+    norms = np.linalg.norm(basis, axis=-2)
+    norms[norms == 0.0] = 1.0
+    basis = basis / norms[..., None, :]
+    cy = np.hypot(basis[..., 0, 0], basis[..., 1, 0])
+    x1 = np.arctan2(basis[..., 2, 1], basis[..., 2, 2])
+    y1 = np.arctan2(-basis[..., 2, 0], cy)
+    z1 = np.arctan2(basis[..., 1, 0], basis[..., 0, 0])
+    x2 = np.arctan2(-basis[..., 2, 1], -basis[..., 2, 2])
+    y2 = np.arctan2(-basis[..., 2, 0], -cy)
+    z2 = np.arctan2(-basis[..., 1, 0], -basis[..., 0, 0])
+    second = np.abs(x1) + np.abs(y1) + np.abs(z1) > np.abs(x2) + np.abs(y2) + np.abs(z2)
+    z = np.where(second, z2, z1)
+    # Gimbal lock, where Blender sets z to zero
+    z[cy <= 16.0 * np.finfo(np.float32).eps] = 0.0
+    return z
+
 class AnimationType(IntEnum):
     NONE = 0
     BASE = 1
@@ -1152,10 +1174,10 @@ class AnimationTag(Tag):
         pitch_node_index: int,
         yaw_node_index: int,
     ) -> tuple[float, float]:
-        root_rotation = animation_data.rotations[0][frame_index].copy()
+        root_rotation = Quaternion(animation_data.rotations[0, frame_index])
         root_rotation.normalize()
-        pitch_rotation = root_rotation @ animation_data.rotations[pitch_node_index][frame_index]
-        yaw_rotation = root_rotation @ animation_data.rotations[yaw_node_index][frame_index]
+        pitch_rotation = root_rotation @ Quaternion(animation_data.rotations[pitch_node_index, frame_index])
+        yaw_rotation = root_rotation @ Quaternion(animation_data.rotations[yaw_node_index, frame_index])
         pitch_euler = pitch_rotation.to_euler("XYZ")
         yaw_euler = yaw_rotation.to_euler("XYZ")
         return yaw_euler.z, -pitch_euler.y
@@ -1209,18 +1231,18 @@ class AnimationTag(Tag):
 
         if abs(yaw_offset) > 1e-4:
             frame_index = 0
-            root_rotation = animation_data.rotations[0][frame_index].copy()
+            root_rotation = Quaternion(animation_data.rotations[0, frame_index])
             root_rotation.normalize()
             root_inverse = root_rotation.inverted()
-            yaw_world_rotation = root_rotation @ animation_data.rotations[yaw_node_index][frame_index]
+            yaw_world_rotation = root_rotation @ Quaternion(animation_data.rotations[yaw_node_index, frame_index])
             yaw_rotation = root_inverse @ (yaw_offset_rotation @ yaw_world_rotation)
             yaw_rotation.normalize()
-            animation_data.rotations[yaw_node_index][frame_index] = yaw_rotation
+            animation_data.rotations[yaw_node_index, frame_index] = yaw_rotation
 
         for sample_index in range(sample_count):
             frame_index = sample_index + 1
             target_yaw, target_pitch = vertices[sample_index]
-            root_rotation = animation_data.rotations[0][frame_index].copy()
+            root_rotation = Quaternion(animation_data.rotations[0, frame_index])
             root_rotation.normalize()
             root_inverse = root_rotation.inverted()
 
@@ -1230,8 +1252,8 @@ class AnimationTag(Tag):
             yaw_rotation = root_inverse @ desired_yaw_rotation
             pitch_rotation.normalize()
             yaw_rotation.normalize()
-            animation_data.rotations[pitch_node_index][frame_index] = pitch_rotation
-            animation_data.rotations[yaw_node_index][frame_index] = yaw_rotation
+            animation_data.rotations[pitch_node_index, frame_index] = pitch_rotation
+            animation_data.rotations[yaw_node_index, frame_index] = yaw_rotation
 
         max_yaw_residual = 0.0
         max_pitch_residual = 0.0
@@ -1264,24 +1286,27 @@ class AnimationTag(Tag):
 
         return None
 
-    def _node_world_matrix(self, node: Node, frame_transforms: dict, world_cache: dict):
+    def _node_world_matrices(self, node: Node, transforms: np.ndarray, node_indices: dict, world_cache: dict) -> np.ndarray:
+        '''Returns the (frames, 4, 4) world matrices of a node from the (frames, nodes, 4, 4) local matrices of its animation'''
         cached = world_cache.get(node)
         if cached is not None:
             return cached
 
-        matrix = frame_transforms.get(node)
-        if matrix is None:
-            matrix = Matrix.Identity(4)
+        node_index = node_indices.get(node)
+        if node_index is None or node_index >= transforms.shape[1]:
+            matrices = np.broadcast_to(np.identity(4), (len(transforms), 4, 4))
+        else:
+            matrices = transforms[:, node_index]
 
         if node.parent is not None:
-            world_matrix = self._node_world_matrix(node.parent, frame_transforms, world_cache) @ matrix
+            world_matrices = self._node_world_matrices(node.parent, transforms, node_indices, world_cache) @ matrices
         else:
-            world_matrix = matrix.copy()
+            world_matrices = matrices.copy()
 
-        world_cache[node] = world_matrix
-        return world_matrix
+        world_cache[node] = world_matrices
+        return world_matrices
 
-    def _infer_wrap_events(self, tag_animation: Animation, blender_animation, armature: bpy.types.Object, nodes: list[Node], transforms: dict, node_usages: dict):
+    def _infer_wrap_events(self, tag_animation: Animation, blender_animation, armature: bpy.types.Object, nodes: list[Node], transforms: np.ndarray, node_usages: dict):
         if not tag_animation.is_pose_overlay:
             return 0
 
@@ -1321,21 +1346,18 @@ class AnimationTag(Tag):
         first_frame = blender_animation.frame_start
         reset = True
 
-        for frame_index in sorted(transforms):
+        node_indices = {node: node_index for node_index, node in enumerate(nodes)}
+        world_cache = {}
+        pedestal_world = self._node_world_matrices(pedestal_node, transforms, node_indices, world_cache)
+        target_world = self._node_world_matrices(yaw_node, transforms, node_indices, world_cache)
+        raw_yaws = np.degrees(_euler_xyz_z(inverted_safe_matrices(pedestal_world) @ target_world)).tolist()
+
+        for frame_index, raw_yaw in enumerate(raw_yaws, start=1):
             if frame_index == first_frame:
                 continue
             if frame_index in wrapped_frames:
                 continue
 
-            frame_transforms = transforms[frame_index]
-            world_cache = {}
-            pedestal_world = self._node_world_matrix(pedestal_node, frame_transforms, world_cache)
-            target_world = self._node_world_matrix(yaw_node, frame_transforms, world_cache)
-            relative = pedestal_world.inverted_safe() @ target_world
-
-            euler = relative.to_euler('XYZ')
-            raw_yaw = degrees(euler.z)
-
             if abs(raw_yaw) > 90 + 1e-3:
                 if reset:
                     current_name = "Wrapped Left" if raw_yaw > 0.0 else "Wrapped Right"
@@ -1664,13 +1686,13 @@ class AnimationTag(Tag):
 
         if 0 <= data_index < len(codec.scales):
             values = codec.scales[data_index]
-            if values:
-                return [float(value) for value in values]
+            if len(values):
+                return values.tolist()
 
         if 0 <= data_index < len(codec.translations):
             values = codec.translations[data_index]
-            if values:
-                return [float(value.x) for value in values]
+            if len(values):
+                return values[:, 0].tolist()
 
         return None
 
@@ -3128,9 +3150,9 @@ class AnimationTag(Tag):
 
     def _animation_data_frame_channels(self, animation_data, frame_index: int) -> FrameChannels:
         return FrameChannels(
-            [animation_data.translations[node_index][frame_index].copy() for node_index in range(animation_data.node_count)],
-            [animation_data.rotations[node_index][frame_index].copy() for node_index in range(animation_data.node_count)],
-            [animation_data.scales[node_index][frame_index] for node_index in range(animation_data.node_count)],
+            [Vector(translation) for translation in animation_data.translations[:, frame_index]],
+            [Quaternion(rotation) for rotation in animation_data.rotations[:, frame_index]],
+            [float(scale) for scale in animation_data.scales[:, frame_index]],
         )
 
     def _write_animation_data_frame_channels(
@@ -3141,9 +3163,9 @@ class AnimationTag(Tag):
         node_indices: list[int],
     ) -> None:
         for node_index in node_indices:
-            animation_data.translations[node_index][frame_index] = frame.translations[node_index]
-            animation_data.rotations[node_index][frame_index] = frame.rotations[node_index]
-            animation_data.scales[node_index][frame_index] = frame.scales[node_index]
+            animation_data.translations[node_index, frame_index] = frame.translations[node_index]
+            animation_data.rotations[node_index, frame_index] = frame.rotations[node_index]
+            animation_data.scales[node_index, frame_index] = frame.scales[node_index]
 
     def _apply_object_space_delta_to_frame(
         self,
@@ -3474,17 +3496,17 @@ class AnimationTag(Tag):
         animation_cache[index] = animation_data
         return animation_data
 
-    def _animation_transforms(self, tag_animation, defaults, overlay_defaults, nodes, graph, shared_static_codec, resource_cache, animation_cache, all_tag_animations):
+    def _animation_transforms(self, tag_animation, defaults, overlay_defaults, nodes, graph, shared_static_codec, resource_cache, animation_cache, all_tag_animations) -> np.ndarray:
+        '''Returns the (frames, nodes, 4, 4) armature space matrices of the animation. Same result as calling
+        import_transform.armature_bone_matrix on every node matrix'''
         animation_data = self._build_animation(tag_animation, defaults, overlay_defaults, graph, shared_static_codec, resource_cache, animation_cache, all_tag_animations)
-        transforms = {}
-        for frame_index, frame_matrices in enumerate(animation_data.frame_matrices(), start=1):
-            frame_transforms = {}
-            for node, matrix in zip(nodes, frame_matrices):
-                matrix = import_transform.armature_bone_matrix(matrix, root=node.parent is None)
-                frame_transforms[node] = matrix
-            transforms[frame_index] = frame_transforms
-        return transforms
-        
+        matrices = animation_data.local_matrices()[:, :len(nodes)]
+        matrices[..., :3, 3] *= import_transform.scale_factor()
+        root_indices = [node_index for node_index, node in enumerate(nodes[:matrices.shape[1]]) if node.parent is None]
+        if root_indices:
+            matrices[:, root_indices] = np.array(import_transform.rotation_matrix()) @ matrices[:, root_indices]
+        return matrices
+
     def _get_animation_name_from_index(self, index):
         if index > self.block_animations.Elements.Count - 1:
             return ""
@@ -3912,9 +3934,9 @@ class AnimationTag(Tag):
                 track.object = armature
                 track.action = action
                 transforms = self._animation_transforms(tag_animation, defaults, overlay_defaults, native_nodes, graph, shared_static_codec, native_resource_cache,native_animation_cache, tag_animations)
-                if transforms:
-                    blender_animation.frame_end = max(blender_animation.frame_end, max(transforms))
-                self._to_armature_action(transforms, armature, action, native_nodes, {}, set(), blender_animation.pose_overlay)
+                if len(transforms):
+                    blender_animation.frame_end = max(blender_animation.frame_end, len(transforms))
+                self._to_armature_action(transforms, armature, action, native_nodes, None, set(), blender_animation.pose_overlay)
                 actions.append(action)
                 action.frame_end = blender_animation.frame_end
                 self._apply_regular_animation_events(tag_animation, blender_animation, armature, actions)
@@ -3943,16 +3965,17 @@ class AnimationTag(Tag):
         
         return actions, animations
     
-    def _to_armature_action(self, transforms, armature: bpy.types.Object, action: bpy.types.Action, nodes: list[Node], base_transforms: dict, nodes_with_animations, pose_overlay=False):
+    def _to_armature_action(self, transforms: np.ndarray, armature: bpy.types.Object, action: bpy.types.Action, nodes: list[Node], base_transforms: np.ndarray | None, nodes_with_animations, pose_overlay=False):
+        '''Keys every node from the (frames, nodes, 4, 4) array returned by _animation_transforms. base_transforms, if given,
+        is an array of the same layout that is looped over the animation and applied to nodes without animation. Each
+        fcurve gets all of its keyframes in one foreach_set call'''
         fcurves = utils.get_fcurves(action, armature.animation_data.last_slot_identifier)
         fcurves.clear()
-        
-        key_options = {'FAST'}
-        
+
         armature_bone_names = {utils.remove_node_prefix(bone.name): bone for bone in armature.pose.bones}
         valid_nodes = []
-        
-        for node in nodes:
+
+        for node_index, node in enumerate(nodes):
             node.pose_bone = armature_bone_names.get(utils.remove_node_prefix(node.name))
             if node.pose_bone is None:
                 continue
@@ -3966,10 +3989,10 @@ class AnimationTag(Tag):
             node.fc_sca_x = fcurves.new(data_path=f'pose.bones["{node.name}"].scale', index=0)
             node.fc_sca_y = fcurves.new(data_path=f'pose.bones["{node.name}"].scale', index=1)
             node.fc_sca_z = fcurves.new(data_path=f'pose.bones["{node.name}"].scale', index=2)
-            valid_nodes.append(node)
-            
+            valid_nodes.append((node_index, node))
+
         bone_dict = {}
-        bones_ordered = [node.pose_bone for node in valid_nodes]
+        bones_ordered = [node.pose_bone for _, node in valid_nodes]
         for bone in bones_ordered:
             if bone.parent:
                 parent = bone_dict.get(bone.parent)
@@ -3979,52 +4002,52 @@ class AnimationTag(Tag):
                     bone_dict[bone] = parent + 1
             else:
                 bone_dict[bone] = 0
-                
+
         bones_ordered.sort(key=lambda x: bone_dict[x])
-        
+
         bone_base_matrices = {}
         for bone in bones_ordered:
             if bone.parent:
                 bone_base_matrices[bone] = bone.parent.matrix.inverted_safe() @ bone.matrix
             else:
                 bone_base_matrices[bone] = bone.matrix
-        
-        base_repeats = 0
-        
-        for frame_idx, nodes_transforms in transforms.items():
-            for node in valid_nodes:
-                bind_inv = bone_base_matrices[node.pose_bone].inverted_safe()
-                repl_matrix = nodes_transforms[node]
-                transform_matrix = bind_inv @ repl_matrix
-                base_matrix = Matrix.Identity(4)
-                if base_transforms:
-                    base_frame_idx = frame_idx - (len(base_transforms) * base_repeats)
-                    if base_frame_idx > len(base_transforms):
-                        base_repeats += 1
-                        base_frame_idx = frame_idx - (len(base_transforms) * base_repeats)
-                    base_nodes_transforms = base_transforms[base_frame_idx]
-                    if base_nodes_transforms is not None:
-                        if node not in nodes_with_animations:
-                            base_matrix = base_nodes_transforms[node]
-                            
-                            delta_base = bind_inv @ base_matrix
 
-                            transform_matrix = delta_base @ transform_matrix
-
-                loc, rot, sca = transform_matrix.decompose()
+        frame_count = len(transforms)
+        if frame_count == 0:
+            return
 
-                node.fc_loc_x.keyframe_points.insert(frame_idx, loc.x, options=key_options)
-                node.fc_loc_y.keyframe_points.insert(frame_idx, loc.y, options=key_options)
-                node.fc_loc_z.keyframe_points.insert(frame_idx, loc.z, options=key_options)
-                
-                node.fc_rot_w.keyframe_points.insert(frame_idx, rot.w, options=key_options)
-                node.fc_rot_x.keyframe_points.insert(frame_idx, rot.x, options=key_options)
-                node.fc_rot_y.keyframe_points.insert(frame_idx, rot.y, options=key_options)
-                node.fc_rot_z.keyframe_points.insert(frame_idx, rot.z, options=key_options)
-                
-                node.fc_sca_x.keyframe_points.insert(frame_idx, sca.x, options=key_options)
-                node.fc_sca_y.keyframe_points.insert(frame_idx, sca.y, options=key_options)
-                node.fc_sca_z.keyframe_points.insert(frame_idx, sca.z, options=key_options)
+        has_base = base_transforms is not None and len(base_transforms) > 0
+        if has_base:
+            # The base animation loops for as long as this one runs
+            base_frames = np.arange(frame_count) % len(base_transforms)
+
+        keyframe_co = np.empty((frame_count, 2), dtype=np.float32)
+        keyframe_co[:, 0] = np.arange(1, frame_count + 1)
+
+        node_indices = np.array([node_index for node_index, _ in valid_nodes], dtype=np.int64)
+        bind_inverses = inverted_safe_matrices(np.array([bone_base_matrices[node.pose_bone] for _, node in valid_nodes], dtype=np.float64).reshape(-1, 4, 4))
+        transform_matrices = bind_inverses @ transforms[:, node_indices]
+        if has_base:
+            based = np.array([node not in nodes_with_animations for _, node in valid_nodes], dtype=bool)
+            delta_base = bind_inverses[based] @ base_transforms[base_frames][:, node_indices[based]]
+            transform_matrices[:, based] = delta_base @ transform_matrices[:, based]
+
+        channels = np.empty(transform_matrices.shape[:2] + (10,))
+        decompose_matrices(transform_matrices, channels)
+        # xyzw to blender's wxyz
+        channels[..., 3:7] = np.roll(channels[..., 3:7], 1, axis=-1)
+
+        for (_, node), node_channels in zip(valid_nodes, channels.swapaxes(0, 1)):
+            node_fcurves = (
+                node.fc_loc_x, node.fc_loc_y, node.fc_loc_z,
+                node.fc_rot_w, node.fc_rot_x, node.fc_rot_y, node.fc_rot_z,
+                node.fc_sca_x, node.fc_sca_y, node.fc_sca_z,
+            )
+            for fcurve, values in zip(node_fcurves, node_channels.T):
+                keyframe_co[:, 1] = values
+                fcurve.keyframe_points.add(frame_count)
+                fcurve.keyframe_points.foreach_set("co", keyframe_co.ravel())
+                fcurve.update()
 
     def _get_base_pose(self, animation_nodes, nodes, node_base_matrices: dict):
         for idx, (an, node) in enumerate(zip(animation_nodes, nodes)):
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import IntEnum
-import math
 import struct
 
-from mathutils import Euler, Matrix, Quaternion, Vector
+from mathutils import Euler, Quaternion, Vector
+import numpy as np
 
 
 class AnimationCodecType(IntEnum):
@@ -37,17 +37,44 @@ def _identity_quaternion() -> Quaternion:
 def _zero_vector() -> Vector:
     return Vector((0.0, 0.0, 0.0))
 
-def _normalize_quaternion(x: float, y: float, z: float, w: float) -> Quaternion:
-    length = math.sqrt((w * w) + (x * x) + (y * y) + (z * z))
-    if length <= 1e-8:
-        return _identity_quaternion()
-    inv = 1.0 / length
-    return Quaternion((w * inv, x * inv, y * inv, z * inv))
-
+IDENTITY_QUATERNION = np.array((1.0, 0.0, 0.0, 0.0))
+
+def _normalized_xyzw(xyzw: np.ndarray) -> np.ndarray:
+    '''Normalizes (..., 4) xyzw quaternions, keeping xyzw order. Zero length quaternions become identity'''
+    length = np.sqrt(np.sum(xyzw * xyzw, axis=-1, keepdims=True))
+    valid = length > 1e-8
+    return np.where(valid, xyzw / np.where(valid, length, 1.0), IDENTITY_QUATERNION[[1, 2, 3, 0]])
+
+def _normalized_quaternions(xyzw: np.ndarray) -> np.ndarray:
+    '''Normalizes (..., 4) xyzw quaternions and returns them in blender's wxyz order'''
+    return np.roll(_normalized_xyzw(xyzw), 1, axis=-1)
+
+def _quaternion_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    '''Broadcasting equivalent of Quaternion a @ b for wxyz arrays'''
+    aw, ax, ay, az = np.moveaxis(a, -1, 0)
+    bw, bx, by, bz = np.moveaxis(b, -1, 0)
+    return np.stack((
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ), axis=-1)
+
+def _lerp(a: np.ndarray, b: np.ndarray, t: np.ndarray) -> np.ndarray:
+    t = t.reshape(t.shape + (1,) * (a.ndim - t.ndim))
+    return a + ((b - a) * t)
 
-def _signed_int16(value: int) -> int:
-    value &= 0xFFFF
-    return value - 0x10000 if value & 0x8000 else value
+def _slerp(a: np.ndarray, b: np.ndarray, t: np.ndarray) -> np.ndarray:
+    '''Row wise Quaternion.slerp. Takes the shortest path and falls back to a linear blend for near identical rotations'''
+    cosom = np.sum(a * b, axis=-1)
+    b = np.where((cosom < 0.0)[:, np.newaxis], -b, b)
+    cosom = np.abs(cosom)
+    linear = (1.0 - cosom) <= 0.0001
+    omega = np.arccos(np.clip(cosom, -1.0, 1.0))
+    sinom = np.where(linear, 1.0, np.sin(omega))
+    weight_a = np.where(linear, 1.0 - t, np.sin((1.0 - t) * omega) / sinom)
+    weight_b = np.where(linear, t, np.sin(t * omega) / sinom)
+    return (a * weight_a[:, np.newaxis]) + (b * weight_b[:, np.newaxis])
 
 class BinaryReader:
     def __init__(self, data: bytes):
@@ -89,6 +116,23 @@ class BinaryReader:
     def read_f32(self) -> float:
         return self._read("<f")
 
+    def read_array(self, dtype: str, count: int) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        end = self.offset + (dtype.itemsize * count)
+        if count < 0 or end > len(self.data):
+            raise ValueError("Unexpected end of animation resource data")
+        values = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset = end
+        return values
+
+    def read_components(self, dtype: str, count: int, width: int) -> np.ndarray:
+        '''Reads count tuples of width components as a (count, width) float array. Signed 16-bit components are
+        dequantized by 0x7FFF'''
+        values = self.read_array(dtype, count * width).astype(np.float64).reshape(count, width)
+        if np.dtype(dtype).kind == "i":
+            values /= float(0x7FFF)
+        return values
+
 
 @dataclass
 class DefaultAnimationNode:
@@ -111,6 +155,20 @@ class SharedStaticCodecData:
     rotations: list[tuple[int, int, int, int]]
     translations: list[Vector]
     scales: list[float]
+    _arrays: tuple[np.ndarray, np.ndarray, np.ndarray] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def as_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''Returns the shared rotations (wxyz), translations and scales as arrays ready for lookup. These are converted once
+        and reused by every animation in the graph'''
+        if self._arrays is None:
+            rotations = np.array(self.rotations, dtype=np.float64).reshape(-1, 4) / float(0x7FFF)
+            translations = np.array([tuple(value) for value in self.translations], dtype=np.float64).reshape(-1, 3) * 100.0
+            self._arrays = (
+                _normalized_quaternions(rotations),
+                translations,
+                np.array(self.scales, dtype=np.float64),
+            )
+        return self._arrays
 
 
 @dataclass
@@ -121,10 +179,12 @@ class MovementData:
 
 @dataclass
 class AnimationData:
+    '''Per node, per frame channels. translations are (nodes, frames, 3), rotations (nodes, frames, 4) in wxyz order and
+    scales (nodes, frames)'''
     frame_count: int
-    translations: list[list[Vector]]
-    rotations: list[list[Quaternion]]
-    scales: list[list[float]]
+    translations: np.ndarray
+    rotations: np.ndarray
+    scales: np.ndarray
     translation_flags: list[bool]
     rotation_flags: list[bool]
     scale_flags: list[bool]
@@ -137,28 +197,48 @@ class AnimationData:
         if self.frame_count < 1:
             return FrameChannels([], [], [])
         return FrameChannels(
-            [self.translations[node_index][0].copy() for node_index in range(self.node_count)],
-            [self.rotations[node_index][0].copy() for node_index in range(self.node_count)],
-            [self.scales[node_index][0] for node_index in range(self.node_count)],
+            [Vector(translation) for translation in self.translations[:, 0]],
+            [Quaternion(rotation) for rotation in self.rotations[:, 0]],
+            [float(scale) for scale in self.scales[:, 0]],
         )
 
-    def frame_matrices(self) -> list[list[Matrix]]:
-        frames: list[list[Matrix]] = []
-        for frame_index in range(self.frame_count):
-            frame: list[Matrix] = []
-            for node_index in range(self.node_count):
-                frame.append(
-                    Matrix.LocRotScale(
-                        self.translations[node_index][frame_index],
-                        self.rotations[node_index][frame_index],
-                        Vector.Fill(3, self.scales[node_index][frame_index]),
-                    )
-                )
-            frames.append(frame)
-        return frames
+    def local_matrices(self) -> np.ndarray:
+        '''Returns the (frames, nodes, 4, 4) local matrix of every node. Equivalent to Matrix.LocRotScale with a uniform scale'''
+        w, x, y, z = np.moveaxis(self.rotations, -1, 0)
+        matrices = np.zeros(self.rotations.shape[:2] + (4, 4))
+        matrices[..., 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+        matrices[..., 0, 1] = 2.0 * (x * y - w * z)
+        matrices[..., 0, 2] = 2.0 * (x * z + w * y)
+        matrices[..., 1, 0] = 2.0 * (x * y + w * z)
+        matrices[..., 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+        matrices[..., 1, 2] = 2.0 * (y * z - w * x)
+        matrices[..., 2, 0] = 2.0 * (x * z - w * y)
+        matrices[..., 2, 1] = 2.0 * (y * z + w * x)
+        matrices[..., 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+        matrices[..., :3, :3] *= self.scales[..., np.newaxis, np.newaxis]
+        matrices[..., :3, 3] = self.translations
+        matrices[..., 3, 3] = 1.0
+        return matrices.swapaxes(0, 1)
+
+
+def _split_tracks(values: np.ndarray, counts: list[int]) -> list[np.ndarray]:
+    '''Splits values read back to back for several nodes into one array per node'''
+    if not counts:
+        return []
+    return np.split(values, np.cumsum(counts)[:-1])
+
+
+def _shared_lookup(values: np.ndarray, indices: np.ndarray, default) -> np.ndarray:
+    result = np.empty((len(indices),) + values.shape[1:])
+    result[:] = default
+    valid = (indices >= 0) & (indices < len(values))
+    result[valid] = values[indices[valid]]
+    return result
 
 
 class CodecBase:
+    '''Codec tracks are kept per node. Each entry of rotations is a (keys, 4) wxyz array, translations (keys, 3) and
+    scales (keys,), with the matching keyframe numbers in the *_keyframes lists'''
     def __init__(self, frame_count: int):
         self.frame_count = frame_count
         self.codec = AnimationCodecType.NO_COMPRESSION
@@ -173,12 +253,12 @@ class CodecBase:
         self.rotated_node_block_size = 0
         self.translated_node_block_size = 0
         self.scaled_node_block_size = 0
-        self.rotation_keyframes: list[list[int]] = []
-        self.translation_keyframes: list[list[int]] = []
-        self.scale_keyframes: list[list[int]] = []
-        self.rotations: list[list[Quaternion]] = []
-        self.translations: list[list[Vector]] = []
-        self.scales: list[list[float]] = []
+        self.rotation_keyframes: list[np.ndarray] = []
+        self.translation_keyframes: list[np.ndarray] = []
+        self.scale_keyframes: list[np.ndarray] = []
+        self.rotations: list[np.ndarray] = []
+        self.translations: list[np.ndarray] = []
+        self.scales: list[np.ndarray] = []
 
     def read_header(self, reader: BinaryReader):
         self.codec = AnimationCodecType(reader.read_u8())
@@ -201,23 +281,11 @@ class UncompressedStaticDataCodec(CodecBase):
         self.translated_node_block_size = reader.read_u32()
         self.scaled_node_block_size = reader.read_u32()
 
-        self.rotations = []
-        for _ in range(self.rotated_node_count):
-            x = reader.read_s16() / float(0x7FFF)
-            y = reader.read_s16() / float(0x7FFF)
-            z = reader.read_s16() / float(0x7FFF)
-            w = reader.read_s16() / float(0x7FFF)
-            self.rotations.append([_normalize_quaternion(x, y, z, w)])
-
-        self.translations = []
-        for _ in range(self.translated_node_count):
-            self.translations.append(
-                [Vector((reader.read_f32() * 100.0, reader.read_f32() * 100.0, reader.read_f32() * 100.0))]
-            )
-
-        self.scales = []
-        for _ in range(self.scaled_node_count):
-            self.scales.append([reader.read_f32()])
+        rotations = _normalized_quaternions(reader.read_components("<i2", self.rotated_node_count, 4))
+        self.rotations = list(rotations[:, np.newaxis])
+        translations = reader.read_components("<f4", self.translated_node_count, 3) * 100.0
+        self.translations = list(translations[:, np.newaxis])
+        self.scales = list(reader.read_components("<f4", self.scaled_node_count, 1))
 
 
 class SharedStaticDataCodec(UncompressedStaticDataCodec):
@@ -233,39 +301,18 @@ class SharedStaticDataCodec(UncompressedStaticDataCodec):
         self.translated_node_block_size = reader.read_u32()
         self.scaled_node_block_size = reader.read_u32()
 
-        self.rotations = []
-        for _ in range(self.rotated_node_count):
-            block_index = reader.read_s16()
-            if 0 <= block_index < len(self.shared_static_data.rotations):
-                i, j, k, w = self.shared_static_data.rotations[block_index]
-                quat = _normalize_quaternion(
-                    i / float(0x7FFF),
-                    j / float(0x7FFF),
-                    k / float(0x7FFF),
-                    w / float(0x7FFF),
-                )
-            else:
-                quat = _identity_quaternion()
-            self.rotations.append([quat])
-
-        self.translations = []
-        for _ in range(self.translated_node_count):
-            block_index = reader.read_s16()
-            if 0 <= block_index < len(self.shared_static_data.translations):
-                value = self.shared_static_data.translations[block_index].copy()
-                value *= 100.0
-            else:
-                value = _zero_vector()
-            self.translations.append([value])
-
-        self.scales = []
-        for _ in range(self.scaled_node_count):
-            block_index = reader.read_s16()
-            scale = self.shared_static_data.scales[block_index] if 0 <= block_index < len(self.shared_static_data.scales) else 1.0
-            self.scales.append([scale])
+        shared_rotations, shared_translations, shared_scales = self.shared_static_data.as_arrays()
+        rotations = _shared_lookup(shared_rotations, reader.read_array("<i2", self.rotated_node_count), IDENTITY_QUATERNION)
+        self.rotations = list(rotations[:, np.newaxis])
+        translations = _shared_lookup(shared_translations, reader.read_array("<i2", self.translated_node_count), 0.0)
+        self.translations = list(translations[:, np.newaxis])
+        scales = _shared_lookup(shared_scales, reader.read_array("<i2", self.scaled_node_count), 1.0)
+        self.scales = list(scales[:, np.newaxis])
 
 
 class QuantizedRotationOnlyCodec(CodecBase):
+    rotation_type = "<i2"
+
     def read(self, reader: BinaryReader):
         super().read(reader)
         self.translation_data_offset = reader.read_u32()
@@ -277,88 +324,26 @@ class QuantizedRotationOnlyCodec(CodecBase):
         self.rotation_data_offset = reader.tell()
         self.translation_data_offset = self.rotation_data_offset + (self.rotated_node_block_size * self.rotated_node_count)
         self.scale_data_offset = self.translation_data_offset + (self.translated_node_block_size * self.translated_node_count)
-        all_frames = list(range(self.frame_count))
-        self.rotation_keyframes = [all_frames[:] for _ in range(self.rotated_node_count)]
-        self.translation_keyframes = [all_frames[:] for _ in range(self.translated_node_count)]
-        self.scale_keyframes = [all_frames[:] for _ in range(self.scaled_node_count)]
+        all_frames = np.arange(self.frame_count)
+        self.rotation_keyframes = [all_frames] * self.rotated_node_count
+        self.translation_keyframes = [all_frames] * self.translated_node_count
+        self.scale_keyframes = [all_frames] * self.scaled_node_count
 
         reader.seek(self.rotation_data_offset)
-        self.rotations = []
-        for _ in range(self.rotated_node_count):
-            node_rotations: list[Quaternion] = []
-            for _frame in range(self.frame_count):
-                x = reader.read_s16() / float(0x7FFF)
-                y = reader.read_s16() / float(0x7FFF)
-                z = reader.read_s16() / float(0x7FFF)
-                w = reader.read_s16() / float(0x7FFF)
-                node_rotations.append(_normalize_quaternion(x, y, z, w))
-            self.rotations.append(node_rotations)
+        rotations = reader.read_components(self.rotation_type, self.rotated_node_count * self.frame_count, 4)
+        self.rotations = list(_normalized_quaternions(rotations).reshape(self.rotated_node_count, self.frame_count, 4))
 
         reader.seek(self.translation_data_offset)
-        self.translations = []
-        for _ in range(self.translated_node_count):
-            node_translations: list[Vector] = []
-            for _frame in range(self.frame_count):
-                node_translations.append(
-                    Vector((reader.read_f32() * 100.0, reader.read_f32() * 100.0, reader.read_f32() * 100.0))
-                )
-            self.translations.append(node_translations)
+        translations = reader.read_components("<f4", self.translated_node_count * self.frame_count, 3) * 100.0
+        self.translations = list(translations.reshape(self.translated_node_count, self.frame_count, 3))
 
         reader.seek(self.scale_data_offset)
-        self.scales = []
-        for _ in range(self.scaled_node_count):
-            node_scales: list[float] = []
-            for _frame in range(self.frame_count):
-                node_scales.append(reader.read_f32())
-            self.scales.append(node_scales)
+        scales = reader.read_components("<f4", self.scaled_node_count * self.frame_count, 1)
+        self.scales = list(scales.reshape(self.scaled_node_count, self.frame_count))
 
 
 class BlendScreenCodec(QuantizedRotationOnlyCodec):
-    def read(self, reader: BinaryReader):
-        super(QuantizedRotationOnlyCodec, self).read(reader)
-        self.translation_data_offset = reader.read_u32()
-        self.scale_data_offset = reader.read_u32()
-        self.rotated_node_block_size = reader.read_u32()
-        self.translated_node_block_size = reader.read_u32()
-        self.scaled_node_block_size = reader.read_u32()
-
-        self.rotation_data_offset = reader.tell()
-        self.translation_data_offset = self.rotation_data_offset + (self.rotated_node_block_size * self.rotated_node_count)
-        self.scale_data_offset = self.translation_data_offset + (self.translated_node_block_size * self.translated_node_count)
-        all_frames = list(range(self.frame_count))
-        self.rotation_keyframes = [all_frames[:] for _ in range(self.rotated_node_count)]
-        self.translation_keyframes = [all_frames[:] for _ in range(self.translated_node_count)]
-        self.scale_keyframes = [all_frames[:] for _ in range(self.scaled_node_count)]
-
-        reader.seek(self.rotation_data_offset)
-        self.rotations = []
-        for _ in range(self.rotated_node_count):
-            node_rotations: list[Quaternion] = []
-            for _frame in range(self.frame_count):
-                x = reader.read_f32()
-                y = reader.read_f32()
-                z = reader.read_f32()
-                w = reader.read_f32()
-                node_rotations.append(_normalize_quaternion(x, y, z, w))
-            self.rotations.append(node_rotations)
-
-        reader.seek(self.translation_data_offset)
-        self.translations = []
-        for _ in range(self.translated_node_count):
-            node_translations: list[Vector] = []
-            for _frame in range(self.frame_count):
-                node_translations.append(
-                    Vector((reader.read_f32() * 100.0, reader.read_f32() * 100.0, reader.read_f32() * 100.0))
-                )
-            self.translations.append(node_translations)
-
-        reader.seek(self.scale_data_offset)
-        self.scales = []
-        for _ in range(self.scaled_node_count):
-            node_scales: list[float] = []
-            for _frame in range(self.frame_count):
-                node_scales.append(reader.read_f32())
-            self.scales.append(node_scales)
+    rotation_type = "<f4"
 
 
 class KeyframeLightlyQuantizedCodec(CodecBase):
@@ -379,58 +364,56 @@ class KeyframeLightlyQuantizedCodec(CodecBase):
         self.scale_data_offset = position + reader.read_u32()
         reader.read_u32()
 
-        for _ in range(self.rotated_node_count):
-            reader.read_u32()
-        for _ in range(self.translated_node_count):
-            reader.read_u32()
-        for _ in range(self.scaled_node_count):
-            reader.read_u32()
+        reader.skip(4 * (self.rotated_node_count + self.translated_node_count + self.scaled_node_count))
 
-        self.rotation_keyframes = [self._read_keyframe_data(reader) for _ in range(self.rotated_node_count)]
-        self.translation_keyframes = [self._read_keyframe_data(reader) for _ in range(self.translated_node_count)]
-        self.scale_keyframes = [self._read_keyframe_data(reader) for _ in range(self.scaled_node_count)]
+        keyframes = self._read_keyframe_data(
+            reader, self.rotated_node_count + self.translated_node_count + self.scaled_node_count
+        )
+        self.rotation_keyframes = keyframes[:self.rotated_node_count]
+        self.translation_keyframes = keyframes[self.rotated_node_count:self.rotated_node_count + self.translated_node_count]
+        self.scale_keyframes = keyframes[self.rotated_node_count + self.translated_node_count:]
 
         reader.seek(self.rotation_data_offset)
-        self.rotations = []
-        for keyframes in self.rotation_keyframes:
-            node_rotations: list[Quaternion] = []
-            for _ in range(len(keyframes)):
-                x = reader.read_s16() / float(0x7FFF)
-                y = reader.read_s16() / float(0x7FFF)
-                z = reader.read_s16() / float(0x7FFF)
-                w = reader.read_s16() / float(0x7FFF)
-                node_rotations.append(_normalize_quaternion(x, y, z, w))
-            self.rotations.append(node_rotations)
+        counts = [len(keyframes) for keyframes in self.rotation_keyframes]
+        rotations = _normalized_quaternions(reader.read_components("<i2", sum(counts), 4))
+        self.rotations = _split_tracks(rotations, counts)
 
         self.translations = []
         if self.translation_keyframes:
             reader.seek(self.translation_data_offset)
-            for keyframes in self.translation_keyframes:
-                node_translations: list[Vector] = []
-                for _ in range(len(keyframes)):
-                    node_translations.append(
-                        Vector((reader.read_f32() * 100.0, reader.read_f32() * 100.0, reader.read_f32() * 100.0))
-                    )
-                self.translations.append(node_translations)
+            counts = [len(keyframes) for keyframes in self.translation_keyframes]
+            translations = reader.read_components("<f4", sum(counts), 3) * 100.0
+            self.translations = _split_tracks(translations, counts)
 
         self.scales = []
         if self.scale_keyframes:
             reader.seek(self.scale_data_offset)
-            for keyframes in self.scale_keyframes:
-                node_scales: list[float] = []
-                for _ in range(len(keyframes)):
-                    node_scales.append(reader.read_f32())
-                self.scales.append(node_scales)
-
-    def _read_keyframe_data(self, reader: BinaryReader) -> list[int]:
-        keyframes: list[int] = []
-        while True:
-            value = reader.read_u8() if self.key_size == 1 else reader.read_u16()
-            if not keyframes or (keyframes[-1] <= value <= self.frame_count):
-                keyframes.append(value)
-                continue
-            reader.skip(-self.key_size)
-            return keyframes
+            counts = [len(keyframes) for keyframes in self.scale_keyframes]
+            self.scales = _split_tracks(reader.read_components("<f4", sum(counts), 1)[:, 0], counts)
+
+    def _read_keyframe_data(self, reader: BinaryReader, track_count: int) -> list[np.ndarray]:
+        '''Reads the keyframe lists of track_count tracks stored back to back. A list ends at the first key that goes
+        backwards or past the end of the animation, that key starts the next list'''
+        if track_count <= 0:
+            return []
+
+        position = reader.tell()
+        key_count = (len(reader.data) - position) // self.key_size
+        keys = reader.read_array("<u1" if self.key_size == 1 else "<u2", key_count).astype(np.int64)
+        breaks = np.flatnonzero((keys[1:] < keys[:-1]) | (keys[1:] > self.frame_count)) + 1
+
+        tracks: list[np.ndarray] = []
+        start = 0
+        for _ in range(track_count):
+            break_index = np.searchsorted(breaks, start, side="right")
+            if break_index == len(breaks):
+                raise ValueError("Unexpected end of animation resource data")
+            end = int(breaks[break_index])
+            tracks.append(keys[start:end])
+            start = end
+
+        reader.seek(position + (start * self.key_size))
+        return tracks
 
 
 class ReverseKeyframeLightlyQuantizedCodec(KeyframeLightlyQuantizedCodec):
@@ -459,14 +442,15 @@ class CurveCodec(CodecBase):
         self.total_compressed_size = reader.read_u32()
         reader.read_u32()
 
-        self.rotation_keyframes = [list(range(self.frame_count)) for _ in range(self.rotated_node_count)]
-        self.translation_keyframes = [list(range(self.frame_count)) for _ in range(self.translated_node_count)]
-        self.scale_keyframes = [list(range(self.frame_count)) for _ in range(self.scaled_node_count)]
-        self.rotations = [[] for _ in range(self.rotated_node_count)]
-        self.translations = [[] for _ in range(self.translated_node_count)]
-        self.scales = [[] for _ in range(self.scaled_node_count)]
+        all_frames = np.arange(self.frame_count)
+        self.rotation_keyframes = [all_frames] * self.rotated_node_count
+        self.translation_keyframes = [all_frames] * self.translated_node_count
+        self.scale_keyframes = [all_frames] * self.scaled_node_count
+        self.rotations = [None] * self.rotated_node_count
+        self.translations = [None] * self.translated_node_count
+        self.scales = [None] * self.scaled_node_count
 
-        rotation_offsets = [reader.read_u32() for _ in range(self.rotated_node_count)]
+        rotation_offsets = reader.read_array("<u4", self.rotated_node_count).tolist()
         for node_index, node_offset in enumerate(rotation_offsets):
             reader.seek(position + self.payload_data_offset + node_offset)
             reader.read_u16()
@@ -474,12 +458,12 @@ class CurveCodec(CodecBase):
             flags = reader.read_u8()
             reader.read_u8()
             reader.read_s16()
-            keyframes = self._read_curve_keyframe_data(key_count, reader) if (flags & 1) == 0 else []
+            keyframes = self._read_curve_keyframe_data(key_count, reader) if (flags & 1) == 0 else None
             self.rotations[node_index] = self._read_curve_rotations(reader, keyframes, flags)
 
         if self.translated_node_count:
             reader.seek(position + self.payload_data_offset + self.translation_data_offset)
-            translation_offsets = [reader.read_u32() for _ in range(self.translated_node_count)]
+            translation_offsets = reader.read_array("<u4", self.translated_node_count).tolist()
             for node_index, node_offset in enumerate(translation_offsets):
                 reader.seek(position + self.payload_data_offset + node_offset)
                 reader.read_u16()
@@ -491,7 +475,7 @@ class CurveCodec(CodecBase):
                 offset_y = reader.read_f32()
                 offset_z = reader.read_f32()
                 scale = reader.read_f32()
-                keyframes = self._read_curve_keyframe_data(key_count, reader) if (flags & 1) == 0 else []
+                keyframes = self._read_curve_keyframe_data(key_count, reader) if (flags & 1) == 0 else None
                 self.translations[node_index] = self._read_curve_translations(
                     reader,
                     keyframes,
@@ -505,7 +489,7 @@ class CurveCodec(CodecBase):
 
         if self.scaled_node_count:
             reader.seek(position + self.payload_data_offset + self.scale_data_offset)
-            scale_offsets = [reader.read_u32() for _ in range(self.scaled_node_count)]
+            scale_offsets = reader.read_array("<u4", self.scaled_node_count).tolist()
             for node_index, node_offset in enumerate(scale_offsets):
                 reader.seek(position + self.payload_data_offset + node_offset)
                 reader.read_u16()
@@ -515,228 +499,97 @@ class CurveCodec(CodecBase):
                 reader.read_u16()
                 offset = reader.read_f32()
                 scale = reader.read_f32()
-                keyframes = self._read_curve_keyframe_data(key_count, reader) if (flags & 1) == 0 else []
+                keyframes = self._read_curve_keyframe_data(key_count, reader) if (flags & 1) == 0 else None
                 self.scales[node_index] = self._read_curve_scales(reader, keyframes, flags, offset, scale)
 
         reader.seek(position + self.total_compressed_size)
 
-    def _read_curve_keyframe_data(self, key_count: int, reader: BinaryReader) -> list[int]:
-        keyframes = [0]
-        total = 0
-        for _ in range(key_count):
-            total += reader.read_u8()
-            keyframes.append(total)
-        return keyframes
-
-    def _decompress_quat(self, i: float, j: float, w: float) -> Quaternion:
-        k = math.sqrt(max(1.0 - (i * i) - (j * j), 0.0))
-        if w < 0.0:
-            k *= -1.0
-        w = (abs(w) * 2.0) - 1.0
-        scale = math.sqrt(max(1.0 - (w * w), 0.0))
-        return _normalize_quaternion(i * scale, j * scale, k * scale, w)
-
-    def _curve_tangent_component(self, tangent_component: int, p1: float, p2: float) -> float:
+    def _read_curve_keyframe_data(self, key_count: int, reader: BinaryReader) -> np.ndarray:
+        return np.concatenate(([0], np.cumsum(reader.read_array("<u1", key_count), dtype=np.int64)))
+
+    def _decompress_quats(self, points: np.ndarray) -> np.ndarray:
+        '''Takes (..., 3) raw int16 curve points and returns normalized xyzw quaternions'''
+        i, j, w = np.moveaxis(points / float(0x7FFF), -1, 0)
+        k = np.sqrt(np.maximum(1.0 - (i * i) - (j * j), 0.0))
+        k = np.where(w < 0.0, -k, k)
+        w = (np.abs(w) * 2.0) - 1.0
+        scale = np.sqrt(np.maximum(1.0 - (w * w), 0.0))
+        return _normalized_xyzw(np.stack((i * scale, j * scale, k * scale, w), axis=-1))
+
+    def _curve_tangent_component(self, tangent_component, p1, p2):
         tangent = tangent_component / 7.0
         return abs(tangent) * (tangent * 0.300000011920929) + (p2 - p1)
 
-    def _curve_position_scalar(self, time: float, tangent_1: float, tangent_2: float, p1: float, p2: float) -> float:
+    def _curve_position_scalar(self, time, tangent_1, tangent_2, p1, p2):
         term_1 = (2.0 * (time ** 3.0)) - (3.0 * (time ** 2.0)) + 1.0
         term_2 = (time ** 3.0) - (2.0 * (time ** 2.0)) + time
         term_3 = (3.0 * (time ** 2.0)) - (2.0 * (time ** 3.0))
         term_4 = (time ** 3.0) - (time ** 2.0)
         return (term_1 * p1) + (term_2 * tangent_1) + (term_3 * p2) + (term_4 * tangent_2)
 
-    def _curve_tangent_quat(
-        self, i_component: int, j_component: int, k_component: int, w_component: int, p1: Quaternion, p2: Quaternion
-    ) -> tuple[float, float, float, float]:
-        return (
-            self._curve_tangent_component(i_component, p1.x, p2.x),
-            self._curve_tangent_component(j_component, p1.y, p2.y),
-            self._curve_tangent_component(k_component, p1.z, p2.z),
-            self._curve_tangent_component(w_component, p1.w, p2.w),
-        )
-
-    def _curve_tangent_vec(self, x_component: int, y_component: int, z_component: int, p1: Vector, p2: Vector) -> Vector:
-        return Vector(
-            (
-                self._curve_tangent_component(x_component, p1.x, p2.x),
-                self._curve_tangent_component(y_component, p1.y, p2.y),
-                self._curve_tangent_component(z_component, p1.z, p2.z),
-            )
-        )
-
-    def _curve_position_quat(
-        self, time: float, tangent_1: tuple[float, float, float, float], tangent_2: tuple[float, float, float, float], p1: Quaternion, p2: Quaternion
-    ) -> Quaternion:
-        return _normalize_quaternion(
-            self._curve_position_scalar(time, tangent_1[0], tangent_2[0], p1.x, p2.x),
-            self._curve_position_scalar(time, tangent_1[1], tangent_2[1], p1.y, p2.y),
-            self._curve_position_scalar(time, tangent_1[2], tangent_2[2], p1.z, p2.z),
-            self._curve_position_scalar(time, tangent_1[3], tangent_2[3], p1.w, p2.w),
-        )
-
-    def _curve_position_vec(self, time: float, tangent_1: Vector, tangent_2: Vector, p1: Vector, p2: Vector) -> Vector:
-        return Vector(
-            (
-                self._curve_position_scalar(time, tangent_1.x, tangent_2.x, p1.x, p2.x),
-                self._curve_position_scalar(time, tangent_1.y, tangent_2.y, p1.y, p2.y),
-                self._curve_position_scalar(time, tangent_1.z, tangent_2.z, p1.z, p2.z),
-            )
-        )
-
-    def _read_curve_rotations(self, reader: BinaryReader, keyframes: list[int], flags: int) -> list[Quaternion]:
-        values: list[Quaternion] = []
-        p1 = _identity_quaternion()
-        p2 = _identity_quaternion()
-        tangent_bytes = (0, 0, 0, 0)
-        current_keyframe = 0
-        keyframe_index = 0
-        next_keyframe = 0
-        for frame_index in range(self.frame_count):
-            if flags & 1:
-                quat = self._decompress_quat(
-                    reader.read_s16() / float(0x7FFF),
-                    reader.read_s16() / float(0x7FFF),
-                    reader.read_s16() / float(0x7FFF),
-                )
-            else:
-                if keyframes[keyframe_index] == frame_index and frame_index < self.frame_count - 1:
-                    i1 = reader.read_s16() / float(0x7FFF)
-                    j1 = reader.read_s16() / float(0x7FFF)
-                    w1 = reader.read_s16() / float(0x7FFF)
-                    tangent_bytes = (reader.read_u8(), reader.read_u8(), reader.read_u8(), reader.read_u8())
-                    i2 = reader.read_s16() / float(0x7FFF)
-                    j2 = reader.read_s16() / float(0x7FFF)
-                    w2 = reader.read_s16() / float(0x7FFF)
-                    p1 = self._decompress_quat(i1, j1, w1)
-                    p2 = self._decompress_quat(i2, j2, w2)
-                    current_keyframe = keyframes[keyframe_index]
-                    next_keyframe = keyframes[keyframe_index + 1]
-                    keyframe_index += 1
-                    reader.skip(-6)
-                tangent_1 = self._curve_tangent_quat(
-                    (tangent_bytes[0] >> 4) - 7,
-                    (tangent_bytes[1] >> 4) - 7,
-                    (tangent_bytes[2] >> 4) - 7,
-                    (tangent_bytes[3] >> 4) - 7,
-                    p1,
-                    p2,
-                )
-                tangent_2 = self._curve_tangent_quat(
-                    (tangent_bytes[0] & 15) - 7,
-                    (tangent_bytes[1] & 15) - 7,
-                    (tangent_bytes[2] & 15) - 7,
-                    (tangent_bytes[3] & 15) - 7,
-                    p1,
-                    p2,
-                )
-                quat = self._curve_position_quat(
-                    (frame_index - current_keyframe) / float(next_keyframe - current_keyframe),
-                    tangent_1,
-                    tangent_2,
-                    p1,
-                    p2,
-                )
-            values.append(quat)
-        return values
+    def _curve_segments(self, keyframes: np.ndarray) -> tuple[int, np.ndarray, np.ndarray]:
+        '''Returns the number of segments stored for a curve track, then for every frame the segment it is evaluated on and
+        the time along that segment. A segment starts at each keyframe before the last frame'''
+        segment_count = int(np.count_nonzero(keyframes < self.frame_count - 1))
+        if segment_count == 0 or segment_count >= len(keyframes):
+            raise ValueError("Curve keyframes do not cover the animation")
+        starts = keyframes[:segment_count]
+        ends = keyframes[1:segment_count + 1]
+        if np.any(ends <= starts):
+            raise ValueError("Curve keyframes are not increasing")
+
+        frames = np.arange(self.frame_count)
+        segments = np.searchsorted(starts, frames, side="right") - 1
+        times = (frames - starts[segments]) / (ends[segments] - starts[segments])
+        return segment_count, segments, times
+
+    def _read_curve_track(self, reader: BinaryReader, keyframes: np.ndarray | None, flags: int, point_width: int, tangent_width: int, decode) -> np.ndarray:
+        '''Evaluates one curve track for every frame. Segment records are p1, tangents, p2 where each p2 is the p1 of the
+        next record. decode turns (..., point_width) raw int16 points into the values to interpolate'''
+        if flags & 1:
+            return decode(reader.read_array("<i2", self.frame_count * point_width).reshape(-1, point_width))
+        if self.frame_count < 1:
+            return decode(np.empty((0, point_width), dtype=np.int16))
+
+        segment_count, segments, times = self._curve_segments(keyframes)
+        record = np.dtype([("point", "<i2", (point_width,)), ("tangents", "u1", (tangent_width,))])
+        data = reader.read_array("u1", (segment_count * record.itemsize) + (point_width * 2))
+        reader.skip(-point_width * 2)
+        records = np.zeros((segment_count + 1) * record.itemsize, dtype=np.uint8)
+        records[:len(data)] = data
+        records = records.view(record)
+
+        points = decode(records["point"])
+        tangent_bytes = records["tangents"][segments].astype(np.int64)
+        p1 = points[segments]
+        p2 = points[segments + 1]
+        tangent_1 = self._curve_tangent_component((tangent_bytes >> 4) - 7, p1, p2)
+        tangent_2 = self._curve_tangent_component((tangent_bytes & 15) - 7, p1, p2)
+        return self._curve_position_scalar(times[:, np.newaxis], tangent_1, tangent_2, p1, p2)
+
+    def _read_curve_rotations(self, reader: BinaryReader, keyframes: np.ndarray | None, flags: int) -> np.ndarray:
+        return _normalized_quaternions(self._read_curve_track(reader, keyframes, flags, 3, 4, self._decompress_quats))
 
     def _read_curve_translations(
         self,
         reader: BinaryReader,
-        keyframes: list[int],
+        keyframes: np.ndarray | None,
         flags: int,
         offset_x: float,
         offset_y: float,
         offset_z: float,
         scale: float,
         apply_scale_100: bool,
-    ) -> list[Vector]:
-        values: list[Vector] = []
-        p1 = _zero_vector()
-        p2 = _zero_vector()
-        tangent_bytes = (0, 0, 0)
-        current_keyframe = 0
-        keyframe_index = 0
-        next_keyframe = 0
-        for frame_index in range(self.frame_count):
-            if flags & 1:
-                value = Vector(
-                    (
-                        reader.read_s16() / float(0x7FFF),
-                        reader.read_s16() / float(0x7FFF),
-                        reader.read_s16() / float(0x7FFF),
-                    )
-                )
-            else:
-                if keyframes[keyframe_index] == frame_index and frame_index < self.frame_count - 1:
-                    p1 = Vector(
-                        (
-                            reader.read_s16() / float(0x7FFF),
-                            reader.read_s16() / float(0x7FFF),
-                            reader.read_s16() / float(0x7FFF),
-                        )
-                    )
-                    tangent_bytes = (reader.read_u8(), reader.read_u8(), reader.read_u8())
-                    p2 = Vector(
-                        (
-                            reader.read_s16() / float(0x7FFF),
-                            reader.read_s16() / float(0x7FFF),
-                            reader.read_s16() / float(0x7FFF),
-                        )
-                    )
-                    current_keyframe = keyframes[keyframe_index]
-                    next_keyframe = keyframes[keyframe_index + 1]
-                    keyframe_index += 1
-                    reader.skip(-6)
-                tangent_1 = self._curve_tangent_vec((tangent_bytes[0] >> 4) - 7, (tangent_bytes[1] >> 4) - 7, (tangent_bytes[2] >> 4) - 7, p1, p2)
-                tangent_2 = self._curve_tangent_vec((tangent_bytes[0] & 15) - 7, (tangent_bytes[1] & 15) - 7, (tangent_bytes[2] & 15) - 7, p1, p2)
-                value = self._curve_position_vec(
-                    (frame_index - current_keyframe) / float(next_keyframe - current_keyframe),
-                    tangent_1,
-                    tangent_2,
-                    p1,
-                    p2,
-                )
-            value.x = (scale * value.x) + offset_x
-            value.y = (scale * value.y) + offset_y
-            value.z = (scale * value.z) + offset_z
-            if apply_scale_100:
-                value *= 100.0
-            values.append(value)
+    ) -> np.ndarray:
+        values = self._read_curve_track(reader, keyframes, flags, 3, 3, lambda points: points / float(0x7FFF))
+        values = (scale * values) + np.array((offset_x, offset_y, offset_z))
+        if apply_scale_100:
+            values *= 100.0
         return values
 
-    def _read_curve_scales(self, reader: BinaryReader, keyframes: list[int], flags: int, offset: float, scale: float) -> list[float]:
-        values: list[float] = []
-        p1 = 0.0
-        p2 = 0.0
-        tangent_byte = 0
-        current_keyframe = 0
-        keyframe_index = 0
-        next_keyframe = 0
-        for frame_index in range(self.frame_count):
-            if flags & 1:
-                value = reader.read_s16() / float(0x7FFF)
-            else:
-                if keyframes[keyframe_index] == frame_index and frame_index < self.frame_count - 1:
-                    p1 = reader.read_s16() / float(0x7FFF)
-                    tangent_byte = reader.read_u8()
-                    p2 = reader.read_s16() / float(0x7FFF)
-                    current_keyframe = keyframes[keyframe_index]
-                    next_keyframe = keyframes[keyframe_index + 1]
-                    keyframe_index += 1
-                    reader.skip(-2)
-                tangent_1 = self._curve_tangent_component((tangent_byte >> 4) - 7, p1, p2)
-                tangent_2 = self._curve_tangent_component((tangent_byte & 15) - 7, p1, p2)
-                value = self._curve_position_scalar(
-                    (frame_index - current_keyframe) / float(next_keyframe - current_keyframe),
-                    tangent_1,
-                    tangent_2,
-                    p1,
-                    p2,
-                )
-            values.append((value * scale) + offset)
-        return values
+    def _read_curve_scales(self, reader: BinaryReader, keyframes: np.ndarray | None, flags: int, offset: float, scale: float) -> np.ndarray:
+        values = self._read_curve_track(reader, keyframes, flags, 1, 1, lambda points: points / float(0x7FFF))
+        return (values[:, 0] * scale) + offset
 
 
 class RevisedCurveCodec(CurveCodec):
@@ -744,86 +597,37 @@ class RevisedCurveCodec(CurveCodec):
         super().__init__(frame_count)
         self.rotation_layout = rotation_layout
 
-    def _decompress_revised_quat(self, v3: int, v4: int, v5: int) -> Quaternion:
-        i = ((float(_signed_int16(v3 & 0xFFFE)) / float(0x7FFF)) * 0.70710677)
-        j = ((float(_signed_int16(v4 & 0xFFFE)) / float(0x7FFF)) * 0.70710677)
-        k = ((float(_signed_int16(v5 & 0xFFFE)) / float(0x7FFF)) * 0.70710677)
-        missing = math.sqrt(max(0.0, 1.0 - ((j * j) + (i * i) + (k * k))))
-        if v3 & 1:
-            missing = -missing
+    def _decompress_quats(self, points: np.ndarray) -> np.ndarray:
+        v3, v4, v5 = np.moveaxis(points.astype(np.int64), -1, 0)
+        i = ((v3 & ~1) / float(0x7FFF)) * 0.70710677
+        j = ((v4 & ~1) / float(0x7FFF)) * 0.70710677
+        k = ((v5 & ~1) / float(0x7FFF)) * 0.70710677
+        missing = np.sqrt(np.maximum(0.0, 1.0 - ((j * j) + (i * i) + (k * k))))
+        missing = np.where(v3 & 1, -missing, missing)
         component_index = (v5 & 1) | (2 * (v4 & 1))
         if self.rotation_layout == "h4_source":
-            output_wxyz = [0.0, 0.0, 0.0, 0.0]
-            output_wxyz[(component_index + 2) & 3] = i
-            output_wxyz[(component_index + 3) & 3] = j
-            output_wxyz[component_index] = k
-            output_wxyz[(component_index + 1) & 3] = missing
-            return _normalize_quaternion(output_wxyz[1], output_wxyz[2], output_wxyz[3], output_wxyz[0])
+            placement = ((component_index + 2) & 3, (component_index + 3) & 3, component_index, (component_index + 1) & 3)
         else:
-            output = [0.0, 0.0, 0.0, 0.0]
-            output[(component_index + 1) & 3] = i
-            output[(component_index - 2) & 3] = j
-            output[(component_index - 1) & 3] = k
-            output[component_index] = missing
-            return _normalize_quaternion(output[0], output[1], output[2], output[3])
-
-    def _read_curve_rotations(self, reader: BinaryReader, keyframes: list[int], flags: int) -> list[Quaternion]:
-        values: list[Quaternion] = []
-        p1 = _identity_quaternion()
-        p2 = _identity_quaternion()
-        tangent_bytes = (0, 0, 0, 0)
-        current_keyframe = 0
-        keyframe_index = 0
-        next_keyframe = 0
-        for frame_index in range(self.frame_count):
-            if flags & 1:
-                quat = self._decompress_revised_quat(reader.read_s16(), reader.read_s16(), reader.read_s16())
-            else:
-                if keyframes[keyframe_index] == frame_index and frame_index < self.frame_count - 1:
-                    p1 = self._decompress_revised_quat(reader.read_s16(), reader.read_s16(), reader.read_s16())
-                    tangent_bytes = (reader.read_u8(), reader.read_u8(), reader.read_u8(), reader.read_u8())
-                    p2 = self._decompress_revised_quat(reader.read_s16(), reader.read_s16(), reader.read_s16())
-                    current_keyframe = keyframes[keyframe_index]
-                    next_keyframe = keyframes[keyframe_index + 1]
-                    keyframe_index += 1
-                    reader.skip(-6)
-                tangent_1 = self._curve_tangent_quat(
-                    (tangent_bytes[0] >> 4) - 7,
-                    (tangent_bytes[1] >> 4) - 7,
-                    (tangent_bytes[2] >> 4) - 7,
-                    (tangent_bytes[3] >> 4) - 7,
-                    p1,
-                    p2,
-                )
-                tangent_2 = self._curve_tangent_quat(
-                    (tangent_bytes[0] & 15) - 7,
-                    (tangent_bytes[1] & 15) - 7,
-                    (tangent_bytes[2] & 15) - 7,
-                    (tangent_bytes[3] & 15) - 7,
-                    p1,
-                    p2,
-                )
-                quat = self._curve_position_quat(
-                    (frame_index - current_keyframe) / float(next_keyframe - current_keyframe),
-                    tangent_1,
-                    tangent_2,
-                    p1,
-                    p2,
-                )
-            values.append(quat)
-        return values
+            placement = ((component_index + 1) & 3, (component_index - 2) & 3, (component_index - 1) & 3, component_index)
+
+        output = np.zeros(points.shape[:-1] + (4,))
+        for value, index in zip((i, j, k, missing), placement):
+            np.put_along_axis(output, index[..., np.newaxis], value[..., np.newaxis], axis=-1)
+        if self.rotation_layout == "h4_source":
+            output = output[..., [1, 2, 3, 0]]
+        return _normalized_xyzw(output)
 
     def _read_curve_translations(
         self,
         reader: BinaryReader,
-        keyframes: list[int],
+        keyframes: np.ndarray | None,
         flags: int,
         offset_x: float,
         offset_y: float,
         offset_z: float,
         scale: float,
         apply_scale_100: bool,
-    ) -> list[Vector]:
+    ) -> np.ndarray:
         scale_translations = apply_scale_100 or self.rotation_layout == "h4_source"
         return super()._read_curve_translations(
             reader,
@@ -1091,58 +895,53 @@ def apply_movement_data(animation: AnimationData, movement_data: MovementData |
             world_delta_translation.rotate(accumulated_rotation)
             accumulated_translation += world_delta_translation
 
-        animation.translations[0][frame_index] = (
-            animation.translations[0][frame_index].copy() + accumulated_translation
-        )
+        animation.translations[0, frame_index] += accumulated_translation
         animation.translation_flags[0] = True
 
         accumulated_rotation = (accumulated_rotation @ local_delta_rotation).normalized()
 
         if movement_rotates_root:
             combined_rotation = accumulated_rotation.copy()
-            combined_rotation.rotate(animation.rotations[0][frame_index])
-            animation.rotations[0][frame_index] = combined_rotation
+            combined_rotation.rotate(Quaternion(animation.rotations[0, frame_index]))
+            animation.rotations[0, frame_index] = combined_rotation
             animation.rotation_flags[0] = True
 
     if 0 < frame_limit < animation.frame_count:
-        animation.translations[0][frame_limit:] = [
-            animation.translations[0][frame_limit - 1].copy()
-            for _ in range(animation.frame_count - frame_limit)
-        ]
+        animation.translations[0, frame_limit:] = animation.translations[0, frame_limit - 1]
         if movement_rotates_root:
-            animation.rotations[0][frame_limit:] = [
-                animation.rotations[0][frame_limit - 1].copy()
-                for _ in range(animation.frame_count - frame_limit)
-            ]
+            animation.rotations[0, frame_limit:] = animation.rotations[0, frame_limit - 1]
 
     return animation
 
 
+def _frame_channel_arrays(frame: FrameChannels, node_count: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''Returns the first node_count translations, wxyz rotations & scales of a frame as arrays'''
+    return (
+        np.array([tuple(frame.translations[node_index]) for node_index in range(node_count)], dtype=np.float64).reshape(node_count, 3),
+        np.array([tuple(frame.rotations[node_index]) for node_index in range(node_count)], dtype=np.float64).reshape(node_count, 4),
+        np.array([frame.scales[node_index] for node_index in range(node_count)], dtype=np.float64),
+    )
+
+
 def append_final_frame(animation: AnimationData, final_frame: FrameChannels | None = None, ignore_root: bool = False):
     if animation.frame_count < 1:
         return
 
-    for node_index in range(animation.node_count):
-        translations = animation.translations[node_index]
-        rotations = animation.rotations[node_index]
-        scales = animation.scales[node_index]
-
-        has_final_pose = (
-            final_frame is not None
-            and not (ignore_root and node_index == 0)
-            and node_index < len(final_frame.translations)
-            and node_index < len(final_frame.rotations)
-            and node_index < len(final_frame.scales)
-        )
-        if has_final_pose:
-            translations.append(final_frame.translations[node_index].copy())
-            rotations.append(final_frame.rotations[node_index].copy())
-            scales.append(final_frame.scales[node_index])
-        else:
-            translations.append(translations[-1].copy() if translations else _zero_vector())
-            rotations.append(rotations[-1].copy() if rotations else _identity_quaternion())
-            scales.append(scales[-1] if scales else 1.0)
-
+    translations = animation.translations[:, -1:].copy()
+    rotations = animation.rotations[:, -1:].copy()
+    scales = animation.scales[:, -1:].copy()
+
+    if final_frame is not None:
+        pose_count = min(animation.node_count, len(final_frame.translations), len(final_frame.rotations), len(final_frame.scales))
+        final_translations, final_rotations, final_scales = _frame_channel_arrays(final_frame, pose_count)
+        first_node = 1 if ignore_root else 0
+        translations[first_node:pose_count, 0] = final_translations[first_node:]
+        rotations[first_node:pose_count, 0] = final_rotations[first_node:]
+        scales[first_node:pose_count, 0] = final_scales[first_node:]
+
+    animation.translations = np.concatenate((animation.translations, translations), axis=1)
+    animation.rotations = np.concatenate((animation.rotations, rotations), axis=1)
+    animation.scales = np.concatenate((animation.scales, scales), axis=1)
     animation.frame_count += 1
 
 
@@ -1154,44 +953,60 @@ def default_frame_channels(default_nodes: list[DefaultAnimationNode]) -> FrameCh
     )
 
 
-def _animation_track(values: list, keyframes: list[int], frame_count: int, default_value):
-    if not values:
-        return [default_value for _ in range(frame_count)]
-    if not keyframes:
-        return [values[0] for _ in range(frame_count)]
+def _animation_track(values: np.ndarray, keyframes: np.ndarray, frame_count: int, default_value: np.ndarray, interpolate) -> np.ndarray:
+    '''Samples a keyed codec track at every frame. Frames between keys are blended with interpolate, frames outside the
+    keyed range hold the first or last value'''
+    if not len(values):
+        return np.repeat(default_value[np.newaxis], frame_count, axis=0)
+    if not len(keyframes):
+        return np.repeat(values[:1], frame_count, axis=0)
     if len(values) == frame_count and len(keyframes) == frame_count:
-        return values[:]
-    frames = []
-    key_index = 0
-    for frame_index in range(frame_count):
-        if frame_index <= keyframes[0]:
-            frames.append(values[0])
-            continue
-        if frame_index >= keyframes[-1]:
-            frames.append(values[-1])
-            continue
-        while key_index < len(keyframes) - 2 and frame_index > keyframes[key_index + 1]:
-            key_index += 1
-        if keyframes[key_index] == frame_index:
-            frames.append(values[key_index])
-            continue
-        previous_frame = keyframes[key_index]
-        next_frame = keyframes[key_index + 1]
-        t = (frame_index - previous_frame) / float(next_frame - previous_frame)
-        frames.append(values[key_index], values[key_index + 1], t)
-    return frames
-
-
-def _slerp_quaternion(a: Quaternion, b: Quaternion, t: float) -> Quaternion:
-    return a.slerp(b, t)
-
-
-def _lerp_vector(a: Vector, b: Vector, t: float) -> Vector:
-    return a.lerp(b, t)
-
-
-def _lerp_float(a: float, b: float, t: float) -> float:
-    return a + ((b - a) * t)
+        return values.copy()
+
+    key_count = min(len(values), len(keyframes))
+    values = values[:key_count]
+    keyframes = np.asarray(keyframes[:key_count], dtype=np.float64)
+    frames = np.arange(frame_count, dtype=np.float64)
+
+    key_index = np.clip(np.searchsorted(keyframes, frames, side="left") - 1, 0, max(key_count - 2, 0))
+    next_index = np.minimum(key_index + 1, key_count - 1)
+    span = keyframes[next_index] - keyframes[key_index]
+    t = np.divide(frames - keyframes[key_index], span, out=np.zeros(frame_count), where=span > 0.0)
+    track = interpolate(values[key_index], values[next_index], t)
+    track[frames <= keyframes[0]] = values[0]
+    track[frames >= keyframes[-1]] = values[-1]
+    return track
+
+
+def _build_channel(
+    channel: np.ndarray,
+    static_flags: list[bool],
+    animated_flags: list[bool],
+    static_values: list[np.ndarray] | None,
+    animated_values: list[np.ndarray],
+    animated_keyframes: list[np.ndarray],
+    defaults: np.ndarray,
+    interpolate,
+):
+    '''Fills a (nodes, frames, ...) channel, which starts out holding the node defaults, from the static & animated codecs.
+    Static data wins over animated data, nodes with neither keep their default'''
+    frame_count = channel.shape[1]
+    static_index = 0
+    animated_index = 0
+    for node_index in range(len(channel)):
+        if static_flags[node_index]:
+            if static_values is not None:
+                channel[node_index] = static_values[static_index][0]
+            static_index += 1
+        elif animated_flags[node_index]:
+            channel[node_index] = _animation_track(
+                animated_values[animated_index],
+                animated_keyframes[animated_index],
+                frame_count,
+                defaults[node_index],
+                interpolate,
+            )
+            animated_index += 1
 
 
 def build_animation(
@@ -1202,103 +1017,63 @@ def build_animation(
     if resource_data.animation_data is None:
         raise ValueError("Animation resource has no animated codec data")
 
-    use_defaults = missing_mode == "default"
-    rotations: list[list[Quaternion]] = []
-    translations: list[list[Vector]] = []
-    scales: list[list[float]] = []
-    rotation_flags: list[bool] = []
-    translation_flags: list[bool] = []
-    scale_flags: list[bool] = []
-
-    static_rotation_index = 0
-    animated_rotation_index = 0
-    static_translation_index = 0
-    animated_translation_index = 0
-    static_scale_index = 0
-    animated_scale_index = 0
-
     node_count = len(default_nodes)
-    static_rot_flags = _fit_node_flags(resource_data.static_rotated_node_flags, node_count)
-    static_trans_flags = _fit_node_flags(resource_data.static_translated_node_flags, node_count)
-    static_scale_flags = _fit_node_flags(resource_data.static_scaled_node_flags, node_count)
+    frame_count = resource_data.frame_count
+    if missing_mode == "default":
+        translation_defaults, rotation_defaults, scale_defaults = _frame_channel_arrays(default_frame_channels(default_nodes), node_count)
+    else:
+        translation_defaults = np.zeros((node_count, 3))
+        rotation_defaults = np.tile(IDENTITY_QUATERNION, (node_count, 1))
+        scale_defaults = np.zeros(node_count)
+
+    translations = np.repeat(translation_defaults[:, np.newaxis], frame_count, axis=1)
+    rotations = np.repeat(rotation_defaults[:, np.newaxis], frame_count, axis=1)
+    scales = np.repeat(scale_defaults[:, np.newaxis], frame_count, axis=1)
+
+    static_data = resource_data.static_data
+    animation_data = resource_data.animation_data
     anim_rot_flags = _fit_node_flags(resource_data.animated_rotated_node_flags, node_count)
     anim_trans_flags = _fit_node_flags(resource_data.animated_translated_node_flags, node_count)
     anim_scale_flags = _fit_node_flags(resource_data.animated_scaled_node_flags, node_count)
-    for node_index, default_node in enumerate(default_nodes):
-        rotation_present = anim_rot_flags[node_index]
-        translation_present = anim_trans_flags[node_index]
-        scale_present = anim_scale_flags[node_index]
-
-        rotation_default = default_node.rotation.copy() if use_defaults else _identity_quaternion()
-        translation_default = default_node.translation.copy() if use_defaults else _zero_vector()
-        scale_default = default_node.scale if use_defaults else 0.0
-
-        if static_rot_flags[node_index]:
-            value = resource_data.static_data.rotations[static_rotation_index][0] if resource_data.static_data else rotation_default
-            node_rotations = [value.copy() for _ in range(resource_data.frame_count)]
-            static_rotation_index += 1
-        elif anim_rot_flags[node_index]:
-            node_rotations = [
-                value.copy()
-                for value in _animation_track(
-                    resource_data.animation_data.rotations[animated_rotation_index],
-                    resource_data.animation_data.rotation_keyframes[animated_rotation_index],
-                    resource_data.frame_count,
-                    rotation_default.copy(),
-                )
-            ]
-            animated_rotation_index += 1
-        else:
-            node_rotations = [rotation_default.copy() for _ in range(resource_data.frame_count)]
-
-        if static_trans_flags[node_index]:
-            value = resource_data.static_data.translations[static_translation_index][0] if resource_data.static_data else translation_default
-            node_translations = [value.copy() for _ in range(resource_data.frame_count)]
-            static_translation_index += 1
-        elif anim_trans_flags[node_index]:
-            node_translations = [
-                value.copy()
-                for value in _animation_track(
-                    resource_data.animation_data.translations[animated_translation_index],
-                    resource_data.animation_data.translation_keyframes[animated_translation_index],
-                    resource_data.frame_count,
-                    translation_default.copy(),
-                )
-            ]
-            animated_translation_index += 1
-        else:
-            node_translations = [translation_default.copy() for _ in range(resource_data.frame_count)]
-
-        if static_scale_flags[node_index]:
-            value = resource_data.static_data.scales[static_scale_index][0] if resource_data.static_data else scale_default
-            node_scales = [value for _ in range(resource_data.frame_count)]
-            static_scale_index += 1
-        elif anim_scale_flags[node_index]:
-            node_scales = _animation_track(
-                resource_data.animation_data.scales[animated_scale_index],
-                resource_data.animation_data.scale_keyframes[animated_scale_index],
-                resource_data.frame_count,
-                scale_default,
-            )
-            animated_scale_index += 1
-        else:
-            node_scales = [scale_default for _ in range(resource_data.frame_count)]
-
-        rotations.append(node_rotations)
-        translations.append(node_translations)
-        scales.append(node_scales)
-        rotation_flags.append(rotation_present)
-        translation_flags.append(translation_present)
-        scale_flags.append(scale_present)
+    _build_channel(
+        rotations,
+        _fit_node_flags(resource_data.static_rotated_node_flags, node_count),
+        anim_rot_flags,
+        static_data.rotations if static_data else None,
+        animation_data.rotations,
+        animation_data.rotation_keyframes,
+        rotation_defaults,
+        _slerp,
+    )
+    _build_channel(
+        translations,
+        _fit_node_flags(resource_data.static_translated_node_flags, node_count),
+        anim_trans_flags,
+        static_data.translations if static_data else None,
+        animation_data.translations,
+        animation_data.translation_keyframes,
+        translation_defaults,
+        _lerp,
+    )
+    _build_channel(
+        scales,
+        _fit_node_flags(resource_data.static_scaled_node_flags, node_count),
+        anim_scale_flags,
+        static_data.scales if static_data else None,
+        animation_data.scales,
+        animation_data.scale_keyframes,
+        scale_defaults,
+        _lerp,
+    )
 
     return AnimationData(
-        resource_data.frame_count,
+        frame_count,
         translations,
         rotations,
         scales,
-        translation_flags,
-        rotation_flags,
-        scale_flags,
+        anim_trans_flags[:],
+        anim_rot_flags[:],
+        anim_scale_flags[:],
     )
 
 
@@ -1307,72 +1082,47 @@ def compose_overlay_animation(
     base_frame: FrameChannels,
     resource_data: AnimationResourceData | None = None,
 ) -> AnimationData:
-    translations: list[list[Vector]] = []
-    rotations: list[list[Quaternion]] = []
-    scales: list[list[float]] = []
-    static_translation_flags = _fit_node_flags(
+    node_count = animation.node_count
+    base_translations, base_rotations, base_scales = _frame_channel_arrays(base_frame, node_count)
+    static_translation_flags = np.array(_fit_node_flags(
         resource_data.static_translated_node_flags if resource_data is not None else None,
-        animation.node_count,
-    )
-    static_rotation_flags = _fit_node_flags(
+        node_count,
+    ), dtype=bool)
+    static_rotation_flags = np.array(_fit_node_flags(
         resource_data.static_rotated_node_flags if resource_data is not None else None,
-        animation.node_count,
-    )
-    static_scale_flags = _fit_node_flags(
+        node_count,
+    ), dtype=bool)
+    static_scale_flags = np.array(_fit_node_flags(
         resource_data.static_scaled_node_flags if resource_data is not None else None,
-        animation.node_count,
-    )
-
-    for node_index in range(animation.node_count):
-        base_translation = base_frame.translations[node_index]
-        base_rotation = base_frame.rotations[node_index]
-        base_scale = base_frame.scales[node_index]
-        reference_translation = (
-            animation.translations[node_index][0].copy()
-            if static_translation_flags[node_index]
-            else base_translation.copy()
-        )
-        reference_rotation = (
-            animation.rotations[node_index][0].copy()
-            if static_rotation_flags[node_index]
-            else base_rotation.copy()
-        )
-        reference_scale = animation.scales[node_index][0] if static_scale_flags[node_index] else base_scale
-        # Imported overlays start with the untouched base pose, then the keyed
-        # overlay samples follow after that first frame. Static overlay data is
-        # also part of that reference frame; Tool writes it from frame 0.
-        node_translations: list[Vector] = [reference_translation.copy()]
-        node_rotations: list[Quaternion] = [reference_rotation.copy()]
-        node_scales: list[float] = [reference_scale]
-        for frame_index in range(animation.frame_count):
-            translation = (
-                reference_translation + animation.translations[node_index][frame_index]
-                if animation.translation_flags[node_index]
-                else reference_translation.copy()
-            )
-            
-            if animation.rotation_flags[node_index]:
-                rotation = animation.rotations[node_index][frame_index]
-                rotation.rotate(reference_rotation)
-            else:
-                rotation = reference_rotation.copy()
-            scale = (
-                reference_scale * animation.scales[node_index][frame_index]
-                if animation.scale_flags[node_index]
-                else reference_scale
-            )
-            node_translations.append(translation)
-            node_rotations.append(rotation)
-            node_scales.append(scale)
-        translations.append(node_translations)
-        rotations.append(node_rotations)
-        scales.append(node_scales)
+        node_count,
+    ), dtype=bool)
+
+    if animation.frame_count:
+        reference_translations = np.where(static_translation_flags[:, np.newaxis], animation.translations[:, 0], base_translations)
+        reference_rotations = np.where(static_rotation_flags[:, np.newaxis], animation.rotations[:, 0], base_rotations)
+        reference_scales = np.where(static_scale_flags, animation.scales[:, 0], base_scales)
+    else:
+        reference_translations, reference_rotations, reference_scales = base_translations, base_rotations, base_scales
+
+    reference_translations = reference_translations[:, np.newaxis]
+    reference_rotations = reference_rotations[:, np.newaxis]
+    reference_scales = reference_scales[:, np.newaxis]
+    translation_flags = np.array(animation.translation_flags, dtype=bool).reshape(node_count, 1, 1)
+    rotation_flags = np.array(animation.rotation_flags, dtype=bool).reshape(node_count, 1, 1)
+    scale_flags = np.array(animation.scale_flags, dtype=bool).reshape(node_count, 1)
+
+    # Imported overlays start with the untouched base pose, then the keyed
+    # overlay samples follow after that first frame. Static overlay data is
+    # also part of that reference frame; Tool writes it from frame 0.
+    translations = np.where(translation_flags, reference_translations + animation.translations, reference_translations)
+    rotations = np.where(rotation_flags, _quaternion_multiply(reference_rotations, animation.rotations), reference_rotations)
+    scales = np.where(scale_flags, reference_scales * animation.scales, reference_scales)
 
     return AnimationData(
         animation.frame_count + 1,
-        translations,
-        rotations,
-        scales,
+        np.concatenate((reference_translations, translations), axis=1),
+        np.concatenate((reference_rotations, rotations), axis=1),
+        np.concatenate((reference_scales, scales), axis=1),
         animation.translation_flags[:],
         animation.rotation_flags[:],
         animation.scale_flags[:],
@@ -1385,39 +1135,20 @@ def offset_overlay_animation(animation: AnimationData, default_nodes: list[Defau
             f"Overlay node count mismatch: animation={animation.node_count}, defaults={len(default_nodes)}"
         )
 
-    translations: list[list[Vector]] = []
-    rotations: list[list[Quaternion]] = []
-    scales: list[list[float]] = []
+    node_count = animation.node_count
+    default_translations, default_rotations, default_scales = _frame_channel_arrays(default_frame_channels(default_nodes), node_count)
+    default_rotation_inverses = default_rotations * np.array((1.0, -1.0, -1.0, -1.0))
+    default_rotation_inverses /= np.sum(default_rotations * default_rotations, axis=-1, keepdims=True)
 
-    for node_index, default_node in enumerate(default_nodes):
-        default_translation = default_node.translation.copy()
-        default_rotation_inverse = default_node.rotation.copy()
-        default_rotation_inverse.invert()
-        default_scale = default_node.scale
+    translation_flags = np.array(animation.translation_flags, dtype=bool).reshape(node_count, 1, 1)
+    rotation_flags = np.array(animation.rotation_flags, dtype=bool).reshape(node_count, 1, 1)
+    scale_flags = np.array(animation.scale_flags, dtype=bool) & (np.abs(default_scales) > 1e-8)
 
-        node_translations: list[Vector] = []
-        node_rotations: list[Quaternion] = []
-        node_scales: list[float] = []
-
-        for frame_index in range(animation.frame_count):
-            translation = animation.translations[node_index][frame_index].copy()
-            if animation.translation_flags[node_index]:
-                translation -= default_translation
-            node_translations.append(translation)
-
-            rotation = animation.rotations[node_index][frame_index].copy()
-            if animation.rotation_flags[node_index]:
-                rotation = (rotation @ default_rotation_inverse).normalized()
-            node_rotations.append(rotation)
-
-            scale = animation.scales[node_index][frame_index]
-            if animation.scale_flags[node_index] and abs(default_scale) > 1e-8:
-                scale /= default_scale
-            node_scales.append(scale)
-
-        translations.append(node_translations)
-        rotations.append(node_rotations)
-        scales.append(node_scales)
+    translations = np.where(translation_flags, animation.translations - default_translations[:, np.newaxis], animation.translations)
+    rotations = _quaternion_multiply(animation.rotations, default_rotation_inverses[:, np.newaxis])
+    rotations = np.where(rotation_flags, _normalized_quaternions(np.roll(rotations, -1, axis=-1)), animation.rotations)
+    scales = animation.scales.copy()
+    scales[scale_flags] /= default_scales[scale_flags, np.newaxis]
 
     return AnimationData(
         animation.frame_count,
@@ -1431,33 +1162,21 @@ def offset_overlay_animation(animation: AnimationData, default_nodes: list[Defau
 
 
 def compose_replacement_animation(animation: AnimationData, base_frame: FrameChannels) -> AnimationData:
-    translations: list[list[Vector]] = []
-    rotations: list[list[Quaternion]] = []
-    scales: list[list[float]] = []
-    for node_index in range(animation.node_count):
-        base_translation = base_frame.translations[node_index]
-        base_rotation = base_frame.rotations[node_index]
-        base_scale = base_frame.scales[node_index]
-        # Replacement animations also get a leading base frame before the keyed samples.
-        node_translations: list[Vector] = [base_translation.copy()]
-        node_rotations: list[Quaternion] = [base_rotation.copy()]
-        node_scales: list[float] = [base_scale]
-        for frame_index in range(animation.frame_count):
-            translation = animation.translations[node_index][frame_index].copy() if animation.translation_flags[node_index] else base_translation.copy()
-            rotation = animation.rotations[node_index][frame_index].copy() if animation.rotation_flags[node_index] else base_rotation.copy()
-            scale = animation.scales[node_index][frame_index] if animation.scale_flags[node_index] else base_scale
-            node_translations.append(translation)
-            node_rotations.append(rotation)
-            node_scales.append(scale)
-        translations.append(node_translations)
-        rotations.append(node_rotations)
-        scales.append(node_scales)
-
+    node_count = animation.node_count
+    base_translations, base_rotations, base_scales = _frame_channel_arrays(base_frame, node_count)
+    base_translations = base_translations[:, np.newaxis]
+    base_rotations = base_rotations[:, np.newaxis]
+    base_scales = base_scales[:, np.newaxis]
+    translation_flags = np.array(animation.translation_flags, dtype=bool).reshape(node_count, 1, 1)
+    rotation_flags = np.array(animation.rotation_flags, dtype=bool).reshape(node_count, 1, 1)
+    scale_flags = np.array(animation.scale_flags, dtype=bool).reshape(node_count, 1)
+
+    # Replacement animations also get a leading base frame before the keyed samples.
     return AnimationData(
         animation.frame_count + 1,
-        translations,
-        rotations,
-        scales,
+        np.concatenate((base_translations, np.where(translation_flags, animation.translations, base_translations)), axis=1),
+        np.concatenate((base_rotations, np.where(rotation_flags, animation.rotations, base_rotations)), axis=1),
+        np.concatenate((base_scales, np.where(scale_flags, animation.scales, base_scales)), axis=1),
         animation.translation_flags[:],
         animation.rotation_flags[:],
         animation.scale_flags[:],
@@ -1,8 +1,9 @@
 
 
-from math import sqrt
+import hashlib
 import math
 import os
+import struct
 import sys
 import traceback
 from pathlib import Path
@@ -21,10 +22,28 @@ NORMAL_DEBUG_GAMMA_LOOKUP = tuple(
     for i in range(256)
 )
 NORMAL_DEBUG_GAMMA_LOOKUP_NP = np.array(NORMAL_DEBUG_GAMMA_LOOKUP, dtype=np.uint8)
+GAMMA_2_2_LOOKUP_NP = np.round(((np.arange(256) / 255.0) ** 2.2) * 255).astype(np.uint8)
+GAMMA_1_1_LOOKUP_NP = np.round(((np.arange(256) / 255.0) ** (2.2 / 2.0)) * 255).astype(np.uint8)
 
 def clear_path_cache():
     global path_cache
     path_cache.clear()
+
+def source_data_image(data: bytes) -> bytes:
+    '''Returns the source image file stored in a bitmap's source data. Single images are stored after a header of
+    (version, header size, image offset, image count) and the null terminated image name'''
+    if len(data) >= 16:
+        _, header_size, image_offset, image_count = struct.unpack_from("<4I", data)
+        if header_size == 16 and image_count == 1 and header_size <= image_offset <= len(data):
+            return data[image_offset:]
+    return data
+
+def file_digest(path: str | Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
     
 class BitmapInfo:
     def __init__(self):
@@ -276,24 +295,25 @@ class BitmapTag(Tag):
         if bitmap.PixelFormat != PixelFormat.Format32bppArgb:
             return None
         
-        gamma = self.get_gamma_name()
-        
         width = bitmap.Width
         height = bitmap.Height
 
         bitmap_data = bitmap.LockBits(Rectangle(0, 0, width, height), ImageLockMode.ReadWrite, bitmap.PixelFormat)
-        stride = bitmap_data.Stride
-        total_bytes = abs(stride) * height
-        bgra_array = Array.CreateInstance(Byte, total_bytes)
-        Marshal.Copy(bitmap_data.Scan0, bgra_array, 0, total_bytes)
-        bitmap.UnlockBits(bitmap_data)
-        
-        if calc_blue_channel:
-            rgba_array = self.bgra_to_rgba_with_calculated_blue(total_bytes, bgra_array, gamma, self.normal_type() == NormalType.OPENGL)
-        elif fill_alpha:
-            rgba_array = self.bgra_to_rgba_solid_alpha(total_bytes, bgra_array, gamma)
-        else:
-            rgba_array = self.bgra_to_rgba(total_bytes, bgra_array, gamma)
+        try:
+            stride = bitmap_data.Stride
+            total_bytes = abs(stride) * height
+            pixels = locked_pixels(bitmap_data)
+            if calc_blue_channel:
+                self.bgra_to_rgba_with_calculated_blue(pixels, self.normal_type() == NormalType.OPENGL)
+            elif fill_alpha:
+                self.bgra_to_rgba_solid_alpha(pixels)
+            else:
+                self.bgra_to_rgba(pixels)
+
+            rgba_array = Array.CreateInstance(Byte, total_bytes)
+            Marshal.Copy(bitmap_data.Scan0, rgba_array, 0, total_bytes)
+        finally:
+            bitmap.UnlockBits(bitmap_data)
         
         handle = GCHandle.Alloc(rgba_array, GCHandleType.Pinned)
         rgba_ptr = None
@@ -311,71 +331,19 @@ class BitmapTag(Tag):
         return width, height, stride, rgba_ptr
     
     @staticmethod
-    def bgra_to_rgba_solid_alpha(total_bytes, bgra_array, gamma):
-        for i in range(0, total_bytes, 4):
-            bgra_array[i + 3] = 255
-            red = bgra_array[i + 2] / 255.0
-            green = bgra_array[i + 1] / 255.0
-            blue = bgra_array[i] / 255.0
-            # match gamma:
-            #     case 'linear':
-            #         red = red ** 2.0
-            #         green = green ** 2.0
-            #         blue = blue ** 2.0
-            #     case 'srgb':
-            #         red = utils.linear_to_srgb(red ** 2.0)
-            #         green = utils.linear_to_srgb(green ** 2.0)
-            #         blue = utils.linear_to_srgb(blue ** 2.0)
-                    
-            bgra_array[i] = int(red * 255)
-            bgra_array[i + 1] = int(green * 255)
-            bgra_array[i + 2] = int(blue * 255)
-            
-        return bgra_array
+    def bgra_to_rgba_solid_alpha(pixels: np.ndarray) -> np.ndarray:
+        pixels[..., 3] = 255
+        return BitmapTag.bgra_to_rgba(pixels)
     
     @staticmethod
-    def bgra_to_rgba(total_bytes, bgra_array, gamma):
-        for i in range(0, total_bytes, 4):
-            red = bgra_array[i + 2] / 255.0
-            green = bgra_array[i + 1] / 255.0
-            blue = bgra_array[i] / 255.0
-            # match gamma:
-            #     case 'linear':
-            #         red = red ** 2.0
-            #         green = green ** 2.0
-            #         blue = blue ** 2.0
-            #     case 'srgb':
-            #         red = utils.linear_to_srgb(red ** 2.0)
-            #         green = utils.linear_to_srgb(green ** 2.0)
-            #         blue = utils.linear_to_srgb(blue ** 2.0)
-                    
-            bgra_array[i] = int(red * 255)
-            bgra_array[i + 1] = int(green * 255)
-            bgra_array[i + 2] = int(blue * 255)
-            
-        return bgra_array
+    def bgra_to_rgba(pixels: np.ndarray) -> np.ndarray:
+        pixels[..., [0, 2]] = pixels[..., [2, 0]]
+        return pixels
     
     @staticmethod
-    def bgra_to_rgba_with_calculated_blue(total_bytes, bgra_array, _gamma, standard_orientation=False):
-        for i in range(0, total_bytes, 4):
-            if standard_orientation:
-                red_byte = bgra_array[i + 1]
-                green_byte = 255 - bgra_array[i + 2]
-            else:
-                red_byte = bgra_array[i + 2]
-                green_byte = bgra_array[i + 1]
-
-            red_byte = NORMAL_DEBUG_GAMMA_LOOKUP[red_byte]
-            green_byte = NORMAL_DEBUG_GAMMA_LOOKUP[green_byte]
-            red = red_byte / 255.0
-            green = green_byte / 255.0
-            blue_byte = int(calculate_z_vector(red, green) * 255 + 0.5)
-                    
-            bgra_array[i] = red_byte
-            bgra_array[i + 1] = green_byte
-            bgra_array[i + 2] = blue_byte
-            
-        return bgra_array
+    def bgra_to_rgba_with_calculated_blue(pixels: np.ndarray, standard_orientation=False) -> np.ndarray:
+        pixels[..., 0], pixels[..., 1], pixels[..., 2] = decode_normal_debug(pixels[..., 2], pixels[..., 1], standard_orientation)
+        return pixels
     
         # faces = {
         #     "back": bitmap.Clone(Rectangle(f * 3, f, f, f), bitmap.PixelFormat), # CUBEMAP: 0,1 HALO: 3,1
@@ -508,59 +476,20 @@ class BitmapTag(Tag):
             rectangle = Rectangle(0, 0, bitmap.Width, bitmap.Height)
             data = bitmap.LockBits(rectangle, ImageLockMode.ReadWrite, bitmap.PixelFormat)
             try:
-                height, width = data.Height, data.Width
-                stride = data.Stride
-
-                address = data.Scan0.ToInt64() if sys.maxsize > 2**32 else data.Scan0.ToInt32()
-                if stride < 0:
-                    address += (height - 1) * (-stride)
-                    stride = -stride
-
-                rowbytes = width * 4
-                total = stride * height
-
-                buf_t = ctypes.c_ubyte * total
-                buf = buf_t.from_address(address)
+                array = locked_pixels(data)
 
-                array = np.ctypeslib.as_array(buf).reshape(height, stride)[:, :rowbytes].reshape(height, width, 4)
-
-                B = array[..., 0]
-                G = array[..., 1]
-                R = array[..., 2]
-                
                 if blue_channel_fix:
-                    if self.normal_type() == NormalType.OPENGL:
-                        # ManagedBlam's debug plate stores standard-orientation normals with the axes swapped.
-                        managed_r = R.copy()
-                        managed_g = G.copy()
-                        R[:] = managed_g
-                        G[:] = 255 - managed_r
-
-                    # ManagedBlam's debug plate is display-oriented; darken R/G back before reconstructing Z.
-                    R[:] = NORMAL_DEBUG_GAMMA_LOOKUP_NP[R]
-                    G[:] = NORMAL_DEBUG_GAMMA_LOOKUP_NP[G]
-
-                    r = R.astype(np.float32) / 255.0
-                    g = G.astype(np.float32) / 255.0
-                    x = r * 2.0 - 1.0
-                    y = g * 2.0 - 1.0
-                    b = np.sqrt(np.clip(1.0 - x*x - y*y, 0.0, 1.0)) * 0.5 + 0.5
-                    B[:] = (b * 255.0 + 0.5).astype(np.uint8)
+                    array[..., 2], array[..., 1], array[..., 0] = decode_normal_debug(array[..., 2], array[..., 1], self.normal_type() == NormalType.OPENGL)
                 else:
                     if single_pixel or self.curve.Value == 3:
-                        lookup_table = (np.round(((np.arange(256) / 255.0) ** 2.2) * 255)).astype(np.uint8)
+                        lookup_table = GAMMA_2_2_LOOKUP_NP
                     elif self.curve.Value == 1:
-                        lookup_table = (np.round(((np.arange(256) / 255.0)) * 255)).astype(np.uint8)
+                        lookup_table = None
                     else:
-                        lookup_table = (np.round(((np.arange(256) / 255.0) ** (2.2/2.0)) * 255)).astype(np.uint8)
+                        lookup_table = GAMMA_1_1_LOOKUP_NP
 
-                    r_linear = lookup_table[R]
-                    g_linear = lookup_table[G]
-                    b_linear = lookup_table[B]
-                    
-                    R[:] = r_linear
-                    G[:] = g_linear
-                    B[:] = b_linear
+                    if lookup_table is not None:
+                        array[..., :3] = lookup_table[array[..., :3]]
 
             finally:
                 bitmap.UnlockBits(data)
@@ -697,13 +626,41 @@ class BitmapTag(Tag):
     def get_shader_type(self):
         items = [i.DisplayName for i in self.longenum_usage.Items]
         return items[self.longenum_usage.Value]
-            
-def lerp(p1: float, p2: float, fraction: float) -> float:
-    return (p1 * (1 - fraction)) + (p2 * fraction)
 
-def calculate_z_vector(r: float, g: float) -> float:
-    x = lerp(-1.0, 1.0, r)
-    y = lerp(-1.0, 1.0, g)
-    z = sqrt(max(0, 1 - x * x - y * y))
+    def source_digest(self) -> str | None:
+        '''Hash of the source image this bitmap was last imported from, matching file_digest of that image'''
+        data = bytes(self.tag.SelectField("Data:source data").GetData())
+        if not data:
+            return None
+        return hashlib.blake2b(source_data_image(data), digest_size=16).hexdigest()
 
-    return (z + 1) / 2
+    def usage_signature(self) -> tuple:
+        '''The import settings new_bitmap writes, for telling whether it changed anything'''
+        return self.longenum_usage.Value, self.charenum_usage.Value, bytes(self.block_usage_override.Serialize())
+            
+def locked_pixels(data) -> np.ndarray:
+    '''Returns a zero copy (height, width, 4) view of the pixels of a locked 32bpp System.Drawing BitmapData'''
+    height, width = data.Height, data.Width
+    stride = data.Stride
+    address = data.Scan0.ToInt64() if sys.maxsize > 2**32 else data.Scan0.ToInt32()
+    if stride < 0:
+        address += (height - 1) * stride
+        stride = -stride
+
+    buf = (ctypes.c_ubyte * (stride * height)).from_address(address)
+    return np.ctypeslib.as_array(buf).reshape(height, stride)[:, :width * 4].reshape(height, width, 4)
+
+def decode_normal_debug(red: np.ndarray, green: np.ndarray, standard_orientation=False) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''Converts the red and green channels of ManagedBlam's normal debug plate back to normal map channels and
+    reconstructs blue from them. Returns new red, green and blue uint8 arrays'''
+    if standard_orientation:
+        # ManagedBlam's debug plate stores standard-orientation normals with the axes swapped.
+        red, green = green, 255 - red
+
+    # The debug plate is display-oriented; darken R/G back before reconstructing Z.
+    red = NORMAL_DEBUG_GAMMA_LOOKUP_NP[red]
+    green = NORMAL_DEBUG_GAMMA_LOOKUP_NP[green]
+    x = red * np.float32(2.0 / 255.0) - 1.0
+    y = green * np.float32(2.0 / 255.0) - 1.0
+    blue = np.sqrt(np.clip(1.0 - x * x - y * y, 0.0, 1.0)) * 127.5 + 128.0
+    return red, green, blue.astype(np.uint8)
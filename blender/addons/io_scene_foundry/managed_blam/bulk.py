@@ -2,28 +2,57 @@
 
 '''A collection of tools to read/write various tags in bulk'''
 
+from collections import Counter, defaultdict
+import os
 from pathlib import Path
 
 from ..managed_blam import Tag
 from ..managed_blam.scenario_structure_bsp import ScenarioStructureBspTag
 from ..managed_blam.animation import AnimationTag
 from ..managed_blam.object import ObjectTag
+from ..managed_blam.graph_scan import TOKEN_CATEGORIES, scan_graphs
+from ..tools.tag_index import get_tag_index
 from .. import utils
 
+def _graph_tokens_managed_blam(path: str) -> dict[str, list[str]]:
+    '''Reads the same tokens as graph_scan.read_graph_tokens through ManagedBlam, for graphs TagReader cannot read'''
+    tokens = {category: [] for category in TOKEN_CATEGORIES}
+    with AnimationTag(path=path) as animation:
+        for element in animation.block_modes.Elements:
+            tokens["mode"].append(element.SelectField("label").GetStringData())
+            for celement in element.SelectField("weapon class").Elements:
+                tokens["weapon class"].append(celement.SelectField("label").GetStringData())
+                for telement in celement.SelectField("weapon type").Elements:
+                    tokens["weapon type"].append(telement.SelectField("label").GetStringData())
+                    for selement in telement.SelectField("sets").Elements:
+                        tokens["set"].append(selement.SelectField("label").GetStringData())
+                        for aelement in selement.SelectField("actions").Elements:
+                            tokens["action"].append(aelement.SelectField("label").GetStringData())
+                        for oelement in selement.SelectField("overlay animations").Elements:
+                            tokens["overlay"].append(oelement.SelectField("label").GetStringData())
+    return tokens
+
+def scan_objects_graphs() -> dict[str, dict[str, list[str]]]:
+    '''Returns the tokens of every animation graph in the objects folder, keyed by tag path without extension'''
+    tags_dir = utils.get_tags_path()
+    objects_dir = os.path.normcase("objects") + os.sep
+    graphs = sorted(
+        path for path in get_tag_index(tags_dir).files_with_extensions(".model_animation_graph")
+        if os.path.normcase(path).startswith(objects_dir)
+    )
+    return {str(Path(path).with_suffix("")): tokens for path, tokens in scan_graphs(tags_dir, graphs, _graph_tokens_managed_blam).items()}
+
 def report_state_names():
     '''Returns a list of all animation graphs and their state types (objects folder only)'''
-    graphs = utils.paths_in_dir(str(Path(utils.get_tags_path(), 'objects')), '.model_animation_graph')
+    graphs = scan_objects_graphs()
     state_names = set()
-    for g in graphs:
-        with AnimationTag(path=g) as animation:
-            print('')
-            print(animation.tag_path.RelativePath)
-            print('-'*50)
-            mode_block = animation.block_modes
-            for element in mode_block.Elements:
-                state_name = element.SelectField('label').GetStringData()
-                print(f'--- {state_name}')
-                state_names.add(state_name)
+    for graph_name, tokens in graphs.items():
+        print('')
+        print(graph_name)
+        print('-'*50)
+        for state_name in tokens["mode"]:
+            print(f'--- {state_name}')
+            state_names.add(state_name)
 
     print('\n\n\n')
     print(f'Found {len(graphs)} animation graphs')
@@ -34,60 +63,19 @@ def report_state_names():
         
     return ordered_state_names
 
-from collections import Counter, defaultdict
-from pathlib import Path
-
 def report_graph_tokens():
     """Returns a list of all animation tokens, sorted by usage frequency,
     with the graph that uses each token the most."""
     
-    graphs = utils.paths_in_dir(
-        str(Path(utils.get_tags_path(), "objects")),
-        ".model_animation_graph"
-    )
-
-    token_usage = {
-        "mode": defaultdict(Counter),
-        "weapon class": defaultdict(Counter),
-        "weapon type": defaultdict(Counter),
-        "set": defaultdict(Counter),
-        "action": defaultdict(Counter),
-        "overlay": defaultdict(Counter),
-    }
-
-    def add_usage(category: str, name: str, graph_name: str):
-        if name:
-            token_usage[category][name][graph_name] += 1
-
-    for g in graphs:
-        with AnimationTag(path=g) as animation:
-            graph_name = animation.tag_path.RelativePath
-
-            mode_block = animation.block_modes
-            for element in mode_block.Elements:
-                mode_name = element.SelectField("label").GetStringData()
-                add_usage("mode", mode_name, graph_name)
-
-                for celement in element.SelectField("weapon class").Elements:
-                    class_name = celement.SelectField("label").GetStringData()
-                    add_usage("weapon class", class_name, graph_name)
-
-                    for telement in celement.SelectField("weapon type").Elements:
-                        type_name = telement.SelectField("label").GetStringData()
-                        add_usage("weapon type", type_name, graph_name)
-
-                        for selement in telement.SelectField("sets").Elements:
-                            set_name = selement.SelectField("label").GetStringData()
-                            add_usage("set", set_name, graph_name)
+    graphs = scan_objects_graphs()
 
-                            for aelement in selement.SelectField("actions").Elements:
-                                action_name = aelement.SelectField("label").GetStringData()
-                                add_usage("action", action_name, graph_name)
+    token_usage = {category: defaultdict(Counter) for category in TOKEN_CATEGORIES}
 
-                            overlay_block = selement.SelectField("overlay animations")
-                            for oelement in overlay_block.Elements:
-                                overlay_name = oelement.SelectField("label").GetStringData()
-                                add_usage("overlay", overlay_name, graph_name)
+    for graph_name, tokens in graphs.items():
+        for category, names in tokens.items():
+            for name in names:
+                if name:
+                    token_usage[category][name][graph_name] += 1
 
     print("\n\n\n")
     print(f"Found {len(graphs)} animation graphs")
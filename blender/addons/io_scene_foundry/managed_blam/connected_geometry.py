@@ -5,7 +5,6 @@ from math import radians
 import math
 from pathlib import Path
 import re
-import struct
 import bmesh
 import bpy
 from mathutils import Matrix, Quaternion, Vector, bvhtree
@@ -24,6 +23,7 @@ from ..tools import materials as special_materials
 from .. import utils
 from . import import_transform
 from .Tags import TagFieldBlock, TagFieldBlockElement
+from .serialized_block import block_payload
 from mathutils.geometry import tessellate_polygon
 
 mat_props_cache = {}
@@ -1456,6 +1456,151 @@ class StructureCollision(BSP):
         self.uses_materials = True
         self.sky_index = sky_index
     
+def new_triangle_mesh(name: str, vertices: np.ndarray, faces: np.ndarray) -> bpy.types.Mesh:
+    '''Builds a triangle mesh from (N, 3) vertex & face arrays without going through python lists'''
+    mesh = bpy.data.meshes.new(name)
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1)
+    loops = np.ascontiguousarray(faces, dtype=np.int32).reshape(-1)
+    face_count = len(loops) // 3
+    mesh.vertices.add(len(vertices) // 3)
+    mesh.loops.add(len(loops))
+    mesh.polygons.add(face_count)
+    mesh.vertices.foreach_set("co", vertices)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(loops), 3, dtype=np.int32))
+    mesh.polygons.foreach_set("vertices", loops)
+    mesh.update(calc_edges=True)
+    return mesh
+
+class PackedIntBuffer:
+    '''Reads Havok tagfile zigzag packed integers. The terminating byte of every packed integer in the buffer is found up
+    front so that runs of integers, or candidate integers at many offsets, can be decoded as arrays'''
+    MAX_BYTES = 10
+    
+    def __init__(self, data: bytes):
+        self.data = data
+        self.bytes = np.frombuffer(data, dtype=np.uint8)
+        self.size = len(self.bytes)
+        self.terminators = np.flatnonzero(self.bytes < 0x80)
+        self._aligned = None
+        
+    def _values(self, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        raw = np.zeros(len(starts), dtype=np.uint64)
+        for i in range(self.MAX_BYTES):
+            mask = lengths > i
+            if not mask.any():
+                break
+            raw[mask] |= (self.bytes[starts[mask] + i] & 0x7F).astype(np.uint64) << np.uint64(7 * i)
+            
+        values = (raw >> np.uint64(1)).astype(np.int64) ^ -(raw & np.uint64(1)).astype(np.int64)
+        # Ten byte integers can carry more than 64 bits. These are never valid counts or indices so keep only their sign
+        overflow = lengths == self.MAX_BYTES
+        if overflow.any():
+            overflow[overflow] = self.bytes[starts[overflow] + self.MAX_BYTES - 1] > 1
+            values[overflow] = np.where(values[overflow] < 0, -1, np.iinfo(np.int64).max)
+            
+        return values
+        
+    def decode(self, offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''Decodes one packed integer at each offset. Returns the values, the offsets following each integer, and a mask of
+        which offsets held a complete integer'''
+        offsets = np.asarray(offsets, dtype=np.int64)
+        positions = np.searchsorted(self.terminators, offsets)
+        valid = positions < len(self.terminators)
+        ends = np.full(len(offsets), self.size, dtype=np.int64)
+        ends[valid] = self.terminators[positions[valid]]
+        lengths = ends - offsets + 1
+        valid &= lengths <= self.MAX_BYTES
+        values = np.zeros(len(offsets), dtype=np.int64)
+        values[valid] = self._values(offsets[valid], lengths[valid])
+        return values, ends + 1, valid
+        
+    def _aligned_values(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''Decodes every packed integer that starts straight after a terminating byte, which is every integer of a
+        sequence but its first. Returns the values with prefix sums of the overlong and the negative ones, so that any
+        sequence can be checked in constant time'''
+        if self._aligned is None:
+            ends = self.terminators.astype(np.int64)
+            starts = np.r_[0, ends[:-1] + 1]
+            lengths = ends - starts + 1
+            overlong = lengths > self.MAX_BYTES
+            values = np.zeros(len(ends), dtype=np.int64)
+            values[~overlong] = self._values(starts[~overlong], lengths[~overlong])
+            self._aligned = (
+                values,
+                np.r_[0, np.cumsum(overlong, dtype=np.int64)],
+                np.r_[0, np.cumsum(values < 0, dtype=np.int64)],
+            )
+        return self._aligned
+        
+    def read_sequence(self, offset: int, count: int, non_negative=False) -> tuple[np.ndarray, int] | None:
+        '''Reads count consecutive packed integers starting at offset. Returns the values and the offset following the last
+        one, or None if the sequence is malformed, runs past the end of the buffer or, when non_negative is set, holds a
+        negative value. Rejected sequences cost constant time whatever their length'''
+        if count <= 0:
+            return np.zeros(0, dtype=np.int64), offset
+        
+        position = int(np.searchsorted(self.terminators, offset))
+        if position + count > len(self.terminators):
+            return None
+        
+        first_end = int(self.terminators[position])
+        if first_end - offset + 1 > self.MAX_BYTES:
+            return None
+        
+        values, overlong, negative = self._aligned_values()
+        last = position + count
+        if overlong[last] != overlong[position + 1]:
+            return None
+        
+        first = self._value_at(offset, first_end)
+        if non_negative and (first < 0 or negative[last] != negative[position + 1]):
+            return None
+        
+        sequence = np.empty(count, dtype=np.int64)
+        sequence[0] = first
+        sequence[1:] = values[position + 1:last]
+        return sequence, int(self.terminators[last - 1]) + 1
+    
+    def _value_at(self, offset: int, end: int) -> int:
+        '''Decodes the single packed integer from offset to its terminating byte at end, as _values would'''
+        raw = 0
+        for shift, byte in enumerate(self.data[offset:end + 1]):
+            raw |= (byte & 0x7F) << (7 * shift)
+        raw &= 0xFFFFFFFFFFFFFFFF
+        value = (raw >> 1) ^ -(raw & 1)
+        if end - offset + 1 == self.MAX_BYTES and self.data[end] > 1:
+            return -1 if value < 0 else np.iinfo(np.int64).max
+        return value
+    
+    def valid_float_pools(self, offsets: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        '''Returns a mask of which float32 runs are all finite & reasonably sized, with at least one non zero value.
+        Uses prefix sums over each of the four possible float alignments so every run is checked in constant time'''
+        offsets = np.asarray(offsets, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        valid = np.zeros(len(offsets), dtype=bool)
+        residues = offsets % 4
+        for residue in range(4):
+            mask = residues == residue
+            if not mask.any():
+                continue
+            
+            float_count = (self.size - residue) // 4
+            values = np.frombuffer(self.data, dtype="<f4", count=float_count, offset=residue)
+            with np.errstate(invalid='ignore'):
+                magnitudes = np.abs(values)
+                bad = ~np.isfinite(values) | (magnitudes > 1.0e8)
+                non_zero = magnitudes > 1.0e-8
+                
+            bad_prefix = np.concatenate(([0], np.cumsum(bad, dtype=np.int64)))
+            non_zero_prefix = np.concatenate(([0], np.cumsum(non_zero, dtype=np.int64)))
+            starts = (offsets[mask] - residue) // 4
+            ends = starts + counts[mask]
+            in_range = ends <= float_count
+            ends = np.minimum(ends, float_count)
+            valid[mask] = in_range & (bad_prefix[ends] == bad_prefix[starts]) & (non_zero_prefix[ends] > non_zero_prefix[starts])
+            
+        return valid
+    
 class HavokCollision:
     """A minimal importer for Tool's serialized HaloCompressedMeshShape data."""
 
@@ -1468,7 +1613,7 @@ class HavokCollision:
         4: "none",
     }
 
-    def __init__(self, name: str, vertices: list[tuple[float, float, float]], faces: list[tuple[int, int, int]], material_indices: list[int], collision_materials: list[BSPCollisionMaterial], render_triangle_mappings: list[tuple[int, ...]] | None = None, collision_type: int = 0):
+    def __init__(self, name: str, vertices: np.ndarray, faces: np.ndarray, material_indices: np.ndarray, collision_materials: list[BSPCollisionMaterial], render_triangle_mappings: list[tuple[int, ...]] | None = None, collision_type: int = 0):
         self.name = name
         self.vertices = vertices
         self.faces = faces
@@ -1533,7 +1678,7 @@ class HavokCollision:
             if not resolved_triangles:
                 continue
 
-            material_index = self.material_indices[face_index] if face_index < len(self.material_indices) else -1
+            material_index = int(self.material_indices[face_index]) if face_index < len(self.material_indices) else -1
             material = self.collision_materials[material_index] if 0 <= material_index < len(self.collision_materials) else None
             group_key = material_index
             surface, triangle_mappings = grouped_mappings.get(group_key, (None, None))
@@ -1585,28 +1730,11 @@ class HavokCollision:
 
         vertices, faces, material_indices, render_triangle_mappings = mesh_data
         vertices = cls._fit_vertices_to_bounds(vertices, bounds_min, bounds_max)
-        if not vertices or not faces:
+        if not len(vertices) or not len(faces):
             return None
 
         return cls(name, vertices, faces, material_indices, collision_materials, render_triangle_mappings, collision_type)
 
-    @staticmethod
-    def _read_packed_int(data: bytes, offset: int) -> tuple[int, int]:
-        result = 0
-        shift = 0
-        while offset < len(data):
-            byte = data[offset]
-            offset += 1
-            result |= (byte & 0x7F) << shift
-            if not byte & 0x80:
-                value = (result >> 1) ^ -(result & 1)
-                return value, offset
-            shift += 7
-            if shift > 63:
-                break
-
-        raise ValueError("Invalid packed Havok integer")
-
     @classmethod
     def _extract_mesh_data(cls, data: bytes, material_count: int):
         if b"HaloCompressedMeshShape" not in data or b"VertexPool" not in data or b"IndexPool" not in data:
@@ -1618,86 +1746,67 @@ class HavokCollision:
             if index != -1:
                 scan_start = max(scan_start, index + len(marker) + 1)
 
-        candidates = []
-        for offset in range(scan_start, len(data) - 8):
-            try:
-                vertex_float_count, vertex_data_offset = cls._read_packed_int(data, offset)
-            except ValueError:
-                continue
-
-            if vertex_float_count < 9 or vertex_float_count % 3:
-                continue
-            if vertex_float_count > cls._MAX_POOL_VALUES:
-                continue
-
-            vertex_data_end = vertex_data_offset + vertex_float_count * 4
-            if vertex_data_end >= len(data):
-                continue
-
-            try:
-                vertex_values = struct.unpack_from(f"<{vertex_float_count}f", data, vertex_data_offset)
-            except struct.error:
-                continue
-
-            if not cls._valid_vertex_pool(vertex_values):
-                continue
-
-            try:
-                index_value_count, index_data_offset = cls._read_packed_int(data, vertex_data_end)
-            except ValueError:
-                continue
+        packed = PackedIntBuffer(data)
+        size = packed.size
+        if scan_start >= size - 8:
+            return None
 
-            if index_value_count < 4 or index_value_count % 4:
-                continue
-            if index_value_count > cls._MAX_POOL_VALUES:
-                continue
+        # Every byte offset after the pool markers is a potential vertex pool header. Decode them all at once and keep
+        # those which describe a float pool that fits in the buffer
+        offsets = np.arange(scan_start, size - 8, dtype=np.int64)
+        vertex_float_counts, vertex_data_offsets, valid = packed.decode(offsets)
+        valid &= (vertex_float_counts >= 9) & (vertex_float_counts % 3 == 0) & (vertex_float_counts <= cls._MAX_POOL_VALUES)
+        vertex_data_ends = vertex_data_offsets + vertex_float_counts * 4
+        valid &= vertex_data_ends < size
+
+        offsets = offsets[valid]
+        vertex_float_counts = vertex_float_counts[valid]
+        vertex_data_offsets = vertex_data_offsets[valid]
+        vertex_data_ends = vertex_data_ends[valid]
+
+        valid = packed.valid_float_pools(vertex_data_offsets, vertex_float_counts)
+        index_value_counts, index_data_offsets, index_valid = packed.decode(vertex_data_ends[valid])
+        index_valid &= (index_value_counts >= 4) & (index_value_counts % 4 == 0) & (index_value_counts <= cls._MAX_POOL_VALUES)
+
+        headers = zip(
+            offsets[valid][index_valid].tolist(),
+            vertex_float_counts[valid][index_valid].tolist(),
+            vertex_data_offsets[valid][index_valid].tolist(),
+            index_value_counts[index_valid].tolist(),
+            index_data_offsets[index_valid].tolist(),
+        )
 
+        candidates = []
+        for offset, vertex_float_count, vertex_data_offset, index_value_count, index_data_offset in headers:
             vertex_count = vertex_float_count // 3
-            vertices = [
-                (vertex_values[i], vertex_values[i + 1], vertex_values[i + 2])
-                for i in range(0, vertex_float_count, 3)
-            ]
+            vertices = None
+            triangle_count = index_value_count // 4
             for index_pool_header_size in (0, 1):
-                index_values = []
-                cursor = index_data_offset + index_pool_header_size
-                try:
-                    for _ in range(index_value_count):
-                        value, cursor = cls._read_packed_int(data, cursor)
-                        if value < 0:
-                            raise ValueError
-                        index_values.append(value)
-                except ValueError:
+                index_pool = packed.read_sequence(index_data_offset + index_pool_header_size, index_value_count, non_negative=True)
+                if index_pool is None:
                     continue
 
-                faces = []
-                material_indices = []
-                valid_triangle_indices = []
-                material_score = 0
-                invalid_triangle_count = 0
-                for triangle_index, i in enumerate(range(0, index_value_count, 4)):
-                    a, b, c, combined_material = index_values[i:i + 4]
-                    if a >= vertex_count or b >= vertex_count or c >= vertex_count or len({a, b, c}) < 3:
-                        invalid_triangle_count += 1
-                        continue
-
-                    material_index = cls._material_index_from_combined_data(combined_material, material_count)
-                    if not material_count or material_index < material_count:
-                        material_score += 1
-
-                    faces.append((a, b, c))
-                    material_indices.append(material_index)
-                    valid_triangle_indices.append(triangle_index)
+                index_values, cursor = index_pool
 
-                triangle_count = index_value_count // 4
-                if not faces or invalid_triangle_count > max(0, triangle_count // 10):
+                triangles = index_values.reshape(-1, 4)
+                a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+                valid_triangles = (a < vertex_count) & (b < vertex_count) & (c < vertex_count) & (a != b) & (b != c) & (a != c)
+                face_count = int(np.count_nonzero(valid_triangles))
+                if not face_count or triangle_count - face_count > max(0, triangle_count // 10):
                     continue
 
-                render_triangle_mappings = cls._extract_render_mappings(data, cursor, triangle_count)
+                faces = triangles[valid_triangles, :3].astype(np.int32)
+                material_indices = cls._material_indices_from_combined_data(triangles[valid_triangles, 3], material_count)
+                material_score = face_count if not material_count else int(np.count_nonzero(material_indices < material_count))
+                
+                if vertices is None:
+                    vertices = np.frombuffer(data, dtype="<f4", count=vertex_float_count, offset=vertex_data_offset).astype(np.float64).reshape(-1, 3)
+                render_triangle_mappings = cls._extract_render_mappings(packed, cursor, triangle_count)
                 if render_triangle_mappings and len(render_triangle_mappings) == triangle_count:
-                    render_triangle_mappings = [render_triangle_mappings[i] for i in valid_triangle_indices]
+                    render_triangle_mappings = [render_triangle_mappings[i] for i in np.flatnonzero(valid_triangles).tolist()]
                 else:
                     render_triangle_mappings = []
-                candidates.append((len(faces), material_score, vertex_count, len(render_triangle_mappings), offset, vertices, faces, material_indices, render_triangle_mappings))
+                candidates.append((face_count, material_score, vertex_count, len(render_triangle_mappings), offset, vertices, faces, material_indices, render_triangle_mappings))
 
         if not candidates:
             return None
@@ -1706,122 +1815,93 @@ class HavokCollision:
         return vertices, faces, material_indices, render_triangle_mappings
 
     @classmethod
-    def _extract_render_mappings(cls, data: bytes, offset: int, triangle_count: int) -> list[tuple[int, ...]]:
+    def _extract_render_mappings(cls, packed: PackedIntBuffer, offset: int, triangle_count: int) -> list[tuple[int, ...]]:
         if triangle_count <= 0:
             return []
 
         for start_offset in (offset, offset + 1):
-            try:
-                mapping_reference_count, cursor = cls._read_packed_int(data, start_offset)
-            except ValueError:
+            header = packed.read_sequence(start_offset, 1)
+            if header is None:
                 continue
 
+            mapping_reference_count, cursor = int(header[0][0]), header[1]
             if mapping_reference_count != triangle_count:
                 continue
-            if cursor >= len(data):
+            if cursor >= packed.size:
                 continue
 
             # The next byte is the tagfile array payload marker, followed by one
             # 4-byte mapping reference per collision triangle.
             pointer_table_cursor = cursor + 1
             mapped_indices_cursor = pointer_table_cursor + triangle_count * 4
-            if mapped_indices_cursor >= len(data):
+            if mapped_indices_cursor >= packed.size:
                 continue
 
-            try:
-                mapped_count, cursor = cls._read_packed_int(data, mapped_indices_cursor)
-            except ValueError:
+            header = packed.read_sequence(mapped_indices_cursor, 1)
+            if header is None:
                 continue
 
-            if mapped_count != triangle_count or cursor >= len(data):
+            mapped_count, cursor = int(header[0][0]), header[1]
+            if mapped_count != triangle_count or cursor >= packed.size:
                 continue
 
             # The render triangle indices array has the same one-byte payload marker.
-            cursor += 1
-            mapped_indices = []
-            try:
-                for _ in range(triangle_count):
-                    render_triangle_index, cursor = cls._read_packed_int(data, cursor)
-                    if render_triangle_index < 0:
-                        raise ValueError
-                    mapped_indices.append(render_triangle_index)
-            except ValueError:
+            mapped_indices = packed.read_sequence(cursor + 1, triangle_count, non_negative=True)
+            if mapped_indices is None:
                 continue
 
-            if len(mapped_indices) == triangle_count:
-                return [(index,) for index in mapped_indices]
+            return [(index,) for index in mapped_indices[0].tolist()]
 
         return []
 
     @staticmethod
-    def _valid_vertex_pool(values) -> bool:
-        if not values:
-            return False
-
-        has_non_zero = False
-        for value in values:
-            if not math.isfinite(value) or abs(value) > 1.0e8:
-                return False
-            if abs(value) > 1.0e-8:
-                has_non_zero = True
-
-        return has_non_zero
-
-    @staticmethod
-    def _material_index_from_combined_data(combined_data: int, material_count: int) -> int:
-        material_index = combined_data & 0x0FFF
+    def _material_indices_from_combined_data(combined_data: np.ndarray, material_count: int) -> np.ndarray:
+        material_indices = combined_data & 0x0FFF
         if material_count:
-            if material_index < material_count:
-                return material_index
-            if combined_data < material_count:
-                return combined_data
+            material_indices = np.where(
+                material_indices < material_count,
+                material_indices,
+                np.where(combined_data < material_count, combined_data, material_indices),
+            )
 
-        return material_index
+        return material_indices.astype(np.int32)
 
     @staticmethod
-    def _fit_vertices_to_bounds(vertices: list[tuple[float, float, float]], bounds_min, bounds_max) -> list[tuple[float, float, float]]:
+    def _fit_vertices_to_bounds(vertices: np.ndarray, bounds_min, bounds_max) -> np.ndarray:
         if bounds_min is None or bounds_max is None:
-            return [(x * 100, y * 100, z * 100) for x, y, z in vertices]
+            return vertices * 100
 
         try:
-            target_min = tuple(float(bounds_min[i]) for i in range(3))
-            target_max = tuple(float(bounds_max[i]) for i in range(3))
+            target_min = np.array([float(bounds_min[i]) for i in range(3)])
+            target_max = np.array([float(bounds_max[i]) for i in range(3)])
         except (IndexError, TypeError, ValueError):
-            return [(x * 100, y * 100, z * 100) for x, y, z in vertices]
+            return vertices * 100
 
-        raw_min = tuple(min(v[axis] for v in vertices) for axis in range(3))
-        raw_max = tuple(max(v[axis] for v in vertices) for axis in range(3))
-        target_extent = tuple(target_max[axis] - target_min[axis] for axis in range(3))
-        raw_extent = tuple(raw_max[axis] - raw_min[axis] for axis in range(3))
+        raw_min = vertices.min(axis=0)
+        raw_max = vertices.max(axis=0)
+        target_extent = target_max - target_min
+        raw_extent = raw_max - raw_min
 
-        max_target_extent = max(abs(value) for value in target_extent)
-        max_bounds_delta = max(
-            max(abs(raw_min[axis] - target_min[axis]), abs(raw_max[axis] - target_max[axis]))
-            for axis in range(3)
-        )
+        max_target_extent = np.abs(target_extent).max()
+        max_bounds_delta = max(np.abs(raw_min - target_min).max(), np.abs(raw_max - target_max).max())
 
         if max_bounds_delta <= max(0.001, max_target_extent * 0.001):
-            return [(x * 100, y * 100, z * 100) for x, y, z in vertices]
-
-        fitted_vertices = []
-        for vertex in vertices:
-            fitted = []
-            for axis in range(3):
-                if abs(raw_extent[axis]) > 1.0e-8 and abs(target_extent[axis]) > 1.0e-8:
-                    fitted_value = (vertex[axis] - raw_min[axis]) * (target_extent[axis] / raw_extent[axis]) + target_min[axis]
-                elif abs(target_extent[axis]) <= 1.0e-8:
-                    fitted_value = target_min[axis]
-                else:
-                    fitted_value = vertex[axis] + target_min[axis] - raw_min[axis]
-                fitted.append(fitted_value * 100)
-
-            fitted_vertices.append(tuple(fitted))
+            return vertices * 100
+
+        fitted_vertices = np.empty_like(vertices)
+        for axis in range(3):
+            if abs(raw_extent[axis]) > 1.0e-8 and abs(target_extent[axis]) > 1.0e-8:
+                fitted_vertices[:, axis] = (vertices[:, axis] - raw_min[axis]) * (target_extent[axis] / raw_extent[axis]) + target_min[axis]
+            elif abs(target_extent[axis]) <= 1.0e-8:
+                fitted_vertices[:, axis] = target_min[axis]
+            else:
+                fitted_vertices[:, axis] = vertices[:, axis] + target_min[axis] - raw_min[axis]
 
-        return fitted_vertices
+        return fitted_vertices * 100
 
     def to_bvh(self):
-        if self.vertices and self.faces:
-            return bvhtree.BVHTree.FromPolygons([Vector(v) for v in self.vertices], self.faces)
+        if len(self.vertices) and len(self.faces):
+            return bvhtree.BVHTree.FromPolygons(self.vertices.tolist(), self.faces.tolist())
 
     def to_object(self, face_indices: list[int] | None = None, name: str | None = None) -> bpy.types.Object:
         if face_indices is None:
@@ -1830,26 +1910,22 @@ class HavokCollision:
             material_indices = self.material_indices
             render_triangle_mappings = self.render_triangle_mappings
         else:
-            used_vertex_indices = sorted({vertex_index for face_index in face_indices for vertex_index in self.faces[face_index]})
-            vertex_remap = {vertex_index: remapped_index for remapped_index, vertex_index in enumerate(used_vertex_indices)}
-            vertices = [self.vertices[vertex_index] for vertex_index in used_vertex_indices]
-            faces = [
-                tuple(vertex_remap[vertex_index] for vertex_index in self.faces[face_index])
-                for face_index in face_indices
-            ]
-            material_indices = [self.material_indices[face_index] for face_index in face_indices]
+            face_indices = np.asarray(face_indices, dtype=np.int64)
+            used_vertex_indices, remapped_faces = np.unique(self.faces[face_indices], return_inverse=True)
+            vertices = self.vertices[used_vertex_indices]
+            faces = remapped_faces.reshape(-1, 3)
+            material_indices = self.material_indices[face_indices]
             render_triangle_mappings = [
                 self.render_triangle_mappings[face_index] if face_index < len(self.render_triangle_mappings) else ()
-                for face_index in face_indices
+                for face_index in face_indices.tolist()
             ]
 
-        mesh = bpy.data.meshes.new(name or self.name)
-        mesh.from_pydata(vertices=vertices, edges=[], faces=faces)
+        mesh = new_triangle_mesh(name or self.name, vertices, faces)
         mesh.transform(import_transform.mesh_matrix())
         mesh.update()
 
-        material_slots = {}
-        for material_index in sorted(set(material_indices)):
+        material_slots = np.zeros(len(material_indices), dtype=np.int32)
+        for material_index in np.unique(material_indices).tolist():
             if material_index < 0 or material_index >= len(self.collision_materials):
                 continue
 
@@ -1857,11 +1933,11 @@ class HavokCollision:
             if collision_material.blender_material is None:
                 continue
 
-            material_slots[material_index] = len(mesh.materials)
+            material_slots[material_indices == material_index] = len(mesh.materials)
             mesh.materials.append(collision_material.blender_material)
 
-        if material_slots:
-            mesh.polygons.foreach_set("material_index", [material_slots.get(i, 0) for i in material_indices])
+        if mesh.materials:
+            mesh.polygons.foreach_set("material_index", material_slots)
 
         if len(render_triangle_mappings) == len(mesh.polygons):
             render_triangle_indices = np.array([mapping[0] if mapping else -1 for mapping in render_triangle_mappings], dtype=np.int32)
@@ -2002,93 +2078,53 @@ class IndexLayoutType(Enum):
     RECT_LIST = 7
     
 class IndexBuffer:
-    def __init__(self, index_buffer_type: int, indices: list[int]):
+    def __init__(self, index_buffer_type: int, indices: np.ndarray):
         self.index_layout = IndexLayoutType(index_buffer_type)
-        self.indices = indices
+        self.indices = np.asarray(indices, dtype=np.int64)
 
-    def get_faces(self, mesh: 'Mesh', subparts=None) -> list[Face]:
-        idx = 0
-        faces = []
+    def get_triangles(self, mesh: 'Mesh', subparts=None) -> tuple[np.ndarray, dict[int, slice]]:
+        '''Returns an (N, 3) array of triangle indices and a mapping of subpart index to the slice of triangles it owns.
+        Triangles are ordered by subpart'''
         if mesh.subparts:
-            if subparts is None:
-                for subpart in mesh.subparts:
-                    start = subpart.index_start
-                    count = subpart.index_count
-                    list_indices = list(self._get_indices(start, count))
-                    indices = [list_indices[n:n+3] for n in range(0, len(list_indices), 3) if len(list_indices[n:n+3]) == 3]
-                    for i in indices:
-                        faces.append(Face(indices=i, subpart=subpart, index=idx))
-                        idx += 1
-            else:
-                for subpart in subparts:
-                    start = subpart.index_start
-                    count = subpart.index_count
-                    list_indices = list(self._get_indices(start, count))
-                    indices = [list_indices[n:n+3] for n in range(0, len(list_indices), 3) if len(list_indices[n:n+3]) == 3]
-                    for i in indices:
-                        faces.append(Face(indices=i, subpart=subpart, index=idx))
-                        idx += 1
+            ranges = [(subpart.index, subpart.index_start, subpart.index_count) for subpart in (mesh.subparts if subparts is None else subparts)]
         else:
-            start = 0
-            count = len(self.indices)
-            list_indices = list(self._get_indices(start, count))
-            indices = [list_indices[n:n+3] for n in range(0, len(list_indices), 3) if len(list_indices[n:n+3]) == 3]
-            for i in indices:
-                faces.append(Face(indices=i, subpart=None, index=idx))
-                idx += 1
-                
-        return faces
+            ranges = [(None, 0, len(self.indices))]
+
+        triangle_arrays = []
+        subpart_slices = {}
+        face_count = 0
+        for subpart_index, start, count in ranges:
+            triangles = self._get_triangles(start, count)
+            triangle_arrays.append(triangles)
+            if subpart_index is not None:
+                subpart_slices[subpart_index] = slice(face_count, face_count + len(triangles))
+            face_count += len(triangles)
+
+        if not triangle_arrays:
+            return np.zeros((0, 3), dtype=np.int32), subpart_slices
 
-    def _get_indices(self, start: int, count: int):
+        return np.concatenate(triangle_arrays).astype(np.int32, copy=False), subpart_slices
+
+    def _get_triangles(self, start: int, count: int) -> np.ndarray:
         end = len(self.indices) if count < 0 else start + count
-        subset = (self.indices[i] for i in range(start, end))
+        subset = self.indices[start:end]
         if self.index_layout == IndexLayoutType.TRIANGLE_LIST:
-            return subset
+            return subset[:len(subset) - len(subset) % 3].reshape(-1, 3)
         elif self.index_layout == IndexLayoutType.TRIANGLE_STRIP:
             return self._unpack(subset)
         else:
             raise ValueError(f"Unsupported Index Layout Type {self.index_layout}")
 
-    def _unpack(self, indices) -> list[int]:
-        indices = list(indices)
-        for pos in range(len(indices) - 2):
-            if indices[pos] == indices[pos+1] or indices[pos] == indices[pos+2] or indices[pos+1] == indices[pos+2]:
-                continue  # Skip degenerate triangles
-            if pos % 2 == 0:
-                yield indices[pos]
-                yield indices[pos+1]
-                yield indices[pos+2]
-            else:
-                yield indices[pos]
-                yield indices[pos+2]
-                yield indices[pos+1]
-
-def _serialized_block_data(block):
-    count = block.Elements.Count
-    if count == 0:
-        return memoryview(b""), 0, 0
-
-    block_size = int(block.Size)
-    if block_size <= 0 or block_size % count:
-        element_size = sum(int(field.Size) for field in block.Elements[0].Fields)
-    else:
-        element_size = block_size // count
-
-    data = bytes(block.Serialize())
-    chunk_start = data.find(b"lbgt")
-    if chunk_start == -1:
-        raise ValueError("Serialized tag block does not contain an lbgt chunk")
-
-    chunk_count = struct.unpack_from("<I", data, chunk_start + 12)[0]
-    if chunk_count != count:
-        raise ValueError(f"Serialized tag block count mismatch: {chunk_count} != {count}")
+    def _unpack(self, indices: np.ndarray) -> np.ndarray:
+        if len(indices) < 3:
+            return np.zeros((0, 3), dtype=indices.dtype)
 
-    values_start = chunk_start + 20
-    values_end = values_start + element_size * count
-    if values_end > len(data):
-        raise ValueError("Serialized tag block ended before all element data was read")
-
-    return memoryview(data)[values_start:values_end], element_size, count
+        a, b, c = indices[:-2], indices[1:-1], indices[2:]
+        odd = (np.arange(len(a)) % 2).astype(bool)
+        # Every other triangle in a strip has reversed winding
+        triangles = np.column_stack((a, np.where(odd, c, b), np.where(odd, b, c)))
+        # Skip degenerate triangles
+        return triangles[(a != b) & (a != c) & (b != c)]
 
 def _raw_vertex_offsets(raw_vertices, element_size: int):
     offsets = []
@@ -2110,15 +2146,15 @@ def _unsigned_int(value: int, field_size: int):
 
 def _read_index_elements(raw_indices):
     if raw_indices.Elements.Count == 0:
-        return []
+        return np.zeros(0, dtype=np.int64)
 
     field_size = int(raw_indices.Elements[0].Fields[0].Size)
-    return [_unsigned_int(element.Fields[0].Data, field_size) for element in raw_indices.Elements]
+    return np.array([_unsigned_int(element.Fields[0].Data, field_size) for element in raw_indices.Elements], dtype=np.int64)
 
 def _read_serialized_indices(raw_indices):
-    data, element_size, count = _serialized_block_data(raw_indices)
+    data, element_size, count = block_payload(raw_indices)
     if count == 0:
-        return []
+        return np.zeros(0, dtype=np.int64)
 
     field_size = int(raw_indices.Elements[0].Fields[0].Size)
     if field_size not in (1, 2, 4):
@@ -2128,7 +2164,7 @@ def _read_serialized_indices(raw_indices):
 
     dtype = np.dtype(f"<u{field_size}")
     if element_size == field_size:
-        return np.frombuffer(data, dtype=dtype, count=count).tolist()
+        return np.frombuffer(data, dtype=dtype, count=count).copy()
 
     index_dtype = np.dtype({
         "names": ["index"],
@@ -2136,20 +2172,20 @@ def _read_serialized_indices(raw_indices):
         "offsets": [0],
         "itemsize": element_size,
     })
-    return np.frombuffer(data, dtype=index_dtype, count=count)["index"].tolist()
+    return np.ascontiguousarray(np.frombuffer(data, dtype=index_dtype, count=count)["index"])
 
 def _read_serialized_raw_vertices(raw_vertices, read_texcoord1: bool):
-    data, element_size, count = _serialized_block_data(raw_vertices)
+    data, element_size, count = block_payload(raw_vertices)
     if count == 0:
         return {
-            "positions": [],
-            "texcoords": [],
-            "normals": [],
-            "lightmap_texcoords": [],
-            "node_indices": [],
-            "node_weights": [],
-            "vertex_colors": [],
-            "texcoords1": [],
+            "positions": np.zeros((0, 3), dtype=np.float32),
+            "texcoords": np.zeros((0, 2), dtype=np.float32),
+            "normals": np.zeros((0, 3), dtype=np.float32),
+            "lightmap_texcoords": np.zeros((0, 2), dtype=np.float32),
+            "node_indices": np.zeros((0, 4), dtype=np.int8),
+            "node_weights": np.zeros((0, 4), dtype=np.float32),
+            "vertex_colors": np.zeros((0, 3), dtype=np.float32),
+            "texcoords1": None,
         }
 
     offsets = _raw_vertex_offsets(raw_vertices, element_size)
@@ -2181,15 +2217,16 @@ def _read_serialized_raw_vertices(raw_vertices, read_texcoord1: bool):
     })
     vertices = np.frombuffer(data, dtype=dtype, count=count)
 
+    # Copy each channel out of the interleaved buffer so the serialized block can be freed
     return {
-        "positions": vertices["position"].tolist(),
-        "texcoords": vertices["texcoord"].tolist(),
-        "normals": vertices["normal"].tolist(),
-        "lightmap_texcoords": vertices["lightmap_texcoord"].tolist(),
-        "node_indices": vertices["node_indices"].tolist(),
-        "node_weights": vertices["node_weights"].tolist(),
-        "vertex_colors": vertices["vertex_color"].tolist(),
-        "texcoords1": vertices["texcoord1"].tolist() if "texcoord1" in vertices.dtype.names else [],
+        "positions": np.ascontiguousarray(vertices["position"]),
+        "texcoords": np.ascontiguousarray(vertices["texcoord"]),
+        "normals": np.ascontiguousarray(vertices["normal"]),
+        "lightmap_texcoords": np.ascontiguousarray(vertices["lightmap_texcoord"]),
+        "node_indices": np.ascontiguousarray(vertices["node_indices"]),
+        "node_weights": np.ascontiguousarray(vertices["node_weights"]),
+        "vertex_colors": np.ascontiguousarray(vertices["vertex_color"]),
+        "texcoords1": np.ascontiguousarray(vertices["texcoord1"]) if "texcoord1" in vertices.dtype.names else None,
     }
                 
 class Tessellation(Enum):
@@ -2406,19 +2443,18 @@ class Mesh:
             self.is_pca = mesh_flags.TestBit("mesh is PCA")
             self.uncompressed = mesh_flags.TestBit("use uncompressed vertex format")
             
-        self.raw_positions = []
-        self.raw_texcoords = []
-        self.raw_normals = []
-        self.raw_node_indices = []
-        self.raw_node_weights = []
-        self.raw_lightmap_texcoords = []
-        self.raw_vertex_colors = []
-        self.raw_texcoords1 = []
-        self.raw_water_texcoords = []
-        self.tris: list[Face] = []
-        self.all_triangle_indices: list[list[int]] = []
-        self.triangle_indices_by_subpart: dict[int, list[list[int]]] = {}
-        self.face_indices_by_subpart: dict[int, list[int]] = {}
+        self.raw_positions: np.ndarray | None = None
+        self.raw_texcoords: np.ndarray | None = None
+        self.raw_normals: np.ndarray | None = None
+        self.raw_node_indices: np.ndarray | None = None
+        self.raw_node_weights: np.ndarray | None = None
+        self.raw_lightmap_texcoords: np.ndarray | None = None
+        self.raw_vertex_colors: np.ndarray | None = None
+        self.raw_texcoords1: np.ndarray | None = None
+        self.raw_water_texcoords: np.ndarray | None = None
+        self.all_triangle_indices = np.zeros((0, 3), dtype=np.int32)
+        self.triangle_indices_by_subpart: dict[int, np.ndarray] = {}
+        self.face_indices_by_subpart: dict[int, np.ndarray] = {}
         
         self.node_map = []
         if block_node_map is not None and block_node_map.Elements.Count and self.index < block_node_map.Elements.Count:
@@ -2440,6 +2476,43 @@ class Mesh:
     def _get_raw_mesh_cache_key(self, raw_mesh_index: int):
         return (self.tag_path or id(self.temp_meshes), raw_mesh_index)
 
+    def _set_vertex_weights(self, ob: bpy.types.Object, nodes, node_indices: np.ndarray, node_weights: np.ndarray):
+        '''Adds every vertex to the vertex groups of the nodes that influence it. Vertices sharing a node and weight are added
+        in a single call'''
+        node_indices = np.asarray(node_indices, dtype=np.int64)
+        node_weights = np.asarray(node_weights, dtype=np.float32)
+        vertex_indices = np.repeat(np.arange(len(node_indices)), node_indices.shape[1])
+        node_indices = node_indices.ravel()
+        node_weights = node_weights.ravel()
+        valid = (node_indices >= 0) & (node_indices <= 254) & (node_weights > 0)
+        vertex_indices, node_indices, node_weights = vertex_indices[valid], node_indices[valid], node_weights[valid]
+        if not len(vertex_indices):
+            return
+        
+        if self.node_map:
+            node_indices = np.asarray(self.node_map, dtype=np.int64)[node_indices]
+            
+        # Groups are created in the order their nodes first appear
+        unique_nodes, first_occurrences = np.unique(node_indices, return_index=True)
+        group_order = unique_nodes[np.argsort(first_occurrences)].tolist()
+            
+        # A vertex can reference the same node more than once, in which case the last weight wins
+        node_count = int(node_indices.max()) + 1
+        _, last_from_end = np.unique((vertex_indices * node_count + node_indices)[::-1], return_index=True)
+        keep = np.sort(len(vertex_indices) - 1 - last_from_end)
+        vertex_indices, node_indices, node_weights = vertex_indices[keep], node_indices[keep], node_weights[keep]
+        
+        vgroups = ob.vertex_groups
+        for node_index in group_order:
+            group_name = nodes[node_index].name
+            group = vgroups.get(group_name) or vgroups.new(name=group_name)
+            node_mask = node_indices == node_index
+            group_vertices = vertex_indices[node_mask]
+            weights, weight_groups = np.unique(node_weights[node_mask], return_inverse=True)
+            weight_groups = weight_groups.ravel()
+            for weight_index, weight in enumerate(weights.tolist()):
+                group.add(group_vertices[weight_groups == weight_index].tolist(), weight, 'REPLACE')
+
     def _get_blender_material(self, material):
         return material.blender_material if hasattr(material, "blender_material") else material
 
@@ -2451,17 +2524,17 @@ class Mesh:
         mask[face_indices] = 1
         return mask
 
-    def _set_uv_layer_data(self, uv_layer, uvs, loop_vertex_indices):
+    def _set_uv_layer_data(self, uv_layer, uvs: np.ndarray, loop_vertex_indices: np.ndarray):
         if uv_layer is None or not len(loop_vertex_indices):
             return
 
-        uv_values = np.asarray([(uv[0], uv[1]) for uv in uvs], dtype=np.float32)
+        uv_values = np.ascontiguousarray(uvs[:, :2], dtype=np.float32)
         uv_layer.data.foreach_set("uv", uv_values[loop_vertex_indices].ravel())
 
-    def _set_water_attribute(self, mesh: bpy.types.Mesh, face_indices: list[int] | None):
+    def _set_water_attribute(self, mesh: bpy.types.Mesh, face_indices: np.ndarray | None):
         if face_indices is None:
             values = np.ones(len(mesh.polygons), dtype=np.int8)
-        elif face_indices:
+        elif len(face_indices):
             values = np.zeros(len(mesh.polygons), dtype=np.int8)
             values[face_indices] = 1
         else:
@@ -2734,14 +2807,14 @@ class Mesh:
             prop.debug_emissive_index = material.emissive_index
             utils.print_warning(f"Mesh {mesh.name} has invalid emissive on material {subpart.part.material.name} (part {subpart.part_index})")
                 
-    def _true_uvs(self, texcoords):
-        return [self._interp_uv(tc) for tc in texcoords]
-    
-    def _interp_uv(self, texcoord):
-        u = np.interp(texcoord[0], (0, 1), (self.bounds.u0, self.bounds.u1))
-        v = np.interp(texcoord[1], (0, 1), (self.bounds.v0, self.bounds.v1))
+    def _true_uvs(self, texcoords: np.ndarray) -> np.ndarray:
+        if self.bounds:
+            u = np.interp(texcoords[:, 0], (0, 1), (self.bounds.u0, self.bounds.u1))
+            v = np.interp(texcoords[:, 1], (0, 1), (self.bounds.v0, self.bounds.v1))
+        else:
+            u, v = texcoords[:, 0], texcoords[:, 1]
         
-        return Vector((u, 1-v)) # 1-v to correct UV for Blender
+        return np.column_stack((u, 1 - v)) # 1-v to correct UV for Blender
     
     def create(self, render_model, temp_meshes: TagFieldBlock, nodes=[], parent: bpy.types.Object | None = None, instances: list['InstancePlacement'] = [], name="blam", is_io=False, surface_triangle_mapping=[], section_index=0, real_mesh_index=None, collision_info: BSP | None = None):
         if not self.valid:
@@ -2807,7 +2880,7 @@ class Mesh:
         return objects
     
     def _get_raw_mesh_data(self):
-        if self.raw_positions:
+        if self.raw_positions is not None:
             return
         
         raw_mesh_index = self.index if self.real_mesh_index is None else self.real_mesh_index
@@ -2825,18 +2898,15 @@ class Mesh:
                 vertex_data = _read_serialized_raw_vertices(raw_vertices, self.corinth)
             except Exception as ex:
                 utils.print_warning(f"Failed to read raw vertices with Field.Serialize(); falling back to ManagedBlam mesh helpers: {ex}")
-                raw_positions = list(self.render_model.GetPositionsFromMesh(self.temp_meshes, raw_mesh_index))
-                raw_texcoords = list(self.render_model.GetTexCoordsFromMesh(self.temp_meshes, raw_mesh_index))
-                raw_normals = list(self.render_model.GetNormalsFromMesh(self.temp_meshes, raw_mesh_index))
                 vertex_data = {
-                    "positions": [tuple(raw_positions[i:i + 3]) for i in range(0, len(raw_positions), 3)],
-                    "texcoords": [tuple(raw_texcoords[i:i + 2]) for i in range(0, len(raw_texcoords), 2)],
-                    "normals": [tuple(raw_normals[i:i + 3]) for i in range(0, len(raw_normals), 3)],
-                    "lightmap_texcoords": [tuple(float(v) for v in e.Fields[5].Data) for e in raw_vertices.Elements],
-                    "vertex_colors": [tuple(float(v) for v in e.Fields[8].Data) for e in raw_vertices.Elements],
+                    "positions": np.array(self.render_model.GetPositionsFromMesh(self.temp_meshes, raw_mesh_index), dtype=np.float32).reshape(-1, 3),
+                    "texcoords": np.array(self.render_model.GetTexCoordsFromMesh(self.temp_meshes, raw_mesh_index), dtype=np.float32).reshape(-1, 2),
+                    "normals": np.array(self.render_model.GetNormalsFromMesh(self.temp_meshes, raw_mesh_index), dtype=np.float32).reshape(-1, 3),
+                    "lightmap_texcoords": np.array([tuple(float(v) for v in e.Fields[5].Data) for e in raw_vertices.Elements], dtype=np.float32).reshape(-1, 2),
+                    "vertex_colors": np.array([tuple(float(v) for v in e.Fields[8].Data) for e in raw_vertices.Elements], dtype=np.float32).reshape(-1, 3),
                     "texcoords1": (
-                        [tuple(float(v) for v in e.Fields[9].Data) for e in raw_vertices.Elements]
-                        if self.corinth and raw_vertices.Elements.Count and len(raw_vertices.Elements[0].Fields) > 9 else []
+                        np.array([tuple(float(v) for v in e.Fields[9].Data) for e in raw_vertices.Elements], dtype=np.float32).reshape(-1, 2)
+                        if self.corinth and raw_vertices.Elements.Count and len(raw_vertices.Elements[0].Fields) > 9 else None
                     ),
                     "node_indices": None,
                     "node_weights": None,
@@ -2858,14 +2928,14 @@ class Mesh:
                 "index_stream": index_stream,
                 "node_indices": vertex_data["node_indices"],
                 "node_weights": vertex_data["node_weights"],
-                "water_indices_local": [],
-                "water_texcoords_local": [],
+                "water_indices_local": None,
+                "water_texcoords_local": None,
             }
 
             if temp_mesh.SelectField("raw water data").Elements.Count > 0:
                 water_data = temp_mesh.SelectField("raw water data").Elements[0]
-                cache_entry["water_indices_local"] = [utils.unsigned_int16(e.Fields[0].Data) for e in water_data.Fields[0].Elements]
-                cache_entry["water_texcoords_local"] = [tuple(float(v) for v in e.Fields[0].Data) for e in water_data.Fields[1].Elements]
+                cache_entry["water_indices_local"] = np.array([utils.unsigned_int16(e.Fields[0].Data) for e in water_data.Fields[0].Elements], dtype=np.int64)
+                cache_entry["water_texcoords_local"] = np.array([tuple(float(v) for v in e.Fields[0].Data) for e in water_data.Fields[1].Elements], dtype=np.float32).reshape(-1, 2)
 
             raw_mesh_data_cache[cache_key] = cache_entry
 
@@ -2875,51 +2945,41 @@ class Mesh:
         self.raw_lightmap_texcoords = cache_entry["lightmap_texcoords"]
         self.raw_vertex_colors = cache_entry["vertex_colors"]
         self.raw_texcoords1 = cache_entry["texcoords1"]
-        self.raw_water_texcoords = []
+        self.raw_water_texcoords = None
 
         if not self.instances and self.rigid_node_index == -1:
             if cache_entry["node_indices"] is None or cache_entry["node_weights"] is None:
-                raw_node_indices = list(self.render_model.GetNodeIndiciesFromMesh(self.temp_meshes, raw_mesh_index))
-                raw_node_weights = list(self.render_model.GetNodeWeightsFromMesh(self.temp_meshes, raw_mesh_index))
-                cache_entry["node_indices"] = [tuple(raw_node_indices[i:i + 4]) for i in range(0, len(raw_node_indices), 4)]
-                cache_entry["node_weights"] = [tuple(raw_node_weights[i:i + 4]) for i in range(0, len(raw_node_weights), 4)]
+                cache_entry["node_indices"] = np.array(self.render_model.GetNodeIndiciesFromMesh(self.temp_meshes, raw_mesh_index), dtype=np.int64).reshape(-1, 4)
+                cache_entry["node_weights"] = np.array(self.render_model.GetNodeWeightsFromMesh(self.temp_meshes, raw_mesh_index), dtype=np.float32).reshape(-1, 4)
 
             self.raw_node_indices = cache_entry["node_indices"]
             self.raw_node_weights = cache_entry["node_weights"]
 
         buffer = IndexBuffer(self.index_buffer_type, cache_entry["index_stream"])
-        self.tris = buffer.get_faces(self)
-        self.all_triangle_indices = [face.indices for face in self.tris]
+        self.all_triangle_indices, subpart_slices = buffer.get_triangles(self)
         self.triangle_indices_by_subpart = {}
         self.face_indices_by_subpart = {}
-        for face in self.tris:
-            if face.subpart is None:
+        for subpart_index, face_slice in subpart_slices.items():
+            if face_slice.stop == face_slice.start:
                 continue
-            subpart_index = face.subpart.index
-            self.triangle_indices_by_subpart.setdefault(subpart_index, []).append(face.indices)
-            self.face_indices_by_subpart.setdefault(subpart_index, []).append(face.index)
+            self.triangle_indices_by_subpart[subpart_index] = self.all_triangle_indices[face_slice]
+            self.face_indices_by_subpart[subpart_index] = np.arange(face_slice.start, face_slice.stop)
 
-        if cache_entry["water_texcoords_local"]:
+        water_texcoords_local = cache_entry["water_texcoords_local"]
+        if water_texcoords_local is not None and len(water_texcoords_local):
+            index_stream = cache_entry["index_stream"]
             water_subparts = [sp for sp in self.subparts if sp.is_water_surface]
+            water_global_index_stream = np.concatenate([index_stream[sp.index_start:sp.index_start + sp.index_count] for sp in water_subparts] or [np.zeros(0, dtype=np.int64)])
+            water_indices_local = cache_entry["water_indices_local"]
+            stream_length = min(len(water_global_index_stream), len(water_indices_local))
 
-            water_global_index_stream = []
-            for sp in water_subparts:
-                s, c = sp.index_start, sp.index_count
-                water_global_index_stream.extend(cache_entry["index_stream"][s:s + c])
-
-            local_to_global = {}
-            for gi, li in zip(water_global_index_stream, cache_entry["water_indices_local"]):
-                if li not in local_to_global:
-                    local_to_global[li] = gi
-
-            vert_count = len(self.raw_positions)
-            full = [(0.0, 0.0)] * vert_count
-            
-            for local_id, uv in enumerate(cache_entry["water_texcoords_local"]):
-                gi = local_to_global.get(local_id)
-                if gi is not None:
-                    full[gi] = (float(uv[0]), float(uv[1]))
+            # Each local water vertex maps to the first global vertex it is paired with
+            local_ids, first_occurrences = np.unique(water_indices_local[:stream_length], return_index=True)
+            global_ids = water_global_index_stream[:stream_length][first_occurrences]
+            in_range = local_ids < len(water_texcoords_local)
 
+            full = np.zeros((len(self.raw_positions), 2), dtype=np.float32)
+            full[global_ids[in_range]] = water_texcoords_local[local_ids[in_range]]
             self.raw_water_texcoords = full
 
     def _create_mesh(self, name, parent, nodes, subpart: MeshSubpart | None, parent_bone=None, local_matrix=None, is_io=False, surface_triangle_mapping=[], section_index=0, collision_info: BSP | None = None):
@@ -2951,40 +3011,35 @@ class Mesh:
         if subpart is None:
             indices = self.all_triangle_indices
         else:
-            indices = self.triangle_indices_by_subpart.get(subpart.index, [])
+            indices = self.triangle_indices_by_subpart.get(subpart.index, np.zeros((0, 3), dtype=np.int32))
+
+        idx_start, idx_end = int(indices.min()), int(indices.max())
+        vertex_range = slice(idx_start, idx_end + 1)
 
-        vertex_indices = sorted({idx for tri in indices for idx in tri})
-        idx_start, idx_end = vertex_indices[0], vertex_indices[-1]
+        positions = self.raw_positions[vertex_range]
+        texcoords = self.raw_texcoords[vertex_range]
+        normals = self.raw_normals[vertex_range]
+        lighting_texcoords = self.raw_lightmap_texcoords[vertex_range]
+        vertex_colors = self.raw_vertex_colors[vertex_range]
+        texcoords1 = self.raw_texcoords1[vertex_range] if self.raw_texcoords1 is not None else None
+        water_texcoords = self.raw_water_texcoords[vertex_range] if self.raw_water_texcoords is not None else None
 
-        mesh = bpy.data.meshes.new(name)
+        if idx_start > 0:
+            indices = indices - idx_start
+
+        mesh = new_triangle_mesh(name, positions, indices)
         ob = bpy.data.objects.new(name, mesh)
         
         if has_tag_path and not self.is_pca:
             mesh_cache[mesh_key] = mesh
 
-        positions = self.raw_positions[idx_start:idx_end + 1]
-        texcoords = self.raw_texcoords[idx_start:idx_end + 1]
-        normals = self.raw_normals[idx_start:idx_end + 1]
-        lighting_texcoords = self.raw_lightmap_texcoords[idx_start:idx_end + 1]
-        vertex_colors = self.raw_vertex_colors[idx_start:idx_end + 1]
-        texcoords1 = self.raw_texcoords1[idx_start:idx_end + 1] if self.raw_texcoords1 else []
-        water_texcoords = self.raw_water_texcoords[idx_start:idx_end + 1] if self.raw_water_texcoords else []
-
-        if idx_start > 0:
-            indices = [[i - idx_start for i in tri] for tri in indices]
-
-        mesh.from_pydata(positions, [], indices)
-
         transform_matrix = import_transform.mesh_matrix() @ (self.bounds.co_matrix if self.bounds else Matrix.Scale(100, 4))
         mesh.transform(transform_matrix)
 
-        has_vertex_colors = any(any(v) for v in vertex_colors)
-        has_lighting_texcoords = any(any(v) for v in lighting_texcoords)
-        has_texcoords1 = bool(texcoords1) and any(any(v) for v in texcoords1)
-        has_water_texcoords = bool(water_texcoords) and any(any(v) for v in water_texcoords)
-        uvs = self._true_uvs(texcoords) if self.bounds else [Vector((u, 1-v)) for (u, v) in texcoords]
-        if has_texcoords1:
-            uvs1 = self._true_uvs(texcoords1) if self.bounds else [Vector((u, 1-v)) for (u, v) in texcoords1]
+        has_vertex_colors = bool(np.any(vertex_colors))
+        has_lighting_texcoords = bool(np.any(lighting_texcoords))
+        has_texcoords1 = texcoords1 is not None and bool(np.any(texcoords1))
+        has_water_texcoords = water_texcoords is not None and bool(np.any(water_texcoords))
         uv_layer = mesh.uv_layers.new(name="UVMap0", do_init=False)
         lighting_uv_layer = mesh.uv_layers.new(name="lighting", do_init=False) if has_lighting_texcoords else None
         uvs1_layer = mesh.uv_layers.new(name="UVMap1", do_init=False) if has_texcoords1 else None
@@ -2994,16 +3049,14 @@ class Mesh:
                 water_uvs_layer = mesh.uv_layers.new(name="UVMap1", do_init=False)
             else:
                 water_uvs_layer = mesh.uv_layers.new(name="UVMap2", do_init=False)
-                
-            water_uvs = self._true_uvs(water_texcoords) if self.bounds else [Vector((u, 1-v)) for (u, v) in water_texcoords]
             
-        loop_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
-        mesh.loops.foreach_get("vertex_index", loop_vertex_indices)
-        self._set_uv_layer_data(uv_layer, uvs, loop_vertex_indices)
+        # Loops are created in face order so the loop vertex indices are just the flattened triangles
+        loop_vertex_indices = indices.ravel()
+        self._set_uv_layer_data(uv_layer, self._true_uvs(texcoords), loop_vertex_indices)
         if has_texcoords1:
-            self._set_uv_layer_data(uvs1_layer, uvs1, loop_vertex_indices)
+            self._set_uv_layer_data(uvs1_layer, self._true_uvs(texcoords1), loop_vertex_indices)
         if has_water_texcoords:
-            self._set_uv_layer_data(water_uvs_layer, water_uvs, loop_vertex_indices)
+            self._set_uv_layer_data(water_uvs_layer, self._true_uvs(water_texcoords), loop_vertex_indices)
         if lighting_uv_layer:
             self._set_uv_layer_data(lighting_uv_layer, lighting_texcoords, loop_vertex_indices)
 
@@ -3024,22 +3077,7 @@ class Mesh:
                     ob.parent_type = "BONE"
                     ob.parent_bone = parent_bone or nodes[self.rigid_node_index].name
                 else:
-                    node_indices = self.raw_node_indices[idx_start:idx_end + 1]
-                    node_weights = self.raw_node_weights[idx_start:idx_end + 1]
-                    vgroups = ob.vertex_groups
-                    group_cache = {}
-                    for idx, (ni, nw) in enumerate(zip(node_indices, node_weights)):
-                        for i, w in zip(ni, nw):
-                            if 0 <= i <= 254 and w > 0:
-                                if self.node_map:
-                                    i = self.node_map[i]
-                                group_name = nodes[i].name
-                                group = group_cache.get(group_name)
-                                if group is None:
-                                    group = vgroups.get(group_name) or vgroups.new(name=group_name)
-                                    group_cache[group_name] = group
-                                group.add([idx], w, 'REPLACE')
-                                    
+                    self._set_vertex_weights(ob, nodes, self.raw_node_indices[vertex_range], self.raw_node_weights[vertex_range])
                     ob.modifiers.new(name="Armature", type="ARMATURE").object = parent
 
         ob.matrix_world = final_matrix
@@ -3057,7 +3095,7 @@ class Mesh:
                 water_face_indices = []
                 for subpart in self.subparts:
                     face_indices = self.face_indices_by_subpart.get(subpart.index)
-                    if not face_indices:
+                    if face_indices is None or not len(face_indices):
                         continue
 
                     blend_material = self._get_blender_material(subpart.part.material)
@@ -3069,19 +3107,18 @@ class Mesh:
 
                     material_indices[face_indices] = blend_material_index
                     if subpart.is_water_surface:
-                        water_face_indices.extend(face_indices)
+                        water_face_indices.append(face_indices)
                     self._apply_subpart_props(mesh, subpart, face_indices)
 
                 if face_count:
                     mesh.polygons.foreach_set("material_index", material_indices)
                 if water_face_indices:
-                    self._set_water_attribute(mesh, water_face_indices)
+                    self._set_water_attribute(mesh, np.concatenate(water_face_indices))
             
         self._resolve_collision_only_surface_mappings(mesh, surface_triangle_mapping, collision_info, section_index)
 
         # for IG figure out what tris are render only
         if surface_triangle_mapping:
-            indices = [t.index for t in self.tris]
             collision_face_indices = set()
             face_count = len(mesh.polygons)
             slip_mask = np.zeros(face_count, dtype=np.int8)
@@ -3112,10 +3149,8 @@ class Mesh:
                     if collision_type:
                         collision_type_masks.setdefault(collision_type, np.zeros(face_count, dtype=np.int8))[idx] = 1
                         
-            render_only_mask = np.zeros(face_count, dtype=np.int8)
-            for f in indices:
-                if f not in collision_face_indices:
-                    render_only_mask[f] = 1
+            render_only_mask = np.ones(face_count, dtype=np.int8)
+            render_only_mask[list(collision_face_indices)] = 0
             
             if slip_mask.any():
                 utils.add_face_prop(mesh, "slip_surface", None if slip_mask.all() else slip_mask)
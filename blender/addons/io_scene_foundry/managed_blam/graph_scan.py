@@ -0,0 +1,122 @@
+'''Reads the mode tree labels of animation graphs for the bulk reports. Graphs are read with TagReader in worker
+processes, and results are cached per graph on file modified time and size so that a rerun only reads graphs that
+changed. Worker processes import this module, so it must not import bpy or ManagedBlam'''
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+from .tag_reader import TagReader
+from .worker_pool import batched, process_pool, worker_count
+
+GRAPH_CACHE_VERSION = 1
+TOKEN_CATEGORIES = ("mode", "weapon class", "weapon type", "set", "action", "overlay")
+# Below this many graphs to read, starting worker processes costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+def read_graph_tokens(path: str) -> dict[str, list[str]]:
+    '''Returns the labels of the graph's modes, weapon classes, weapon types, sets, actions and overlays in tag order'''
+    tokens = {category: [] for category in TOKEN_CATEGORIES}
+    with TagReader(path) as reader:
+        for mode in reader.select("Struct:content[0]/Block:modes"):
+            tokens["mode"].append(mode["label"])
+            for weapon_class in mode["weapon class"]:
+                tokens["weapon class"].append(weapon_class["label"])
+                for weapon_type in weapon_class["weapon type"]:
+                    tokens["weapon type"].append(weapon_type["label"])
+                    for animation_set in weapon_type["sets"]:
+                        tokens["set"].append(animation_set["label"])
+                        tokens["action"].extend(action["label"] for action in animation_set["actions"])
+                        tokens["overlay"].extend(overlay["label"] for overlay in animation_set["overlay animations"])
+    return tokens
+
+def _read_graphs(paths: list[str]) -> list[tuple[dict[str, list[str]] | None, str]]:
+    results = []
+    for path in paths:
+        try:
+            results.append((read_graph_tokens(path), ""))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+def _read_graphs_parallel(paths: list[str], workers: int) -> list[tuple[dict[str, list[str]] | None, str]]:
+    with process_pool(__name__, workers) as executor:
+        return [result for batch in executor.map(_read_graphs, batched(paths, workers)) for result in batch]
+
+def _cache_path(tags_dir: str) -> Path | None:
+    appdata = os.getenv('APPDATA')
+    if not appdata:
+        return None
+    key = hashlib.blake2b(os.path.normcase(os.path.abspath(tags_dir)).encode(), digest_size=8).hexdigest()
+    return Path(appdata, "Foundry", "graph_scan", f"{key}.json")
+
+def _load_cache(cache_path: Path | None) -> dict:
+    if cache_path is None or not cache_path.exists():
+        return {}
+    try:
+        with open(cache_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != GRAPH_CACHE_VERSION:
+        return {}
+    return data.get("graphs", {})
+
+def _save_cache(cache_path: Path | None, graphs: dict):
+    if cache_path is None:
+        return
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump({"version": GRAPH_CACHE_VERSION, "graphs": graphs}, f)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Failed to save animation graph scan cache {cache_path}: {e}")
+
+def scan_graphs(tags_dir: str, relative_paths: list[str], fallback: Callable[[str], dict[str, list[str]]] | None = None, workers: int = 0) -> dict[str, dict[str, list[str]]]:
+    '''Returns the tokens of each graph keyed by its tags relative path. Graphs unchanged since they were last scanned
+    come from the cache, the rest are read in parallel. Graphs TagReader cannot read are passed to fallback, which is
+    called in this process'''
+    cache_path = _cache_path(tags_dir)
+    cached = _load_cache(cache_path)
+    graphs = {}
+    stale = []
+    for relative_path in relative_paths:
+        try:
+            stat = os.stat(os.path.join(tags_dir, relative_path))
+        except OSError:
+            continue
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = cached.get(relative_path)
+        if entry is not None and (entry["mtime"], entry["size"]) == key:
+            graphs[relative_path] = entry
+        else:
+            stale.append((relative_path, key))
+
+    print(f"Reading {len(stale)} of {len(graphs) + len(stale)} animation graphs, {len(graphs)} unchanged since the last scan")
+    full_paths = [os.path.join(tags_dir, relative_path) for relative_path, _ in stale]
+    workers = worker_count(workers)
+    results = None
+    if workers > 1 and len(full_paths) >= PARALLEL_THRESHOLD:
+        try:
+            results = _read_graphs_parallel(full_paths, workers)
+        except Exception as e:
+            print(f"Failed to read animation graphs in worker processes, reading them here instead: {e}")
+    if results is None:
+        results = _read_graphs(full_paths)
+
+    for (relative_path, (mtime, size)), (tokens, error) in zip(stale, results):
+        if tokens is None:
+            if fallback is None:
+                print(f"Failed to read {relative_path}: {error}")
+                continue
+            tokens = fallback(os.path.join(tags_dir, relative_path))
+        graphs[relative_path] = {"mtime": mtime, "size": size, "tokens": tokens}
+
+    if stale:
+        _save_cache(cache_path, graphs)
+
+    return {relative_path: graphs[relative_path]["tokens"] for relative_path in relative_paths if relative_path in graphs}
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import hashlib
 import re
 from typing import TYPE_CHECKING
 
@@ -180,152 +181,95 @@ def _without_comments(values: list) -> list:
     return [value for value in values if not _is_comment(value)]
 
 
-def _read_quoted(src: str, start: int, quote: str) -> tuple[str, int]:
-    i = start + 1
-    while i < len(src):
-        if src[i] == "\\" and i + 1 < len(src):
-            i += 2
-            continue
-        if src[i] == quote:
-            return src[start:i + 1], i + 1
-        i += 1
-    return src[start:], len(src)
+_LISP_TOKEN_PATTERN = re.compile(
+    r'(?P<comment_block>;\*(?P<block_text>.*?)(?:\*;|\Z))'
+    r'|(?P<comment_line>;(?P<line_text>[^\n]*))'
+    r'|(?P<quoted>"(?:\\.|\\\Z|[^"\\])*"?)'
+    r'|(?P<paren>[()])'
+    r'|(?P<atom>[^\s();]+)'
+    r'|\s+',
+    re.DOTALL,
+)
 
+_CORINTH_TOKEN_PATTERN = re.compile(
+    r'(?P<comment_line>//(?P<line_text>[^\n]*))'
+    r'|(?P<comment_block>/\*(?P<block_text>.*?)(?:\*/|\Z))'
+    r'|(?P<quoted>"(?:\\.|\\\Z|[^"\\])*"?|\'(?:\\.|\\\Z|[^\'\\])*\'?)'
+    r'|(?P<operator>==|!=|>=|<=|[=+\-*/%<>])'
+    r'|(?P<punctuation>[(),;])'
+    r'|(?P<atom>[^\s(),;=+\-*/%<>]+)'
+    r'|\s+',
+    re.DOTALL,
+)
 
-def _tokenize_lisp(src: str) -> list[_Token]:
-    tokens = []
-    i = 0
-    while i < len(src):
-        char = src[i]
-        if char.isspace():
-            i += 1
-            continue
-        if src.startswith(";*", i):
-            end = src.find("*;", i + 2)
-            if end == -1:
-                tokens.append(_Token("comment_block", src[i + 2:]))
-                break
-            tokens.append(_Token("comment_block", src[i + 2:end]))
-            i = end + 2
-            continue
-        if char == ";":
-            end = src.find("\n", i + 1)
-            if end == -1:
-                tokens.append(_Token("comment_line", src[i + 1:]))
-                break
-            tokens.append(_Token("comment_line", src[i + 1:end]))
-            i = end
-            continue
-        if char == '"':
-            value, i = _read_quoted(src, i, '"')
-            tokens.append(_Token("atom", value))
-            continue
-        if char in "()":
-            tokens.append(_Token(char, char))
-            i += 1
-            continue
+# Parsed documents keyed by a digest of their source. Parsing never mutates the result, so cached trees are shared
+_PARSE_CACHE_SIZE = 512
+_lisp_parse_cache: dict[bytes, list] = {}
+_CONVERT_CACHE_SIZE = 128
+_convert_cache: dict[tuple[bytes, bool], str] = {}
 
-        start = i
-        while i < len(src):
-            char = src[i]
-            if char.isspace() or char in "()":
-                break
-            if char == ";":
-                break
-            i += 1
-        tokens.append(_Token("atom", src[start:i]))
 
-    return tokens
+def _source_digest(src: str) -> bytes:
+    return hashlib.blake2b(src.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _cache_store(cache: dict, size: int, key, value):
+    if len(cache) >= size:
+        del cache[next(iter(cache))]
+    cache[key] = value
 
 
 def _parse_lisp_document(src: str) -> list:
-    tokens = _tokenize_lisp(src)
-    index = 0
+    digest = _source_digest(src)
+    expressions = _lisp_parse_cache.get(digest)
+    if expressions is None:
+        expressions = _parse_lisp(src)
+        _cache_store(_lisp_parse_cache, _PARSE_CACHE_SIZE, digest, expressions)
+    return expressions
 
-    def parse_expr():
-        nonlocal index
-        token = tokens[index]
-        if token.kind == "comment_line":
-            index += 1
-            return _Comment(token.value)
-        if token.kind == "comment_block":
-            index += 1
-            return _Comment(token.value, True)
-        if token.value == "(":
-            index += 1
-            values = []
-            while index < len(tokens) and tokens[index].value != ")":
-                values.append(parse_expr())
-            if index < len(tokens) and tokens[index].value == ")":
-                index += 1
-            return values
-        index += 1
-        return token.value
 
+def _parse_lisp(src: str) -> list:
     expressions = []
-    while index < len(tokens):
-        if tokens[index].value == ")":
-            index += 1
+    stack = [expressions]
+    for match in _LISP_TOKEN_PATTERN.finditer(src):
+        kind = match.lastgroup
+        if kind is None:
             continue
-        expressions.append(parse_expr())
+        if kind == "atom" or kind == "quoted":
+            stack[-1].append(match.group())
+        elif kind == "paren":
+            if match.group() == "(":
+                values = []
+                stack[-1].append(values)
+                stack.append(values)
+            elif len(stack) > 1:
+                # Unmatched closing parens at the top level are dropped
+                stack.pop()
+        elif kind == "comment_block":
+            stack[-1].append(_Comment(match.group("block_text"), True))
+        else:
+            stack[-1].append(_Comment(match.group("line_text")))
 
     return expressions
 
 
 def _tokenize_corinth(src: str) -> list[_Token]:
     tokens = []
-    i = 0
-    two_char_ops = {"==", "!=", ">=", "<="}
-    one_char_ops = set("=+-*/%<>")
-    punctuation = set("(),;")
-
-    while i < len(src):
-        char = src[i]
-        if char.isspace():
-            i += 1
-            continue
-        if src.startswith("//", i):
-            end = src.find("\n", i + 2)
-            if end == -1:
-                tokens.append(_Token("comment_line", src[i + 2:]))
-                break
-            tokens.append(_Token("comment_line", src[i + 2:end]))
-            i = end
-            continue
-        if src.startswith("/*", i):
-            end = src.find("*/", i + 2)
-            if end == -1:
-                tokens.append(_Token("comment_block", src[i + 2:]))
-                break
-            tokens.append(_Token("comment_block", src[i + 2:end]))
-            i = end + 2
-            continue
-        if char in "\"'":
-            value, i = _read_quoted(src, i, char)
-            tokens.append(_Token("atom", value))
-            continue
-        if i + 1 < len(src) and src[i:i + 2] in two_char_ops:
-            tokens.append(_Token("operator", src[i:i + 2]))
-            i += 2
-            continue
-        if char in one_char_ops:
-            tokens.append(_Token("operator", char))
-            i += 1
-            continue
-        if char in punctuation:
-            tokens.append(_Token(char, char))
-            i += 1
+    for match in _CORINTH_TOKEN_PATTERN.finditer(src):
+        kind = match.lastgroup
+        if kind is None:
             continue
-
-        start = i
-        while i < len(src):
-            char = src[i]
-            if char.isspace() or char in punctuation or char in one_char_ops:
-                break
-            if src.startswith("//", i) or src.startswith("/*", i):
-                break
-            i += 1
-        tokens.append(_Token("atom", src[start:i]))
+        if kind == "atom" or kind == "quoted":
+            tokens.append(_Token("atom", match.group()))
+        elif kind == "operator":
+            tokens.append(_Token(kind, match.group()))
+        elif kind == "punctuation":
+            value = match.group()
+            tokens.append(_Token(value, value))
+        elif kind == "comment_block":
+            tokens.append(_Token(kind, match.group("block_text")))
+        else:
+            tokens.append(_Token(kind, match.group("line_text")))
 
     return tokens
 
@@ -1047,7 +991,7 @@ def corinth_to_lisp(src: str) -> str:
     return _corinth_document_to_lisp(src)
 
 
-def convert(src: str, corinth: bool) -> str:
+def _convert(src: str, corinth: bool) -> str:
     if corinth:
         if _looks_corinth_document(src) and not _looks_lisp_like(src):
             return src
@@ -1055,6 +999,15 @@ def convert(src: str, corinth: bool) -> str:
     return corinth_to_lisp(src)
 
 
+def convert(src: str, corinth: bool) -> str:
+    key = (_source_digest(src), corinth)
+    result = _convert_cache.get(key)
+    if result is None:
+        result = _convert(src, corinth)
+        _cache_store(_convert_cache, _CONVERT_CACHE_SIZE, key, result)
+    return result
+
+
 def script_from_text(corinth: bool, raw_text: str = "", text_file: bpy.types.Text = None, use_text_file: bool | None = None):
     """Returns valid halo script from raw text, or the optional text file."""
 
@@ -1,6 +1,5 @@
 import numpy as np
 import bpy
-import struct
 from typing import cast
 from mathutils import Vector
 
@@ -9,19 +8,53 @@ from .. import utils
 from .render_model import RenderModelTag
 
 from .connected_geometry import CompressionBounds
+from .serialized_block import BlockLayout, read_block
 from ..managed_blam import Tag
 
+# Raw value of the LINEAR keyframe interpolation enum, for foreach_set
+LINEAR_INTERPOLATION = 1
+
 class PCAAnimationTag(Tag):
     tag_ext = "pca_animation"
 
     def _read_fields(self):
         self.block_mesh_data = self.tag.SelectField("Block:mesh data")
         self.block_frame_data = self.tag.SelectField("Block:frame data")
+        self.frame_coefficients: np.ndarray = None
+        self.raw_shape_vertices: dict[int, np.ndarray] = {}
 
     def _raw_verts(self, mesh_data):
         block = mesh_data.SelectField("Block:raw blendshape verts")
+        if block.Elements.Count:
+            layout = BlockLayout(block.Elements[0])
+            try:
+                return read_block(block, {"co": next(iter(layout.fields))}, layout)["co"].astype(np.single)
+            except ValueError:
+                pass
         verts = [Vector((*e.Fields[0].Data,)) for e in block.Elements]
-        return np.asarray([v[:] for v in verts], dtype=np.single)
+        return np.asarray([v[:] for v in verts], dtype=np.single).reshape(-1, 3)
+
+    def _mesh_raw_verts(self, mesh_data_index: int) -> np.ndarray:
+        raw_verts = self.raw_shape_vertices.get(mesh_data_index)
+        if raw_verts is None:
+            raw_verts = self._raw_verts(self.block_mesh_data.Elements[mesh_data_index])
+            self.raw_shape_vertices[mesh_data_index] = raw_verts
+        return raw_verts
+
+    def _frame_coefficients(self) -> np.ndarray:
+        '''Returns every row of the frame data block as one zero padded (rows, coefficients) matrix. All animations in the
+        tag slice their frames from this block, so it is only decoded once'''
+        if self.frame_coefficients is None:
+            rows = []
+            for elem in self.block_frame_data.Elements:
+                buffer = bytes(elem.Fields[0].GetData())
+                rows.append(np.frombuffer(buffer, dtype="<f4", count=len(buffer) // 4))
+
+            self.frame_coefficients = np.zeros((len(rows), max((len(r) for r in rows), default=0)), np.float32)
+            for i, r in enumerate(rows):
+                self.frame_coefficients[i, :len(r)] = r
+
+        return self.frame_coefficients
     
     def _decompress_verts(self, raw_verts: np.ndarray, bounds: CompressionBounds) -> np.ndarray:
         scale = np.array([bounds.x1 - bounds.x0, bounds.y1 - bounds.y0, bounds.z1 - bounds.z0])
@@ -37,26 +70,20 @@ class PCAAnimationTag(Tag):
         
         shape_keys = set()
 
-        compressed_vertices_array = self._raw_verts(mesh_data)
+        compressed_vertices_array = self._mesh_raw_verts(mesh_data_index)
         vertices_array = self._decompress_verts(compressed_vertices_array, bounds)
         all_shape_vertices = vertices_array.reshape(-1, vertices_per_shape, 3)
         shape_vertices = all_shape_vertices[shape_offset : shape_offset + shape_count]
         K = shape_vertices.shape[0]
 
-        rows = []
-        for elem in self.block_frame_data.Elements:
-            buffer = bytes(elem.Fields[0].GetData())
-            rows.append(struct.unpack('<'+'f'*(len(buffer)//4), buffer))
-
-        row_length = len(rows)
-        coefficient = np.zeros((row_length, K), np.float32)
-        for i, r in enumerate(rows):
-            coefficient[i, :min(K, len(r))] = r[:K]
-
+        frame_coefficients = self._frame_coefficients()
+        row_length = len(frame_coefficients)
         if count is None:
             count = row_length - offset
-            
-        coefficient = coefficient[offset:offset+count]
+
+        coefficient = np.zeros((len(frame_coefficients[offset:offset+count]), K), np.float32)
+        width = min(K, frame_coefficients.shape[1])
+        coefficient[:, :width] = frame_coefficients[offset:offset+count, :width]
 
         if not ob.data.shape_keys:
             keys = []
@@ -109,21 +136,17 @@ class PCAAnimationTag(Tag):
         
         paths = {kb: f'key_blocks["{kb.name}"].value' for kb in keys}
         
-        fc_map = {}
-        for kb in keys:
+        keyframe_co = np.empty((len(coefficient), 2), np.float32)
+        keyframe_co[:, 0] = np.arange(1, len(coefficient) + 1)
+        interpolation = np.full(len(coefficient), LINEAR_INTERPOLATION, np.int32)
+        for k, kb in enumerate(keys):
             fcu = fcurves.new(data_path=paths[kb])
             fcu.keyframe_points.add(count=len(coefficient))
-            fc_map[kb] = fcu
-
-        for frame_idx, row in enumerate(coefficient, start=1):
-            for k, kb in enumerate(keys):
-                fcu = fc_map[kb]
-                kp = fcu.keyframe_points[frame_idx - 1]
-                value = float(row[k])
-                pinned_value = utils.clamp(value, *kb_pca_min_max[kb])
-                kp.co = (frame_idx, pinned_value)
-                kp.interpolation = 'LINEAR'
-                
+            keyframe_co[:, 1] = np.clip(coefficient[:, k], *kb_pca_min_max[kb])
+            fcu.keyframe_points.foreach_set("co", keyframe_co.ravel())
+            fcu.keyframe_points.foreach_set("interpolation", interpolation)
+            fcu.update()
+
         return ob.data.shape_keys, action, slot
                 
     def to_blender(self, animations: dict, groups: dict, objects: list):
@@ -12,6 +12,7 @@ from .structure_meta import StructureMetaTag
 
 from .scenario_structure_lighting_info import ScenarioStructureLightingInfoTag
 
+from .serialized_block import write_block
 from .connected_geometry import BSP, BSPCollisionMaterial, Cluster, CompressionBounds, Emissive, EnvironmentObject, EnvironmentObjectReference, HavokCollision, Instance, InstanceDefinition, Material, Portal, StructureCollision, StructureMarker, SurfaceMapping
 from . import import_transform
 from ..utils import jstr
@@ -30,16 +31,21 @@ class ScenarioStructureBspTag(Tag):
     
     def write_prefabs(self, prefabs):
         if not self.corinth or (not prefabs and self.block_prefabs.Elements.Count == 0): return
-        self.block_prefabs.RemoveAllElements()
-        for prefab in prefabs:
-            element = self.block_prefabs.AddElement()
+        rows = np.zeros(len(prefabs), dtype=[
+            ("scale", np.float64),
+            ("forward", np.float64, (3,)),
+            ("left", np.float64, (3,)),
+            ("up", np.float64, (3,)),
+            ("position", np.float64, (3,)),
+        ])
+        for idx, prefab in enumerate(prefabs):
+            rows[idx] = float(prefab.scale), tuple(map(float, prefab.forward)), tuple(map(float, prefab.left)), tuple(map(float, prefab.up)), tuple(map(float, prefab.position))
+            
+        write_block(self.block_prefabs, rows)
+        
+        for prefab, element in zip(prefabs, self.block_prefabs.Elements):
             element.SelectField("prefab reference").Path = self._TagPath_from_string(prefab.reference)
             element.SelectField("name").SetStringData(prefab.name)
-            element.SelectField("scale").SetStringData(prefab.scale)
-            element.SelectField("forward").SetStringData(prefab.forward)
-            element.SelectField("left").SetStringData(prefab.left)
-            element.SelectField("up").SetStringData(prefab.up)
-            element.SelectField("position").SetStringData(prefab.position)
             
             override_flags = element.SelectField("override flags")
             flags_mask = element.SelectField("instance flags Mask")
@@ -743,7 +749,7 @@ class ScenarioStructureBspTag(Tag):
             except Exception:
                 continue
 
-            triangle_count = len(cluster.mesh.tris)
+            triangle_count = len(cluster.mesh.all_triangle_indices)
             if triangle_count:
                 section_triangle_ranges.append((cluster.index, first_triangle_index, triangle_count))
                 first_triangle_index += triangle_count
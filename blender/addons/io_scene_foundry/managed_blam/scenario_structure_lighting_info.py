@@ -12,10 +12,12 @@ from ..tools.property_apply import apply_props_material
 from ..props.object import NWO_ObjectPropertiesGroup
 from ..props.light import NWO_LightPropertiesGroup
 from . Tags import TagFieldBlockElement
+from .serialized_block import update_block, write_block
 from . import Tag
 from . import import_transform
 from .. import utils
 import bpy
+import numpy as np
 
 class ScenarioStructureLightingInfoTag(Tag):
     tag_ext = 'scenario_structure_lighting_info'
@@ -24,20 +26,6 @@ class ScenarioStructureLightingInfoTag(Tag):
         self.block_generic_light_definitions = self.tag.SelectField("Block:generic light definitions")
         self.block_generic_light_instances = self.tag.SelectField("Block:generic light instances")
         
-    def _definition_index_from_id(self, id) -> int:
-        for element in self.block_generic_light_definitions.Elements:
-            if id == element.Fields[0].Data:
-                return element.ElementIndex
-            
-        return 0
-    
-    def _definition_index_from_data_name(self, name, light_definitions) -> int:
-        for definition in light_definitions:
-            if name == definition.data_name:
-                return definition.index
-            
-        return 0
-    
     def clear_lights(self):
         self.block_generic_light_definitions.RemoveAllElements()
         self.block_generic_light_instances.RemoveAllElements()
@@ -141,25 +129,37 @@ class ScenarioStructureLightingInfoTag(Tag):
         
         
     def _write_corinth_light_instances(self, light_instances, light_definitions):
-        self.block_generic_light_instances.RemoveAllElements()
-        for light in light_instances:
-            element = self.block_generic_light_instances.AddElement()
+        definition_indices = {}
+        for element in self.block_generic_light_definitions.Elements:
+            definition_indices.setdefault(element.Fields[0].Data, element.ElementIndex)
+            
+        rows = np.zeros(len(light_instances), dtype=[
+            ("Light Definition ID", np.int64),
+            ("Light Definition Index", np.int64),
+            ("light mode", np.int64),
+            ("origin", np.float64, (3,)),
+            ("forward", np.float64, (3,)),
+            ("up", np.float64, (3,)),
+        ])
+        for idx, light in enumerate(light_instances):
             id = utils.id_from_string(light.data_name)
-            element.SelectField("Light Definition ID").Data = id
-            element.SelectField("Light Definition Index").Data = self._definition_index_from_id(id)
-            element.SelectField("light mode").Value = light.light_mode
-            element.SelectField("origin").Data = light.origin
-            element.SelectField("forward").Data = light.forward
-            element.SelectField("up").Data = light.up
+            rows[idx] = id, definition_indices.get(id, 0), light.light_mode, tuple(light.origin), tuple(light.forward), tuple(light.up)
+            
+        write_block(self.block_generic_light_instances, rows)
             
     def _write_reach_light_definitions(self, light_definitions):
         # self.block_generic_light_definitions.RemoveAllElements()
+        rows = np.zeros(len(light_definitions), dtype=[
+            ("type", np.int64),
+            ("shape", np.int64),
+            ("color", np.float64, (3,)),
+            ("intensity", np.float64),
+            ("near attenuation bounds", np.float64, (2,)),
+            ("far attenuation bounds", np.float64, (2,)),
+            ("aspect", np.float64),
+        ])
         for idx, light in enumerate(light_definitions):
-            element = self.block_generic_light_definitions.Elements[idx]
-            light.index = element.ElementIndex
-            element.SelectField("type").Value = light.type
-            element.SelectField("shape").Value = light.shape
-            element.SelectField("color").Data = light.color
+            light.index = idx
             intensity_divisor = 1
             # Reach seems to fudge our intensity numbers based on whether the light is a point or spot light, fight back!
             # NOTE 23/07/2025 no longer need to do this with the tag post-process workaround
@@ -170,43 +170,67 @@ class ScenarioStructureLightingInfoTag(Tag):
             #         intensity_divisor = 3.14465382959
             #     case 2:
             #         intensity_divisor = 0.6289308
-                    
-            element.SelectField("intensity").Data = light.intensity / intensity_divisor
             
+            rows[idx] = (
+                light.type,
+                light.shape,
+                tuple(light.color),
+                light.intensity / intensity_divisor,
+                (light.near_attenuation_start, light.near_attenuation_end),
+                (light.far_attenuation_start, light.far_attenuation_end),
+                light.aspect,
+            )
+            
+        update_block(self.block_generic_light_definitions, rows)
+        
+        for light, element in zip(light_definitions, self.block_generic_light_definitions.Elements):
             if light.type == 1:
                 element.SelectField("hotspot size").Data = light.hotspot_size
                 element.SelectField("hotspot cutoff size").Data = light.hotspot_cutoff
                 element.SelectField("hotspot falloff speed").Data = light.hotspot_falloff
-    
-            element.SelectField("near attenuation bounds").Data = [light.near_attenuation_start, light.near_attenuation_end]
             
             flags = element.SelectField("flags")
             flags.SetBit("use far attenuation", True)
-            element.SelectField("far attenuation bounds").Data = [light.far_attenuation_start, light.far_attenuation_end]
             flags.SetBit("invere squared falloff", light.inverse_squared_falloff)
-
-            element.SelectField("aspect").Data = light.aspect
             
     def _write_reach_light_instances(self, light_instances, light_definitions):
         # self.block_generic_light_instances.RemoveAllElements()
+        definition_indices = {}
+        for definition in light_definitions:
+            definition_indices.setdefault(definition.data_name, definition.index)
+            
+        rows = np.zeros(len(light_instances), dtype=[
+            ("definition index", np.int64),
+            ("origin", np.float64, (3,)),
+            ("forward", np.float64, (3,)),
+            ("up", np.float64, (3,)),
+            ("bungie light type", np.int64),
+            ("bounce light control", np.float64),
+            ("light volume distance", np.float64),
+            ("light volume intensity scalar", np.float64),
+            ("fade out distance", np.float64),
+            ("fade start distance", np.float64),
+        ])
         for idx, light in enumerate(light_instances):
-            element = self.block_generic_light_instances.Elements[idx]
-            element.SelectField("definition index").Data = self._definition_index_from_data_name(light.data_name, light_definitions)
-            element.SelectField("origin").Data = light.origin
-            element.SelectField("forward").Data = light.forward
-            element.SelectField("up").Data = light.up
-            element.SelectField("bungie light type").Value = light.game_type
-            
+            rows[idx] = (
+                definition_indices.get(light.data_name, 0),
+                tuple(light.origin),
+                tuple(light.forward),
+                tuple(light.up),
+                light.game_type,
+                light.bounce_ratio,
+                light.volume_distance,
+                light.volume_intensity,
+                light.fade_out_distance,
+                light.fade_start_distance,
+            )
+            
+        update_block(self.block_generic_light_instances, rows)
+        
+        for light, element in zip(light_instances, self.block_generic_light_instances.Elements):
             flags = element.SelectField("screen space specular")
             flags.SetBit("screen space light has specular", light.screen_space_specular)
             
-            element.SelectField("bounce light control").Data = light.bounce_ratio
-
-            element.SelectField("light volume distance").Data = light.volume_distance
-            element.SelectField("light volume intensity scalar").Data = light.volume_intensity
-            element.SelectField("fade out distance").Data = light.fade_out_distance
-            element.SelectField("fade start distance").Data = light.fade_start_distance
-            
             if light.light_tag:
                 element.SelectField("user control").Path = self._TagPath_from_string(light.light_tag)
             if light.shader:
@@ -215,7 +239,7 @@ class ScenarioStructureLightingInfoTag(Tag):
                 element.SelectField("gel reference").Path = self._TagPath_from_string(light.gel)
             if light.lens_flare:
                 element.SelectField("lens flare reference").Path = self._TagPath_from_string(light.lens_flare)
-    
+                
     def lightmap_regions_to_blender(self, parent_collection: bpy.types.Collection = None):
         if self.corinth:
             return []
@@ -0,0 +1,269 @@
+'''Reads and writes whole tag blocks through their serialized form, so that a block of any size costs a fixed number of
+ManagedBlam calls instead of one call per field per element'''
+
+import struct
+import numpy as np
+
+# Numpy formats for fields whose serialized data is the plain little endian value
+FIELD_FORMATS = {
+    "CharInteger": "i1",
+    "ShortInteger": "<i2",
+    "LongInteger": "<i4",
+    "Int64Integer": "<i8",
+    "ByteInteger": "u1",
+    "WordInteger": "<u2",
+    "DwordInteger": "<u4",
+    "QwordInteger": "<u8",
+    "Angle": "<f4",
+    "Real": "<f4",
+    "RealFraction": "<f4",
+    "CharEnum": "i1",
+    "ShortEnum": "<i2",
+    "LongEnum": "<i4",
+    "ByteFlags": "u1",
+    "WordFlags": "<u2",
+    "Flags": "<u4",
+    "ByteBlockFlags": "u1",
+    "WordBlockFlags": "<u2",
+    "BlockFlags": "<u4",
+    "CharBlockIndex": "i1",
+    "CharBlockIndexCustomSearch": "i1",
+    "ShortBlockIndex": "<i2",
+    "ShortBlockIndexCustomSearch": "<i2",
+    "LongBlockIndex": "<i4",
+    "LongBlockIndexCustomSearch": "<i4",
+    "RgbPixel32": "<u4",
+    "ArgbPixel32": "<u4",
+    "Point2d": ("<i2", (2,)),
+    "Rectangle2d": ("<i2", (4,)),
+    "ShortIntegerBounds": ("<i2", (2,)),
+    "RealPoint2d": ("<f4", (2,)),
+    "RealVector2d": ("<f4", (2,)),
+    "RealEulerAngles2d": ("<f4", (2,)),
+    "RealBounds": ("<f4", (2,)),
+    "AngleBounds": ("<f4", (2,)),
+    "RealFractionBounds": ("<f4", (2,)),
+    "RealPoint3d": ("<f4", (3,)),
+    "RealVector3d": ("<f4", (3,)),
+    "RealEulerAngles3d": ("<f4", (3,)),
+    "RealPlane2d": ("<f4", (3,)),
+    "RealRgbColor": ("<f4", (3,)),
+    "RealHsvColor": ("<f4", (3,)),
+    "RealQuaternion": ("<f4", (4,)),
+    "RealPlane3d": ("<f4", (4,)),
+    "RealArgbColor": ("<f4", (4,)),
+    "RealAhsvColor": ("<f4", (4,)),
+}
+
+# Fields with no value that are still safe to carry through a serialized write untouched
+OPAQUE_FIELD_TYPES = {"Pad", "UselessPad", "Skip", "Explanation", "Terminator"}
+
+VALUE_FIELD_TYPES = {"CharEnum", "ShortEnum", "LongEnum", "CharBlockIndex", "CharBlockIndexCustomSearch", "ShortBlockIndex", "ShortBlockIndexCustomSearch", "LongBlockIndex", "LongBlockIndexCustomSearch"}
+FLAGS_FIELD_TYPES = {"ByteFlags", "WordFlags", "Flags", "ByteBlockFlags", "WordBlockFlags", "BlockFlags"}
+
+class BlockLayout:
+    '''Byte layout of the elements of a tag block, taken from the fields of an element'''
+    def __init__(self, element):
+        self.fields: dict[str, tuple[str, int, int]] = {}
+        offset = 0
+        for field in element.Fields:
+            size = int(field.Size)
+            self.fields[field.FieldName] = str(field.FieldType), offset, size
+            offset += size
+
+        self.element_size = offset
+        # Any field with data outside of the element itself (references, string ids, child blocks...) needs ManagedBlam
+        self.bulk_writable = all(field_type in FIELD_FORMATS or field_type in OPAQUE_FIELD_TYPES for field_type, _, _ in self.fields.values())
+
+    @classmethod
+    def from_block(cls, block) -> 'BlockLayout':
+        '''Gets the layout from the first element of the block, adding and removing a temporary element if the block is empty'''
+        if block.Elements.Count:
+            return cls(block.Elements[0])
+
+        layout = cls(block.AddElement())
+        block.RemoveAllElements()
+        return layout
+
+    def field_format(self, field_name: str):
+        field_type, _, size = self.fields[field_name]
+        field_format = FIELD_FORMATS.get(field_type)
+        if field_format is None:
+            raise ValueError(f"Field {field_name} of type {field_type} has no bulk representation")
+        if np.dtype(field_format).itemsize != size:
+            raise ValueError(f"Field {field_name} is {size} bytes, expected {np.dtype(field_format).itemsize} for {field_type}")
+        return field_format
+
+    def dtype(self, field_names: dict[str, str] | list[str]) -> np.dtype:
+        '''Returns a structured dtype spanning whole elements that exposes the given fields. field_names either lists tag
+        field names or maps array column names to tag field names'''
+        if not isinstance(field_names, dict):
+            field_names = {name: name for name in field_names}
+
+        missing = [field_name for field_name in field_names.values() if field_name not in self.fields]
+        if missing:
+            raise ValueError(f"Tag block is missing fields: {', '.join(missing)}")
+
+        return np.dtype({
+            "names": list(field_names),
+            "formats": [self.field_format(field_name) for field_name in field_names.values()],
+            "offsets": [self.fields[field_name][1] for field_name in field_names.values()],
+            "itemsize": self.element_size,
+        })
+
+def serialized_block(block) -> tuple[bytes, int, int, int]:
+    '''Returns the serialized block along with the offset of its element data, the element size and the count'''
+    count = block.Elements.Count
+    if count == 0:
+        return b"", 0, 0, 0
+
+    block_size = int(block.Size)
+    if block_size <= 0 or block_size % count:
+        element_size = sum(int(field.Size) for field in block.Elements[0].Fields)
+    else:
+        element_size = block_size // count
+
+    data = bytes(block.Serialize())
+    chunk_start = data.find(b"lbgt")
+    if chunk_start == -1:
+        raise ValueError("Serialized tag block does not contain an lbgt chunk")
+
+    chunk_count = struct.unpack_from("<I", data, chunk_start + 12)[0]
+    if chunk_count != count:
+        raise ValueError(f"Serialized tag block count mismatch: {chunk_count} != {count}")
+
+    values_start = chunk_start + 20
+    if values_start + element_size * count > len(data):
+        raise ValueError("Serialized tag block ended before all element data was read")
+
+    return data, values_start, element_size, count
+
+def block_payload(block) -> tuple[memoryview, int, int]:
+    '''Returns the raw element data of the block along with the element size and count'''
+    data, values_start, element_size, count = serialized_block(block)
+    return memoryview(data)[values_start:values_start + element_size * count], element_size, count
+
+def serialized_block_with_payload(template: bytes, count: int, payload: bytes | bytearray) -> bytes:
+    '''Splices element data into the serialized form of an empty block'''
+    data = bytearray(template)
+    lbgt = data.rfind(b"lbgt")
+    dtpc = data.rfind(b"dtpc", 0, lbgt)
+    if lbgt == -1 or dtpc == -1:
+        raise ValueError("Serialized tag block does not contain expected chunks")
+
+    values_start = lbgt + 20
+    data = data[:values_start] + payload + data[values_start:]
+    struct.pack_into("<I", data, 8, len(data) - 12)
+    struct.pack_into("<I", data, dtpc + 8, len(data) - dtpc - 12)
+    struct.pack_into("<I", data, lbgt + 8, len(payload) + 8)
+    struct.pack_into("<I", data, lbgt + 12, count)
+    return bytes(data)
+
+def read_block(block, field_names: dict[str, str] | list[str], layout: BlockLayout = None) -> np.ndarray:
+    '''Reads the given fields of every element of the block into a structured array'''
+    if block.Elements.Count == 0:
+        return np.zeros(0, dtype=(layout or BlockLayout.from_block(block)).dtype(field_names))
+
+    layout = layout or BlockLayout(block.Elements[0])
+    dtype = layout.dtype(field_names)
+    try:
+        payload, element_size, count = block_payload(block)
+        if element_size != layout.element_size:
+            raise ValueError(f"Serialized element size {element_size} does not match field layout size {layout.element_size}")
+        return np.frombuffer(payload, dtype=dtype, count=count).copy()
+    except ValueError:
+        return _read_block_elementwise(block, dtype, field_names if isinstance(field_names, dict) else {name: name for name in field_names}, layout)
+
+def _read_block_elementwise(block, dtype: np.dtype, field_names: dict[str, str], layout: BlockLayout) -> np.ndarray:
+    rows = np.zeros(block.Elements.Count, dtype=dtype)
+    for idx, element in enumerate(block.Elements):
+        for column, field_name in field_names.items():
+            field = element.SelectField(field_name)
+            field_type = layout.fields[field_name][0]
+            if field_type in VALUE_FIELD_TYPES:
+                rows[column][idx] = field.Value
+            elif field_type in FLAGS_FIELD_TYPES:
+                rows[column][idx] = field.RawValue
+            else:
+                rows[column][idx] = field.Data
+
+    return rows
+
+def write_block(block, rows: np.ndarray, field_names: dict[str, str] | list[str] = None, layout: BlockLayout = None):
+    '''Replaces the elements of the block with one element per row. Fields without a column keep the defaults of a new
+    element. Blocks whose elements reference data outside of themselves get their elements added through ManagedBlam,
+    and then have their columns written as in update_block'''
+    field_names = _column_field_names(rows, field_names)
+    block.RemoveAllElements()
+    if not len(rows):
+        return
+
+    template_element = block.AddElement()
+    layout = layout or BlockLayout(template_element)
+    if not layout.bulk_writable:
+        for _ in range(len(rows) - 1):
+            block.AddElement()
+        return update_block(block, rows, field_names, layout)
+
+    default_element, element_size, _ = block_payload(block)
+    block.RemoveAllElements()
+    if element_size != layout.element_size:
+        for _ in range(len(rows)):
+            block.AddElement()
+        return _update_block_elementwise(block, rows, field_names, layout)
+
+    payload = bytearray(bytes(default_element) * len(rows))
+    elements = np.ndarray(len(rows), dtype=layout.dtype(field_names), buffer=payload)
+    for column in field_names:
+        elements[column] = rows[column]
+
+    block.Deserialize(serialized_block_with_payload(bytes(block.Serialize()), len(rows), payload))
+
+def update_block(block, rows: np.ndarray, field_names: dict[str, str] | list[str] = None, layout: BlockLayout = None):
+    '''Writes the columns of rows to the existing elements of the block, one row per element. Columns with a bulk
+    representation are patched into the serialized block in a single pass, leaving every other byte as it was. The
+    remaining columns (string ids, references, data...) are set element by element'''
+    field_names = _column_field_names(rows, field_names)
+    if block.Elements.Count != len(rows):
+        raise ValueError(f"Tag block has {block.Elements.Count} elements, expected {len(rows)}")
+    if not len(rows):
+        return
+
+    layout = layout or BlockLayout(block.Elements[0])
+    bulk_field_names = {column: field_name for column, field_name in field_names.items() if layout.fields[field_name][0] in FIELD_FORMATS}
+    element_field_names = {column: field_name for column, field_name in field_names.items() if column not in bulk_field_names}
+    if bulk_field_names:
+        try:
+            data, values_start, element_size, count = serialized_block(block)
+            if element_size != layout.element_size:
+                raise ValueError(f"Serialized element size {element_size} does not match field layout size {layout.element_size}")
+            data = bytearray(data)
+            elements = np.ndarray(count, dtype=layout.dtype(bulk_field_names), buffer=data, offset=values_start)
+            for column in bulk_field_names:
+                elements[column] = rows[column]
+            block.Deserialize(bytes(data))
+        except ValueError:
+            element_field_names = field_names
+
+    _update_block_elementwise(block, rows, element_field_names, layout)
+
+def _column_field_names(rows: np.ndarray, field_names: dict[str, str] | list[str] | None) -> dict[str, str]:
+    if field_names is None:
+        field_names = list(rows.dtype.names)
+    if not isinstance(field_names, dict):
+        field_names = {name: name for name in field_names}
+    return field_names
+
+def _update_block_elementwise(block, rows: np.ndarray, field_names: dict[str, str], layout: BlockLayout):
+    columns = [(field_name, layout.fields[field_name][0], rows[column].tolist()) for column, field_name in field_names.items()]
+    if not columns:
+        return
+    for idx, element in enumerate(block.Elements):
+        for field_name, field_type, values in columns:
+            field = element.SelectField(field_name)
+            if field_type in VALUE_FIELD_TYPES:
+                field.Value = values[idx]
+            elif field_type in FLAGS_FIELD_TYPES:
+                field.RawValue = values[idx]
+            else:
+                field.Data = values[idx]
@@ -116,6 +116,18 @@ class _ChunkReader(_BinaryReader):
             raise ValueError(f"Invalid chunk size {size} for {signature}")
         return _Chunk(_ChunkHeader(signature, version, size), self.read_bytes(size))
 
+    def read_next_chunk_view(self) -> _Chunk | None:
+        if self.remaining < 12:
+            return None
+        signature = self.read_signature()
+        version = self.read_i32()
+        size = self.read_i32()
+        if size < 0 or size > self.remaining:
+            raise ValueError(f"Invalid chunk size {size} for {signature}")
+        data = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return _Chunk(_ChunkHeader(signature, version, size), data)
+
     def peek_next_chunk_header(self) -> _ChunkHeader | None:
         if self.remaining < 12:
             return None
@@ -440,12 +452,12 @@ class _SourceTagParser:
             raise ValueError("Serialized tag is too small to contain a valid header")
         reader.skip(0x40)
 
-        tag_chunk = reader.read_next_chunk()
+        tag_chunk = reader.read_next_chunk_view()
         if tag_chunk is None or tag_chunk.header.signature != "tag!":
             raise ValueError("Expected tag! chunk in serialized tag data")
         tag_reader = _ChunkReader(tag_chunk.data)
 
-        blay_chunk = tag_reader.read_next_chunk()
+        blay_chunk = tag_reader.read_next_chunk_view()
         if blay_chunk is None or blay_chunk.header.signature != "blay":
             raise ValueError("Expected blay chunk in serialized tag data")
         blay_reader = _ChunkReader(blay_chunk.data)
@@ -539,16 +551,16 @@ class _SourceTagParser:
         reader = _ChunkReader(self.serialized_tag_data)
         reader.skip(0x40)
 
-        tag_chunk = reader.read_next_chunk()
+        tag_chunk = reader.read_next_chunk_view()
         if tag_chunk is None or tag_chunk.header.signature != "tag!":
             raise ValueError("Expected tag! chunk in serialized tag data")
         tag_reader = _ChunkReader(tag_chunk.data)
 
-        blay_chunk = tag_reader.read_next_chunk()
+        blay_chunk = tag_reader.read_next_chunk_view()
         if blay_chunk is None or blay_chunk.header.signature != "blay":
             raise ValueError("Expected blay chunk in serialized tag data")
 
-        bdat_chunk = tag_reader.read_next_chunk()
+        bdat_chunk = tag_reader.read_next_chunk_view()
         if bdat_chunk is None or bdat_chunk.header.signature != "bdat":
             raise ValueError("Expected bdat chunk in serialized tag data")
         bdat_reader = _ChunkReader(bdat_chunk.data)
@@ -0,0 +1,385 @@
+'''Read only tag access without ManagedBlam. Tag files are memory mapped and fields are resolved by name from the layout
+embedded in each tag, so reading needs neither the .NET runtime nor bpy and can happen in worker processes'''
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import mmap
+import os
+from typing import Any
+
+import numpy as np
+
+from .source_tag_resource import (
+    _ArrayDefinition,
+    _BlockDefinition,
+    _ChunkReader,
+    _FieldDefinition,
+    _SourceTagParser,
+    _StructDefinition,
+    _normalize_name,
+)
+
+
+FIELD_DTYPES = {
+    "char_integer": "i1",
+    "byte_integer": "u1",
+    "short_integer": "<i2",
+    "word_integer": "<u2",
+    "long_integer": "<i4",
+    "dword_integer": "<u4",
+    "int64_integer": "<i8",
+    "qword_integer": "<u8",
+    "angle": "<f4",
+    "real": "<f4",
+    "real_fraction": "<f4",
+    "char_enum": "i1",
+    "short_enum": "<i2",
+    "long_enum": "<i4",
+    "byte_flags": "u1",
+    "word_flags": "<u2",
+    "long_flags": "<u4",
+    "byte_block_flags": "u1",
+    "word_block_flags": "<u2",
+    "long_block_flags": "<u4",
+    "char_block_index": "i1",
+    "custom_char_block_index": "i1",
+    "short_block_index": "<i2",
+    "custom_short_block_index": "<i2",
+    "long_block_index": "<i4",
+    "custom_long_block_index": "<i4",
+    "rgb_color": "<u4",
+    "argb_color": "<u4",
+    "point_2d": ("<i2", (2,)),
+    "rectangle_2d": ("<i2", (4,)),
+    "short_bounds": ("<i2", (2,)),
+    "real_point_2d": ("<f4", (2,)),
+    "real_vector_2d": ("<f4", (2,)),
+    "real_euler_angles_2d": ("<f4", (2,)),
+    "real_bounds": ("<f4", (2,)),
+    "angle_bounds": ("<f4", (2,)),
+    "real_fraction_bounds": ("<f4", (2,)),
+    "real_point_3d": ("<f4", (3,)),
+    "real_vector_3d": ("<f4", (3,)),
+    "real_euler_angles_3d": ("<f4", (3,)),
+    "real_plane_2d": ("<f4", (3,)),
+    "real_rgb_color": ("<f4", (3,)),
+    "real_hsv_color": ("<f4", (3,)),
+    "real_quaternion": ("<f4", (4,)),
+    "real_plane_3d": ("<f4", (4,)),
+    "real_argb_color": ("<f4", (4,)),
+    "real_ahsv_color": ("<f4", (4,)),
+}
+
+# Fields whose values live in a chunk after the raw element data rather than in the element itself, keyed to the
+# signatures that chunk can have
+EMBEDDED_SIGNATURES = {
+    "struct": {"tgst"},
+    "block": {"tgbl"},
+    "tag_reference": {"tgrf"},
+    "string_id": {"tgsi"},
+    "old_string_id": {"tgsi"},
+    "data": {"tgda", "tgst"},
+    "pageable_resource": {"tgrc", "tg\x00c"},
+    "api_interop": {"tgin"},
+}
+
+
+@dataclass(frozen=True, slots=True)
+class TagReference:
+    group: str
+    path: str
+
+
+def _field_dtype(field: _FieldDefinition):
+    field_dtype = FIELD_DTYPES.get(field.type_name)
+    if field_dtype is not None and np.dtype(field_dtype).itemsize == field.size:
+        return field_dtype
+    if field.type_name in {"string", "long_string", "tag"}:
+        return f"S{field.size}"
+    return f"V{field.size}"
+
+
+def _has_embedded_data(definition: _StructDefinition, seen: set[int] | None = None) -> bool:
+    seen = set() if seen is None else seen
+    if id(definition) in seen:
+        return False
+    seen.add(id(definition))
+    for field in definition.fields:
+        if field.type_name == "struct" and isinstance(field.definition, _StructDefinition):
+            if _has_embedded_data(field.definition, seen):
+                return True
+        elif field.type_name == "array" and isinstance(field.definition, _ArrayDefinition):
+            if _has_embedded_data(field.definition.struct, seen):
+                return True
+        elif field.type_name in EMBEDDED_SIGNATURES:
+            return True
+    return False
+
+
+def _split_path_part(part: str) -> tuple[str, int | None]:
+    index = None
+    if part.endswith("]") and "[" in part:
+        part, index_text = part[:-1].split("[", 1)
+        index = int(index_text)
+    if ":" in part:
+        part = part.split(":", 1)[1]
+    return _normalize_name(part), index
+
+
+class TagStruct:
+    '''One element of a block, or a struct field of one. Fields are looked up by name, either as written in the tag
+    definition or normalized'''
+    def __init__(self, definition: _StructDefinition, raw: memoryview, embedded: memoryview | None):
+        self.definition = definition
+        self.raw = raw
+        self._embedded = embedded
+        self._embedded_fields: dict[str, memoryview | None] | None = None
+        self._fields = {field.normalized_name: field for field in definition.fields}
+
+    def __getitem__(self, name: str):
+        return self.get_value(self.field(name))
+
+    def __contains__(self, name: str) -> bool:
+        return _normalize_name(name) in self._fields
+
+    def field(self, name: str) -> _FieldDefinition:
+        field = self._fields.get(_normalize_name(name))
+        if field is None:
+            raise KeyError(f"{self.definition.name} has no field named {name}")
+        return field
+
+    def get(self, *names: str, default=None):
+        for name in names:
+            if name in self:
+                return self[name]
+        return default
+
+    def select(self, path: str):
+        '''Walks a ManagedBlam style field path such as "Struct:render_method[0]/Block:parameters". Type prefixes are
+        ignored and an index selects a block element'''
+        value = self
+        for part in path.split("/"):
+            name, index = _split_path_part(part)
+            if not isinstance(value, TagStruct):
+                raise ValueError(f"Cannot select {part} from a {type(value).__name__}")
+            value = value[name]
+            if index is not None and not isinstance(value, TagStruct):
+                value = value[index]
+        return value
+
+    def get_value(self, field: _FieldDefinition):
+        type_name = field.type_name
+        if type_name in EMBEDDED_SIGNATURES:
+            chunk = self._embedded_chunk(field)
+            if type_name == "struct":
+                return TagStruct(field.definition, self.raw[field.offset:field.offset + field.size], chunk)
+            if type_name == "block":
+                return TagBlock(field.definition, chunk)
+            if type_name == "tag_reference":
+                if chunk is None or len(chunk) < 4:
+                    return None
+                return TagReference(bytes(chunk[3::-1]).decode("ascii", errors="replace"), bytes(chunk[4:]).decode("ascii", errors="replace"))
+            if type_name in {"string_id", "old_string_id"}:
+                return "" if chunk is None else bytes(chunk).decode("ascii", errors="replace")
+            if type_name == "data":
+                return memoryview(b"") if chunk is None else chunk
+            return chunk
+
+        if type_name == "array" and isinstance(field.definition, _ArrayDefinition):
+            struct_def = field.definition.struct
+            return [
+                TagStruct(struct_def, self.raw[offset:offset + struct_def.size], None)
+                for offset in range(field.offset, field.offset + field.size, struct_def.size)
+            ]
+
+        if field.size == 0:
+            # explanations, custom fields and the like hold no data
+            return None
+
+        value = np.frombuffer(self.raw, dtype=_field_dtype(field), count=1, offset=field.offset)[0]
+        if type_name in {"string", "long_string"}:
+            return value.split(b"\x00", 1)[0].decode("ascii", errors="replace")
+        if type_name == "tag":
+            return value[::-1].decode("ascii", errors="replace")
+        if isinstance(value, np.ndarray):
+            return tuple(value.tolist())
+        if isinstance(value, np.generic) and value.dtype.kind != "V":
+            return value.item()
+        return bytes(value)
+
+    def _embedded_chunk(self, field: _FieldDefinition) -> memoryview | None:
+        if self._embedded_fields is None:
+            self._embedded_fields = self._index_embedded_fields()
+        if field.normalized_name not in self._embedded_fields:
+            raise ValueError(f"Field {field.name} in {self.definition.name} follows data this reader cannot walk")
+        return self._embedded_fields[field.normalized_name]
+
+    def _index_embedded_fields(self) -> dict[str, memoryview | None]:
+        fields = {}
+        reader = _ChunkReader(b"" if self._embedded is None else self._embedded)
+        for field in self.definition.fields:
+            if field.type_name == "array" and isinstance(field.definition, _ArrayDefinition) and _has_embedded_data(field.definition.struct):
+                # Embedded data of array elements is not walked, every later field is unreachable
+                break
+            signatures = EMBEDDED_SIGNATURES.get(field.type_name)
+            if signatures is None:
+                continue
+            if field.type_name == "struct" and not _has_embedded_data(field.definition):
+                fields[field.normalized_name] = None
+                continue
+            header = reader.peek_next_chunk_header()
+            if header is None or header.signature not in signatures:
+                fields[field.normalized_name] = None
+                continue
+            chunk = reader.read_next_chunk_view()
+            data = chunk.data
+            if field.type_name == "data" and chunk.header.signature == "tgst":
+                inner = _ChunkReader(data).read_next_chunk_view()
+                data = None if inner is None else inner.data
+            fields[field.normalized_name] = data
+
+        return fields
+
+
+class TagBlock:
+    '''A tag block read from a tgbl chunk. array returns the raw element data as a NumPy structured array that shares
+    memory with the tag file'''
+    def __init__(self, definition: _BlockDefinition, chunk: memoryview | None):
+        self.definition = definition
+        self.count = 0
+        self.raw = memoryview(b"")
+        self._chunk = chunk
+        self._embedded: list[memoryview | None] | None = None
+        if chunk is not None and len(chunk) >= 8:
+            reader = _ChunkReader(chunk)
+            self.count = max(reader.read_i32(), 0)
+            reader.read_i32()
+            raw_size = self.count * definition.struct.size
+            if raw_size > reader.remaining:
+                raise ValueError(f"Block {definition.name} is truncated (count={self.count}, struct_size={definition.struct.size})")
+            self.raw = reader.data[reader.tell():reader.tell() + raw_size]
+            self._embedded_offset = reader.tell() + raw_size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> TagStruct:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"Element {index} is out of range for block {self.definition.name} with {self.count} elements")
+        size = self.definition.struct.size
+        return TagStruct(self.definition.struct, self.raw[index * size:(index + 1) * size], self._element_embedded()[index])
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    @property
+    def fields(self) -> list[str]:
+        return [field.name for field in self.definition.struct.fields]
+
+    def dtype(self, field_names: list[str] | None = None) -> np.dtype:
+        '''Structured dtype for the given fields, or every field stored in the element data when None'''
+        struct_def = self.definition.struct
+        if field_names is None:
+            fields = [field for field in struct_def.fields if field.size and field.type_name not in {"pad", "skip", "useless_pad"}]
+        else:
+            lookup = {field.normalized_name: field for field in struct_def.fields}
+            fields = []
+            for name in field_names:
+                field = lookup.get(_normalize_name(name))
+                if field is None:
+                    raise KeyError(f"{struct_def.name} has no field named {name}")
+                fields.append(field)
+
+        return np.dtype({
+            "names": [field.name for field in fields],
+            "formats": [_field_dtype(field) for field in fields],
+            "offsets": [field.offset for field in fields],
+            "itemsize": struct_def.size,
+        })
+
+    def array(self, field_names: list[str] | None = None) -> np.ndarray:
+        '''Read only structured view over the raw element data. Embedded fields such as references and string ids
+        are not part of the element data, read those through the elements'''
+        return np.frombuffer(self.raw, dtype=self.dtype(field_names), count=self.count)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.array([name])[self.dtype([name]).names[0]]
+
+    def _element_embedded(self) -> list[memoryview | None]:
+        if self._embedded is None:
+            self._embedded = [None] * self.count
+            if self.count and _has_embedded_data(self.definition.struct):
+                reader = _ChunkReader(self._chunk)
+                reader.seek(self._embedded_offset)
+                for index in range(self.count):
+                    header = reader.peek_next_chunk_header()
+                    if header is None or header.signature != "tgst":
+                        break
+                    self._embedded[index] = reader.read_next_chunk_view().data
+        return self._embedded
+
+
+class TagReader:
+    '''Memory maps a tag file and exposes its root element. Use as a context manager so the file is unmapped when done,
+    arrays taken from the tag must not be used after that'''
+    def __init__(self, path: str | os.PathLike):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                raise ValueError(f"Tag file is empty: {self.path}")
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self._mmap)
+        self.parser = _SourceTagParser(self.data)
+        self.layout_version = self.parser.layout_version
+        self._root: TagStruct | None = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def root_block(self) -> TagBlock:
+        reader = _ChunkReader(self.data)
+        reader.skip(0x40)
+        tag_chunk = reader.read_next_chunk_view()
+        if tag_chunk is None or tag_chunk.header.signature != "tag!":
+            raise ValueError(f"Expected tag! chunk in {self.path}")
+        tag_reader = _ChunkReader(tag_chunk.data)
+        while True:
+            chunk = tag_reader.read_next_chunk_view()
+            if chunk is None:
+                raise ValueError(f"Expected bdat chunk in {self.path}")
+            if chunk.header.signature == "bdat":
+                break
+        root_chunk = _ChunkReader(chunk.data).read_next_chunk_view()
+        if root_chunk is None or root_chunk.header.signature != "tgbl":
+            raise ValueError(f"Expected tgbl chunk for root block in {self.path}")
+        return TagBlock(self.parser.layout.root_block, root_chunk.data)
+
+    @property
+    def root(self) -> TagStruct:
+        if self._root is None:
+            root_block = self.root_block
+            if not len(root_block):
+                raise ValueError(f"Root block of {self.path} has no elements")
+            self._root = root_block[0]
+        return self._root
+
+    def select(self, path: str) -> Any:
+        return self.root.select(path)
+
+    def close(self):
+        self._root = None
+        self.parser = None
+        try:
+            self.data.release()
+            self._mmap.close()
+        except BufferError:
+            # Views of the tag are still alive, the mapping is released once they are collected
+            pass
@@ -0,0 +1,53 @@
+'''Process pools for work that only needs plain python and numpy. Addon modules cannot normally be imported in a worker
+process since the addon's __init__ needs bpy, so workers register the parent packages of the module doing the work as
+bare namespaces before any task is unpickled. Only modules that import neither bpy nor ManagedBlam at import time can
+have their functions run in these pools'''
+
+import concurrent.futures
+import multiprocessing
+import os
+import runpy
+import sys
+import types
+
+def bootstrap_worker(packages: list[tuple[str, str]]):
+    '''Registers each (name, path) package as a bare namespace, so that modules inside them can be imported without
+    running the package __init__'''
+    for name, path in packages:
+        if name not in sys.modules:
+            module = types.ModuleType(name)
+            module.__path__ = [path]
+            sys.modules[name] = module
+
+def _parent_packages(module_name: str) -> list[tuple[str, str]]:
+    packages = []
+    parts = module_name.split(".")[:-1]
+    for i in range(1, len(parts) + 1):
+        name = ".".join(parts[:i])
+        packages.append((name, list(sys.modules[name].__path__)[0]))
+    return packages
+
+BOOTSTRAP_RUN_NAME = "__worker_bootstrap__"
+
+def worker_count(workers: int = 0) -> int:
+    return workers or os.cpu_count() or 1
+
+def process_pool(module_name: str, workers: int = 0) -> concurrent.futures.ProcessPoolExecutor:
+    '''Returns a pool of spawned processes able to run functions from the given module'''
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=worker_count(workers),
+        mp_context=multiprocessing.get_context("spawn"),
+        # A worker cannot import this module by name before the bootstrap has run, so it runs this file by path instead,
+        # which only needs the standard library, and the run calls bootstrap_worker below
+        initializer=runpy.run_path,
+        initargs=(__file__, {"BOOTSTRAP_PACKAGES": _parent_packages(module_name)}, BOOTSTRAP_RUN_NAME),
+    )
+
+def batched(items: list, workers: int, max_batch_size: int = 32) -> list[list]:
+    '''Splits items into batches small enough to balance across the workers, large enough to keep pickling overhead low'''
+    batch_size = max(1, min(max_batch_size, len(items) // (worker_count(workers) * 4)))
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+if __name__ == BOOTSTRAP_RUN_NAME:
+    # BOOTSTRAP_PACKAGES is passed in as an initial global by the run_path in process_pool
+    bootstrap_worker(globals()["BOOTSTRAP_PACKAGES"])
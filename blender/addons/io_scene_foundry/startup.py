@@ -3,9 +3,7 @@ import addon_utils
 from bpy.app.handlers import persistent
 import bpy
 
-from .tools.light_exporter import export_lights
-from .tools.prefab_exporter import export_prefabs
-from .tools.decorator_exporter import export_decorators
+from .tools import save_sync
 
 from . import managed_blam
 from . import utils
@@ -98,6 +96,7 @@ def load_handler(dummy):
 
     global load_handler_complete, _subscription_owner
 
+    save_sync.reset()
     context = bpy.context
     nwo = utils.get_scene_props()
 
@@ -220,20 +219,22 @@ def save_object_positions_to_tags(dummy):
     asset_type = nwo.asset_type
 
     if nwo.prefabs_export_on_save and asset_type == 'scenario' and utils.is_corinth():
-        print("Exporting Prefabs")
-        export_prefabs()
+        save_sync.sync_prefabs()
 
     if nwo.lights_export_on_save and asset_type == 'scenario':
-        print("Exporting Lights")
-        export_lights(*utils.get_asset_info())
+        save_sync.sync_lights()
 
     if (
         nwo.decorators_export_on_save
         and asset_type == 'scenario'
         and nwo.decorators_from_blender
     ):
-        print("Exporting Decorators")
-        export_decorators(utils.is_corinth(bpy.context))
+        save_sync.sync_decorators()
+
+
+@persistent
+def track_save_sync_changes(scene, depsgraph):
+    save_sync.track_depsgraph_updates(depsgraph)
 
 
 @persistent
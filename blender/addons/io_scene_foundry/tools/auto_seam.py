@@ -1,35 +1,201 @@
 
 
+from dataclasses import dataclass
 import bpy
 import bmesh
+import numpy as np
 from ..tools.property_apply import apply_props_material
 
-from ..utils import deselect_all_objects, export_objects_mesh_only, get_prefs, get_scene_props, poll_ui, set_active_object, true_permutation, true_region, current_project_valid
+from ..utils import export_objects_mesh_only, get_prefs, get_scene_props, poll_ui, true_permutation, true_region, current_project_valid
+
+# World space vertices closer than this are treated as the same vertex
+SEAM_TOLERANCE = 0.0001
+
+@dataclass
+class SeamLoop:
+    facing_region: int
+    back_region: int
+    facing_object: int
+    positions: np.ndarray
+    cells: frozenset
+
+def quantize(positions: np.ndarray, tolerance=SEAM_TOLERANCE) -> np.ndarray:
+    return np.round(positions / tolerance).astype(np.int64)
+
+def grid_cells(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''Returns the distinct (N, 3) grid keys and the index of each input key among them. Equivalent to np.unique with axis=0
+    but sorts the key columns directly rather than as one opaque row type, which is several times faster'''
+    order = np.lexsort(keys.T[::-1])
+    sorted_keys = keys[order]
+    first = np.r_[True, np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)]
+    inverse = np.empty(len(keys), dtype=np.int64)
+    inverse[order] = np.cumsum(first) - 1
+    return sorted_keys[first], inverse
+
+def world_vertices(ob: bpy.types.Object) -> np.ndarray:
+    me = ob.data
+    co = np.empty(len(me.vertices) * 3, dtype=np.float32)
+    me.vertices.foreach_get("co", co)
+    matrix = np.array(ob.matrix_world, dtype=np.float64)
+    return co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+def mesh_edges(me: bpy.types.Mesh) -> np.ndarray:
+    edges = np.empty(len(me.edges) * 2, dtype=np.int64)
+    me.edges.foreach_get("vertices", edges)
+    return edges.reshape(-1, 2)
+
+def _components(cells: np.ndarray, edges: np.ndarray) -> list[np.ndarray]:
+    '''Splits cells into the groups connected by edges. Cells no edge touches are gathered into one group so that meshes
+    sharing loose vertices still get a seam'''
+    parents = {cell: cell for cell in cells.tolist()}
+
+    def find(cell):
+        while parents[cell] != cell:
+            parents[cell] = parents[parents[cell]]
+            cell = parents[cell]
+        return cell
+
+    for a, b in edges.tolist():
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parents[root_b] = root_a
+
+    connected = set(edges.ravel().tolist())
+    groups = {}
+    for cell in cells.tolist():
+        groups.setdefault(find(cell) if cell in connected else -1, []).append(cell)
+    return [np.array(group, dtype=np.int64) for group in groups.values()]
+
+def _loop_order(cells: np.ndarray, edges: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    '''Returns cell indices in order around the loop. A component whose edges form a single cycle is walked, anything else
+    is sorted by angle around its centroid in its best fit plane'''
+    neighbours = {cell: [] for cell in cells.tolist()}
+    for a, b in edges.tolist():
+        neighbours[a].append(b)
+        neighbours[b].append(a)
+
+    if all(len(linked) == 2 for linked in neighbours.values()):
+        start = cells[0].item()
+        order = [start]
+        previous, current = None, start
+        while True:
+            a, b = neighbours[current]
+            following = b if a == previous else a
+            if following == start:
+                break
+            order.append(following)
+            previous, current = current, following
+        if len(order) == len(cells):
+            return np.array(order, dtype=np.int64)
+
+    points = positions[cells]
+    centered = points - points.mean(axis=0)
+    _, _, axes = np.linalg.svd(centered, full_matrices=False)
+    angles = np.arctan2(centered @ axes[1], centered @ axes[0])
+    return cells[np.argsort(angles, kind="stable")]
+
+def find_seam_loops(object_vertices: list[np.ndarray], object_edges: list[np.ndarray], object_regions: list[int], tolerance=SEAM_TOLERANCE) -> list[SeamLoop]:
+    '''Finds the loops of vertices shared between regions. Vertices of every object are quantized into one hash grid, so
+    a single pass finds every cell used by more than one region regardless of how many objects there are. The facing
+    region of a seam is whichever of its two regions comes first in object_regions'''
+    counts = [len(vertices) for vertices in object_vertices]
+    if not sum(counts):
+        return []
+
+    vertex_objects = np.repeat(np.arange(len(object_vertices)), counts)
+    vertex_regions = np.asarray(object_regions, dtype=np.int64)[vertex_objects]
+    positions = np.concatenate(object_vertices)
+    cells, vertex_cells = grid_cells(quantize(positions, tolerance))
+    # The first vertex in each cell stands in for it when ordering loops. Assigning in reverse leaves the first one written
+    cell_vertices = np.empty(len(cells), dtype=np.int64)
+    cell_vertices[vertex_cells[::-1]] = np.arange(len(positions) - 1, -1, -1)
+    cell_positions = positions[cell_vertices]
+
+    # Each (cell, region) once, sorted by cell
+    region_count = int(vertex_regions.max()) + 1
+    cell_regions = np.unique(vertex_cells * region_count + vertex_regions)
+    region_cells, regions = np.divmod(cell_regions, region_count)
+    shared = np.bincount(region_cells, minlength=len(cells)) > 1
+
+    pair_cells: dict[tuple[int, int], list[int]] = {}
+    boundaries = np.flatnonzero(np.r_[True, region_cells[1:] != region_cells[:-1], True])
+    starts, ends = boundaries[:-1], boundaries[1:]
+    shared_starts = shared[region_cells[starts]]
+    for start, end in zip(starts[shared_starts].tolist(), ends[shared_starts].tolist()):
+        cell = region_cells[start].item()
+        cell_region_list = regions[start:end].tolist()
+        for i, a in enumerate(cell_region_list):
+            for b in cell_region_list[i + 1:]:
+                pair_cells.setdefault((a, b), []).append(cell)
+
+    offsets = np.r_[0, np.cumsum(counts)[:-1]]
+    edges = np.concatenate([object_edge + offset for object_edge, offset in zip(object_edges, offsets.tolist())]) if object_edges else np.zeros((0, 2), dtype=np.int64)
+    edges = vertex_cells[edges.reshape(-1, 2)]
+    edges = np.sort(edges[shared[edges].all(axis=1) & (edges[:, 0] != edges[:, 1])], axis=1)
+    edges = edges[np.unique(edges[:, 0] * len(cells) + edges[:, 1], return_index=True)[1]]
+
+    # First vertex of each region in each shared cell. Seams are built from the facing region's vertices so that they sit
+    # exactly on its geometry, and the object owning them gives the seam's permutation
+    first_vertex = {}
+    shared_vertices = np.flatnonzero(shared[vertex_cells])
+    for vertex, cell, region in zip(shared_vertices.tolist(), vertex_cells[shared_vertices].tolist(), vertex_regions[shared_vertices].tolist()):
+        first_vertex.setdefault((cell, region), vertex)
+
+    loops = []
+    for (a, b), pair_cell_list in pair_cells.items():
+        pair_cell_array = np.array(pair_cell_list, dtype=np.int64)
+        pair_edges = edges[np.isin(edges, pair_cell_array).all(axis=1)]
+        for component in _components(pair_cell_array, pair_edges):
+            if len(component) < 3:
+                continue
+            component_edges = pair_edges[np.isin(pair_edges, component).all(axis=1)]
+            order = _loop_order(component, component_edges, cell_positions)
+            facing_vertices = np.array([first_vertex[(cell, a)] for cell in order.tolist()], dtype=np.int64)
+            facing_object = vertex_objects[facing_vertices].min().item()
+            loops.append(SeamLoop(a, b, facing_object, positions[facing_vertices], frozenset(map(tuple, cells[order].tolist()))))
+
+    return loops
+
+def seam_mesh(name: str, positions: np.ndarray) -> bpy.types.Mesh:
+    '''Builds a seam from its loop of positions as a single face, inset so that the face inside the loop is well formed'''
+    count = len(positions)
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(count)
+    mesh.loops.add(count)
+    mesh.polygons.add(1)
+    mesh.vertices.foreach_set("co", positions.astype(np.float32).ravel())
+    mesh.polygons.foreach_set("loop_start", np.zeros(1, dtype=np.int32))
+    mesh.polygons.foreach_set("vertices", np.arange(count, dtype=np.int32))
+    mesh.update(calc_edges=True)
+
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bmesh.ops.inset_individual(bm, faces=bm.faces)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
 
 class NWO_AutoSeam(bpy.types.Operator):
     bl_idname = "nwo.auto_seam"
     bl_label = "Auto Seam"
     bl_options = {"UNDO"}
     bl_description = "Generates BSP seams. Requires there to be atleast 2 BSPs in the blend scene and that object mode is active"
-    
+
     selected_only: bpy.props.BoolProperty(name='Selected Objects Only', description="Only create seams between objects in the current selection")
-    
+
     @classmethod
     def poll(cls, context):
         return context.mode == 'OBJECT' and poll_ui('scenario') and len(get_scene_props().regions_table) > 1 and current_project_valid()
 
     def execute(self, context):
         return self.auto_seam(context)
-    
+
     def invoke(self, context, event):
         return context.window_manager.invoke_props_dialog(self)
 
     def auto_seam(self, context: bpy.types.Context):
-        old_selection = [ob for ob in context.selected_objects if ob.nwo.mesh_type != '_connected_geometry_mesh_type_seam']
-        old_active = context.object if context.object and context.object.nwo.mesh_type != '_connected_geometry_mesh_type_seam' else None
-        old_3d_cursor_mat = context.scene.cursor.matrix
         apply_materials = get_prefs().apply_materials
-        export_obs = export_objects_mesh_only()
+        export_obs = [ob for ob in export_objects_mesh_only() if ob.type == 'MESH']
         seam_obs = [ob for ob in export_obs if ob.data.nwo.mesh_type == "_connected_geometry_mesh_type_seam"]
 
         if self.selected_only:
@@ -37,99 +203,52 @@ class NWO_AutoSeam(bpy.types.Operator):
         else:
             structure_obs = [ob for ob in export_obs if ob.data.nwo.mesh_type == "_connected_geometry_mesh_type_structure"]
 
-        deselect_all_objects()
-        selected_regions = {true_region(structure.nwo) for structure in structure_obs}
-        if len(selected_regions) <= 1:
+        region_names = list(dict.fromkeys(true_region(structure.nwo) for structure in structure_obs))
+        if len(region_names) <= 1:
             word = "selection" if self.selected_only else "scene"
             self.report({"WARNING"}, f"Only one structure bsp in {word}")
             return {"CANCELLED"}
 
-        ignore_verts = set()
+        object_vertices = [world_vertices(ob) for ob in structure_obs]
+        loops = find_seam_loops(
+            object_vertices,
+            [mesh_edges(ob.data) for ob in structure_obs],
+            [region_names.index(true_region(ob.nwo)) for ob in structure_obs],
+        )
+
+        existing_seams = [frozenset(map(tuple, quantize(world_vertices(ob)).tolist())) for ob in seam_obs]
+
         seam_counter = 0
         overlapping_seams = 0
-        matches = set()
-        
-        structure_obs_data = [(ob, ob.matrix_world, ob.data, [ob.matrix_world @ v.co for v in ob.data.vertices]) for ob in structure_obs]
-
-        for ob, ob_mat, me, verts in structure_obs_data:
-            for test_ob, test_ob_mat, test_me, test_verts in structure_obs_data:
-                if ob == test_ob:
-                    continue
-
-                pair_key = frozenset({ob.name, test_ob.name})
-                if pair_key in matches:
-                    continue
-                matches.add(pair_key)
-
-                if true_region(test_ob.nwo) == true_region(ob.nwo):
-                    continue
-
-                matching_verts = [v.to_tuple() for v in verts if v in test_verts]
-                if len(matching_verts) > 2 and frozenset(matching_verts) not in ignore_verts:
-                    ignore_verts.add(frozenset(matching_verts))
-                    set_active_object(ob)
-                    ob.select_set(True)
-                    bpy.ops.object.mode_set(mode='EDIT')
-                    bpy.ops.mesh.select_all(action="SELECT")
-                    bpy.ops.view3d.snap_cursor_to_selected()
-                    bpy.ops.object.mode_set(mode='OBJECT')
-                    ob.select_set(False)
-
-                    ob_nwo = ob.nwo
-                    test_ob_nwo = test_ob.nwo
-                    facing_bsp = true_region(ob_nwo)
-                    backfacing_bsp = true_region(test_ob_nwo)
-                    facing_perm = true_permutation(ob_nwo)
-
-                    seam_data = bpy.data.meshes.new("seam")
-                    seam_data.from_pydata(matching_verts, [], [])
-                    seam_data.update()
-
-                    new_seam_found = False
-                    for old_seam in seam_obs:
-                        old_verts = sorted([old_seam.matrix_world @ v.co for v in old_seam.data.vertices])
-                        new_verts = sorted([v for v in seam_data.vertices])
-                        if old_verts == new_verts:
-                            new_seam_found = True
-                            overlapping_seams += 1
-                            break
-                    
-                    if new_seam_found:
-                        continue
-
-                    bm = bmesh.new()
-                    bm.from_mesh(seam_data)
-                    old_verts = bm.verts
-                    bmesh.ops.contextual_create(bm, geom=bm.verts)
-                    bmesh.ops.inset_individual(bm, faces=bm.faces)
-                    bm.to_mesh(seam_data)
-
-                    seam = bpy.data.objects.new(f"seam({facing_bsp}:{backfacing_bsp})", seam_data)
-                    seam.data.nwo.mesh_type = "_connected_geometry_mesh_type_seam"
-                    seam.nwo.permutation_name = facing_perm
-                    seam.nwo.region_name = facing_bsp
-                    seam.nwo.seam_back = backfacing_bsp
-                    context.scene.collection.objects.link(seam)
-
-                    if apply_materials:
-                        apply_props_material(seam, 'Seam')
-
-                    set_active_object(seam)
-                    seam.select_set(True)
-                    bpy.ops.object.origin_set(type="ORIGIN_CURSOR", center="MEDIAN")
-                    bpy.ops.object.mode_set(mode='EDIT')
-                    bpy.ops.mesh.select_all(action="SELECT")
-                    bpy.ops.mesh.normals_make_consistent(inside=True)
-                    bpy.ops.mesh.remove_doubles()
-                    bpy.ops.object.mode_set(mode='OBJECT')
-                    seam.select_set(False)
-                    seam_counter += 1
-
-        for ob in old_selection:
-            ob.select_set(True)
-        if old_active is not None:
-            set_active_object(old_active)
-        context.scene.cursor.matrix = old_3d_cursor_mat
+        for loop in loops:
+            if any(loop.cells <= seam_cells for seam_cells in existing_seams):
+                overlapping_seams += 1
+                continue
+
+            facing_bsp = region_names[loop.facing_region]
+            backfacing_bsp = region_names[loop.back_region]
+            facing_ob = structure_obs[loop.facing_object]
+
+            # Face the seam into its facing bsp
+            centroid = loop.positions.mean(axis=0)
+            positions = loop.positions - centroid
+            normal = np.cross(positions, np.roll(positions, -1, axis=0)).sum(axis=0)
+            if np.dot(normal, object_vertices[loop.facing_object].mean(axis=0) - centroid) < 0:
+                positions = positions[::-1]
+
+            seam = bpy.data.objects.new(f"seam({facing_bsp}:{backfacing_bsp})", seam_mesh("seam", positions))
+            seam.location = centroid.tolist()
+            seam.data.nwo.mesh_type = "_connected_geometry_mesh_type_seam"
+            seam.nwo.permutation_name = true_permutation(facing_ob.nwo)
+            seam.nwo.region_name = facing_bsp
+            seam.nwo.seam_back = backfacing_bsp
+            context.scene.collection.objects.link(seam)
+
+            if apply_materials:
+                apply_props_material(seam, 'Seam')
+
+            existing_seams.append(loop.cells)
+            seam_counter += 1
 
         if seam_counter:
             self.report({'INFO'}, f"Created {seam_counter} seam{'s' if seam_counter > 1 else ''}")
@@ -137,6 +256,5 @@ class NWO_AutoSeam(bpy.types.Operator):
             self.report({'INFO'}, f'Seams already in place')
         else:
             self.report({'WARNING'}, f'Failed to create any seams. Ensure that structure objects between bsps have overlapping verts')
-        
-        return {"FINISHED"}
 
+        return {"FINISHED"}
@@ -0,0 +1,14 @@
+'''Benchmarks for the array based readers and writers, and harnesses that run the Tool process schedulers against a
+stand-in Tool. Each module builds its own synthetic input, times or checks the code path and prints the results through
+main(). The modules they exercise import bpy, so run them from inside Blender, e.g. from the Python console with
+`from <add-on package>.tools import bench; bench.run("havok_mesh")`'''
+
+import importlib
+
+BENCHMARKS = "havok_mesh", "bitmap_channels", "serialized_block", "sky_light", "farm_scheduler", "jms"
+
+def run(*names: str):
+    '''Runs the named benchmarks, or all of them if none are given'''
+    for name in names or BENCHMARKS:
+        print(f"\n--- {name}")
+        importlib.import_module(f".{name}", __package__).main()
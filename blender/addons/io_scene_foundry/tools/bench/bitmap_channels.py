@@ -0,0 +1,60 @@
+'''Times the BitmapTag channel conversions on synthetic BGRA buffers, against the per pixel loop they replaced for the
+normal map conversion'''
+
+from math import sqrt
+import time
+
+import numpy as np
+
+from ...managed_blam.bitmap import NORMAL_DEBUG_GAMMA_LOOKUP, BitmapTag
+
+SIZES = 1024, 4096
+REFERENCE_SIZE = 256
+
+def per_pixel_calculated_blue(bgra: bytearray, standard_orientation=False) -> bytearray:
+    '''The per pixel conversion bgra_to_rgba_with_calculated_blue used before it moved to numpy'''
+    for i in range(0, len(bgra), 4):
+        if standard_orientation:
+            red_byte = bgra[i + 1]
+            green_byte = 255 - bgra[i + 2]
+        else:
+            red_byte = bgra[i + 2]
+            green_byte = bgra[i + 1]
+
+        red_byte = NORMAL_DEBUG_GAMMA_LOOKUP[red_byte]
+        green_byte = NORMAL_DEBUG_GAMMA_LOOKUP[green_byte]
+        x = -1.0 + 2.0 * (red_byte / 255.0)
+        y = -1.0 + 2.0 * (green_byte / 255.0)
+        z = (sqrt(max(0, 1 - x * x - y * y)) + 1) / 2
+        bgra[i] = red_byte
+        bgra[i + 1] = green_byte
+        bgra[i + 2] = int(z * 255 + 0.5)
+    return bgra
+
+def _time(function, pixels: np.ndarray, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        buffer = pixels.copy()
+        start = time.perf_counter()
+        function(buffer)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(repeats=3):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (REFERENCE_SIZE, REFERENCE_SIZE, 4), dtype=np.uint8)
+    start = time.perf_counter()
+    reference = per_pixel_calculated_blue(bytearray(pixels.tobytes()))
+    reference_time = time.perf_counter() - start
+    converted = BitmapTag.bgra_to_rgba_with_calculated_blue(pixels.copy())
+    matches = np.array_equal(np.frombuffer(reference, dtype=np.uint8).reshape(pixels.shape), converted)
+    print(f"per pixel normal conversion, {REFERENCE_SIZE}x{REFERENCE_SIZE}: {reference_time * 1000:8.1f} ms, numpy output matches: {matches}")
+
+    for size in SIZES:
+        pixels = rng.integers(0, 256, (size, size, 4), dtype=np.uint8)
+        for name, function in (
+            ("bgra_to_rgba", BitmapTag.bgra_to_rgba),
+            ("bgra_to_rgba_solid_alpha", BitmapTag.bgra_to_rgba_solid_alpha),
+            ("bgra_to_rgba_with_calculated_blue", BitmapTag.bgra_to_rgba_with_calculated_blue),
+        ):
+            print(f"{name:>34}, {size}x{size}: {_time(function, pixels, repeats) * 1000:8.1f} ms")
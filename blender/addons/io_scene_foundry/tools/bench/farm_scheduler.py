@@ -0,0 +1,106 @@
+'''Runs FarmScheduler against a stand-in Tool: a Python process that logs its arguments and exits with a scripted code.
+The lightmap scenarios go through LightMapper.farm itself, with slices feeding a merge per stage, and check the failure,
+retry and dependent skip behaviour'''
+
+import os
+from subprocess import Popen
+import sys
+import tempfile
+import time
+from typing import TextIO
+
+from ..farm_scheduler import FarmScheduler
+from ..scenario.lightmap import LightMapper
+
+STAGES = ("dillum", "Direct Illumination"), ("pcast", "Casting Photons"), ("fgather", "Final Gather")
+SLICES = 4
+
+class FakeTool:
+    '''Launches a stand-in Tool process per call. exit_codes maps a task's Tool arguments, joined with spaces, to the
+    exit codes of its successive attempts. Attempts past the end of the list, and unlisted tasks, exit with 0'''
+    def __init__(self, exit_codes: dict[str, list[int]] = None, duration=0.05):
+        self.exit_codes = {args: list(codes) for args, codes in (exit_codes or {}).items()}
+        self.duration = duration
+        self.launched: list[str] = []
+
+    def launch(self, tool_args: list[str], log_file: TextIO | None) -> Popen:
+        key = " ".join(tool_args)
+        self.launched.append(key)
+        codes = self.exit_codes.get(key)
+        code = codes.pop(0) if codes else 0
+        script = f"import sys, time; print({tool_args!r}); time.sleep({self.duration}); sys.exit({code})"
+        return Popen([sys.executable, "-c", script], stdout=log_file, stderr=log_file)
+
+def stand_in_lightmapper(tool: FakeTool, blob_dir: str) -> LightMapper:
+    '''A LightMapper holding only the state farm uses, launching the stand-in Tool'''
+    lightmapper = LightMapper.__new__(LightMapper)
+    lightmapper.lightmap_message = ""
+    lightmapper.lightmap_failed = False
+    lightmapper.show_crash_report = True
+    lightmapper.thread_count = SLICES
+    lightmapper.blob_dir = blob_dir
+    lightmapper.launch_farm_process = tool.launch
+    return lightmapper
+
+def slice_args(blob_dir: str, stage: str, index: int) -> str:
+    return f"faux_farm_{stage} {blob_dir} {index} {SLICES}"
+
+def merge_args(blob_dir: str, stage: str) -> str:
+    return f"faux_farm_{stage}_merge {blob_dir} {SLICES}"
+
+def _check(results: list[bool], label: str, passed: bool):
+    results.append(passed)
+    print(f"{'PASS' if passed else 'FAIL'}: {label}")
+
+def main():
+    results = []
+    with tempfile.TemporaryDirectory() as blob_dir:
+        print("clean run")
+        tool = FakeTool()
+        lightmapper = stand_in_lightmapper(tool, blob_dir)
+        _check(results, "the farm finishes", lightmapper.farm(STAGES) and not lightmapper.lightmap_failed)
+        _check(results, "one launch per task", len(tool.launched) == len(STAGES) * (SLICES + 1))
+
+        print("\nslice fails once")
+        tool = FakeTool({slice_args(blob_dir, "pcast", 1): [3]})
+        lightmapper = stand_in_lightmapper(tool, blob_dir)
+        _check(results, "the slice is retried and the farm finishes", lightmapper.farm(STAGES) and tool.launched.count(slice_args(blob_dir, "pcast", 1)) == 2)
+        with open(os.path.join(blob_dir, "logs", "pcast", "1.txt")) as log:
+            _check(results, "the retry appends to the slice log", log.read().count("faux_farm_pcast") == 2)
+
+        print("\nslice fails past its retries")
+        tool = FakeTool({slice_args(blob_dir, "pcast", 2): [3, 3]})
+        lightmapper = stand_in_lightmapper(tool, blob_dir)
+        _check(results, "the farm aborts on the slice", not lightmapper.farm(STAGES) and "during pcast" in lightmapper.lightmap_message and "code 3" in lightmapper.lightmap_message)
+        _check(results, "no later stage starts", not any(args.startswith("faux_farm_fgather") for args in tool.launched))
+
+        print("\nmerge fails once")
+        tool = FakeTool({merge_args(blob_dir, "dillum"): [4]})
+        lightmapper = stand_in_lightmapper(tool, blob_dir)
+        _check(results, "the farm aborts on the merge", not lightmapper.farm(STAGES) and "during faux_farm_dillum_merge" in lightmapper.lightmap_message)
+        _check(results, "the merge is not retried", tool.launched.count(merge_args(blob_dir, "dillum")) == 1)
+        _check(results, "no slice of the next stage starts", not any(args.startswith("faux_farm_pcast") for args in tool.launched))
+
+        print("\nfailure without stop_on_failure")
+        tool = FakeTool({"bad": [5, 5]})
+        scheduler = FarmScheduler(tool.launch, 2, retries=1, stop_on_failure=False)
+        bad = scheduler.add("bitmaps", "bad", ["bad"])
+        child = scheduler.add("bitmaps", "child", ["child"], dependencies=[bad])
+        grandchild = scheduler.add("bitmaps", "grandchild", ["grandchild"], dependencies=[child])
+        independent = scheduler.add("bitmaps", "independent", ["independent"])
+        failed = scheduler.run()
+        _check(results, "the farm carries on", failed is None and independent.finished)
+        _check(results, "the failed task is collected after its retry", scheduler.failures == [bad] and bad.attempts == 2)
+        _check(results, "dependents are skipped, transitively", scheduler.skipped == [child, grandchild] and "child" not in tool.launched)
+
+        print("\ncancel")
+        tool = FakeTool(duration=5)
+        scheduler = FarmScheduler(tool.launch, 2)
+        for index in range(4):
+            scheduler.add("bitmaps", f"slow {index}", ["slow", str(index)])
+        scheduler.step()
+        start = time.perf_counter()
+        scheduler.cancel()
+        _check(results, "running processes are killed and pending tasks dropped", not scheduler.running and not scheduler.pending and time.perf_counter() - start < 5)
+
+    print(f"\n{sum(results)}/{len(results)} checks passed")
@@ -0,0 +1,63 @@
+'''Times HavokCollision._extract_mesh_data on synthetic HaloCompressedMeshShape data of increasing size, and on any
+captured serialized shapes passed to main. The parse time should grow linearly with the size of the shape'''
+
+from pathlib import Path
+import random
+import time
+
+import numpy as np
+
+from ...managed_blam.connected_geometry import HavokCollision
+
+SIZES = 1_000, 10_000, 100_000
+
+def _packed(value: int) -> bytes:
+    raw = ((value << 1) ^ (value >> 63)) & 0xFFFFFFFFFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = raw & 0x7F
+        raw >>= 7
+        if not raw:
+            out.append(byte)
+            return bytes(out)
+        out.append(byte | 0x80)
+
+def serialized_shape(triangle_count: int, seed=0) -> bytes:
+    '''Builds a shape with a vertex pool, an index pool of triangle_count quads and a render triangle mapping, preceded
+    and followed by noise'''
+    rng = random.Random(seed)
+    vertex_count = max(3, triangle_count // 2)
+    vertices = np.random.default_rng(seed).uniform(-50, 50, vertex_count * 3).astype("<f4")
+    data = bytearray(b"HaloCompressedMeshShape VertexPool IndexPool RenderMapping IORenderTriangleIndices ")
+    data += bytes(rng.randrange(256) for _ in range(16))
+    data += _packed(vertex_count * 3) + vertices.tobytes()
+    data += _packed(triangle_count * 4)
+    for _ in range(triangle_count):
+        for index in rng.sample(range(vertex_count), 3):
+            data += _packed(index)
+        data += _packed(rng.randrange(4096))
+    data += _packed(triangle_count) + b"\x01" + bytes(4 * triangle_count)
+    data += _packed(triangle_count) + b"\x01" + b"".join(_packed(rng.randrange(triangle_count)) for _ in range(triangle_count))
+    data += bytes(rng.randrange(256) for _ in range(32))
+    return bytes(data)
+
+def _time(data: bytes, repeats: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        mesh_data = HavokCollision._extract_mesh_data(data, 4)
+        best = min(best, time.perf_counter() - start)
+    return best, 0 if mesh_data is None else len(mesh_data[1])
+
+def main(paths=(), repeats=3):
+    '''paths are files holding the raw serialized shape data of captured collision, e.g. a havok shape block's data
+    written out while importing a BSP'''
+    for triangle_count in SIZES:
+        data = serialized_shape(triangle_count)
+        elapsed, faces = _time(data, repeats)
+        print(f"{triangle_count:>8} triangles, {len(data) / 1024:8.0f} KiB: {elapsed * 1000:8.1f} ms, {faces} faces read")
+
+    for path in paths:
+        data = Path(path).read_bytes()
+        elapsed, faces = _time(data, repeats)
+        print(f"{Path(path).name}, {len(data) / 1024:8.0f} KiB: {elapsed * 1000:8.1f} ms, {faces} faces read")
@@ -0,0 +1,147 @@
+'''Times JMS.from_file on generated version 8213 files, against a reader that builds a Python object per vertex,
+influence, texture coordinate and triangle as the JMS reader did before. Peak memory is measured with tracemalloc in a
+separate pass. Files are written with every vertex at the same stride, and with influence and texture coordinate counts
+varying per vertex. set_vertex_weights is run against a stand-in object counting its group.add calls'''
+
+from pathlib import Path
+import random
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from ...legacy.jms import JMS
+
+SIZES = 100_000, 1_000_000
+NODES = "root", "b_spine", "b_pelvis", "b_head"
+
+def write_jms(path: Path, vertex_count: int, varying=False, seed=0):
+    '''Writes a JMS with a node per NODES entry, one material, and vertex_count vertices forming vertex_count // 3
+    triangles. Weights are written at six decimal places, as the exporters write them'''
+    rng = random.Random(seed)
+    with open(path, "w") as file:
+        write = lambda *lines: file.write("\n".join(lines) + "\n")
+        write(";### VERSION ###", "8213", ";### NODES ###", str(len(NODES)))
+        for index, name in enumerate(NODES):
+            write(f";NODE {index}", name, str(index - 1), "0.0\t0.0\t0.0\t1.0", "0.0\t0.0\t0.0")
+        write(";### MATERIALS ###", "1", ";MATERIAL 0", "floor", "(1) default bsp_a")
+        write(";### MARKERS ###", "0", ";### INSTANCE XREF PATHS ###", "0", ";### INSTANCE MARKERS ###", "0")
+        write(";### VERTICES ###", str(vertex_count))
+        for index in range(vertex_count):
+            write(f";VERTEX {index}")
+            write("%.10f\t%.10f\t%.10f" % (rng.uniform(-100, 100), rng.uniform(-100, 100), rng.uniform(-100, 100)))
+            write("%.10f\t%.10f\t%.10f" % (rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)))
+            influence_count = rng.randint(1, 3) if varying else 2
+            write(str(influence_count))
+            for _ in range(influence_count):
+                write(str(rng.randrange(len(NODES))), "%.6f" % rng.random())
+            texture_coordinate_count = rng.randint(1, 2) if varying else 1
+            write(str(texture_coordinate_count))
+            for _ in range(texture_coordinate_count):
+                write("%.10f\t%.10f" % (rng.random(), rng.random()))
+            write("%.6f\t%.6f\t%.6f" % (rng.random(), rng.random(), rng.random()))
+        triangle_count = vertex_count // 3
+        write(";### TRIANGLES ###", str(triangle_count))
+        for index in range(triangle_count):
+            write(f";TRIANGLE {index}", "0", f"{index * 3}\t{index * 3 + 1}\t{index * 3 + 2}")
+        write(";### SPHERES ###", "0", ";### BOXES ###", "0")
+
+class _Influence:
+    def __init__(self, node_index: int, weight: float):
+        self.node_index = node_index
+        self.weight = weight
+
+class _Vertex:
+    def __init__(self, position, normal, influences, texture_coordinates, color):
+        self.position = position
+        self.normal = normal
+        self.influences = influences
+        self.texture_coordinates = texture_coordinates
+        self.color = color
+
+class _Triangle:
+    def __init__(self, material_index: int, vertex_indices):
+        self.material_index = material_index
+        self.vertex_indices = vertex_indices
+
+def per_vertex_objects(path: Path) -> tuple[list[_Vertex], list[_Triangle]]:
+    '''Reads the vertices and triangles of a file written by write_jms line by line into Python objects'''
+    with open(path, "r") as file:
+        lines = (line.rstrip("\n") for line in file if line.strip() and not line.startswith(";"))
+        get = lambda: next(lines)
+        geti = lambda: int(next(lines))
+        getv = lambda: tuple(float(value) for value in next(lines).split())
+        get()
+        for _ in range(geti()):
+            get(), get(), get(), get()
+        for _ in range(geti()):
+            get(), get()
+        for _ in range(3):
+            geti()
+        vertices = []
+        for _ in range(geti()):
+            position, normal = getv(), getv()
+            influences = [_Influence(geti(), float(get())) for _ in range(geti())]
+            texture_coordinates = [getv() for _ in range(geti())]
+            vertices.append(_Vertex(position, normal, influences, texture_coordinates, getv()))
+        triangles = [_Triangle(geti(), getv()) for _ in range(geti())]
+    return vertices, triangles
+
+class _VertexGroup:
+    def __init__(self, ob: '_StandInObject'):
+        self._ob = ob
+
+    def add(self, index: list[int], weight: float, type: str):
+        self._ob.add_calls += 1
+        self._ob.weights_written += len(index)
+
+class _VertexGroups(dict):
+    def new(self, name: str):
+        group = self[name] = _VertexGroup(self.ob)
+        return group
+
+class _StandInObject:
+    '''Object with only the vertex group methods set_vertex_weights uses'''
+    def __init__(self):
+        self.vertex_groups = _VertexGroups()
+        self.vertex_groups.ob = self
+        self.add_calls = 0
+        self.weights_written = 0
+
+def _measure(function, path: Path) -> tuple[float, float]:
+    '''Returns the time taken and the peak memory in GB'''
+    start = time.perf_counter()
+    function(path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 ** 3
+
+def main(sizes=SIZES):
+    with tempfile.TemporaryDirectory() as directory:
+        for vertex_count in sizes:
+            for varying in False, True:
+                path = Path(directory, f"bench_{vertex_count}_{'varying' if varying else 'fixed'}.jms")
+                write_jms(path, vertex_count, varying)
+                label = f"{vertex_count:>9} vertices, {'varying' if varying else 'fixed':>7} stride, {path.stat().st_size / 1024 ** 2:6.0f} MiB"
+                object_time, object_peak = _measure(per_vertex_objects, path)
+                column_time, column_peak = _measure(lambda path: JMS().from_file(path), path)
+                print(f"{label}: per vertex objects {object_time:6.2f}s / {object_peak:5.2f} GB, columns {column_time:6.2f}s / {column_peak:5.2f} GB")
+
+                jms = JMS()
+                jms.from_file(path)
+                vertices, _ = per_vertex_objects(path)
+                matches = np.allclose(jms.positions, [vertex.position for vertex in vertices]) and all(
+                    np.allclose(jms.influence_weights[index, :len(vertex.influences)], [influence.weight for influence in vertex.influences])
+                    for index, vertex in enumerate(vertices[:1000])
+                )
+                del vertices
+                ob = _StandInObject()
+                start = time.perf_counter()
+                jms.set_vertex_weights(ob)
+                print(f"{'':>{len(label)}}  output matches: {matches}, set_vertex_weights {time.perf_counter() - start:6.2f}s, "
+                      f"{ob.add_calls} group.add calls for {ob.weights_written} weights")
+                path.unlink()
@@ -0,0 +1,138 @@
+'''Counts the ManagedBlam calls made writing tag blocks through serialized_block against setting every field of every
+element, using an in memory stand-in for a ManagedBlam tag block. The cost of a real write is dominated by these calls,
+so the count is the figure to compare. The time shown only covers the Python side'''
+
+import struct
+import time
+
+import numpy as np
+
+from ...managed_blam.serialized_block import read_block, write_block
+
+SIZES = 100, 1_000, 10_000
+
+class _Field:
+    def __init__(self, name: str, field_type: str, size: int):
+        self.FieldName = name
+        self.FieldType = field_type
+        self.Size = size
+
+class _ElementField:
+    def __init__(self, block: 'StandInBlock'):
+        self._block = block
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            return super().__setattr__(name, value)
+        self._block.calls += 1
+
+class _Element:
+    def __init__(self, block: 'StandInBlock'):
+        self._block = block
+        self.Fields = block.fields
+
+    def SelectField(self, name: str):
+        self._block.calls += 1
+        return _ElementField(self._block)
+
+class _Elements(list):
+    @property
+    def Count(self):
+        return len(self)
+
+class StandInBlock:
+    '''Tag block whose serialized form is a header, a dtpc chunk and an lbgt chunk holding the element data. Every
+    method and field access ManagedBlam would service adds to calls'''
+    def __init__(self, fields: list[_Field]):
+        self.fields = fields
+        self.element_size = sum(field.Size for field in fields)
+        self.data = bytearray()
+        self.Elements = _Elements()
+        self.calls = 0
+
+    @property
+    def Size(self):
+        return len(self.data)
+
+    def AddElement(self):
+        self.calls += 1
+        self.data += bytes(self.element_size)
+        self.Elements.append(_Element(self))
+        return self.Elements[-1]
+
+    def RemoveAllElements(self):
+        self.calls += 1
+        self.data = bytearray()
+        self.Elements.clear()
+
+    def Serialize(self):
+        self.calls += 1
+        lbgt = b"lbgt" + struct.pack("<III", 0, len(self.data) + 8, len(self.Elements)) + bytes(4) + bytes(self.data)
+        dtpc = b"dtpc" + struct.pack("<II", 0, len(lbgt)) + lbgt
+        return b"tag!" + struct.pack("<II", 0, len(dtpc)) + dtpc
+
+    def Deserialize(self, data: bytes):
+        self.calls += 1
+        lbgt = data.rfind(b"lbgt")
+        count = struct.unpack_from("<I", data, lbgt + 12)[0]
+        self.data = bytearray(data[lbgt + 20:lbgt + 20 + count * self.element_size])
+        if count != len(self.Elements):
+            self.Elements = _Elements(_Element(self) for _ in range(count))
+
+# Corinth light instance: every field has a bulk representation
+LIGHT_INSTANCE = [
+    _Field("Light Definition ID", "LongInteger", 4),
+    _Field("Light Definition Index", "LongBlockIndex", 4),
+    _Field("light mode", "ShortEnum", 2),
+    _Field("pad", "Pad", 2),
+    _Field("origin", "RealPoint3d", 12),
+    _Field("forward", "RealVector3d", 12),
+    _Field("up", "RealVector3d", 12),
+]
+
+# Prefab placement: a reference and a string id alongside the transform
+PREFAB = [
+    _Field("prefab reference", "Reference", 16),
+    _Field("name", "StringId", 4),
+    _Field("scale", "Real", 4),
+    _Field("forward", "RealVector3d", 12),
+    _Field("left", "RealVector3d", 12),
+    _Field("up", "RealVector3d", 12),
+    _Field("position", "RealPoint3d", 12),
+]
+
+def _rows(fields: list[_Field], count: int) -> np.ndarray:
+    columns = {"RealPoint3d": (np.float64, (3,)), "RealVector3d": (np.float64, (3,)), "Real": (np.float64, ())}
+    dtype = [(field.FieldName, *columns.get(field.FieldType, (np.int64, ()))) for field in fields if field.FieldType not in {"Pad", "Reference", "StringId"}]
+    rows = np.zeros(count, dtype=dtype)
+    rng = np.random.default_rng(count)
+    for name in rows.dtype.names:
+        rows[name] = rng.integers(0, 100, rows[name].shape)
+    return rows
+
+def _write_elementwise(block: StandInBlock, rows: np.ndarray):
+    '''Writes the block the way the exporters did before, one field at a time'''
+    block.RemoveAllElements()
+    for row in rows.tolist():
+        element = block.AddElement()
+        for name, value in zip(rows.dtype.names, row):
+            element.SelectField(name).Data = value
+
+def _measure(fields: list[_Field], count: int, write) -> tuple[int, float, StandInBlock]:
+    block = StandInBlock(fields)
+    rows = _rows(fields, count)
+    start = time.perf_counter()
+    write(block, rows)
+    return block.calls, time.perf_counter() - start, block
+
+def main():
+    for label, fields in ("light instances", LIGHT_INSTANCE), ("prefabs", PREFAB):
+        print(label)
+        for count in SIZES:
+            element_calls, element_time, _ = _measure(fields, count, _write_elementwise)
+            bulk_calls, bulk_time, block = _measure(fields, count, write_block)
+            rows = _rows(fields, count)
+            written = read_block(block, list(rows.dtype.names))
+            matches = all(np.array_equal(written[name], rows[name]) for name in rows.dtype.names)
+            print(f"{count:>8} elements: {element_calls:>8} calls / {element_time * 1000:7.1f} ms per field, "
+                  f"{bulk_calls:>8} calls / {bulk_time * 1000:7.1f} ms serialized, output matches: {matches}")
@@ -0,0 +1,169 @@
+'''Times sky light generation and sky dome sampling on a synthetic 1024x512 sky against the implementations they replaced:
+the median cut that rescanned every box and summed each box region per split, and the per vertex dome sampling'''
+
+import math
+import time
+
+import numpy as np
+
+from ..sky_gen.sky_light import (
+    EPSILON,
+    TWO_PI,
+    LightBox,
+    _pixel_directions,
+    _pixel_weights,
+    build_sky_dome_data,
+    clamp_color,
+    gamma_correct,
+    generate_sky_lights,
+    linear_color_luminance,
+)
+
+IMAGE_SIZE = 1024, 512
+LIGHT_COUNTS = 16, 64, 256, 1024, 4096
+DOME_SLICES = 32, 64
+
+class _Params:
+    sky_intensity = 1.5
+    exposure = 1.0
+    sky_dome_radius = 100.0
+
+def synthetic_sky(width: int, height: int, seed=1) -> np.ndarray:
+    '''A noisy HDR sky with a small bright sun region'''
+    rng = np.random.default_rng(seed)
+    image = (rng.random((height, width, 3)) ** 4 * 5).astype(np.float32)
+    image[height // 25 : height // 25 + 10, width // 5 : width // 5 + 10] *= 50
+    return image
+
+def _previous_build_light_box(colors, directions, weights, x0, y0, w, h) -> LightBox:
+    region_colors = colors[y0 : y0 + h, x0 : x0 + w]
+    region_weights = weights[y0 : y0 + h, x0 : x0 + w]
+    center_direction = directions[y0 + h // 2, x0 + w // 2]
+    weight_sum = float(region_weights.sum())
+    if weight_sum <= EPSILON:
+        return LightBox(x0, y0, w, h, 0.0)
+
+    average_color = (region_colors * region_weights[..., None]).sum(axis=(0, 1)) / weight_sum
+    region_directions = directions[y0 : y0 + h, x0 : x0 + w]
+    angle_diff = 1.0 - np.clip((region_directions * center_direction).sum(axis=-1), -1.0, 1.0)
+    luminance_diff = linear_color_luminance(np.abs(region_colors - average_color))
+    return LightBox(x0, y0, w, h, float((region_weights * angle_diff * luminance_diff).sum()))
+
+def _previous_split_light_box(box: LightBox, colors, directions, weights) -> tuple[LightBox, LightBox]:
+    region_colors = colors[box.y0 : box.y0 + box.h, box.x0 : box.x0 + box.w]
+    region_weights = weights[box.y0 : box.y0 + box.h, box.x0 : box.x0 + box.w]
+    region_luminance = linear_color_luminance(region_colors) * region_weights
+    half_luminance = float(region_luminance.sum()) * 0.5
+    if box.w > box.h:
+        cumulative = region_luminance.sum(axis=0).cumsum()
+        split_offset = min(max(int(np.searchsorted(cumulative, half_luminance, side="left")), 0), box.w - 2)
+        first = _previous_build_light_box(colors, directions, weights, box.x0, box.y0, split_offset + 1, box.h)
+        second = _previous_build_light_box(colors, directions, weights, box.x0 + split_offset + 1, box.y0, box.w - split_offset - 1, box.h)
+        return first, second
+
+    cumulative = region_luminance.sum(axis=1).cumsum()
+    split_offset = min(max(int(np.searchsorted(cumulative, half_luminance, side="left")), 0), box.h - 2)
+    first = _previous_build_light_box(colors, directions, weights, box.x0, box.y0, box.w, split_offset + 1)
+    second = _previous_build_light_box(colors, directions, weights, box.x0, box.y0 + split_offset + 1, box.w, box.h - split_offset - 1)
+    return first, second
+
+def _previous_box_light(box: LightBox, colors, directions, weights) -> tuple[np.ndarray, np.ndarray, float]:
+    x_slice = slice(box.x0, box.x0 + box.w)
+    y_slice = slice(box.y0, box.y0 + box.h)
+    region_colors = colors[y_slice, x_slice]
+    region_weights = weights[y_slice, x_slice]
+    average_color = (region_colors * region_weights[..., None]).sum(axis=(0, 1)) / max(float(region_weights.sum()), EPSILON)
+    luminance_weights = region_weights * linear_color_luminance(region_colors)
+    luminance_sum = float(luminance_weights.sum())
+    if luminance_sum <= EPSILON:
+        center_x = box.x0 + box.w // 2
+        center_y = box.y0 + box.h // 2
+    else:
+        x_coords = np.arange(box.x0, box.x0 + box.w, dtype=np.float32)[None, :]
+        y_coords = np.arange(box.y0, box.y0 + box.h, dtype=np.float32)[:, None]
+        center_x = int(np.clip((x_coords * luminance_weights).sum() / luminance_sum, box.x0, box.x0 + box.w - 1))
+        center_y = int(np.clip((y_coords * luminance_weights).sum() / luminance_sum, box.y0, box.y0 + box.h - 1))
+
+    return average_color, directions[center_y, center_x], float(region_weights.sum())
+
+def previous_sky_lights(colors: np.ndarray, params, light_count: int, vertical_fov: float) -> list[tuple[np.ndarray, np.ndarray, float]]:
+    '''The median cut generate_sky_lights used before, which scans every box for the worst one on each split and sums
+    each box region in full. Returns (color, direction, solid angle) for each light'''
+    height, width = colors.shape[:2]
+    directions = _pixel_directions(width, height)
+    weights = _pixel_weights(width, height)
+    weight_unify_scalar = TWO_PI / max(float(weights.sum()), EPSILON)
+    initial_height = max(1, min(height, int(height * float(np.clip(vertical_fov / math.pi, 0.03, 1.0)))))
+    boxes = [_previous_build_light_box(colors, directions, weights, 0, 0, width, initial_height)]
+    while len(boxes) < max(light_count, 1):
+        worst_index = None
+        worst_error = -1.0
+        for index, box in enumerate(boxes):
+            if box.is_splitable() and box.mean_square_error > worst_error:
+                worst_error = box.mean_square_error
+                worst_index = index
+
+        if worst_index is None:
+            break
+
+        first, second = _previous_split_light_box(boxes[worst_index], colors, directions, weights)
+        boxes[worst_index] = first
+        boxes.append(second)
+
+    lights = []
+    for box in boxes[:light_count]:
+        average_color, direction, solid_angle = _previous_box_light(box, colors, directions, weights)
+        lights.append((average_color * params.sky_intensity, direction, solid_angle * weight_unify_scalar))
+    return lights
+
+def _previous_sample(theta: float, phi: float, image: np.ndarray, sample_radius=5) -> np.ndarray:
+    height, width = image.shape[:2]
+    phi_step = TWO_PI / max(width - 1, 1)
+    theta_step = math.pi / max(height - 1, 1)
+    center_x = int(min(max(phi, 0.0), TWO_PI) / phi_step)
+    center_y = int(min(max(theta, 0.0), math.pi) / theta_step)
+    sample_color = np.zeros(3, dtype=np.float32)
+    sample_weight = 0.0
+    for dx in range(-sample_radius, sample_radius + 1):
+        xx = min(max(center_x + dx, 0), width - 1)
+        for dy in range(-sample_radius, sample_radius + 1):
+            yy = min(max(center_y + dy, 0), height - 1)
+            weight = 1.0 / (dx * dx + dy * dy + 1.0)
+            sample_color += image[yy, xx] * weight
+            sample_weight += weight
+    return sample_color / sample_weight
+
+def previous_dome_colors(image: np.ndarray, params, latitude_slices: int, longitude_slices: int, horizontal_fov: float, vertical_fov: float) -> np.ndarray:
+    '''The per vertex color sampling build_sky_dome_data used before'''
+    theta_step = vertical_fov / max(latitude_slices - 1, 1)
+    phi_step = horizontal_fov / max(longitude_slices - 1, 1)
+    colors = []
+    for latitude in range(latitude_slices):
+        for longitude in range(longitude_slices):
+            color = _previous_sample(latitude * theta_step, longitude * phi_step, image) * (params.sky_intensity * params.exposure)
+            colors.append(clamp_color(gamma_correct(color)))
+    return np.array(colors)
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    image = synthetic_sky(*IMAGE_SIZE)
+    params = _Params()
+    print(f"sky lights, {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]} image")
+    for light_count in LIGHT_COUNTS:
+        previous_lights, previous_time = _timed(previous_sky_lights, image, params, light_count, math.pi / 2)
+        lights, current_time = _timed(generate_sky_lights, image, params, light_count, math.pi / 2)
+        difference = max(
+            max(np.abs(np.asarray(light.color) - color).max(), np.abs(np.asarray(light.direction) - direction).max(), abs(light.solid_angle - solid_angle))
+            for light, (color, direction, solid_angle) in zip(lights, previous_lights)
+        )
+        print(f"{light_count:>6} lights: previous {previous_time:6.2f}s, current {current_time:6.2f}s, max difference {difference:.1e}")
+
+    latitude_slices, longitude_slices = DOME_SLICES
+    previous_colors, previous_time = _timed(previous_dome_colors, image, params, latitude_slices, longitude_slices, TWO_PI, math.pi / 2)
+    (_, _, colors, _), current_time = _timed(build_sky_dome_data, image, params, latitude_slices, longitude_slices, TWO_PI, math.pi / 2)
+    difference = float(np.abs(np.asarray(colors) - previous_colors).max())
+    print(f"{latitude_slices}x{longitude_slices} dome: previous {previous_time:6.2f}s, current {current_time:6.2f}s, max color difference {difference:.1e}")
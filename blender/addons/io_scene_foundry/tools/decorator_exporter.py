@@ -1,6 +1,6 @@
 from pathlib import Path
-import struct
 import time
+import traceback
 import bpy
 from math import tau
 from mathutils import Matrix, Quaternion, Vector
@@ -10,6 +10,7 @@ import types
 from ..constants import WU_SCALAR
 
 from ..managed_blam.decorator_set import DecoratorSetTag
+from ..managed_blam.serialized_block import BlockLayout, write_block
 
 from ..managed_blam.scenario import (
     DECORATOR_ATTR_INFO,
@@ -288,30 +289,6 @@ def decorator_cloud_to_instances(ob, collection=None, remove_cloud=False):
     
     return created
 
-def _placement_field_offsets(element):
-    offsets = {}
-    offset = 0
-    for field in element.Fields:
-        offsets[field.FieldName] = offset
-        offset += int(field.Size)
-        
-    return offsets, offset
-
-def _serialized_block_with_payload(template, count, payload):
-    data = bytearray(template)
-    lbgt = data.rfind(b"lbgt")
-    dtpc = data.rfind(b"dtpc", 0, lbgt)
-    if lbgt == -1 or dtpc == -1:
-        raise ValueError("Serialized decorator placement block does not contain expected chunks")
-    
-    values_start = lbgt + 20
-    data = data[:values_start] + payload + data[values_start:]
-    struct.pack_into("<I", data, 8, len(data) - 12)
-    struct.pack_into("<I", data, dtpc + 8, len(data) - dtpc - 12)
-    struct.pack_into("<I", data, lbgt + 8, len(payload) + 8)
-    struct.pack_into("<I", data, lbgt + 12, count)
-    return bytes(data)
-
 def _decorator_type_indices(decorator_types):
     return {dec_type.decorator_type_name.lower(): dec_type.decorator_type_index for dec_type in decorator_types}
 
@@ -326,47 +303,26 @@ def _decorator_byte_value(value, corinth):
     
     return value
 
-def _decorator_placement_dtype(offsets, element_size):
-    fields = (
-        ("position", "position", ("<f4", (3,))),
-        ("type_index", "type index", "u1"),
-        ("motion_scale", "motion scale", "u1"),
-        ("ground_tint", "ground tint", "u1"),
-        ("rotation", "rotation", ("<f4", (4,))),
-        ("scale", "scale", "<f4"),
-        ("tint_color", "tint color", ("<f4", (3,))),
-        ("bsp_index", "bsp index", "<i4"),
-        ("cluster_index", "cluster index", "<i2"),
-    )
-    missing = [field_name for _, field_name, _ in fields if field_name not in offsets]
-    if missing:
-        raise ValueError(f"Decorator placement block is missing fields: {', '.join(missing)}")
+def _decorator_placement_rows(decorator_objects, decorator_types, corinth, layout):
+    columns = [
+        ("position", ("<f4", (3,))),
+        ("type index", "u1"),
+        ("motion scale", "i1"),
+        ("ground tint", "i1"),
+        ("rotation", ("<f4", (4,))),
+        ("scale", "<f4"),
+        ("tint color", ("<f4", (3,))),
+        ("bsp index", "<i4"),
+        ("cluster index", "<i2"),
+    ]
+    if corinth and "cluster decorator set index" in layout.fields:
+        columns.append(("cluster decorator set index", "<i2"))
     
-    names = [name for name, _, _ in fields]
-    formats = [fmt for _, _, fmt in fields]
-    field_offsets = [offsets[field_name] for _, field_name, _ in fields]
-    if "cluster decorator set index" in offsets:
-        names.append("cluster_decorator_set_index")
-        formats.append("<i2")
-        field_offsets.append(offsets["cluster decorator set index"])
-    
-    return np.dtype({
-        "names": names,
-        "formats": formats,
-        "offsets": field_offsets,
-        "itemsize": element_size,
-    })
-
-def _build_decorator_placement_payload(decorator_objects, decorator_types, corinth, offsets, element_size):
-    payload = bytearray(element_size * len(decorator_objects))
-    if not decorator_objects:
-        return payload
-    
-    rows = np.ndarray(len(decorator_objects), dtype=_decorator_placement_dtype(offsets, element_size), buffer=payload)
-    rows["bsp_index"] = -1
-    rows["cluster_index"] = -1
-    if corinth and "cluster_decorator_set_index" in rows.dtype.names:
-        rows["cluster_decorator_set_index"] = -1
+    rows = np.zeros(len(decorator_objects), dtype=columns)
+    rows["bsp index"] = -1
+    rows["cluster index"] = -1
+    if "cluster decorator set index" in rows.dtype.names:
+        rows["cluster decorator set index"] = -1
     
     type_indices = _decorator_type_indices(decorator_types)
     for idx, ob in enumerate(decorator_objects):
@@ -378,26 +334,25 @@ def _build_decorator_placement_payload(decorator_objects, decorator_types, corin
         
         variant = ob.nwo.marker_game_instance_tag_variant_name.strip().lower()
         if variant:
-            rows["type_index"][idx] = type_indices.get(variant, 0) & 0xFF
+            rows["type index"][idx] = type_indices.get(variant, 0) & 0xFF
         
-        rows["motion_scale"][idx] = _decorator_byte_value(ob.nwo.decorator_motion_scale * 255, corinth)
-        rows["ground_tint"][idx] = _decorator_byte_value(ob.nwo.decorator_ground_tint * 255, corinth)
-        rows["tint_color"][idx] = tuple(utils.linear_to_srgb(ob.nwo.decorator_tint[i]) for i in range(3))
+        # Byte values are stored as signed chars, matching utils.signed_int8 in the element writer
+        rows["motion scale"][idx] = utils.signed_int8(_decorator_byte_value(ob.nwo.decorator_motion_scale * 255, corinth))
+        rows["ground tint"][idx] = utils.signed_int8(_decorator_byte_value(ob.nwo.decorator_ground_tint * 255, corinth))
+        rows["tint color"][idx] = tuple(utils.linear_to_srgb(ob.nwo.decorator_tint[i]) for i in range(3))
         
-    return payload
+    return rows
 
 def _write_decorator_placements_serialized(placements, decorator_objects, decorator_types, corinth):
     placements.RemoveAllElements()
     if not decorator_objects:
         return
     
-    template_element = placements.AddElement()
-    offsets, element_size = _placement_field_offsets(template_element)
-    placements.RemoveAllElements()
+    layout = BlockLayout.from_block(placements)
+    if not layout.bulk_writable:
+        raise ValueError("Decorator placement block has fields that cannot be written in bulk")
     
-    payload = _build_decorator_placement_payload(decorator_objects, decorator_types, corinth, offsets, element_size)
-    serialized = _serialized_block_with_payload(bytes(placements.Serialize()), len(decorator_objects), payload)
-    placements.Deserialize(serialized)
+    write_block(placements, _decorator_placement_rows(decorator_objects, decorator_types, corinth, layout), layout=layout)
 
 def _write_decorator_placements_elementwise(placements, decorator_objects, decorator_types, corinth):
     placements.RemoveAllElements()
@@ -431,66 +386,77 @@ def _write_decorator_placements_elementwise(placements, decorator_objects, decor
         if corinth:
             placement.SelectField("cluster decorator set index").Data = -1
     
-def export_decorators(corinth, decorator_objects = None):
+def decorator_scenario_path(corinth):
     scenario_path = utils.get_asset_tag(".scenario", True)
     scene_nwo = utils.get_scene_props()
     if corinth and scene_nwo.decorators_from_blender_child_scenario.strip():
         scenario_path = str(Path(scenario_path).with_name(scene_nwo.decorators_from_blender_child_scenario).with_suffix(".scenario"))
     
-    tags_dir = utils.get_tags_path()
-    context = bpy.context
-    if decorator_objects is None:
-        decorator_objects = gather_decorators(context)
+    return scenario_path
+
+def export_decorators(corinth, decorator_objects = None):
+    try:
+        scenario_path = decorator_scenario_path(corinth)
     
-    decorator_sets = {}
-    MAX_SETS = 48
-    MAX_PLACEMENTS_PER_SET = 262_144
-    for ob in decorator_objects:
-        tag_path = utils.relative_path(ob.nwo.marker_game_instance_tag_name.lower())
-        index = 0
-
-        while True:
-            values = decorator_sets.setdefault((tag_path, index), [])
-            if len(values) < MAX_PLACEMENTS_PER_SET:
-                values.append(ob)
-                break
-            index += 1
-
-            if len(decorator_sets) > MAX_SETS:
-                for k in list(decorator_sets.keys())[:-MAX_SETS]:
-                    del decorator_sets[k]
+        tags_dir = utils.get_tags_path()
+        context = bpy.context
+        if decorator_objects is None:
+            decorator_objects = gather_decorators(context)
+    
+        decorator_sets = {}
+        MAX_SETS = 48
+        MAX_PLACEMENTS_PER_SET = 262_144
+        for ob in decorator_objects:
+            tag_path = utils.relative_path(ob.nwo.marker_game_instance_tag_name.lower())
+            index = 0
+
+            while True:
+                values = decorator_sets.setdefault((tag_path, index), [])
+                if len(values) < MAX_PLACEMENTS_PER_SET:
+                    values.append(ob)
+                    break
+                index += 1
+
+                if len(decorator_sets) > MAX_SETS:
+                    for k in list(decorator_sets.keys())[:-MAX_SETS]:
+                        del decorator_sets[k]
                     
-    print("--- Writing decorators to Tag")
-    start = time.perf_counter()
-    with ScenarioTag(path=scenario_path) as scenario:
-        decorator_block = scenario.tag.SelectField("Block:decorators")
-        if decorator_block.Elements.Count < 1:
-            set_element = decorator_block.AddElement()
-        else:
-            set_element = decorator_block.Elements[0]
+        print("--- Writing decorators to Tag")
+        start = time.perf_counter()
+        with ScenarioTag(path=scenario_path) as scenario:
+            decorator_block = scenario.tag.SelectField("Block:decorators")
+            if decorator_block.Elements.Count < 1:
+                set_element = decorator_block.AddElement()
+            else:
+                set_element = decorator_block.Elements[0]
             
-        sets_block = set_element.SelectField("Block:sets")
-        sets_block.RemoveAllElements()
-        # print("Max sets size", sets_block.MaximumElementCount)
+            sets_block = set_element.SelectField("Block:sets")
+            sets_block.RemoveAllElements()
+            # print("Max sets size", sets_block.MaximumElementCount)
         
-        for key, value in decorator_sets.items():
-            path = key[0]
-            if path and Path(tags_dir, path).exists():
-                with DecoratorSetTag(path=path) as decorator_set:
-                    decorator_types = decorator_set.get_decorator_types()
-                    decorator_path = decorator_set.tag_path
-                element = sets_block.AddElement()
-                element.SelectField("Reference:decorator set").Path = decorator_path
-                placements = element.SelectField("Block:placements")
-                # print("Max placements size", placements.MaximumElementCount)
-                try:
-                    _write_decorator_placements_serialized(placements, value, decorator_types, corinth)
-                except Exception as error:
-                    print(f"Serialized decorator write failed for {path}, using element writes: {error}")
-                    _write_decorator_placements_elementwise(placements, value, decorator_types, corinth)
+            for key, value in decorator_sets.items():
+                path = key[0]
+                if path and Path(tags_dir, path).exists():
+                    with DecoratorSetTag(path=path) as decorator_set:
+                        decorator_types = decorator_set.get_decorator_types()
+                        decorator_path = decorator_set.tag_path
+                    element = sets_block.AddElement()
+                    element.SelectField("Reference:decorator set").Path = decorator_path
+                    placements = element.SelectField("Block:placements")
+                    # print("Max placements size", placements.MaximumElementCount)
+                    try:
+                        _write_decorator_placements_serialized(placements, value, decorator_types, corinth)
+                    except Exception as error:
+                        print(f"Serialized decorator write failed for {path}, using element writes: {error}")
+                        _write_decorator_placements_elementwise(placements, value, decorator_types, corinth)
                 
                     
-        scenario.tag_has_changes = True
-    print("--- Completed decorators tag write in", utils.human_time(time.perf_counter() - start, True))
+            scenario.tag_has_changes = True
+        print("--- Completed decorators tag write in", utils.human_time(time.perf_counter() - start, True))
+    except Exception as e:
+        utils.print_warning(f"Failed to export decorators\n{traceback.format_exception(e)}")
+        return False
+    
+    return True
                             
                     
@@ -0,0 +1,186 @@
+'''Runs farms of Tool processes as a graph of tasks. A task starts as soon as every task it depends on has finished, no
+more than max_workers processes run at once, failed tasks are retried up to their own retry count, and a task that
+runs out of retries stops the farm straight away rather than after every other process has exited'''
+
+from dataclasses import dataclass, field
+import os
+from subprocess import Popen
+import time
+from typing import Callable, TextIO
+
+POLL_INTERVAL = 0.05
+
+@dataclass(eq=False)
+class FarmTask:
+    stage: str
+    name: str
+    tool_args: list[str]
+    log_filename: str = ""
+    dependencies: list['FarmTask'] = field(default_factory=list)
+    retries: int = 0
+    attempts: int = 0
+    returncode: int | None = None
+    process: Popen | None = None
+    log: TextIO | None = None
+    start_time: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.returncode == 0
+
+class FarmScheduler:
+    '''Schedules farm tasks. launch takes the Tool arguments and an open log file, or None to write to the console, and
+    returns the started process. retries is the number of reruns a failed task gets unless add is given its own. Unless
+    stop_on_failure is set, tasks that run out of retries are collected in failures, every task depending on them is
+    collected in skipped, and the rest of the farm carries on'''
+    def __init__(self, launch: Callable[[list[str], TextIO | None], Popen], max_workers=1, retries=1, stop_on_failure=True):
+        self.launch = launch
+        self.max_workers = max(1, max_workers)
+        self.retries = max(0, retries)
+        self.stop_on_failure = stop_on_failure
+        self.failures: list[FarmTask] = []
+        self.skipped: list[FarmTask] = []
+        self.tasks: list[FarmTask] = []
+        self.stage_titles: dict[str, str] = {}
+        self.stage_totals: dict[str, int] = {}
+        self.stage_done: dict[str, int] = {}
+        self.pending: list[FarmTask] = []
+        self.running: list[FarmTask] = []
+        self.failed: FarmTask | None = None
+        self.cancelled = False
+        self.start_time = None
+
+    def add(self, stage: str, name: str, tool_args: list[str], log_filename="", dependencies=(), retries: int | None = None) -> FarmTask:
+        task = FarmTask(stage, name, tool_args, log_filename, list(dependencies), self.retries if retries is None else max(0, retries))
+        self.tasks.append(task)
+        self.pending.append(task)
+        self.stage_totals[task.stage] = self.stage_totals.get(task.stage, 0) + 1
+        self.stage_done.setdefault(task.stage, 0)
+        return task
+
+    @property
+    def completed(self) -> int:
+        return sum(self.stage_done.values())
+
+    @property
+    def elapsed(self) -> float:
+        return 0.0 if self.start_time is None else time.perf_counter() - self.start_time
+
+    def _start(self, task: FarmTask):
+        title = self.stage_titles.pop(task.stage, None)
+        if title is not None:
+            print(f"\n{title}")
+            print(
+                "-------------------------------------------------------------------------\n"
+            )
+
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        task.attempts += 1
+        task.returncode = None
+        if task.log_filename:
+            os.makedirs(os.path.dirname(task.log_filename), exist_ok=True)
+            task.log = open(task.log_filename, "w" if task.attempts == 1 else "a")
+        task.start_time = time.perf_counter()
+        task.process = self.launch(task.tool_args, task.log)
+        print(f"--- Spawned {task.name}" + (f" (attempt {task.attempts})" if task.attempts > 1 else ""))
+
+    def _close(self, task: FarmTask):
+        if task.log is not None:
+            task.log.close()
+            task.log = None
+        task.process = None
+
+    def _stop(self):
+        for task in self.running:
+            try:
+                if task.process.poll() is None:
+                    task.process.kill()
+                    task.process.wait()
+            except Exception:
+                pass
+            self._close(task)
+        self.running.clear()
+
+    def _skip_dependents(self, failed: FarmTask):
+        '''Drops every pending task that depends on the failed task, directly or through another dropped task'''
+        dropped = {failed}
+        skipping = True
+        while skipping:
+            skipping = False
+            for task in list(self.pending):
+                dependency = next((dependency for dependency in task.dependencies if dependency in dropped), None)
+                if dependency is not None:
+                    self.pending.remove(task)
+                    self.skipped.append(task)
+                    dropped.add(task)
+                    skipping = True
+                    print(f"--- Skipped {task.name}, {dependency.name} did not complete")
+
+    def cancel(self):
+        '''Kills all running processes and drops every task that has not started'''
+        self._stop()
+        self.pending.clear()
+        self.cancelled = True
+
+    def step(self) -> bool:
+        '''Starts any tasks that can start and collects any that exited, without waiting on either. Returns whether
+        there is still work left'''
+        if self.failed is not None or self.cancelled:
+            return False
+
+        for task in [task for task in self.pending if all(dependency.finished for dependency in task.dependencies)]:
+            if len(self.running) >= self.max_workers:
+                break
+            self.pending.remove(task)
+            try:
+                self._start(task)
+            except Exception:
+                self._close(task)
+                self._stop()
+                raise
+            self.running.append(task)
+
+        if self.pending and not self.running:
+            # Nothing can start, a dependency is missing from the farm
+            self.failed = self.pending[0]
+            return False
+
+        for task in list(self.running):
+            returncode = task.process.poll()
+            if returncode is None:
+                continue
+
+            self.running.remove(task)
+            elapsed = time.perf_counter() - task.start_time
+            self._close(task)
+            task.returncode = returncode
+            if returncode == 0:
+                self.stage_done[task.stage] += 1
+                progress = f" [{self.stage_done[task.stage]}/{self.stage_totals[task.stage]} {task.stage}]" if self.stage_totals[task.stage] > 1 else ""
+                print(f"--- Completed {task.name} in {elapsed:.1f}s{progress}")
+            elif task.attempts <= task.retries:
+                print(f"--- {task.name} exited with code {returncode}, retrying")
+                self.pending.insert(0, task)
+            elif self.stop_on_failure:
+                self._stop()
+                self.failed = task
+                return False
+            else:
+                print(f"--- {task.name} exited with code {returncode}")
+                self.failures.append(task)
+                self._skip_dependents(task)
+
+        return bool(self.pending or self.running)
+
+    def run(self) -> FarmTask | None:
+        '''Runs every task, returning the task that failed or None if all finished. A keyboard interrupt cancels the
+        farm'''
+        try:
+            while self.step():
+                time.sleep(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            print("--- Farm cancelled")
+            self.cancel()
+
+        return self.failed
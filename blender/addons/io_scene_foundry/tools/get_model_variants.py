@@ -1,12 +1,12 @@
 
-from pathlib import Path
 import bpy
 
 from ..managed_blam.render_model import RenderModelTag
 from ..managed_blam.model import ModelTag
 from ..managed_blam.object import ObjectTag
 
-from ..utils import get_tags_path, relative_path, current_project_valid, get_scene_props
+from .tag_index import tag_exists
+from ..utils import current_project_valid, get_scene_props
 
 class NWO_OT_GetModelMarkersForEvent(bpy.types.Operator):
     bl_idname = "nwo.get_model_markers_event"
@@ -22,8 +22,7 @@ class NWO_OT_GetModelMarkersForEvent(bpy.types.Operator):
             event = scene_nwo.cinematic_events[scene_nwo.active_cinematic_event_index]
             ob = event.marker
             if ob and ob.type == 'ARMATURE':
-                tag_path = Path(get_tags_path(), relative_path(ob.nwo.cinematic_object))
-                return tag_path.is_absolute() and tag_path.exists() and tag_path.is_file()
+                return tag_exists(ob.nwo.cinematic_object)
         
         return False
     
@@ -34,11 +33,11 @@ class NWO_OT_GetModelMarkersForEvent(bpy.types.Operator):
         
         with ObjectTag(path=ob.nwo.cinematic_object) as object:
             model_tag = object.get_model_tag_path()
-        if not model_tag or not Path(get_tags_path(), model_tag).exists():
+        if not model_tag or not tag_exists(model_tag):
             return [("", "None", "")]
         with ModelTag(path=model_tag) as model:
             render_tag = model.get_render_model()
-        if not render_tag or not Path(get_tags_path(), render_tag).exists():
+        if not render_tag or not tag_exists(render_tag):
             return [("", "None", "")]
         with RenderModelTag(path=render_tag) as render:
             markers = render.get_markers()
@@ -77,17 +76,16 @@ class NWO_OT_GetModelMarkers(bpy.types.Operator):
         if not current_project_valid():
             return False
         
-        tag_path = Path(get_tags_path(), relative_path(context.object.nwo.cinematic_object))
-        return tag_path.is_absolute() and tag_path.exists() and tag_path.is_file()
+        return tag_exists(context.object.nwo.cinematic_object)
     
     def marker_items(self, context):
         with ObjectTag(path=context.object.nwo.cinematic_object) as object:
             model_tag = object.get_model_tag_path()
-        if not model_tag or not Path(get_tags_path(), model_tag).exists():
+        if not model_tag or not tag_exists(model_tag):
             return [("", "None", "")]
         with ModelTag(path=model_tag) as model:
             render_tag = model.get_render_model()
-        if not render_tag or not Path(get_tags_path(), render_tag).exists():
+        if not render_tag or not tag_exists(render_tag):
             return [("", "None", "")]
         with RenderModelTag(path=render_tag) as render:
             markers = render.get_markers()
@@ -125,13 +123,12 @@ class NWO_OT_GetCinematicModelVariants(bpy.types.Operator):
         if not current_project_valid():
             return False
         
-        tag_path = Path(get_tags_path(), relative_path(context.object.nwo.cinematic_object))
-        return tag_path.is_absolute() and tag_path.exists() and tag_path.is_file()
+        return tag_exists(context.object.nwo.cinematic_object)
     
     def variant_items(self, context):
         with ObjectTag(path=context.object.nwo.cinematic_object) as object:
             model_tag = object.get_model_tag_path()
-        if not model_tag or not Path(get_tags_path(), model_tag).exists():
+        if not model_tag or not tag_exists(model_tag):
             return [("default", "default", "")]
         with ModelTag(path=model_tag) as model:
             variants = model.get_model_variants()
@@ -169,13 +166,12 @@ class NWO_GetModelVariants(bpy.types.Operator):
         if not current_project_valid():
             return False
         
-        tag_path = Path(get_tags_path(), relative_path(context.object.nwo.marker_game_instance_tag_name))
-        return tag_path.is_absolute() and tag_path.exists() and tag_path.is_file()
+        return tag_exists(context.object.nwo.marker_game_instance_tag_name)
     
     def variant_items(self, context):
         with ObjectTag(path=context.object.nwo.marker_game_instance_tag_name) as object:
             model_tag = object.get_model_tag_path()
-        if not model_tag or not Path(get_tags_path(), model_tag).exists():
+        if not model_tag or not tag_exists(model_tag):
             return [("default", "default", "")]
         with ModelTag(path=model_tag) as model:
             variants = model.get_model_variants()
@@ -3,6 +3,7 @@
 from pathlib import Path
 import bpy
 import os
+from .tag_index import get_tag_index
 from ..utils import get_prefs, get_project_path, get_scene_props, get_tags_path, is_corinth, open_in_explorer, os_sep_partition, redraw_area, relative_path
 
 global_items = {}
@@ -210,12 +211,9 @@ def walk_tags_dir(tags_dir, ext_list):
                     if l and not l.startswith(";") and l.endswith(ext_list):
                         fav_tags.add(l)
 
-    for root, dirs, files in os.walk(tags_dir):
-        for file in files:
-            if file.endswith(ext_list):
-                relative_path = str(Path(root, file).relative_to(tags_dir))
-                if relative_path not in fav_tags:
-                    tags_set.add(relative_path)
+    for tag_path in get_tag_index(tags_dir).files_with_extensions(ext_list):
+        if tag_path not in fav_tags:
+            tags_set.add(tag_path)
 
     tags_sorted = sorted(tags_set, key=lambda x: os_sep_partition(x, True))
     tags = [t for t in fav_tags]
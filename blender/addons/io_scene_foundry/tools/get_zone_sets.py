@@ -1,9 +1,8 @@
 
-from pathlib import Path
 import bpy
 from ..managed_blam.scenario import ScenarioTag
 
-from ..utils import get_tags_path
+from .tag_index import tag_exists
 from .. import utils
 
 class NWO_GetZoneSets(bpy.types.Operator):
@@ -21,8 +20,7 @@ class NWO_GetZoneSets(bpy.types.Operator):
         scene_nwo = utils.get_scene_props()
         if not scene_nwo.cinematic_scenario:
             return False
-        tag_path = Path(get_tags_path(), scene_nwo.cinematic_scenario)
-        return tag_path.is_absolute() and tag_path.exists() and tag_path.is_file()
+        return tag_exists(scene_nwo.cinematic_scenario)
     
     def zone_set_items(self, context):
         scene_nwo = utils.get_scene_props()
@@ -45,7 +43,7 @@ class NWO_GetZoneSets(bpy.types.Operator):
     
     def execute(self, context):
         nwo = utils.get_scene_props()
-        if Path(get_tags_path(), utils.relative_path(nwo.cinematic_scenario)).exists():
+        if tag_exists(nwo.cinematic_scenario):
             nwo.cinematic_zone_set = self.zone_set
             return {'FINISHED'}
         
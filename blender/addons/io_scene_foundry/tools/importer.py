@@ -65,6 +65,7 @@ from ..tools.property_apply import apply_props_material, apply_prefix_bulk
 from ..tools.rigging import HaloRig, aim_pitch_name, aim_yaw_name, needs_reach_fp_ik_fix, pedestal_name
 from ..tools.rigging.create_rig import bake_imported_actions_to_control_rig
 from ..tools.shader_finder import find_shaders
+from ..tools.tag_index import get_tag_index
 from ..tools.shader_reader import tag_to_nodes
 from ..constants import (
     IDENTITY_MATRIX,
@@ -654,8 +655,6 @@ filetype_suffixes = (
     ("cinematic", (".cinematic",)),
 )
 
-tag_files_cache = set()
-tag_files_by_name_cache = {}
 objects_cache = {}
 
 deferred_ops = []
@@ -2848,23 +2847,6 @@ class NWOImporter:
         self._ensure_permutation_entry(permutation)
         ob.nwo.permutation_name = permutation
 
-    def _ensure_tag_files_cache(self):
-        global tag_files_cache
-        global tag_files_by_name_cache
-        if tag_files_by_name_cache:
-            return tag_files_by_name_cache
-
-        if not tag_files_cache:
-            for root, _, files in os.walk(self.tags_dir):
-                for file in files:
-                    tag_files_cache.add(Path(root, file).with_suffix(""))
-
-        tag_files_by_name_cache = {}
-        for path_no_ext in tag_files_cache:
-            tag_files_by_name_cache.setdefault(path_no_ext.name, []).append(path_no_ext)
-
-        return tag_files_by_name_cache
-
     def _resolve_xref_tag_path(self, xref: 'XREF'):
         tag_path = ""
         fallback_tag_path = ""
@@ -2880,8 +2862,7 @@ class NWOImporter:
                     if path.exists():
                         return utils.relative_path(path), fallback_tag_path
 
-        tag_files_by_name = self._ensure_tag_files_cache()
-        for path_no_ext in tag_files_by_name.get(xref.name, ()):
+        for path_no_ext in get_tag_index(self.tags_dir).paths_by_name(xref.name):
             path = path_no_ext.with_suffix(xref.preferred_type)
             if path.exists():
                 tag_path = utils.relative_path(path)
@@ -6193,7 +6174,6 @@ def remove_collection_hierarchy(collection: bpy.types.Collection):
 
 def clear_cache():
     global objects_cache
-    global tag_files_by_name_cache
     for cache_entry in objects_cache.values():
         if isinstance(cache_entry, dict):
             collection = cache_entry.get("collection")
@@ -6203,5 +6183,4 @@ def clear_cache():
                 except Exception as e:
                     utils.print_warning(f"Could not clear import cache collection '{collection.name}': {e}")
     objects_cache = {}
-    tag_files_by_name_cache = {}
     connected_geometry.clear_cache()
@@ -327,4 +327,7 @@ def export_lights(asset_path, asset_name, light_objects = None, bsps = None, lig
                 if asset_type in ('model', 'sky'):
                     with ModelTag(path=str(Path(asset_path, f'{asset_name}.model'))) as tag: tag.assign_lighting_info_tag(info_path)
     except Exception as e:
-        utils.print_warning(f"Failed to export lights\n{traceback.format_exception(e)}")
\ No newline at end of file
+        utils.print_warning(f"Failed to export lights\n{traceback.format_exception(e)}")
+        return False
+    
+    return True
\ No newline at end of file
@@ -2,6 +2,7 @@
 
 from pathlib import Path
 import time
+import traceback
 import bpy
 from ..managed_blam.scenario_structure_bsp import ScenarioStructureBspTag
 from .. import utils
@@ -97,12 +98,20 @@ def gather_prefabs(context):
         
     return proxies
 
-def export_prefabs():
-    asset_path = utils.get_asset_path()
-    prefabs = [BlamPrefab(ob, region) for ob, region in gather_prefabs(bpy.context).items()]
-    bsps = [r.name for r in utils.get_scene_props().regions_table if r.name.lower() != 'shared']
-    structure_bsp_paths = [str(Path(asset_path, f'{b}.scenario_structure_bsp')) for b in bsps]
-    for idx, bsp_path in enumerate(structure_bsp_paths):
-        b = bsps[idx]
-        prefabs_list = [prefab for prefab in prefabs if prefab.bsp == b]
-        with ScenarioStructureBspTag(path=bsp_path) as bsp: bsp.write_prefabs(prefabs_list)
\ No newline at end of file
+def export_prefabs(prefabs=None, bsps=None):
+    try:
+        asset_path = utils.get_asset_path()
+        if prefabs is None:
+            prefabs = [BlamPrefab(ob, region) for ob, region in gather_prefabs(bpy.context).items()]
+        if bsps is None:
+            bsps = [r.name for r in utils.get_scene_props().regions_table if r.name.lower() != 'shared']
+        structure_bsp_paths = [str(Path(asset_path, f'{b}.scenario_structure_bsp')) for b in bsps]
+        for idx, bsp_path in enumerate(structure_bsp_paths):
+            b = bsps[idx]
+            prefabs_list = [prefab for prefab in prefabs if prefab.bsp == b]
+            with ScenarioStructureBspTag(path=bsp_path) as bsp: bsp.write_prefabs(prefabs_list)
+    except Exception as e:
+        utils.print_warning(f"Failed to export prefabs\n{traceback.format_exception(e)}")
+        return False
+    
+    return True
@@ -0,0 +1,212 @@
+'''Change tracking for the prefab, light and decorator tag sync that runs when the blend file is saved. A depsgraph
+handler flags which kinds of objects were touched since the last sync. On save, only flagged kinds are gathered, and the
+entries bound for each tag are hashed so that only tags whose contents changed get written'''
+
+import os
+from pathlib import Path
+import bpy
+from mathutils import Color, Euler, Matrix, Quaternion, Vector
+import numpy as np
+
+from ..managed_blam.scenario import DECORATOR_CLOUD_PROP
+from .decorator_exporter import decorator_scenario_path, export_decorators, gather_decorators
+from .light_exporter import BlamLightDefinition, BlamLightInstance, export_lights, gather_lightmap_regions, gather_lights
+from .prefab_exporter import BlamPrefab, export_prefabs, gather_prefabs
+from .. import utils
+
+PREFABS = "prefabs"
+LIGHTS = "lights"
+DECORATORS = "decorators"
+CATEGORIES = (PREFABS, LIGHTS, DECORATORS)
+
+_dirty = set(CATEGORIES)
+# Per category, the signature and modified time of every tag written by the last sync
+_synced: dict[str, dict[str, tuple[int, int | None]]] = {category: {} for category in CATEGORIES}
+# Per category, the names of the objects included in the last sync. Lets an update to an object that no longer
+# qualifies, such as a prefab marker changed to another type, still flag the category it used to belong to
+_synced_objects: dict[str, set[str]] = {category: set() for category in CATEGORIES}
+
+def reset():
+    '''Forgets everything synced so far, the next save writes all tags again'''
+    _dirty.update(CATEGORIES)
+    for category in CATEGORIES:
+        _synced[category].clear()
+        _synced_objects[category].clear()
+
+def _object_categories(ob: bpy.types.Object) -> set[str]:
+    categories = {category for category in CATEGORIES if ob.name in _synced_objects[category]}
+    if ob.type == 'LIGHT':
+        categories.add(LIGHTS)
+    elif ob.type == 'EMPTY':
+        if ob.instance_type == 'COLLECTION' and ob.instance_collection:
+            return set(CATEGORIES)
+        nwo = ob.nwo
+        if nwo.marker_type == '_connected_geometry_marker_type_game_instance':
+            tag_name = nwo.marker_game_instance_tag_name.lower()
+            if tag_name.endswith(".prefab"):
+                categories.add(PREFABS)
+            elif tag_name.endswith(".decorator_set"):
+                categories.add(DECORATORS)
+    elif ob.type == 'MESH':
+        if ob.get(DECORATOR_CLOUD_PROP):
+            categories.add(DECORATORS)
+        elif ob.data.nwo.mesh_type == '_connected_geometry_mesh_type_lightmap_region':
+            categories.add(LIGHTS)
+
+    return categories
+
+def track_depsgraph_updates(depsgraph: bpy.types.Depsgraph):
+    '''Flags the categories affected by the updates in the given depsgraph'''
+    if _dirty.issuperset(CATEGORIES):
+        return
+    for update in depsgraph.updates:
+        id = update.id.original
+        if isinstance(id, (bpy.types.Scene, bpy.types.Collection)):
+            # Objects were linked, unlinked or hidden. Hashing on save finds out which categories that touched
+            _dirty.update(CATEGORIES)
+            return
+        if isinstance(id, bpy.types.Object):
+            _dirty.update(_object_categories(id))
+        elif isinstance(id, bpy.types.Light):
+            _dirty.add(LIGHTS)
+        elif isinstance(id, bpy.types.Mesh) and id.nwo.mesh_type == '_connected_geometry_mesh_type_lightmap_region':
+            _dirty.add(LIGHTS)
+
+def _signature_value(value):
+    if isinstance(value, (Vector, Color, Quaternion, Euler)):
+        return tuple(value)
+    if isinstance(value, Matrix):
+        return tuple(tuple(row) for row in value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_signature_value(v) for v in value)
+    if isinstance(value, bpy.types.bpy_struct):
+        return None
+    return value
+
+def _attributes_signature(instance) -> tuple:
+    return tuple((key, _signature_value(value)) for key, value in sorted(vars(instance).items()))
+
+def _props_signature(props, prefix: str) -> tuple:
+    return tuple(
+        (prop.identifier, _signature_value(getattr(props, prop.identifier)))
+        for prop in props.bl_rna.properties
+        if prop.identifier.startswith(prefix)
+    )
+
+def _mesh_signature(mesh: bpy.types.Mesh) -> tuple:
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    return mesh.name, len(mesh.polygons), hash(coords.tobytes())
+
+def _tag_mtime(tag_path: str) -> int | None:
+    try:
+        return os.stat(Path(utils.get_tags_path(), utils.relative_path(tag_path))).st_mtime_ns
+    except OSError:
+        return None
+
+def _changed_tags(category: str, signatures: dict[str, int]) -> list[str]:
+    '''Returns the tags whose signature differs from the last sync, or that were modified by something else since'''
+    synced = _synced[category]
+    return [
+        tag_path for tag_path, signature in signatures.items()
+        if synced.get(tag_path) != (signature, _tag_mtime(tag_path))
+    ]
+
+def _record_sync(category: str, signatures: dict[str, int], object_names: set[str]):
+    _synced[category] = {tag_path: (signature, _tag_mtime(tag_path)) for tag_path, signature in signatures.items()}
+    _synced_objects[category] = object_names
+    _dirty.discard(category)
+
+def _scenario_bsps() -> list[str]:
+    return [r.name for r in utils.get_scene_props().regions_table if r.name.lower() != 'shared']
+
+def sync_prefabs():
+    if PREFABS not in _dirty:
+        return
+
+    proxies = gather_prefabs(bpy.context)
+    prefabs = [BlamPrefab(ob, region) for ob, region in proxies.items()]
+    asset_path = utils.get_asset_path()
+    bsp_paths = {bsp: str(Path(asset_path, f'{bsp}.scenario_structure_bsp')) for bsp in _scenario_bsps()}
+    signatures = {}
+    for bsp, tag_path in bsp_paths.items():
+        signatures[tag_path] = hash(tuple(
+            (_attributes_signature(prefab), _props_signature(prefab.props, "prefab_"))
+            for prefab in prefabs if prefab.bsp == bsp
+        ))
+
+    changed = set(_changed_tags(PREFABS, signatures))
+    if changed:
+        print(f"Exporting Prefabs to {len(changed)} of {len(signatures)} structure bsps")
+        if not export_prefabs(prefabs, [bsp for bsp, tag_path in bsp_paths.items() if tag_path in changed]):
+            return
+
+    _record_sync(PREFABS, signatures, {proxy.name for proxy in proxies})
+
+def sync_lights():
+    if LIGHTS not in _dirty:
+        return
+
+    context = bpy.context
+    corinth = utils.is_corinth(context)
+    collection_map = utils.create_parent_mapping(context)
+    light_objects = gather_lights(context, collection_map)
+    # Only Reach writes lightmap regions to the lighting info tags
+    lightmap_regions = {} if corinth else gather_lightmap_regions(context, collection_map)
+    asset_path, asset_name = utils.get_asset_info()
+    bsp_paths = {bsp: str(Path(asset_path, f'{bsp}.scenario_structure_lighting_info')) for bsp in _scenario_bsps()}
+
+    instances = [BlamLightInstance(ob, region) for ob, region in light_objects.items()]
+    definitions = {}
+    signatures = {}
+    for bsp, tag_path in bsp_paths.items():
+        bsp_instances = [light for light in instances if light.bsp == bsp]
+        bsp_definitions = []
+        for data_name in sorted({light.data_name for light in bsp_instances}):
+            if data_name not in definitions:
+                data = bpy.data.lights.get(data_name)
+                definitions[data_name] = None if data is None else _attributes_signature(BlamLightDefinition(data))
+            bsp_definitions.append(definitions[data_name])
+
+        bsp_regions = tuple(
+            (proxy.name, _signature_value(proxy.matrix_world), _mesh_signature(proxy.data))
+            for proxy, region in lightmap_regions.items() if region == bsp
+        )
+        signatures[tag_path] = hash((tuple(_attributes_signature(light) for light in bsp_instances), tuple(bsp_definitions), bsp_regions))
+
+    changed = set(_changed_tags(LIGHTS, signatures))
+    if changed:
+        print(f"Exporting Lights to {len(changed)} of {len(signatures)} lighting info tags")
+        if not export_lights(asset_path, asset_name, light_objects, [bsp for bsp, tag_path in bsp_paths.items() if tag_path in changed], lightmap_regions):
+            return
+
+    _record_sync(LIGHTS, signatures, {proxy.name for proxy in light_objects} | {proxy.name for proxy in lightmap_regions})
+
+def sync_decorators():
+    if DECORATORS not in _dirty:
+        return
+
+    corinth = utils.is_corinth(bpy.context)
+    decorator_objects = gather_decorators(bpy.context)
+    tag_path = decorator_scenario_path(corinth)
+    signatures = {tag_path: hash(tuple(
+        (
+            ob.name,
+            ob.nwo.marker_game_instance_tag_name.lower(),
+            ob.nwo.marker_game_instance_tag_variant_name,
+            _signature_value(ob.matrix_world),
+            ob.nwo.decorator_motion_scale,
+            ob.nwo.decorator_ground_tint,
+            tuple(ob.nwo.decorator_tint),
+        )
+        for ob in decorator_objects
+    ))}
+
+    if _changed_tags(DECORATORS, signatures):
+        print("Exporting Decorators")
+        if not export_decorators(corinth, decorator_objects):
+            return
+
+    # Decorator cloud proxies are named after their cloud object with the point index appended
+    object_names = {ob.name for ob in decorator_objects} | {ob.name.rpartition(":")[0] for ob in decorator_objects}
+    _record_sync(DECORATORS, signatures, object_names)
@@ -5,12 +5,18 @@ from subprocess import CalledProcessError
 
 from ...patches import ToolPatcher
 
+from ..farm_scheduler import FarmScheduler
+
 from ...managed_blam.lightmapper_globals import LightmapperGlobalsTag
 
 from ...managed_blam.scenario import ScenarioTag
 from ... import utils
 import os
 
+# Times a failed faux farm slice is rerun before lightmapping is aborted. Merges are never rerun, a failed merge aborts
+# straight away
+FARM_RETRIES = 1
+
 def scenario_exists() -> bool:
     asset_dir, asset_name = utils.get_asset_info()
     scenario_path = Path(utils.get_tags_path(), asset_dir, asset_name).with_suffix('.scenario')
@@ -212,54 +218,62 @@ class LightMapper:
             return False
         return True
 
-    def threads(self, stage, thread_index):
-        log_filename = os.path.join(self.blob_dir, "logs", stage, f"{thread_index}.txt")
-        log_dir = os.path.dirname(log_filename)
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        with open(log_filename, "w") as log:
-            p = utils.run_tool(
+    def launch_farm_process(self, tool_args, log_file):
+        return utils.run_tool(tool_args, True, log_file=log_file, force_tool_fast=True)
+
+    def farm(self, stages):
+        """Runs the given faux farm stages, each a (stage, title) pair. Every stage is split into one slice per thread
+        which run once the previous stage has merged, and each stage merges as soon as its last slice finishes"""
+        scheduler = FarmScheduler(self.launch_farm_process, self.thread_count, FARM_RETRIES)
+        previous_merge = []
+        for stage, title in stages:
+            scheduler.stage_titles[stage] = title
+            slices = [
+                scheduler.add(
+                    stage,
+                    f"faux_farm_{stage} {thread_index}",
                     [
                         "faux_farm_" + stage,
                         self.blob_dir,
                         str(thread_index),
                         str(self.thread_count),
                     ],
-                    True,
-                    log_file=log,
-                    force_tool_fast=True)
-            print(f"--- Spawned Process {thread_index}")
-            return (p, log_filename)
+                    os.path.join(self.blob_dir, "logs", stage, f"{thread_index}.txt"),
+                    previous_merge,
+                )
+                for thread_index in range(self.thread_count)
+            ]
+            merge_stage = "faux_farm_" + stage + "_merge"
+            previous_merge = [
+                scheduler.add(
+                    merge_stage,
+                    merge_stage,
+                    [
+                        merge_stage,
+                        self.blob_dir,
+                        str(self.thread_count),
+                    ],
+                    dependencies=slices,
+                    retries=0,
+                )
+            ]
 
-    def farm(self, stage):
-        # self.print_exec_time()
-        processes = [
-            self.threads(stage, thread_index)
-            for thread_index in range(self.thread_count)
-        ]
-        print("--- Waiting for processes to complete")
-        for idx, (p, log_filename) in enumerate(processes):
-            returncode = p.wait()
-            if returncode != 0:
-                for remaining_process, _remaining_log in processes[idx + 1:]:
-                    try:
-                        if remaining_process.poll() is None:
-                            remaining_process.kill()
-                            remaining_process.wait()
-                    except Exception:
-                        pass
-                self.abort_tool_error(stage, returncode=returncode, log_filename=log_filename)
-                return False
+        try:
+            failed_task = scheduler.run()
+        except OSError:
+            self.lightmap_failed = True
+            self.show_crash_report = False
+            self.lightmap_message = "Lightmapping aborted: Failed to start Tool"
+            return False
 
-        if not self.run_tool_or_abort(
-            [
-                "faux_farm_" + stage + "_merge",
-                self.blob_dir,
-                str(self.thread_count),
-            ],
-            "faux_farm_" + stage + "_merge",
-            force_tool_fast=True,
-        ):
+        if scheduler.cancelled:
+            self.lightmap_failed = True
+            self.show_crash_report = False
+            self.lightmap_message = "Lightmapping cancelled"
+            return False
+
+        if failed_task is not None:
+            self.abort_tool_error(failed_task.stage, returncode=failed_task.returncode, log_filename=failed_task.log_filename)
             return False
 
         return True
@@ -302,29 +316,14 @@ class LightMapper:
         ):
             return self
 
-        print("\nDirect Illumination")
-        print(
-            "-------------------------------------------------------------------------\n"
-        )
-        if not self.farm("dillum"):
-            return self
-        print("\nCasting Photons")
-        print(
-            "-------------------------------------------------------------------------\n"
-        )
-        if not self.farm("pcast"):
-            return self
-        print("\nExtended Illumination")
-        print(
-            "-------------------------------------------------------------------------\n"
-        )
-        if not self.farm("radest_extillum"):
-            return self 
-        print("\nFinal Gather")
-        print(
-            "-------------------------------------------------------------------------\n"
-        )
-        if not self.farm("fgather"):
+        if not self.farm(
+            [
+                ("dillum", "Direct Illumination"),
+                ("pcast", "Casting Photons"),
+                ("radest_extillum", "Extended Illumination"),
+                ("fgather", "Final Gather"),
+            ]
+        ):
             return self
 
         print("\nFaux Farm Process Finalise")
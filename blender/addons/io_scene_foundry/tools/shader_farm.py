@@ -1,17 +1,16 @@
-import itertools
 import multiprocessing
 import os
 from pathlib import Path
-import threading
 import time
 import bpy
 
 from .. import utils
 
 from ..icons import get_icon_id
-from ..managed_blam.bitmap import BitmapTag
+from ..managed_blam.bitmap import BitmapTag, file_digest
 from ..tools.export_bitmaps import save_image_as
 from ..tools.shader_builder import build_shader
+from .farm_scheduler import FarmScheduler
 
 BLENDER_IMAGE_FORMATS = (".bmp", ".sgi", ".rgb", ".bw", ".png", ".jpg", ".jpeg", ".jp2", ".j2c", ".tga", ".cin", ".dpx", ".exr", ".hdr", ".tif", ".tiff", ".webp")
 
@@ -105,9 +104,7 @@ class NWO_FarmShaders(bpy.types.Operator):
     def execute(self, context):
         with utils.ExportManager():
             self.corinth = utils.is_corinth(context)
-            self.thread_max = multiprocessing.cpu_count()
-            self.running_check = 0
-            self.bitmap_processes = 0
+            self.skipped_bitmaps = 0
             self.exported_bitmaps = []
             shaders = {}
             shaders['new'] = []
@@ -196,24 +193,32 @@ class NWO_FarmShaders(bpy.types.Operator):
                 bitmap_count = len(valid_bitmaps)
                 print(f"{bitmap_count} bitmaps in scope")
                 print(f"Bitmaps Directory = {utils.relative_path(self.bitmaps_data_dir)}\n")
-                for idx, bitmap in enumerate(valid_bitmaps):
-                    tiff_path = self.export_tiff_if_needed(bitmap)
-                    if tiff_path:
-                        self.thread_bitmap_export(bitmap)
+                # Tool reimports run in the background while the remaining bitmap tags are prepared, and all of them
+                # finish before any shader is built since shaders read the bitmap tags they reference
+                self.bitmap_farm = FarmScheduler(self.launch_bitmap_import, multiprocessing.cpu_count(), stop_on_failure=False)
+                try:
+                    for bitmap in valid_bitmaps:
+                        tiff_path = self.export_tiff_if_needed(bitmap)
+                        if tiff_path:
+                            self.queue_bitmap_import(bitmap)
+                        self.bitmap_farm.step()
+                except KeyboardInterrupt:
+                    self.bitmap_farm.cancel()
+
+                self.bitmap_farm.run()
+                if self.bitmap_farm.cancelled:
+                    self.report({'WARNING'}, "Farm cancelled")
+                    return {'CANCELLED'}
+                for failed in self.bitmap_farm.failures:
+                    utils.print_warning(f"Failed to reimport {failed.name}, Tool exited with code {failed.returncode}")
+
+                imported = self.bitmap_farm.completed
+                elapsed = self.bitmap_farm.elapsed
+                print(f"\nReimported {imported} bitmaps in {round(elapsed, 3)} seconds" + (f" ({imported / elapsed:.2f} per second)" if elapsed > 0 else ""))
+                if self.skipped_bitmaps:
+                    print(f"Skipped {self.skipped_bitmaps} bitmaps already up to date")
                 self.report({'INFO'}, f"Exported {bitmap_count} Bitmaps")
 
-                # Wait for Bitmap export to finish
-                print("")
-                job = "Reimporting Source Tiffs"
-                spinner = itertools.cycle(["|", "/", "—", "\\"])
-                total_p = self.bitmap_processes
-                while self.running_check:
-                    utils.update_job_count(
-                        job, next(spinner), total_p - self.running_check, total_p
-                    )
-                    time.sleep(0.1)
-                utils.update_job_count(job, "", total_p, total_p)
-
             if self.farm_type == "both" or self.farm_type == "shaders":
                 print(f"\nStarting {tag_type}s Export")
                 print(
@@ -283,7 +288,7 @@ class NWO_FarmShaders(bpy.types.Operator):
                 
         return image.nwo.filepath
     
-    def thread_bitmap_export(self, image):
+    def queue_bitmap_import(self, image):
         user_path = image.filepath_from_user()
         if user_path and Path(user_path).is_relative_to(Path(self.data_dir)):
             bitmap_path = str(Path(user_path).relative_to(Path(self.data_dir)).with_suffix('.bitmap'))
@@ -302,27 +307,32 @@ class NWO_FarmShaders(bpy.types.Operator):
         if not bitmap_path or bitmap_path not in self.exported_bitmaps:
             path_no_ext = str(Path(image.nwo.filepath).with_suffix(""))
             bitmap_path = path_no_ext + '.bitmap'
+            source_path = Path(self.data_dir, image.nwo.filepath)
+            source_digest = file_digest(source_path) if source_path.exists() else None
             with BitmapTag(path=bitmap_path) as bitmap:
+                usage_signature = bitmap.usage_signature()
                 bitmap.new_bitmap(utils.dot_partition(image.nwo.source_name), image.nwo.bitmap_type, image.colorspace_settings.name)
+                up_to_date = (
+                    source_digest is not None
+                    and bitmap.has_bitmap_data()
+                    and bitmap.usage_signature() == usage_signature
+                    and bitmap.source_digest() == source_digest
+                )
+                if up_to_date:
+                    bitmap.tag_has_changes = False
                 
             self.exported_bitmaps.append(bitmap_path)
+            if up_to_date:
+                self.skipped_bitmaps += 1
+                print(f"-- Up to date: {bitmap_path}")
+                return
+
             print(f"{job} {bitmap_path}")
-            while self.running_check > self.thread_max * 2:
-                time.sleep(0.1)
-
-            thread = threading.Thread(target=self.export_bitmap, args=(path_no_ext,))
-            thread.start()
-            self.first_bitmap = False
-
-    def export_bitmap(self, bitmap_path):
-        self.running_check += 1
-        self.bitmap_processes += 1
-        time.sleep(self.running_check / 10)
-        if self.corinth:
-            utils.run_tool(["reimport-bitmaps-single", bitmap_path, "default"], False, True)
-        else:
-            utils.run_tool(["reimport-bitmaps-single", bitmap_path], False, True)
-        self.running_check -= 1
+            tool_args = ["reimport-bitmaps-single", path_no_ext, "default"] if self.corinth else ["reimport-bitmaps-single", path_no_ext]
+            self.bitmap_farm.add("bitmaps", path_no_ext, tool_args)
+
+    def launch_bitmap_import(self, tool_args, log_file):
+        return utils.run_tool(tool_args, True, True)
         
     def draw(self, context):
         layout = self.layout
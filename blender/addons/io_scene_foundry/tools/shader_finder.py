@@ -9,6 +9,10 @@ from ..utils import (
     relative_path,
     shader_exts,
 )
+from .tag_index import get_tag_index
+
+# Shader name indexes keyed by tags directory and search directory, along with the tag index generation they were built from
+_shader_indexes: dict[tuple[str, str], tuple[int, dict[str, list[str]]]] = {}
 
 class NWO_ShaderFinder_Find(bpy.types.Operator):
     bl_idname = "nwo.shader_finder"
@@ -88,9 +92,45 @@ def scan_tree(shaders_dir, shaders):
     return shaders
 
 
+def _name_index(shader_paths) -> dict[str, list[str]]:
+    index = {}
+    for path in sorted(shader_paths):
+        index.setdefault(dot_partition(os.path.basename(path)).lower(), []).append(path)
+    return index
+
+
+def shader_name_index(tags_path: str, shaders_dir: str) -> dict[str, list[str]]:
+    """Returns the full paths of the shaders under shaders_dir keyed by their lowercase name without extension. Shaders
+    are listed from the tag index, and the name index is rebuilt only when the tag index has seen the tags directory
+    change. Directories outside of the tags directory are walked on every call"""
+    try:
+        relative_dir = os.path.relpath(shaders_dir, tags_path)
+    except ValueError:
+        # On Windows relpath raises when the two paths are on different drives
+        relative_dir = None
+    if relative_dir is None or relative_dir == os.pardir or relative_dir.startswith(os.pardir + os.sep):
+        return _name_index(scan_tree(shaders_dir, set()))
+
+    tag_index = get_tag_index(tags_path, refresh=False)
+    tag_index.refresh()
+    key = os.path.normcase(tag_index.tags_dir), os.path.normcase(relative_dir)
+    cached = _shader_indexes.get(key)
+    if cached is not None and cached[0] == tag_index.generation:
+        return cached[1]
+
+    prefix = "" if relative_dir == os.curdir else os.path.normcase(relative_dir) + os.sep
+    shader_paths = [
+        os.path.join(tag_index.tags_dir, path)
+        for path in tag_index.files_with_extensions(shader_exts)
+        if os.path.normcase(path).startswith(prefix)
+    ]
+    index = _name_index(shader_paths)
+    _shader_indexes[key] = tag_index.generation, index
+    return index
+
+
 def find_shaders(materials_all, report=None, shaders_dir="", overwrite=False):
     materials = [mat for mat in materials_all if has_shader_path(mat)]
-    shaders = set()
     update_count = 0
     no_path_materials = []
     tags_path = get_tags_path()
@@ -102,9 +142,8 @@ def find_shaders(materials_all, report=None, shaders_dir="", overwrite=False):
 
     # verify that the path created actually exists
     shaders_dir = os.path.join(tags_path, shaders_dir)
-    shaders = set()
     if os.path.isdir(shaders_dir):
-        scan_tree(shaders_dir, shaders)
+        shaders = shader_name_index(tags_path, shaders_dir)
         # loop through mats, find a matching shader, and apply it if the shader path field is empty
         for mat in materials:
             no_path = not bool(mat.nwo.shader_path)
@@ -155,19 +194,18 @@ def find_shaders(materials_all, report=None, shaders_dir="", overwrite=False):
     return no_path_materials
 
 
-def find_shader_match(mat, shaders):
-    """Tries to find a shader match. Includes logic for filtering out legacy material name prefixes/suffixes"""
+def find_shader_match(mat, shaders: dict[str, list[str]]):
+    """Tries to find a shader match in a shader name index. Includes logic for filtering out legacy material name prefixes/suffixes"""
     name_lower = mat.name.lower()
     material_name = base_material_name(name_lower, True)
     parts = material_name.split()
     material_name_ignore_first_word = material_name
     if len(parts) > 1:
         material_name_ignore_first_word = ' '.join(parts[1:])
-    for s in shaders:
-        # get just the shader name
-        shader_name = dot_partition(os.path.basename(s)).lower()
-        # changing this to check 3 versions, to ensure the correct material is picked
-        if shader_name in (name_lower, dot_partition(name_lower), material_name, material_name_ignore_first_word):
-            return s
+    # changing this to check 3 versions, to ensure the correct material is picked
+    for name in (name_lower, dot_partition(name_lower), material_name, material_name_ignore_first_word):
+        paths = shaders.get(name)
+        if paths:
+            return paths[0]
 
     return ""
@@ -743,16 +743,23 @@ class NWO_OT_SkyGenerate(bpy.types.Operator):
         )
 
         mesh = bpy.data.meshes.new(SKY_GEN_DOME_OBJECT)
-        mesh.from_pydata(vertices, [], faces)
+        loops = faces.astype(np.int32).ravel()
+        mesh.vertices.add(len(vertices))
+        mesh.loops.add(len(loops))
+        mesh.polygons.add(len(faces))
+        mesh.vertices.foreach_set("co", vertices.astype(np.float32).ravel())
+        mesh.polygons.foreach_set("loop_start", np.arange(0, len(loops), 3, dtype=np.int32))
+        mesh.polygons.foreach_set("vertices", loops)
+        mesh.polygons.foreach_set("use_smooth", np.ones(len(faces), dtype=bool))
+        mesh.update(calc_edges=True)
 
         uv_layer = mesh.uv_layers.new(name="UVMap0", do_init=False)
-        for polygon in mesh.polygons:
-            for vertex_index, loop_index in zip(polygon.vertices, polygon.loop_indices):
-                uv_layer.data[loop_index].uv = texcoords[vertex_index]
-            polygon.use_smooth = True
+        loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vertices)
+        uv_layer.data.foreach_set("uv", texcoords[loop_vertices].astype(np.float32).ravel())
 
         color_attribute = _ensure_color_attribute(mesh, SKY_GEN_COLOR_ATTRIBUTE)
-        _apply_vertex_colors(color_attribute, np.asarray(colors, dtype=np.float32))
+        _apply_vertex_colors(color_attribute, colors)
 
         material = _ensure_dome_material()
         if mesh.materials:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import heapq
 import math
 
 import numpy as np
@@ -524,15 +525,44 @@ def _pixel_weights(width: int, height: int) -> np.ndarray:
     row_weights = np.sin(theta) * theta_step * phi_step
     return np.broadcast_to(row_weights[:, None], (height, width)).copy()
 
-def _build_light_box(colors: np.ndarray, directions: np.ndarray, weights: np.ndarray, x0: int, y0: int, w: int, h: int) -> LightBox:
-    region_colors = colors[y0 : y0 + h, x0 : x0 + w]
-    region_weights = weights[y0 : y0 + h, x0 : x0 + w]
-    center_direction = directions[y0 + h // 2, x0 + w // 2]
-    weight_sum = float(region_weights.sum())
+# Summed area table over the weight, weighted color and weighted luminance of every pixel, so that summing them over a
+# box costs four lookups regardless of the box size
+class _SkyImageTables:
+    def __init__(self, colors: np.ndarray, weights: np.ndarray):
+        height, width = weights.shape
+        values = np.empty((height, width, 5), dtype=np.float64)
+        values[..., 0] = weights
+        values[..., 1:4] = colors * weights[..., None]
+        values[..., 4] = linear_color_luminance(colors) * weights
+        self.table = np.zeros((height + 1, width + 1, 5), dtype=np.float64)
+        np.cumsum(values, axis=0, out=values)
+        np.cumsum(values, axis=1, out=self.table[1:, 1:])
+
+    def box_sums(self, x0: int, y0: int, w: int, h: int) -> np.ndarray:
+        table = self.table
+        return table[y0 + h, x0 + w] - table[y0, x0 + w] - table[y0 + h, x0] + table[y0, x0]
+
+    def luminance_cumsum_x(self, box: LightBox) -> np.ndarray:
+        luminance = self.table[..., 4]
+        columns = luminance[box.y0 + box.h, box.x0 : box.x0 + box.w + 1] - luminance[box.y0, box.x0 : box.x0 + box.w + 1]
+        return columns[1:] - columns[0]
+
+    def luminance_cumsum_y(self, box: LightBox) -> np.ndarray:
+        luminance = self.table[..., 4]
+        rows = luminance[box.y0 : box.y0 + box.h + 1, box.x0 + box.w] - luminance[box.y0 : box.y0 + box.h + 1, box.x0]
+        return rows[1:] - rows[0]
+
+
+def _build_light_box(colors: np.ndarray, directions: np.ndarray, weights: np.ndarray, tables: _SkyImageTables, x0: int, y0: int, w: int, h: int) -> LightBox:
+    sums = tables.box_sums(x0, y0, w, h)
+    weight_sum = float(sums[0])
     if weight_sum <= EPSILON:
         return LightBox(x0, y0, w, h, 0.0)
 
-    average_color = (region_colors * region_weights[..., None]).sum(axis=(0, 1)) / weight_sum
+    average_color = (sums[1:4] / weight_sum).astype(np.float32)
+    region_colors = colors[y0 : y0 + h, x0 : x0 + w]
+    region_weights = weights[y0 : y0 + h, x0 : x0 + w]
+    center_direction = directions[y0 + h // 2, x0 + w // 2]
     region_directions = directions[y0 : y0 + h, x0 : x0 + w]
     angle_diff = 1.0 - np.clip((region_directions * center_direction).sum(axis=-1), -1.0, 1.0)
     color_diff = np.abs(region_colors - average_color)
@@ -541,48 +571,42 @@ def _build_light_box(colors: np.ndarray, directions: np.ndarray, weights: np.nda
     return LightBox(x0, y0, w, h, error)
 
 
-def _split_light_box(box: LightBox, colors: np.ndarray, weights: np.ndarray) -> tuple[LightBox, LightBox]:
-    region_colors = colors[box.y0 : box.y0 + box.h, box.x0 : box.x0 + box.w]
-    region_weights = weights[box.y0 : box.y0 + box.h, box.x0 : box.x0 + box.w]
-    region_luminance = linear_color_luminance(region_colors) * region_weights
-    half_luminance = float(region_luminance.sum()) * 0.5
-
+def _split_light_box(box: LightBox, colors: np.ndarray, directions: np.ndarray, weights: np.ndarray, tables: _SkyImageTables) -> tuple[LightBox, LightBox]:
     if box.w > box.h:
-        cumulative = region_luminance.sum(axis=0).cumsum()
-        split_offset = int(np.searchsorted(cumulative, half_luminance, side="left"))
+        cumulative = tables.luminance_cumsum_x(box)
+        split_offset = int(np.searchsorted(cumulative, cumulative[-1] * 0.5, side="left"))
         split_offset = min(max(split_offset, 0), box.w - 2)
-        first = _build_light_box(colors, _DIRECTIONS_CACHE[(colors.shape[1], colors.shape[0])], weights, box.x0, box.y0, split_offset + 1, box.h)
-        second = _build_light_box(colors, _DIRECTIONS_CACHE[(colors.shape[1], colors.shape[0])], weights, box.x0 + split_offset + 1, box.y0, box.w - split_offset - 1, box.h)
+        first = _build_light_box(colors, directions, weights, tables, box.x0, box.y0, split_offset + 1, box.h)
+        second = _build_light_box(colors, directions, weights, tables, box.x0 + split_offset + 1, box.y0, box.w - split_offset - 1, box.h)
         return first, second
 
-    cumulative = region_luminance.sum(axis=1).cumsum()
-    split_offset = int(np.searchsorted(cumulative, half_luminance, side="left"))
+    cumulative = tables.luminance_cumsum_y(box)
+    split_offset = int(np.searchsorted(cumulative, cumulative[-1] * 0.5, side="left"))
     split_offset = min(max(split_offset, 0), box.h - 2)
-    first = _build_light_box(colors, _DIRECTIONS_CACHE[(colors.shape[1], colors.shape[0])], weights, box.x0, box.y0, box.w, split_offset + 1)
-    second = _build_light_box(colors, _DIRECTIONS_CACHE[(colors.shape[1], colors.shape[0])], weights, box.x0, box.y0 + split_offset + 1, box.w, box.h - split_offset - 1)
+    first = _build_light_box(colors, directions, weights, tables, box.x0, box.y0, box.w, split_offset + 1)
+    second = _build_light_box(colors, directions, weights, tables, box.x0, box.y0 + split_offset + 1, box.w, box.h - split_offset - 1)
     return first, second
 
 
-def _box_best_center(box: LightBox, colors: np.ndarray, directions: np.ndarray, weights: np.ndarray):
-    x_slice = slice(box.x0, box.x0 + box.w)
-    y_slice = slice(box.y0, box.y0 + box.h)
-    region_colors = colors[y_slice, x_slice]
-    region_weights = weights[y_slice, x_slice]
-    region_luminance = linear_color_luminance(region_colors)
-    average_color = (region_colors * region_weights[..., None]).sum(axis=(0, 1)) / max(float(region_weights.sum()), EPSILON)
-    luminance_weights = region_weights * region_luminance
-    luminance_sum = float(luminance_weights.sum())
+def _box_best_center(box: LightBox, colors: np.ndarray, directions: np.ndarray, weights: np.ndarray, tables: _SkyImageTables):
+    sums = tables.box_sums(box.x0, box.y0, box.w, box.h)
+    weight_sum = float(sums[0])
+    average_color = (sums[1:4] / max(weight_sum, EPSILON)).astype(np.float32)
 
-    if luminance_sum <= EPSILON:
+    if float(sums[4]) <= EPSILON:
         center_x = box.x0 + box.w // 2
         center_y = box.y0 + box.h // 2
     else:
+        x_slice = slice(box.x0, box.x0 + box.w)
+        y_slice = slice(box.y0, box.y0 + box.h)
+        luminance_weights = weights[y_slice, x_slice] * linear_color_luminance(colors[y_slice, x_slice])
+        luminance_sum = float(luminance_weights.sum())
         x_coords = np.arange(box.x0, box.x0 + box.w, dtype=np.float32)[None, :]
         y_coords = np.arange(box.y0, box.y0 + box.h, dtype=np.float32)[:, None]
         center_x = int(np.clip((x_coords * luminance_weights).sum() / luminance_sum, box.x0, box.x0 + box.w - 1))
         center_y = int(np.clip((y_coords * luminance_weights).sum() / luminance_sum, box.y0, box.y0 + box.h - 1))
 
-    return center_x, center_y, average_color, float(region_weights.sum()), directions[center_y, center_x]
+    return center_x, center_y, average_color, weight_sum, directions[center_y, center_x]
 
 
 _DIRECTIONS_CACHE: dict[tuple[int, int], np.ndarray] = {}
@@ -837,27 +861,34 @@ def generate_sky_lights(colors: np.ndarray, params: SkyAtmosphereParameters, lig
 
     actual_vertical_percentage = float(np.clip(vertical_fov / math.pi, 0.03, 1.0))
     initial_height = max(1, min(height, int(height * actual_vertical_percentage)))
-    boxes = [_build_light_box(colors, directions, weights, 0, 0, width, initial_height)]
-
-    while len(boxes) < max(light_count, 1):
-        worst_index = None
-        worst_error = -1.0
-        for index, box in enumerate(boxes):
-            if box.is_splitable() and box.mean_square_error > worst_error:
-                worst_error = box.mean_square_error
-                worst_index = index
-
-        if worst_index is None:
-            break
+    # Boxes never grow past the initial box, so the rows below it are never summed
+    tables = _SkyImageTables(colors[:initial_height], weights[:initial_height])
+    boxes = [_build_light_box(colors, directions, weights, tables, 0, 0, width, initial_height)]
+
+    # Max heap of splitable boxes keyed on error, ties going to the lowest index. A split replaces the box at its
+    # index, so entries whose box is no longer at that index are stale and skipped
+    heap = []
+
+    def push(index: int):
+        box = boxes[index]
+        if box.is_splitable():
+            heapq.heappush(heap, (-box.mean_square_error, index, box))
+
+    push(0)
+    while len(boxes) < max(light_count, 1) and heap:
+        _, index, box = heapq.heappop(heap)
+        if boxes[index] is not box:
+            continue
 
-        first, second = _split_light_box(boxes[worst_index], colors, weights)
-        boxes[worst_index] = first
+        first, second = _split_light_box(box, colors, directions, weights, tables)
+        boxes[index] = first
         boxes.append(second)
+        push(index)
+        push(len(boxes) - 1)
 
     result = []
     for box in boxes[:light_count]:
-        center_x, center_y, average_color, solid_angle, direction = _box_best_center(box, colors, directions, weights)
-        del center_x, center_y
+        _, _, average_color, solid_angle, direction = _box_best_center(box, colors, directions, weights, tables)
         light_color = average_color * params.sky_intensity
         result.append(
             SkyLightSample(
@@ -869,30 +900,29 @@ def generate_sky_lights(colors: np.ndarray, params: SkyAtmosphereParameters, lig
     return result
 
 
-def sample_sky_image(theta: float, phi: float, image: np.ndarray, sample_radius: int = 5) -> np.ndarray:
-    image = np.asarray(image, dtype=np.float32)
+def _sample_sky_image_pixels(theta: np.ndarray, phi: np.ndarray, image: np.ndarray, sample_radius: int) -> np.ndarray:
     height, width = image.shape[:2]
     phi_step = TWO_PI / max(width - 1, 1)
     # Treat imported sky maps as standard 360x180 lat-long images, where the
     # full image height spans zenith to nadir rather than only zenith to horizon.
     theta_step = math.pi / max(height - 1, 1)
-    phi = float(np.clip(phi, 0.0, TWO_PI))
-    theta = float(np.clip(theta, 0.0, math.pi))
-    center_x = int(phi / phi_step) if phi_step > EPSILON else 0
-    center_y = int(theta / theta_step) if theta_step > EPSILON else 0
+    phi = np.clip(np.asarray(phi, dtype=np.float64), 0.0, TWO_PI)
+    theta = np.clip(np.asarray(theta, dtype=np.float64), 0.0, math.pi)
+    center_x = (phi / phi_step).astype(np.int64) if phi_step > EPSILON else np.zeros(phi.shape, dtype=np.int64)
+    center_y = (theta / theta_step).astype(np.int64) if theta_step > EPSILON else np.zeros(theta.shape, dtype=np.int64)
 
-    sample_color = np.zeros(3, dtype=np.float32)
+    sample_color = np.zeros((*center_x.shape, 3), dtype=np.float32)
     sample_weight = 0.0
     for dx in range(-sample_radius, sample_radius + 1):
-        xx = min(max(center_x + dx, 0), width - 1)
+        xx = np.clip(center_x + dx, 0, width - 1)
         for dy in range(-sample_radius, sample_radius + 1):
-            yy = min(max(center_y + dy, 0), height - 1)
+            yy = np.clip(center_y + dy, 0, height - 1)
             weight = 1.0 / (dx * dx + dy * dy + 1.0)
             sample_color += image[yy, xx] * weight
             sample_weight += weight
 
     if sample_weight <= EPSILON:
-        return image[min(max(center_y, 0), height - 1), min(max(center_x, 0), width - 1)].copy()
+        return image[np.clip(center_y, 0, height - 1), np.clip(center_x, 0, width - 1)].copy()
     return sample_color / sample_weight
 
 
@@ -911,46 +941,33 @@ def build_sky_dome_data(
     phi_step = horizontal_fov / max(longitude_slices - 1, 1)
     radius = max(params.sky_dome_radius, EPSILON)
 
-    vertices = []
-    colors = []
-    texcoords = []
-    for latitude in range(latitude_slices):
-        theta = latitude * theta_step
-        for longitude in range(longitude_slices):
-            phi = longitude * phi_step
-            vertices.append(
-                (
-                    radius * math.sin(theta) * math.cos(phi),
-                    radius * math.sin(theta) * math.sin(phi),
-                    radius * math.cos(theta),
-                )
-            )
-            color = sample_sky_image(theta, phi, image) * (params.sky_intensity * params.exposure)
-            color = gamma_correct(color)
-            if clamp:
-                color = clamp_color(color)
-            colors.append(tuple(np.asarray(color, dtype=np.float32).tolist()))
-            u = 0.0 if horizontal_fov <= EPSILON else phi / horizontal_fov
-            v = 0.0 if vertical_fov <= EPSILON else 1.0 - theta / vertical_fov
-            texcoords.append((u, v))
-
-    faces = []
-    for latitude in range(latitude_slices - 1):
-        for longitude in range(longitude_slices - 1):
-            faces.append(
-                (
-                    latitude * longitude_slices + longitude,
-                    latitude * longitude_slices + longitude + 1,
-                    (latitude + 1) * longitude_slices + longitude,
-                )
-            )
-            faces.append(
-                (
-                    latitude * longitude_slices + longitude + 1,
-                    (latitude + 1) * longitude_slices + longitude + 1,
-                    (latitude + 1) * longitude_slices + longitude,
-                )
-            )
+    theta, phi = np.meshgrid(
+        np.arange(latitude_slices, dtype=np.float64) * theta_step,
+        np.arange(longitude_slices, dtype=np.float64) * phi_step,
+        indexing="ij",
+    )
+    theta = theta.ravel()
+    phi = phi.ravel()
+    sin_theta = np.sin(theta)
+    vertices = np.column_stack((radius * sin_theta * np.cos(phi), radius * sin_theta * np.sin(phi), radius * np.cos(theta)))
+
+    colors = _sample_sky_image_pixels(theta, phi, np.asarray(image, dtype=np.float32), 5) * (params.sky_intensity * params.exposure)
+    colors = gamma_correct(colors)
+    if clamp:
+        colors = clamp_color(colors)
+
+    u = np.zeros_like(phi) if horizontal_fov <= EPSILON else phi / horizontal_fov
+    v = np.zeros_like(theta) if vertical_fov <= EPSILON else 1.0 - theta / vertical_fov
+    texcoords = np.column_stack((u, v))
+
+    latitude, longitude = np.meshgrid(np.arange(latitude_slices - 1), np.arange(longitude_slices - 1), indexing="ij")
+    corner = (latitude * longitude_slices + longitude).ravel()
+    right = corner + 1
+    below = corner + longitude_slices
+    below_right = below + 1
+    faces = np.empty((len(corner) * 2, 3), dtype=np.int32)
+    faces[0::2] = np.column_stack((corner, right, below))
+    faces[1::2] = np.column_stack((right, below_right, below))
 
     return vertices, faces, colors, texcoords
 
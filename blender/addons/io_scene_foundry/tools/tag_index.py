@@ -0,0 +1,169 @@
+'''Persistent index of the files in a project's tags directory, used by the tag pickers and importers in place of walking
+the tags tree'''
+
+from collections import defaultdict
+import hashlib
+import os
+from pathlib import Path
+import sqlite3
+import time
+
+from .. import utils
+
+INDEX_VERSION = 1
+REFRESH_INTERVAL = 30.0
+
+_indexes: dict[str, 'TagIndex'] = {}
+
+def _normalize_extensions(extensions) -> tuple[str, ...]:
+    if isinstance(extensions, str):
+        extensions = (extensions,)
+    return tuple(ext if ext.startswith(".") else f".{ext}" for ext in extensions)
+
+def _index_db_path(tags_dir: str) -> Path | None:
+    appdata = os.getenv('APPDATA')
+    if not appdata:
+        return None
+    key = hashlib.blake2b(os.path.normcase(os.path.abspath(tags_dir)).encode(), digest_size=8).hexdigest()
+    return Path(appdata, "Foundry", "tag_index", f"{key}.db")
+
+class TagIndex:
+    '''Index of every file under a tags directory, keyed by extension and name. Lives in a sqlite database so that it
+    persists between sessions. refresh only lists directories whose modification time changed since the last scan, the
+    rest of the tree costs a single stat per directory'''
+    def __init__(self, tags_dir: str, db_path: Path | None = None):
+        self.tags_dir = os.path.normpath(tags_dir)
+        self.refreshed = None
+        # Incremented whenever a refresh finds changes, so callers can tell when their own caches are stale
+        self.generation = 0
+        self.connection = None
+        if db_path is not None:
+            try:
+                db_path.parent.mkdir(parents=True, exist_ok=True)
+                self.connection = sqlite3.connect(str(db_path), timeout=5, check_same_thread=False)
+                self._create_tables()
+            except (OSError, sqlite3.Error) as e:
+                utils.print_warning(f"Failed to open tag index {db_path}, falling back to an in memory index: {e}")
+                self.connection = None
+
+        if self.connection is None:
+            self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+            self._create_tables()
+
+    def _create_tables(self):
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+            if meta.get("version") != str(INDEX_VERSION) or meta.get("tags_dir", self.tags_dir) != self.tags_dir:
+                self.connection.execute("DROP TABLE IF EXISTS dirs")
+                self.connection.execute("DROP TABLE IF EXISTS files")
+
+            self.connection.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime INTEGER)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS files (dir TEXT, name TEXT, stem TEXT, ext TEXT, PRIMARY KEY (dir, name))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS files_ext ON files (ext)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS files_stem ON files (stem)")
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?), ('tags_dir', ?)", (str(INDEX_VERSION), self.tags_dir))
+
+    def refresh(self):
+        '''Brings the index up to date with the tags directory'''
+        known = dict(self.connection.execute("SELECT path, mtime FROM dirs"))
+        children = defaultdict(list)
+        for path, parent in self.connection.execute("SELECT path, parent FROM dirs"):
+            if parent is not None:
+                children[parent].append(path)
+
+        seen = set()
+        stack = [""]
+        changed = False
+        try:
+            with self.connection:
+                while stack:
+                    relative = stack.pop()
+                    full_path = os.path.join(self.tags_dir, relative)
+                    try:
+                        mtime = os.stat(full_path).st_mtime_ns
+                    except OSError:
+                        continue
+
+                    seen.add(relative)
+                    if known.get(relative) == mtime:
+                        stack.extend(children[relative])
+                        continue
+
+                    subdirs = []
+                    files = []
+                    try:
+                        with os.scandir(full_path) as entries:
+                            for entry in entries:
+                                if entry.is_dir():
+                                    subdirs.append(os.path.join(relative, entry.name))
+                                else:
+                                    stem, ext = os.path.splitext(entry.name)
+                                    files.append((relative, entry.name, stem, ext))
+                    except OSError:
+                        continue
+
+                    changed = True
+                    self.connection.execute("DELETE FROM files WHERE dir = ?", (relative,))
+                    self.connection.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", files)
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)",
+                        (relative, os.path.dirname(relative) if relative else None, mtime),
+                    )
+                    stack.extend(subdirs)
+
+                removed = [(path,) for path in known if path not in seen]
+                self.connection.executemany("DELETE FROM dirs WHERE path = ?", removed)
+                self.connection.executemany("DELETE FROM files WHERE dir = ?", removed)
+                changed = changed or bool(removed)
+        except sqlite3.Error as e:
+            utils.print_warning(f"Failed to update tag index: {e}")
+            changed = True
+
+        if changed or self.refreshed is None:
+            self.generation += 1
+        self.refreshed = time.monotonic()
+
+    def files_with_extensions(self, extensions) -> list[str]:
+        '''Returns the tags relative paths of all files with one of the given extensions'''
+        extensions = _normalize_extensions(extensions)
+        if not extensions:
+            return []
+        rows = self.connection.execute(
+            f"SELECT dir, name FROM files WHERE ext IN ({', '.join('?' * len(extensions))})", extensions
+        )
+        return [os.path.join(directory, name) for directory, name in rows]
+
+    def paths_by_name(self, name: str) -> list[Path]:
+        '''Returns the full paths, without extension, of every file whose name minus its extension matches the given name'''
+        rows = self.connection.execute("SELECT DISTINCT dir FROM files WHERE stem = ?", (name,))
+        return [Path(self.tags_dir, directory, name) for directory, in rows]
+
+    def contains(self, relative_path: str) -> bool:
+        directory, name = os.path.split(os.path.normpath(relative_path))
+        return self.connection.execute("SELECT 1 FROM files WHERE dir = ? AND name = ?", (directory, name)).fetchone() is not None
+
+def get_tag_index(tags_dir: str = "", refresh: bool = True) -> TagIndex:
+    '''Returns the tag index for the given tags directory, or the current project's tags directory if none is given.
+    The index is refreshed at most every REFRESH_INTERVAL seconds unless refresh is False'''
+    tags_dir = os.path.normpath(tags_dir or utils.get_tags_path())
+    key = os.path.normcase(tags_dir)
+    index = _indexes.get(key)
+    if index is None:
+        index = TagIndex(tags_dir, _index_db_path(tags_dir))
+        _indexes[key] = index
+    if refresh and (index.refreshed is None or time.monotonic() - index.refreshed > REFRESH_INTERVAL):
+        index.refresh()
+
+    return index
+
+def tag_exists(tag_path: str) -> bool:
+    '''Checks whether a tag exists. This is a single stat of the tag file. The index is not consulted, since a stale index
+    would still need each hit confirmed on disk'''
+    tags_dir = utils.get_tags_path()
+    if not tag_path or not Path(tags_dir).is_absolute():
+        return False
+    relative = utils.relative_path(tag_path)
+    if Path(relative).is_absolute():
+        return os.path.isfile(relative)
+    return os.path.isfile(os.path.join(tags_dir, relative))
@@ -496,6 +496,7 @@ class NWO_HaloExportSettings(bpy.types.Panel):
         col.prop(scene_nwo_export, "show_output", text="Toggle Output")
         if asset_type in {'cinematic', 'model', 'animation'}:
             col.prop(scene_nwo_export, "faster_animation_export")
+        col.prop(scene_nwo_export, "granny_parallel_write")
         col.separator()
         col = flow.column()
         col.use_property_split = False
@@ -808,6 +809,13 @@ class NWO_HaloExportPropertiesGroup(bpy.types.PropertyGroup):
         options=set(),
     )
     
+    granny_parallel_write: bpy.props.BoolProperty(
+        name="Background GR2 Write",
+        description="Transforms and writes each GR2 file on a background thread while the next file is built, rather than one after another. Calls into the Granny DLL still run one at a time, so this only overlaps a single write with building the next file",
+        default=False,
+        options=set(),
+    )
+    
     cinematic_scope: bpy.props.EnumProperty(
         name="Cinematic Scope",
         description="Whether to export object animation or camera animation, or both",
@@ -1259,7 +1267,7 @@ class NWO_HaloExportPropertiesGroup(bpy.types.PropertyGroup):
 
     import_force: bpy.props.BoolProperty(
         name="Force",
-        description="Force all files to import even if they haven't changed",
+        description="Force all GR2 files to be rewritten and imported even if they haven't changed",
         default=False,
         options=set(),
     )